@@ -1,10 +1,11 @@
 import json
 import logging
 import time
-from typing import List, Dict, Tuple, Optional, Any, Union, Iterable, Generator
+from typing import List, Dict, Tuple, Optional, Any, Union, Iterable, AsyncIterator
 
-import requests
+import httpx
 
+from .async_http import call_sync, open_stream
 from .interfaces import ProviderClient, LLMResponseError, LLMConnectionError
 
 log = logging.getLogger(__name__)
@@ -58,11 +59,10 @@ class GeminiClient(ProviderClient):
             raise ValueError("Для GeminiClient требуется api_key.")
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             "Content-Type": "application/json",
             "x-goog-api-key": api_key  # Gemini использует этот заголовок
-        })
+        }
         log.info("GeminiClient инициализирован с base_url: %s", self.base_url)
 
     def _translate_messages_to_gemini(self, messages: List[Dict[str, str]]) -> Tuple[List[Dict], Optional[Dict]]:
@@ -128,6 +128,12 @@ class GeminiClient(ProviderClient):
         return payload
 
     def send_request(self, payload: Dict[str, Any]) -> Union[Dict[str, Any], Iterable[Dict[str, Any]]]:
+        """Синхронная обёртка над send_request_async."""
+        return call_sync(self.send_request_async(payload))
+
+    async def send_request_async(
+            self, payload: Dict[str, Any]
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
         """Отправляет запрос к Gemini API."""
         model_name = payload.pop("_model_name")
         is_stream = payload.pop("_stream_mode", False)
@@ -141,38 +147,49 @@ class GeminiClient(ProviderClient):
         log.debug("Gemini payload: %s", json.dumps(payload, indent=2, ensure_ascii=False))
 
         try:
-            resp = self.session.post(
+            resp = await open_stream(
+                "POST",
                 endpoint,
                 json=payload,
-                stream=is_stream,
+                headers=self.headers,
                 timeout=timeout,
                 params={"key": self.api_key}
             )
-            resp.raise_for_status()
+            if resp.is_error:
+                body = await resp.aread()
+                await resp.aclose()
+                self._raise_api_error(resp, body)
 
             log.info("Запрос к Gemini успешно выполнен.")
 
             if is_stream:
-                return self._handle_stream(resp)
-            else:
-                return resp.json()
-
-        except requests.exceptions.RequestException as e:
-            log.error("Сетевая ошибка при запросе к Gemini API: %s", e)
-
-            # Попытка извлечь детали ошибки
+                return self._iter_stream(resp)
             try:
-                if hasattr(e, 'response') and e.response:
-                    error_details = e.response.json()
-                    log.error("Детали ошибки от Gemini API: %s", error_details)
-
-                    # Извлекаем человекочитаемое сообщение об ошибке
-                    error_message = error_details.get('error', {}).get('message', str(e))
-                    raise LLMResponseError(f"Gemini API error: {error_message}") from e
-            except (ValueError, json.JSONDecodeError):
-                pass
+                body = await resp.aread()
+            finally:
+                await resp.aclose()
+            return json.loads(body)
 
+        except httpx.HTTPError as e:
+            log.error("Сетевая ошибка при запросе к Gemini API: %s", e)
             raise LLMConnectionError(f"Сетевая ошибка при запросе к Gemini: {e}") from e
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(f"Ошибка декодирования JSON из ответа Gemini: {e}") from e
+
+    @staticmethod
+    def _raise_api_error(resp: httpx.Response, body: bytes) -> None:
+        """Превращает HTTP-ошибку Gemini в исключение с человекочитаемым сообщением."""
+        log.error("Ошибка HTTP %d от Gemini API", resp.status_code)
+        try:
+            error_details = json.loads(body)
+            log.error("Детали ошибки от Gemini API: %s", error_details)
+            # Извлекаем человекочитаемое сообщение об ошибке
+            error_message = error_details.get('error', {}).get('message', f"HTTP {resp.status_code}")
+        except (ValueError, AttributeError):
+            raise LLMConnectionError(
+                f"Сетевая ошибка при запросе к Gemini: HTTP {resp.status_code}"
+            )
+        raise LLMResponseError(f"Gemini API error: {error_message}")
 
     def extract_choices(self, response: Union[Dict[str, Any], List[Any]]) -> List[Dict[str, Any]]:
         """Извлекает варианты ответов из ответа Gemini с поддержкой разных форматов."""
@@ -255,7 +272,7 @@ class GeminiClient(ProviderClient):
 
         return None
 
-    def _handle_stream(self, response: requests.Response) -> Generator[Dict[str, Any], None, None]:
+    async def _iter_stream(self, response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
         """Оптимизированная обработка потокового ответа."""
         log.info("🔍 GEMINI: Начало обработки потокового ответа")
 
@@ -264,7 +281,7 @@ class GeminiClient(ProviderClient):
         start_time = time.time()
 
         try:
-            for line in response.iter_lines(decode_unicode=True):
+            async for line in response.aiter_lines():
                 if not line:
                     continue
 
@@ -313,9 +330,14 @@ class GeminiClient(ProviderClient):
                         buffer = ""
                     continue
 
+        except httpx.HTTPError as e:
+            log.error("💥 STREAM ERROR: %s", e, exc_info=True)
+            raise LLMResponseError(f"Ошибка при чтении потокового ответа Gemini: {e}") from e
         except Exception as e:
             log.error("💥 STREAM ERROR: %s", e, exc_info=True)
             raise
+        finally:
+            await response.aclose()
 
         duration = time.time() - start_time
         log.info("✅ GEMINI: Завершена обработка потока (%d чанков за %.2f сек)",
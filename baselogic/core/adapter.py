@@ -1,10 +1,10 @@
 import logging
-import re
 import time
-from typing import Dict, Any, Generator, Optional, List
+from typing import Dict, Any, AsyncIterator, Generator, Optional, List
 
-from .interfaces import ILLMClient, LLMClientError
+from .interfaces import ILLMClient, LLMCacheMissError, LLMClientError
 from .llm_client import LLMClient
+from .response_parser import parse_response
 
 log = logging.getLogger(__name__)
 llm_logger = logging.getLogger('LLM_Interactions')
@@ -21,6 +21,13 @@ class AdapterLLMClient(ILLMClient):
         self.new_client = new_llm_client
         self.model_config = model_config
         self.query_timeout = int(model_config.get('options', {}).get('query_timeout', 600))
+        # При параллельных запросах потоки из нескольких стримов перемешались бы
+        # в stdout, поэтому посимвольный вывод оставляем только для одного потока.
+        try:
+            max_concurrency = int(model_config.get('inference', {}).get('max_concurrency', 1))
+        except (TypeError, ValueError):
+            max_concurrency = 1
+        self.echo_stream = max_concurrency <= 1
 
     def get_model_name(self) -> str:
         return self.new_client.model
@@ -28,46 +35,24 @@ class AdapterLLMClient(ILLMClient):
     def get_model_info(self) -> Dict[str, Any]:
         return {"model_name": self.new_client.model, "provider": self.new_client.provider.__class__.__name__}
 
-    def _parse_think_response(self, raw_response: str) -> Dict[str, Any]:
-        # Парсим <think> блоки
-        think_pattern = re.compile(r"<think>(.*?)</think>", re.DOTALL | re.IGNORECASE)
-        think_match = think_pattern.search(raw_response)
-
-        thinking_response = ""
-        if think_match:
-            thinking_response = think_match.group(1).strip()
-
-        # Удаляем <think> блоки из ответа
-        llm_response = think_pattern.sub("", raw_response).strip()
-
-        # Парсим <response> блоки
-        response_pattern = re.compile(r"<response>(.*?)</response>", re.DOTALL | re.IGNORECASE)
-        response_match = response_pattern.search(llm_response)
-
-        if response_match:
-            # Если есть <response>, используем только его содержимое
-            llm_response = response_match.group(1).strip()
-        else:
-            # Иначе очищаем от служебных токенов
-            llm_response = self._cleanup_raw_response(llm_response)
-
-        return {"thinking_response": thinking_response, "llm_response": llm_response}
-
-    def _cleanup_raw_response(self, text: str) -> str:
-        """Очищает ответ от служебных токенов и мусора."""
-        if not text:
-            return ""
-
-        # Удаляем завершающие токены
-        stop_tokens = [r"</s>", r"<\|eot_id\|>", r"<\|endoftext\|>"]
-        for token in stop_tokens:
-            text = re.sub(token + r".*$", "", text, flags=re.DOTALL)
+    def warm_up(self) -> Dict[str, Any]:
+        try:
+            return self.new_client.warm_up()
+        except LLMClientError as e:
+            # Неудачный прогрев не мешает тестам: модель загрузится первым запросом
+            log.warning("Не удалось прогреть модель '%s': %s", self.new_client.model, e)
+            return {}
 
-        # Удаляем повторяющееся содержимое после основного ответа
-        # Ищем паттерн типа "», Поскольку в тексте указано:"
-        text = re.sub(r"»\s*,\s*.*$", "", text, flags=re.DOTALL)
+    def unload(self) -> None:
+        try:
+            self.new_client.unload()
+        except LLMClientError as e:
+            log.warning("Не удалось выгрузить модель '%s': %s", self.new_client.model, e)
 
-        return text.strip()
+    def _parse_think_response(self, raw_response: str) -> Dict[str, Any]:
+        """Отделяет рассуждения (<think>) от ответа; ответ — содержимое <response> или очищенный текст."""
+        parsed = parse_response(raw_response)
+        return {"thinking_response": parsed.thinking, "llm_response": parsed.llm_response}
 
     # Сначала определим эвристическую функцию. Ее можно сделать статическим методом.
     @staticmethod
@@ -83,48 +68,69 @@ class AdapterLLMClient(ILLMClient):
             # Не логируем здесь, чтобы не спамить, если токенизатор не настроен
             return self._estimate_tokens_heuristic(text)
 
-    def _handle_stream_response(self, response_generator: Generator) -> tuple[str, dict, float | None, float]:
-        """Обрабатывает потоковый ответ, собирает текст и метаданные."""
+    def _start_stream(self) -> Dict[str, Any]:
+        """Создаёт состояние сборки потокового ответа."""
         log.info("Начало получения потокового ответа...")
-
-        start_time = time.perf_counter()
-        start_time_formatted = time.strftime("%H:%M:%S", time.localtime())
-        print(f">>> LLM Stream [{start_time_formatted}]: ", end="", flush=True)
-
-        chunks_text = []
-        server_metadata = {}
-        ttft_time: float | None = None
-        first_chunk = True
-
-        for chunk_dict in response_generator:
-            if first_chunk:
-                ttft_time = time.perf_counter()
-                first_chunk = False
-
-            delta = self.new_client.provider.extract_delta_from_chunk(chunk_dict)
-            if delta:
+        if self.echo_stream:
+            start_time_formatted = time.strftime("%H:%M:%S", time.localtime())
+            print(f">>> LLM Stream [{start_time_formatted}]: ", end="", flush=True)
+        return {"chunks_text": [], "server_metadata": {}, "ttft_time": None}
+
+    def _consume_stream_chunk(self, state: Dict[str, Any], chunk_dict: Dict[str, Any]) -> bool:
+        """Обрабатывает один чанк. Возвращает True, если стрим пора завершить."""
+        if state["ttft_time"] is None:
+            state["ttft_time"] = time.perf_counter()
+
+        delta = self.new_client.provider.extract_delta_from_chunk(chunk_dict)
+        if delta:
+            if self.echo_stream:
                 print(delta, end="", flush=True)
-                chunks_text.append(delta)
+            state["chunks_text"].append(delta)
 
-            # Проверяем метаданные и условия завершения
-            chunk_metadata = self.new_client.provider.extract_metadata_from_chunk(chunk_dict)
-            if chunk_metadata:
-                server_metadata.update(chunk_metadata)
+        # Проверяем метаданные и условия завершения
+        chunk_metadata = self.new_client.provider.extract_metadata_from_chunk(chunk_dict)
+        if chunk_metadata:
+            state["server_metadata"].update(chunk_metadata)
 
-            # Проверяем finish_reason для раннего завершения
-            choices = chunk_dict.get("choices", [])
-            if choices and choices[0].get("finish_reason") in ["stop", "length", "content_filter"]:
-                log.info("Стрим завершен по finish_reason: %s", choices[0].get("finish_reason"))
-                break
+        # Проверяем finish_reason для раннего завершения
+        choices = chunk_dict.get("choices", [])
+        if choices and choices[0].get("finish_reason") in ["stop", "length", "content_filter"]:
+            log.info("Стрим завершен по finish_reason: %s", choices[0].get("finish_reason"))
+            return True
+        return False
 
+    def _finish_stream(self, state: Dict[str, Any]) -> tuple[str, dict, float | None, float]:
         end_time = time.perf_counter()
-        print()  # Переход на новую строку
+        if self.echo_stream:
+            print()  # Переход на новую строку
 
-        final_response_str = "".join(chunks_text)
+        final_response_str = "".join(state["chunks_text"])
         log.info("Потоковый ответ полностью получен (длина: %d символов).", len(final_response_str))
         llm_logger.info("LLM Stream Response: %s", final_response_str)
 
-        return final_response_str, server_metadata, ttft_time, end_time
+        return final_response_str, state["server_metadata"], state["ttft_time"], end_time
+
+    def _handle_stream_response(self, response_generator: Generator) -> tuple[str, dict, float | None, float]:
+        """Обрабатывает потоковый ответ, собирает текст и метаданные."""
+        state = self._start_stream()
+        for chunk_dict in response_generator:
+            if self._consume_stream_chunk(state, chunk_dict):
+                response_generator.close()
+                break
+        return self._finish_stream(state)
+
+    async def _handle_stream_response_async(
+            self, response_iterator: AsyncIterator[Dict[str, Any]]
+    ) -> tuple[str, dict, float | None, float]:
+        """Асинхронная версия _handle_stream_response."""
+        state = self._start_stream()
+        async for chunk_dict in response_iterator:
+            if self._consume_stream_chunk(state, chunk_dict):
+                # Досрочный выход — закрываем поток, чтобы освободить соединение
+                if hasattr(response_iterator, "aclose"):
+                    await response_iterator.aclose()
+                break
+        return self._finish_stream(state)
 
     def _handle_non_stream_response(self, response_dict: dict) -> tuple[str, dict, float, float]:
         """Обрабатывает непотоковый (полный) ответ."""
@@ -172,9 +178,16 @@ class AdapterLLMClient(ILLMClient):
         total_latency_ms = (end_time - start_time) * 1000
         final_metrics['total_latency_ms'] = total_latency_ms
         if ttft_time:
-            final_metrics['time_to_first_token_ms'] = round((ttft_time - start_time) * 1000, 2)
+            ttft_ms = (ttft_time - start_time) * 1000
         else:
-            final_metrics['time_to_first_token_ms'] = round(total_latency_ms, 2)
+            ttft_ms = total_latency_ms
+
+        # Загрузка модели сервером — не часть ответа: выносим её из TTFT отдельно
+        load_ms = (final_metrics.get('load_duration') or 0) / 1e6
+        if load_ms > 0:
+            final_metrics['model_load_ms'] = round(load_ms, 2)
+            ttft_ms = max(ttft_ms - load_ms, 0.0)
+        final_metrics['time_to_first_token_ms'] = round(ttft_ms, 2)
 
         return {k: v for k, v in final_metrics.items() if v is not None}
 
@@ -192,7 +205,10 @@ class AdapterLLMClient(ILLMClient):
             }
         }
 
-    def query(self, user_prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    def _prepare_query(
+            self, user_prompt: str, system_prompt: Optional[str]
+    ) -> tuple[List[Dict[str, str]], int, bool, Dict[str, Any]]:
+        """Формирует сообщения и опции запроса (общая часть query/query_async)."""
         log.info("Adapter получил промпт (длина: %d символов).", len(user_prompt))
         messages: List[Dict[str, str]] = []
 
@@ -219,37 +235,95 @@ class AdapterLLMClient(ILLMClient):
         inference_opts = self.model_config.get('inference', {})
         use_stream = str(inference_opts.get('stream', 'false')).lower() == 'true'
         generation_opts = self.model_config.get('generation', {})
-
+        return messages, prompt_token_count, use_stream, generation_opts
+
+    def _finalize_query(self, handled: tuple, prompt_token_count: int, start_time: float) -> Dict[str, Any]:
+        final_response_str, server_metadata, ttft_time, end_time = handled
+        cache_timings = self.new_client.last_cache_hit_timings()
+        if cache_timings and 'total_latency_ms' in cache_timings:
+            # Ответ из кэша: клиентские метрики строятся по таймингам исходного
+            # запроса, а не по времени чтения с диска
+            start_time = end_time - cache_timings['total_latency_ms'] / 1000
+            ttft_ms = cache_timings.get('time_to_first_token_ms')
+            ttft_time = end_time if ttft_ms is None else start_time + ttft_ms / 1000
+        final_metrics = self._build_final_metrics(
+            server_metadata=server_metadata,
+            prompt_token_count=prompt_token_count,
+            final_response_str=final_response_str,
+            start_time=start_time,
+            ttft_time=ttft_time,
+            end_time=end_time
+        )
+
+        final_metrics['response_cache_hit'] = cache_timings is not None
+        if cache_timings is not None and 'total_latency_ms' not in cache_timings:
+            # Старая запись кэша без таймингов: задержку не выдумываем, в агрегаты она не попадёт
+            final_metrics.pop('total_latency_ms', None)
+            final_metrics.pop('time_to_first_token_ms', None)
+
+        parsed_struct = self._parse_think_response(final_response_str)
+        parsed_struct['performance_metrics'] = final_metrics
+        return parsed_struct
+
+    def query(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            *,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        messages, prompt_token_count, use_stream, generation_opts = self._prepare_query(user_prompt, system_prompt)
         start_time = time.perf_counter()
 
         try:
             response_or_stream = self.new_client.chat(
-                messages, stream=use_stream, **generation_opts
+                messages, stream=use_stream, use_cache=use_cache, **generation_opts
             )
 
             if use_stream and isinstance(response_or_stream, Generator):
-                final_response_str, server_metadata, ttft_time, end_time = self._handle_stream_response(
-                    response_or_stream)
+                handled = self._handle_stream_response(response_or_stream)
             elif not use_stream and isinstance(response_or_stream, dict):
-                final_response_str, server_metadata, ttft_time, end_time = self._handle_non_stream_response(
-                    response_or_stream)
+                handled = self._handle_non_stream_response(response_or_stream)
             else:
                 # Обработка неожиданного типа ответа
                 raise TypeError(
                     f"Получен неожиданный тип ответа: {type(response_or_stream)} для use_stream={use_stream}")
 
-            final_metrics = self._build_final_metrics(
-                server_metadata=server_metadata,
-                prompt_token_count=prompt_token_count,
-                final_response_str=final_response_str,
-                start_time=start_time,
-                ttft_time=ttft_time,
-                end_time=end_time
+            return self._finalize_query(handled, prompt_token_count, start_time)
+
+        except LLMCacheMissError:
+            # Промах в режиме replay — не ошибка модели: раннер пропускает кейс
+            raise
+        except LLMClientError as e:  # Замените на ваше реальное исключение
+            return self._build_error_response(e, start_time)
+
+    async def query_async(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            *,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Асинхронная версия query: запрос идёт через LLMClient.chat_async без блокировки потока."""
+        messages, prompt_token_count, use_stream, generation_opts = self._prepare_query(user_prompt, system_prompt)
+        start_time = time.perf_counter()
+
+        try:
+            response_or_stream = await self.new_client.chat_async(
+                messages, stream=use_stream, use_cache=use_cache, **generation_opts
             )
 
-            parsed_struct = self._parse_think_response(final_response_str)
-            parsed_struct['performance_metrics'] = final_metrics
-            return parsed_struct
+            if use_stream and hasattr(response_or_stream, "__anext__"):
+                handled = await self._handle_stream_response_async(response_or_stream)
+            elif not use_stream and isinstance(response_or_stream, dict):
+                handled = self._handle_non_stream_response(response_or_stream)
+            else:
+                raise TypeError(
+                    f"Получен неожиданный тип ответа: {type(response_or_stream)} для use_stream={use_stream}")
 
-        except LLMClientError as e:  # Замените на ваше реальное исключение
+            return self._finalize_query(handled, prompt_token_count, start_time)
+
+        except LLMCacheMissError:
+            raise
+        except LLMClientError as e:
             return self._build_error_response(e, start_time)
@@ -4,6 +4,9 @@ from typing import Dict, List, Tuple, Optional, Any
 import pandas as pd
 import numpy as np
 
+from .columnar_store import ColumnarResultStore
+from .result_store import list_result_files, load_result_records
+
 
 class AdvancedReporter:
     """
@@ -23,15 +26,50 @@ class AdvancedReporter:
         self.model_details_extracted: bool = False
 
     def _load_all_results(self) -> pd.DataFrame:
-        """Загружает все JSON файлы и извлекает детали моделей."""
+        """Загружает все результаты и извлекает детали моделей."""
+        combined_data = self._load_from_store()
+        if combined_data is None:
+            combined_data = self._load_raw_results()
+        if combined_data.empty:
+            return combined_data
+
+        # Извлекаем детали моделей
+        return self._extract_model_details(combined_data)
+
+    def _load_from_store(self) -> Optional[pd.DataFrame]:
+        """
+        Читает результаты из колоночного хранилища (только основные колонки,
+        без текстов ответов). Возвращает None, если pyarrow не установлен.
+        """
+        if not ColumnarResultStore.is_available():
+            return None
+        try:
+            store = ColumnarResultStore(Path(self.results_dir).parent / "store")
+            stats = store.ingest(self.results_dir)
+            print(f"Хранилище результатов: загружено файлов {stats['ingested']}, без изменений {stats['skipped']}")
+            combined_data = store.load()
+        except Exception as e:
+            print(f"Колоночное хранилище недоступно ({e}), читаем сырые файлы.")
+            return None
+        if combined_data.empty:
+            print("Не найдено данных для анализа.")
+        else:
+            print(f"Всего записей для анализа: {len(combined_data)}")
+        return combined_data
+
+    def _load_raw_results(self) -> pd.DataFrame:
+        """Загружает все файлы результатов (*.json, *.jsonl)."""
         all_data = []
-        json_files = sorted(list(self.results_dir.glob("*.json")))
+        json_files = list_result_files(self.results_dir)
 
         print(f"Найдено файлов результатов: {len(json_files)}")
 
         for json_file in json_files:
             try:
-                data = pd.read_json(json_file)
+                if json_file.suffix == '.jsonl':
+                    data = pd.DataFrame(load_result_records(json_file))
+                else:
+                    data = pd.read_json(json_file)
                 if data.empty:
                     print(f"Пропущен пустой файл: {json_file.name}")
                     continue
@@ -49,10 +87,6 @@ class AdvancedReporter:
 
         combined_data = pd.concat(all_data, ignore_index=True)
         print(f"Всего записей для анализа: {len(combined_data)}")
-
-        # Извлекаем детали моделей
-        combined_data = self._extract_model_details(combined_data)
-
         return combined_data
 
     def _extract_model_details(self, df: pd.DataFrame) -> pd.DataFrame:
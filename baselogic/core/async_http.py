@@ -0,0 +1,134 @@
+"""
+Общий асинхронный HTTP-транспорт для провайдеров LLM.
+
+- Пул соединений: один httpx.AsyncClient на event loop, общий для всех
+  провайдеров и моделей (keep-alive к локальным серверам переиспользуется).
+- Синхронный мост: фоновый event loop в отдельном потоке. Синхронные
+  send_request() провайдеров — тонкие обёртки над асинхронными:
+  корутина выполняется в фоновом цикле, а асинхронный поток чанков
+  превращается в обычный генератор. Пул моста закрывается по окончании
+  прогона (TestRunner.run) и при выходе из процесса.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Dict, Generator, Optional, TypeVar, Union
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Лимиты пула: несколько десятков одновременных стримов к одному серверу
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+_bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+_bridge_lock = threading.Lock()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Возвращает пул соединений текущего event loop (создаёт при первом обращении)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=POOL_LIMITS)
+            _clients[loop] = client
+            log.debug("Создан пул HTTP-соединений для event loop %s", id(loop))
+        return client
+
+
+async def close_async_client() -> None:
+    """Закрывает пул соединений текущего event loop (например, при остановке сервера)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+async def open_stream(
+        method: str,
+        url: str,
+        *,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+) -> httpx.Response:
+    """
+    Отправляет запрос и возвращает ответ с ещё не прочитанным телом.
+    Вызывающий код обязан закрыть ответ (await response.aclose()).
+    """
+    client = get_async_client()
+    request = client.build_request(method, url, json=json, headers=headers, params=params, timeout=timeout)
+    return await client.send(request, stream=True)
+
+
+# ──────────────────────────── синхронный мост ─────────────────────────────
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    global _bridge_loop
+    with _bridge_lock:
+        if _bridge_loop is None or _bridge_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="llm-async-http", daemon=True
+            )
+            thread.start()
+            _bridge_loop = loop
+        return _bridge_loop
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """Выполняет корутину в фоновом event loop и блокирующе ждёт результат."""
+    return asyncio.run_coroutine_threadsafe(awaitable, _get_bridge_loop()).result()
+
+
+@atexit.register
+def close_bridge_client() -> None:
+    """
+    Закрывает пул соединений синхронного моста (keep-alive соединения к серверам).
+    Фоновый цикл остаётся запущенным: следующий запрос откроет новый пул.
+    """
+    with _bridge_lock:
+        loop = _bridge_loop
+    if loop is None or loop.is_closed() or not loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_async_client(), loop).result(timeout=5)
+    except Exception as e:
+        log.debug("Не удалось закрыть пул HTTP-соединений: %s", e)
+
+
+def iterate_sync(iterator: AsyncIterator[T]) -> Generator[T, None, None]:
+    """Превращает асинхронный итератор в синхронный генератор."""
+    finished = False
+    try:
+        while True:
+            try:
+                item = run_sync(iterator.__anext__())
+            except StopAsyncIteration:
+                finished = True
+                return
+            yield item
+    finally:
+        # Генератор закрыли раньше конца потока — освобождаем соединение
+        if not finished and hasattr(iterator, "aclose"):
+            run_sync(iterator.aclose())
+
+
+def call_sync(awaitable: Awaitable[Union[T, AsyncIterator[T]]]) -> Union[T, Generator[T, None, None]]:
+    """
+    Синхронная обёртка над асинхронным send_request провайдера:
+    словарь возвращается как есть, асинхронный поток — как генератор.
+    """
+    result = run_sync(awaitable)
+    if hasattr(result, "__anext__"):
+        return iterate_sync(result)
+    return result
@@ -0,0 +1,290 @@
+"""
+Колоночное хранилище результатов (Parquet) с инкрементальной загрузкой.
+
+Сырые прогоны из results/raw (*.json, *.jsonl) конвертируются в Parquet-файлы,
+разложенные по партициям model=<модель>/tier=<уровень железа>/date=<дата>.
+Повторный ingest обрабатывает только новые или изменённые файлы
+(отслеживаются mtime и размер), поэтому построение отчёта по многомесячной
+истории не требует разбора всех JSON заново.
+
+Крупные текстовые поля (промпт, ответы, рассуждения) лежат в отдельной группе
+колонок (*.text.parquet) и читаются только если их явно запросили.
+
+Для работы нужен pyarrow (опциональная зависимость, группа "store").
+"""
+import importlib.util
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .result_store import list_result_files, load_result_records
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+
+# Крупные текстовые поля записи — отдельная, лениво загружаемая группа колонок
+TEXT_COLUMNS = (
+    'prompt',
+    'thinking_response',
+    'llm_response',
+    'thinking_log',
+    'parsed_answer',
+    'raw_llm_output',
+)
+
+
+def _safe_partition_value(value: Any) -> str:
+    text = str(value) if value is not None and not pd.isna(value) else "unknown"
+    return re.sub(r'[^\w.-]', '_', text) or "unknown"
+
+
+def _partition_date(timestamp: Any, fallback: str) -> str:
+    try:
+        return datetime.fromtimestamp(float(timestamp)).strftime('%Y-%m-%d')
+    except (TypeError, ValueError, OverflowError, OSError):
+        return fallback
+
+
+def _needs_json(series: pd.Series) -> bool:
+    """Колонку с вложенными или смешанными значениями храним как JSON-строки."""
+    if series.dtype != object:
+        return False
+    return any(v is not None and not isinstance(v, str) for v in series)
+
+
+class ColumnarResultStore:
+    """
+    Партиционированное Parquet-хранилище результатов тестирования.
+
+    Использование:
+        store = ColumnarResultStore(Path("results/store"))
+        store.ingest(Path("results/raw"))
+        df = store.load(columns=['model_name', 'is_correct'])
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self.manifest_path = self.store_dir / MANIFEST_NAME
+        self._manifest = self._load_manifest()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Проверяет, установлен ли pyarrow."""
+        return importlib.util.find_spec("pyarrow") is not None
+
+    # ──────────────────────────── manifest ────────────────────────────
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    return manifest
+                log.warning("Версия манифеста хранилища устарела, хранилище будет пересобрано.")
+            except (OSError, json.JSONDecodeError) as e:
+                log.warning("Манифест хранилища повреждён (%s), хранилище будет пересобрано.", e)
+        return {'version': MANIFEST_VERSION, 'sources': {}}
+
+    def _save_manifest(self) -> None:
+        # Каталог хранилища появляется вместе с первой партицией: отчёт по пустым
+        # или не содержащим записей результатам не оставляет после себя results/store
+        if not self.store_dir.exists() and not any(
+                entry['parts'] for entry in self._manifest['sources'].values()):
+            return
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ──────────────────────────── ingest ──────────────────────────────
+    def ingest(self, raw_dir: Path) -> Dict[str, int]:
+        """
+        Загружает в хранилище новые и изменённые файлы из raw_dir.
+        Файлы, удалённые из raw_dir, удаляются и из хранилища.
+
+        Returns:
+            Статистика: {'ingested': N, 'skipped': N, 'removed': N}
+        """
+        stats = {'ingested': 0, 'skipped': 0, 'removed': 0}
+        sources = self._manifest['sources']
+        seen = set()
+
+        for path in list_result_files(raw_dir):
+            seen.add(path.name)
+            stat = path.stat()
+            entry = sources.get(path.name)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                stats['skipped'] += 1
+                continue
+
+            if entry:
+                self._remove_parts(entry)
+            try:
+                parts = self._ingest_file(path, stat.st_mtime)
+            except Exception as e:
+                log.error("Ошибка при загрузке %s в хранилище: %s", path.name, e)
+                sources.pop(path.name, None)
+                continue
+            sources[path.name] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'parts': parts,
+            }
+            stats['ingested'] += 1
+
+        for name in [name for name in sources if name not in seen]:
+            self._remove_parts(sources.pop(name))
+            stats['removed'] += 1
+
+        if stats['ingested'] or stats['removed']:
+            self._save_manifest()
+        log.info(
+            "Хранилище результатов: загружено %d, без изменений %d, удалено %d файлов",
+            stats['ingested'], stats['skipped'], stats['removed'],
+        )
+        return stats
+
+    def _ingest_file(self, path: Path, mtime: float) -> List[Dict[str, Any]]:
+        records = load_result_records(path)
+        if not records:
+            return []
+
+        df = pd.DataFrame(records)
+        df['source_file'] = path.name
+        fallback_date = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
+
+        model_key = df['model_name'] if 'model_name' in df.columns else pd.Series(None, index=df.index)
+        tier_key = df['hardware_tier'] if 'hardware_tier' in df.columns else pd.Series(None, index=df.index)
+        if 'benchmark_timestamp' in df.columns:
+            date_key = df['benchmark_timestamp'].map(lambda ts: _partition_date(ts, fallback_date))
+        else:
+            date_key = pd.Series(fallback_date, index=df.index)
+
+        partition = pd.DataFrame({
+            'model': model_key.map(_safe_partition_value),
+            'tier': tier_key.map(_safe_partition_value),
+            'date': date_key,
+        })
+
+        parts = []
+        for (model, tier, date), index in partition.groupby(['model', 'tier', 'date']).groups.items():
+            parts.append(self._write_part(df.loc[index].reset_index(drop=True), path.stem, model, tier, date))
+        return parts
+
+    def _write_part(self, df: pd.DataFrame, stem: str, model: str, tier: str, date: str) -> Dict[str, Any]:
+        rel_dir = Path(f"model={model}") / f"tier={tier}" / f"date={date}"
+        part_dir = self.store_dir / rel_dir
+        part_dir.mkdir(parents=True, exist_ok=True)
+
+        json_columns = []
+        for column in df.columns:
+            if _needs_json(df[column]):
+                df[column] = df[column].map(
+                    lambda v: None if v is None else json.dumps(v, ensure_ascii=False, default=str)
+                )
+                json_columns.append(column)
+
+        text_columns = [c for c in df.columns if c in TEXT_COLUMNS]
+        core_columns = [c for c in df.columns if c not in TEXT_COLUMNS]
+
+        part = {
+            'model': model,
+            'tier': tier,
+            'date': date,
+            'rows': len(df),
+            'json_columns': json_columns,
+            'core': str(rel_dir / f"{stem}.core.parquet"),
+            'core_columns': core_columns,
+            'text': None,
+            'text_columns': text_columns,
+        }
+        self._write_parquet(df[core_columns], self.store_dir / part['core'])
+        if text_columns:
+            part['text'] = str(rel_dir / f"{stem}.text.parquet")
+            self._write_parquet(df[text_columns], self.store_dir / part['text'])
+        return part
+
+    @staticmethod
+    def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+        tmp_path = path.with_suffix('.tmp')
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _remove_parts(self, entry: Dict[str, Any]) -> None:
+        for part in entry.get('parts', []):
+            for key in ('core', 'text'):
+                if part.get(key):
+                    (self.store_dir / part[key]).unlink(missing_ok=True)
+
+    # ──────────────────────────── query ───────────────────────────────
+    def load(
+            self,
+            columns: Optional[Sequence[str]] = None,
+            text_columns: Iterable[str] = (),
+            models: Optional[Iterable[str]] = None,
+            hardware_tiers: Optional[Iterable[str]] = None,
+            since: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Читает результаты из хранилища.
+
+        Args:
+            columns: Основные колонки (None — все, кроме текстовых)
+            text_columns: Какие текстовые колонки подгрузить (по умолчанию — никакие)
+            models: Фильтр по моделям (отсекает партиции без чтения файлов)
+            hardware_tiers: Фильтр по уровню оборудования
+            since: Нижняя граница даты в формате YYYY-MM-DD
+        """
+        text_columns = [c for c in text_columns if c in TEXT_COLUMNS]
+        model_filter = {_safe_partition_value(m) for m in models} if models is not None else None
+        tier_filter = {_safe_partition_value(t) for t in hardware_tiers} if hardware_tiers is not None else None
+
+        frames = []
+        for entry in self._manifest['sources'].values():
+            for part in entry['parts']:
+                if model_filter is not None and part['model'] not in model_filter:
+                    continue
+                if tier_filter is not None and part['tier'] not in tier_filter:
+                    continue
+                if since is not None and part['date'] < since:
+                    continue
+                frames.append(self._read_part(part, columns, text_columns))
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _read_part(
+            self, part: Dict[str, Any], columns: Optional[Sequence[str]], text_columns: List[str]
+    ) -> pd.DataFrame:
+        core_columns = part['core_columns'] if columns is None else [
+            c for c in columns if c in part['core_columns']
+        ]
+        df = pd.read_parquet(self.store_dir / part['core'], columns=core_columns)
+
+        wanted_text = [c for c in text_columns if c in part['text_columns']]
+        if wanted_text:
+            # Файлы групп выровнены по строкам — склеиваем без ключа
+            text_df = pd.read_parquet(self.store_dir / part['text'], columns=wanted_text)
+            df = pd.concat([df, text_df], axis=1)
+
+        for column in part['json_columns']:
+            if column in df.columns:
+                df[column] = df[column].map(lambda v: json.loads(v) if isinstance(v, str) else v)
+        return df
+
+    def clear(self) -> None:
+        """Полностью удаляет хранилище (будет пересобрано при следующем ingest)."""
+        if self.store_dir.exists():
+            shutil.rmtree(self.store_dir)
+        self._manifest = {'version': MANIFEST_VERSION, 'sources': {}}
@@ -0,0 +1,198 @@
+"""
+Кэш артефактов компиляции с адресацией по содержимому исходника.
+
+Повторные прогоны (runs_per_test > 1, перепроверка сохранённых результатов,
+одинаковые ответы детерминированных моделей) компилируют байт-в-байт
+одинаковый код. Ключ — хеш от вида артефакта, версии тулчейна и
+санитизированного исходника; значение — файл артефакта:
+    .jar  — скомпилированный Kotlin
+    .err  — сообщения компилятора Kotlin (ошибки компиляции тоже кэшируются)
+    .pyc  — marshal code-объекта Python
+
+Настройки (переменные окружения):
+    BC_COMPILE_CACHE         — включить кэш (true)
+    BC_COMPILE_CACHE_DIR     — каталог (results/cache/compile)
+    BC_COMPILE_CACHE_MAX_MB  — лимит размера на диске (512), вытеснение LRU
+"""
+import hashlib
+import importlib.util
+import logging
+import marshal
+import os
+import shutil
+import sys
+import threading
+import uuid
+from pathlib import Path
+from types import CodeType
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from .shared import LazySingleton, env_flag
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "results" / "cache" / "compile"
+
+# Версия интерпретатора, от которой зависит байткод
+PYTHON_TOOLCHAIN = f"{sys.implementation.cache_tag}|{importlib.util.MAGIC_NUMBER.hex()}"
+
+
+class CompileCache:
+    """
+    Дисковый кэш: один файл на артефакт, <dir>/<ключ[:2]>/<ключ><суффикс>.
+    При превышении max_size_mb удаляются давно не использованные записи.
+    """
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 512):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_size: Optional[int] = None
+
+    @staticmethod
+    def make_key(kind: str, toolchain: str, source: str) -> str:
+        payload = "\0".join((kind, toolchain, source))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    # ──────────────────────────── чтение ──────────────────────────────
+    def find(self, key: str, suffixes: Sequence[str]) -> Optional[Path]:
+        """
+        Ищет артефакт с одним из суффиксов и засчитывает попадание/промах.
+        Найденный файл стоит сразу скопировать или прочитать: его может вытеснить другой поток.
+        """
+        for suffix in suffixes:
+            path = self._path(key, suffix)
+            try:
+                os.utime(path)  # отметка использования для вытеснения LRU
+            except OSError:
+                continue
+            self._count(hit=True)
+            return path
+        self._count(hit=False)
+        return None
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self, hit: Optional[bool] = None) -> Dict[str, object]:
+        """Статистика для details результата проверки (hit — попадание для текущей проверки)."""
+        with self._lock:
+            total = self.hits + self.misses
+            stats: Dict[str, object] = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+        if hit is not None:
+            stats['hit'] = hit
+        return stats
+
+    # ──────────────────────────── запись ──────────────────────────────
+    def put_bytes(self, key: str, data: bytes, suffix: str) -> None:
+        self._store(key, suffix, lambda tmp: tmp.write_bytes(data))
+
+    def put_file(self, key: str, source: Path, suffix: str) -> None:
+        self._store(key, suffix, lambda tmp: shutil.copyfile(source, tmp))
+
+    def _store(self, key: str, suffix: str, write) -> None:
+        path = self._path(key, suffix)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write(tmp_path)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            new_size = path.stat().st_size
+        except OSError as e:
+            log.warning("Не удалось записать артефакт компиляции в кэш: %s", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._total_size is None:
+                self._total_size = self._scan_size()
+            else:
+                self._total_size += new_size - old_size
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _iter_entries(self) -> Iterable[os.DirEntry]:
+        if not self.cache_dir.exists():
+            return
+        for bucket in os.scandir(self.cache_dir):
+            if bucket.is_dir():
+                for entry in os.scandir(bucket.path):
+                    if not entry.name.endswith('.tmp'):
+                        yield entry
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._iter_entries())
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные артефакты, пока размер не станет ≤ 90% лимита."""
+        target = int(self.max_size_bytes * 0.9)
+        entries = sorted(
+            ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._iter_entries())
+        )
+        removed = 0
+        for _, size, path in entries:
+            if self._total_size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_size -= size
+            removed += 1
+        log.info("🧹 Кэш компиляции: вытеснено %d артефактов", removed)
+
+
+def _create_cache() -> Optional[CompileCache]:
+    if not env_flag('BC_COMPILE_CACHE'):
+        return None
+    return CompileCache(
+        cache_dir=Path(os.environ.get('BC_COMPILE_CACHE_DIR') or DEFAULT_CACHE_DIR),
+        max_size_mb=float(os.environ.get('BC_COMPILE_CACHE_MAX_MB', 512)),
+    )
+
+
+_cache: LazySingleton[CompileCache] = LazySingleton(_create_cache)
+
+
+def get_compile_cache() -> Optional[CompileCache]:
+    """Общий для процесса кэш или None, если он выключен (BC_COMPILE_CACHE=false)."""
+    return _cache.get()
+
+
+def compile_python(source: str, filename: str = '<llm_generated>') -> Tuple[CodeType, Optional[bool]]:
+    """
+    compile(source, filename, 'exec') через кэш.
+
+    Returns:
+        (code-объект, попадание в кэш или None, если кэш выключен).
+        SyntaxError пробрасывается как у обычного compile().
+    """
+    cache = get_compile_cache()
+    if cache is None:
+        return compile(source, filename, 'exec'), None
+
+    key = cache.make_key('python', PYTHON_TOOLCHAIN, f"{filename}\0{source}")
+    path = cache.find(key, ('.pyc',))
+    if path is not None:
+        try:
+            return marshal.loads(path.read_bytes()), True
+        except (OSError, EOFError, ValueError, TypeError):
+            log.debug("Повреждённый артефакт кэша компиляции %s", path.name)
+
+    code = compile(source, filename, 'exec')
+    cache.put_bytes(key, marshal.dumps(code), '.pyc')
+    return code, False
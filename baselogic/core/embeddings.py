@@ -0,0 +1,232 @@
+"""
+Локальные эмбеддинги для семантической валидации (только CPU).
+
+Модель загружается из локального пути (BC_EMBEDDING_MODEL):
+    - каталог с model.onnx и tokenizer.json (или путь к .onnx) —
+      onnxruntime + tokenizers, mean pooling по маске внимания;
+    - иначе каталог sentence-transformers.
+Обе библиотеки необязательны (группа "embeddings"); без модели или без
+библиотек SemanticSimilarityScorer работает только на лексических метриках.
+
+Тексты кодируются пакетами, векторы нормируются и кэшируются на диске по
+sha256 текста: матрица float16 (vectors.f16, читается через np.memmap) и
+список ключей (keys.txt, строка i — ключ строки i матрицы), отдельно для
+каждой модели. Эталоны одинаковы для всех моделей и прогонов, поэтому при
+повторной валидации кодируются только новые ответы. Кэш пишет один процесс
+(валидация идёт в основном процессе), чтение из нескольких безопасно.
+
+Настройки (переменные окружения):
+    BC_EMBEDDING_MODEL       — путь к модели (пусто — эмбеддинги выключены)
+    BC_EMBEDDING_BATCH_SIZE  — размер пакета кодирования (32)
+    BC_EMBEDDING_CACHE       — кэшировать векторы на диске (true)
+    BC_EMBEDDING_CACHE_DIR   — каталог кэша (results/cache/embeddings)
+"""
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from .shared import LazySingleton, env_flag
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "results" / "cache" / "embeddings"
+
+
+def text_key(text: str) -> str:
+    """Ключ текста в кэше эмбеддингов."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class SentenceTransformerBackend:
+    """Модель sentence-transformers из локального каталога."""
+
+    def __init__(self, model_path: Path):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(f"sentence-transformers не установлен: {e}") from e
+        self.model = SentenceTransformer(str(model_path), device='cpu')
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.model_id = f"sentence-transformers:{_model_fingerprint(model_path)}"
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=len(texts), convert_to_numpy=True,
+                                 show_progress_bar=False)
+
+
+class OnnxBackend:
+    """ONNX-модель энкодера (onnxruntime, CPUExecutionProvider) с токенизатором tokenizer.json."""
+
+    def __init__(self, model_path: Path, max_length: int = 512):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(f"onnxruntime/tokenizers не установлены: {e}") from e
+        model_file = model_path if model_path.suffix == '.onnx' else model_path / "model.onnx"
+        self.tokenizer = Tokenizer.from_file(str(model_file.parent / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        self.session = onnxruntime.InferenceSession(str(model_file), providers=['CPUExecutionProvider'])
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        self.model_id = f"onnx:{_model_fingerprint(model_file)}"
+        dim = self.session.get_outputs()[0].shape[-1]
+        # Размерность может быть символьной — тогда узнаём её пробным кодированием
+        self.dim = dim if isinstance(dim, int) else int(self.encode(["probe"]).shape[1])
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feed = {'input_ids': input_ids, 'attention_mask': attention_mask,
+                'token_type_ids': np.zeros_like(input_ids)}
+        output = self.session.run(None, {name: feed[name] for name in self._input_names if name in feed})[0]
+        if output.ndim == 2:
+            # Модель уже отдаёт эмбеддинг предложения
+            return output
+        weights = attention_mask[..., np.newaxis].astype(np.float32)
+        return (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+
+def _model_fingerprint(path: Path) -> str:
+    """Путь и время изменения модели: замена файлов модели даёт новый кэш."""
+    path = path.resolve()
+    return f"{path}@{path.stat().st_mtime_ns}"
+
+
+def load_embedding_backend(model_path: Union[str, Path]):
+    """
+    Бэкенд по локальному пути: ONNX, если есть model.onnx, иначе sentence-transformers.
+    Если модель или библиотеки недоступны, бросает RuntimeError.
+    """
+    model_path = Path(model_path)
+    if not model_path.exists():
+        raise RuntimeError(f"Модель эмбеддингов не найдена: {model_path}")
+    if model_path.suffix == '.onnx' or (model_path / "model.onnx").exists():
+        return OnnxBackend(model_path)
+    return SentenceTransformerBackend(model_path)
+
+
+class EmbeddingCache:
+    """Нормированные векторы текстов: float16-матрица на диске (memmap) и индекс ключ → строка."""
+
+    def __init__(self, directory: Path, dim: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._vectors_path = self.directory / "vectors.f16"
+        self._keys_path = self.directory / "keys.txt"
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._rows = self._load_rows()
+
+    def _load_rows(self) -> Dict[str, int]:
+        keys = self._keys_path.read_text(encoding='ascii').split() if self._keys_path.exists() else []
+        row_bytes = self.dim * np.dtype(np.float16).itemsize
+        stored = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        # Ключ дописывается после вектора: при оборванной записи хвост без пары отбрасывается
+        count = min(len(keys), stored)
+        if self._vectors_path.exists() and self._vectors_path.stat().st_size != count * row_bytes:
+            with open(self._vectors_path, 'r+b') as f:
+                f.truncate(count * row_bytes)
+        if len(keys) > count:
+            self._keys_path.write_text("".join(f"{key}\n" for key in keys[:count]), encoding='ascii')
+        return {key: row for row, key in enumerate(keys[:count])}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _view(self) -> np.ndarray:
+        if self._matrix is None or self._matrix.shape[0] != len(self._rows):
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float16, mode='r',
+                                     shape=(len(self._rows), self.dim))
+        return self._matrix
+
+    def get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Найденные в кэше векторы (float32) по ключам текстов."""
+        with self._lock:
+            found = [key for key in keys if key in self._rows]
+            if not found:
+                return {}
+            vectors = self._view()[[self._rows[key] for key in found]].astype(np.float32)
+        return dict(zip(found, vectors))
+
+    def put(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """Дописывает векторы новых ключей в конец матрицы."""
+        with self._lock:
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            if not new:
+                return
+            # Отображение закрывается до дозаписи файла (на Windows иначе файл заблокирован)
+            self._matrix = None
+            with open(self._vectors_path, 'ab') as f:
+                f.write(np.asarray([vector for _, vector in new], dtype=np.float16).tobytes())
+            with open(self._keys_path, 'a', encoding='ascii') as f:
+                f.write("".join(f"{key}\n" for key, _ in new))
+            for key, _ in new:
+                self._rows[key] = len(self._rows)
+
+
+class Embedder:
+    """Пакетное кодирование текстов с кэшем: каждый текст кодируется моделью один раз."""
+
+    def __init__(self, backend, cache: Optional[EmbeddingCache] = None, batch_size: int = 32):
+        self.backend = backend
+        self.cache = cache
+        self.batch_size = batch_size
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Нормированные эмбеддинги (n × dim, float32) в порядке texts."""
+        keys = [text_key(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        vectors = self.cache.get(list(unique)) if self.cache is not None else {}
+
+        missing = [key for key in unique if key not in vectors]
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            # Округление до float16 сразу: результат не зависит от того, был ли текст в кэше
+            encoded = _normalize(self.backend.encode([unique[key] for key in chunk]))
+            encoded = encoded.astype(np.float16).astype(np.float32)
+            vectors.update(zip(chunk, encoded))
+            if self.cache is not None:
+                self.cache.put(chunk, encoded)
+
+        if not keys:
+            return np.zeros((0, self.backend.dim), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+
+def _create_embedder() -> Optional[Embedder]:
+    model_path = os.environ.get('BC_EMBEDDING_MODEL', '').strip()
+    if not model_path:
+        return None
+    try:
+        backend = load_embedding_backend(model_path)
+    except Exception as e:
+        log.warning("Эмбеддинги отключены: не удалось загрузить модель %s: %s", model_path, e)
+        return None
+    cache = None
+    if env_flag('BC_EMBEDDING_CACHE'):
+        cache_dir = Path(os.environ.get('BC_EMBEDDING_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        cache = EmbeddingCache(cache_dir / text_key(backend.model_id)[:16], backend.dim)
+    log.info("✅ Модель эмбеддингов загружена: %s", backend.model_id)
+    return Embedder(backend, cache, int(os.environ.get('BC_EMBEDDING_BATCH_SIZE', 32)))
+
+
+_embedder: LazySingleton[Embedder] = LazySingleton(_create_embedder)
+
+
+def get_embedder() -> Optional[Embedder]:
+    """Embedder процесса или None, если модель не задана или не загрузилась."""
+    return _embedder.get()
@@ -9,7 +9,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 import logging
 from enum import Enum
@@ -51,6 +51,12 @@ class ValidationConfig:
     confidence_threshold: float = 0.8
 
 
+def _numeric_scores(scores: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Числовые метрики компонента без служебных полей (например, _detailed_analysis)."""
+    return {name: value for name, value in (scores or {}).items()
+            if not name.startswith('_') and isinstance(value, (int, float))}
+
+
 class BaseScorer(ABC):
     """Базовый класс для всех оценщиков"""
 
@@ -82,8 +88,15 @@ class SemanticAnalyzer(BaseScorer):
     def score(self, response: str, reference: Dict[str, Any], test_type: TestType) -> Dict[str, float]:
         """Семантическая оценка ответа с использованием улучшенного анализатора"""
         # Выполняем полный семантический анализ
-        analysis_results = self.enhanced_analyzer.analyze(response, reference, test_type)
+        return self._scores(self.enhanced_analyzer.analyze(response, reference, test_type))
 
+    def score_batch(self, responses: Sequence[str], references: Sequence[Dict[str, Any]],
+                    test_types: Sequence[TestType]) -> List[Dict[str, float]]:
+        """Семантическая оценка пакета ответов одним векторным проходом"""
+        return [self._scores(analysis)
+                for analysis in self.enhanced_analyzer.analyze_batch(responses, references, test_types)]
+
+    def _scores(self, analysis_results: Dict[str, Any]) -> Dict[str, float]:
         # Извлекаем ключевые метрики для совместимости с интерфейсом
         integrated_scores = analysis_results.get('integrated_scores', {})
 
@@ -362,7 +375,9 @@ class EnsembleScorer:
 
         weights = self.config.ensemble_weights
 
-        # Средние оценки по компонентам
+        # Средние оценки по компонентам (служебные ключи вроде _detailed_analysis не учитываются)
+        semantic = _numeric_scores(semantic)
+        llm = _numeric_scores(llm)
         semantic_avg = sum(semantic.values()) / len(semantic) if semantic else 0.5
         llm_avg = sum(llm.values()) / len(llm) if llm else 0.5
         statistical_avg = statistical.get('statistical_score', 0.5)
@@ -382,7 +397,7 @@ class EnsembleScorer:
         scores = []
         for component in component_scores.values():
             if component:
-                scores.extend(component.values())
+                scores.extend(_numeric_scores(component).values())
 
         if not scores:
             return 0.5
@@ -462,6 +477,29 @@ class EnhancedValidator:
         Returns:
             ValidationResult с полной информацией о валидации
         """
+        return self._validate(response, reference, test_type, level, semantic_scores=None)
+
+    def validate_batch(self, items: Sequence[Tuple[str, Dict[str, Any], TestType]],
+                       level: ValidationLevel = ValidationLevel.STANDARD) -> List[ValidationResult]:
+        """
+        Валидация пакета ответов (например, всего каталога результатов).
+
+        Семантические метрики всего пакета считаются одним векторным проходом;
+        если он падает, ответы валидируются по одному, как в validate().
+        """
+        semantic_batch: List[Optional[Dict[str, float]]] = [None] * len(items)
+        if self.config.semantic_enabled and level in [ValidationLevel.STANDARD, ValidationLevel.COMPREHENSIVE]:
+            try:
+                semantic_batch = self.semantic_analyzer.score_batch(*zip(*items)) if items else []
+            except Exception as e:
+                log.error("Error during batch semantic analysis, falling back to per-item: %s", e)
+        return [
+            self._validate(response, reference, test_type, level, semantic_scores=semantic)
+            for (response, reference, test_type), semantic in zip(items, semantic_batch)
+        ]
+
+    def _validate(self, response: str, reference: Dict[str, Any], test_type: TestType,
+                  level: ValidationLevel, semantic_scores: Optional[Dict[str, float]]) -> ValidationResult:
         import time
         start_time = time.time()
 
@@ -470,7 +508,9 @@ class EnhancedValidator:
             component_scores = {}
 
             if self.config.semantic_enabled and level in [ValidationLevel.STANDARD, ValidationLevel.COMPREHENSIVE]:
-                component_scores['semantic'] = self.semantic_analyzer.score(response, reference, test_type)
+                if semantic_scores is None:
+                    semantic_scores = self.semantic_analyzer.score(response, reference, test_type)
+                component_scores['semantic'] = semantic_scores
 
             if self.config.llm_judge_enabled and level == ValidationLevel.COMPREHENSIVE:
                 component_scores['llm_judge'] = self.llm_judge.score(response, reference, test_type)
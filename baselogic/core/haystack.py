@@ -0,0 +1,180 @@
+"""
+Движок "стога сена" для стресс-тестов длинного контекста.
+
+Контекст собирается как список блоков, а не одной растущей строкой:
+число символов и слов считается инкрементально при добавлении блока,
+а иголки и дистракторы вставляются между блоками по смещению — без
+повторного split/join всего текста. Строка собирается один раз в render().
+
+Текст блоков берётся из SentencePool — заранее отрендеренных предложений
+с посчитанными длинами. Пул строится один раз на процесс (cached_pool),
+после чего абзац — это один вызов rng.choices() и join.
+"""
+import bisect
+import itertools
+import math
+import random
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# Источник значения поля шаблона: набор вариантов или функция без аргументов
+FieldSource = Union[Sequence[Any], Callable[[], Any]]
+
+_POOL_CACHE: Dict[Hashable, 'SentencePool'] = {}
+
+
+class SentencePool:
+    """Набор заранее отрендеренных предложений с посчитанными длинами в словах и символах."""
+
+    def __init__(self, sentences: Sequence[str]):
+        if not sentences:
+            raise ValueError("SentencePool: пустой набор предложений")
+        self.sentences = list(sentences)
+        self.word_counts = [len(s.split()) for s in self.sentences]
+        self.char_counts = [len(s) for s in self.sentences]
+        self.mean_chars = sum(self.char_counts) / len(self.sentences)
+        self._indices = range(len(self.sentences))
+
+    @classmethod
+    def render(cls, templates: Sequence[str], fields: Mapping[str, FieldSource],
+               size: int = 2048, rng=random) -> 'SentencePool':
+        """
+        Рендерит size предложений: шаблон и значения полей выбираются случайно.
+        Поле задаётся набором вариантов (rng.choice) или функцией без аргументов.
+        Поля, которых нет в шаблоне, игнорируются.
+        """
+        sentences = []
+        for _ in range(size):
+            values = {name: source() if callable(source) else rng.choice(source)
+                      for name, source in fields.items()}
+            sentences.append(rng.choice(templates).format(**values))
+        return cls(sentences)
+
+    def sample(self, k: int, rng=random, sep: str = " ") -> Tuple[str, int]:
+        """k случайных предложений (с повторами), склеенных через sep, и их число слов."""
+        picked = rng.choices(self._indices, k=k)
+        return sep.join(self.sentences[i] for i in picked), sum(self.word_counts[i] for i in picked)
+
+    def sample_chars(self, target_chars: int, rng=random, sep: str = "\n") -> str:
+        """Набирает предложения, пока их длина с разделителями не достигнет target_chars."""
+        picked: List[int] = []
+        total = 0
+        step = len(sep)
+        while total < target_chars:
+            estimate = max(1, math.ceil((target_chars - total) / (self.mean_chars + step)))
+            for i in rng.choices(self._indices, k=estimate):
+                picked.append(i)
+                total += self.char_counts[i] + step
+                if total >= target_chars:
+                    break
+        return sep.join(self.sentences[i] for i in picked)
+
+
+def cached_pool(key: Hashable, factory: Callable[[], SentencePool]) -> SentencePool:
+    """Пул предложений, построенный один раз на процесс для данного ключа."""
+    pool = _POOL_CACHE.get(key)
+    if pool is None:
+        pool = _POOL_CACHE[key] = factory()
+    return pool
+
+
+class Haystack:
+    """
+    Контекст как список блоков, склеиваемых через separator.
+
+    char_count — длина итогового текста (с разделителями), word_count — сумма
+    слов блоков. Оба значения поддерживаются при каждой вставке, смещения
+    блоков пересчитываются лениво (по длинам, без работы со строками).
+    """
+
+    def __init__(self, separator: str = "\n\n"):
+        self.separator = separator
+        self.blocks: List[str] = []
+        self.word_counts: List[int] = []
+        self.char_count = 0
+        self.word_count = 0
+        self._offsets: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def insert(self, index: int, block: str, words: Optional[int] = None) -> int:
+        """Вставляет блок перед блоком index и возвращает его индекс."""
+        if words is None:
+            words = len(block.split())
+        if self.blocks:
+            self.char_count += len(self.separator)
+        self.blocks.insert(index, block)
+        self.word_counts.insert(index, words)
+        self.char_count += len(block)
+        self.word_count += words
+        self._offsets = None
+        return index
+
+    def append(self, block: str, words: Optional[int] = None) -> int:
+        return self.insert(len(self.blocks), block, words)
+
+    def replace(self, index: int, block: str, words: Optional[int] = None) -> None:
+        """Заменяет текст блока (например, после вставки внутрь него)."""
+        if words is None:
+            words = len(block.split())
+        self.char_count += len(block) - len(self.blocks[index])
+        self.word_count += words - self.word_counts[index]
+        self.blocks[index] = block
+        self.word_counts[index] = words
+        self._offsets = None
+
+    def extend_block(self, index: int, text: str, words: Optional[int] = None) -> None:
+        """Дописывает text в конец блока index."""
+        added = len(text.split()) if words is None else words
+        self.replace(index, self.blocks[index] + text, self.word_counts[index] + added)
+
+    def fill(self, make_block: Callable[[], Union[str, Tuple[str, int]]],
+             target_chars: Optional[int] = None, target_words: Optional[int] = None) -> 'Haystack':
+        """
+        Добавляет блоки make_block(), пока не будет достигнута целевая длина
+        (ровно одна из target_chars/target_words). make_block может вернуть
+        строку или пару (строка, число слов), если слова уже посчитаны.
+        """
+        if (target_chars is None) == (target_words is None):
+            raise ValueError("Укажите ровно одну цель: target_chars или target_words")
+        while (self.char_count if target_words is None else self.word_count) < (target_chars or target_words):
+            block = make_block()
+            if isinstance(block, tuple):
+                self.append(*block)
+            else:
+                self.append(block)
+        return self
+
+    def offsets(self) -> List[int]:
+        """Смещение начала каждого блока в итоговом тексте."""
+        if self._offsets is None:
+            step = len(self.separator)
+            self._offsets = list(itertools.accumulate((len(b) + step for b in self.blocks[:-1]), initial=0))
+        return self._offsets
+
+    def locate(self, depth_percent: float) -> Tuple[int, int]:
+        """Блок, на который приходится depth_percent% текста, и смещение внутри него."""
+        if not self.blocks:
+            return 0, 0
+        target = int(self.char_count * depth_percent / 100)
+        offsets = self.offsets()
+        index = max(0, bisect.bisect_right(offsets, target) - 1)
+        return index, min(target - offsets[index], len(self.blocks[index]))
+
+    def index_at_depth(self, depth_percent: float) -> int:
+        """Индекс вставки, ближайший к depth_percent% текста (граница между блоками)."""
+        return bisect.bisect_left(self.offsets(), self.char_count * depth_percent / 100) if self.blocks else 0
+
+    def insert_at_depth(self, depth_percent: float, block: str, words: Optional[int] = None,
+                        lo: int = 0, hi: Optional[int] = None) -> int:
+        """Вставляет блок на глубине depth_percent%; индекс ограничивается [lo, hi]."""
+        hi = len(self.blocks) if hi is None else hi
+        index = max(lo, min(self.index_at_depth(depth_percent), hi))
+        return self.insert(max(0, min(index, len(self.blocks))), block, words)
+
+    def insert_random(self, block: str, rng=random, words: Optional[int] = None) -> int:
+        """Вставляет блок на случайную границу между блоками."""
+        return self.insert(rng.randint(0, len(self.blocks)), block, words)
+
+    def render(self) -> str:
+        return self.separator.join(self.blocks)
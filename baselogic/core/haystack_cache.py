@@ -0,0 +1,152 @@
+"""
+Кэш сгенерированных кейсов стресс-тестов длинного контекста.
+
+При фиксированном seed кейс (промпт с "стогом сена", ожидаемый ответ,
+метаданные) полностью определяется генератором, размером контекста,
+глубиной иголки и seed. Такой кейс генерируется один раз и затем
+воспроизводится для каждой модели свипа: модели видят байт-в-байт
+одинаковый контекст в одной и той же ячейке (32k/50%), результаты
+сравнимы, а префиксный кэш промптов Ollama/llama.cpp срабатывает между
+повторными прогонами.
+
+Ключ — хеш от генератора (класс, test_id, хеш исходников модуля
+генератора и baselogic/core/haystack.py — правка генератора или сборки
+стога инвалидирует кэш), context_k, depth_percent и seed. Кейсы
+хранятся на диске (<dir>/<ключ[:2]>/<ключ>.json, вытеснение LRU как в
+CompileCache) и в памяти процесса: повторная выдача кейса следующей
+модели не читает диск и не копирует промпт.
+
+Настройки (переменные окружения):
+    BC_HAYSTACK_CACHE         — включить кэш (true)
+    BC_HAYSTACK_CACHE_DIR     — каталог (results/cache/haystacks)
+    BC_HAYSTACK_CACHE_MAX_MB  — лимит размера на диске (1024)
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from baselogic.core.compile_cache import CompileCache
+from baselogic.core.shared import LazySingleton, env_flag
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "results" / "cache" / "haystacks"
+
+# Сколько последних кейсов держать в памяти процесса (промпт 128k — около мегабайта)
+MEMORY_ENTRIES = 64
+
+# Сборка стога (пулы предложений, заполнение контекста) живёт вне модуля генератора
+HAYSTACK_SOURCE = Path(__file__).with_name("haystack.py")
+
+
+@functools.lru_cache(maxsize=None)
+def _source_fingerprint(generator_class: type) -> str:
+    """
+    Хеш исходников модуля генератора и haystack.py: изменение генерации
+    или сборки стога делает старые кейсы промахом.
+    """
+    digest = hashlib.sha256()
+    try:
+        paths = [Path(inspect.getfile(generator_class)), HAYSTACK_SOURCE]
+    except TypeError:
+        return "unknown"
+    for path in paths:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            return "unknown"
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class HaystackCache(CompileCache):
+    """Дисковый кэш кейсов (хранилище и вытеснение CompileCache) с LRU-слоем в памяти."""
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 1024, memory_entries: int = MEMORY_ENTRIES):
+        super().__init__(cache_dir, max_size_mb)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def case_key(generator: Any, context_k: int, depth_percent: int, seed: int) -> str:
+        generator_class = type(generator)
+        name = (f"{generator_class.__module__}.{generator_class.__qualname__}"
+                f":{getattr(generator, 'test_id', '')}")
+        return CompileCache.make_key(
+            'haystack', _source_fingerprint(generator_class), f"{name}\0{context_k}\0{depth_percent}\0{seed}"
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            case = self._memory.get(key)
+            if case is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return case
+
+        path = self.find(key, ('.json',))
+        if path is None:
+            return None
+        try:
+            case = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            log.debug("Повреждённый кейс в кэше стогов сена %s", path.name)
+            return None
+        self._remember(key, case)
+        return case
+
+    def put(self, key: str, case: Dict[str, Any]) -> None:
+        self._remember(key, case)
+        self.put_bytes(key, json.dumps(case, ensure_ascii=False).encode('utf-8'), '.json')
+
+    def _remember(self, key: str, case: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = case
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+
+def _create_cache() -> Optional[HaystackCache]:
+    if not env_flag('BC_HAYSTACK_CACHE'):
+        return None
+    return HaystackCache(
+        cache_dir=Path(os.environ.get('BC_HAYSTACK_CACHE_DIR') or DEFAULT_CACHE_DIR),
+        max_size_mb=float(os.environ.get('BC_HAYSTACK_CACHE_MAX_MB', 1024)),
+    )
+
+
+_cache: LazySingleton[HaystackCache] = LazySingleton(_create_cache)
+
+
+def get_haystack_cache() -> Optional[HaystackCache]:
+    """Кэш кейсов процесса или None при BC_HAYSTACK_CACHE=false."""
+    return _cache.get()
+
+
+def cached_case(generator: Any, context_k: int, depth_percent: int, seed: int,
+                build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Кейс из кэша или build(), сохранённый в кэш. build() обязан быть
+    детерминированным по seed — иначе кэш подменит один случайный кейс другим.
+    """
+    cache = get_haystack_cache()
+    if cache is None:
+        return build()
+
+    key = cache.case_key(generator, context_k, depth_percent, seed)
+    case = cache.get(key)
+    if case is not None:
+        log.info("♻️ Кейс %s_%sk_%spct (seed=%s) взят из кэша", getattr(generator, 'test_id', ''),
+                 context_k, depth_percent, seed)
+    else:
+        case = build()
+        cache.put(key, case)
+    # Копия верхнего уровня: промпт общий, но правка метаданных не испортит кэш
+    return {**case, 'metadata': dict(case.get('metadata') or {})}
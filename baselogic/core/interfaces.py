@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Iterable, Union, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterable, Union, List, Optional
 
 
 class ILLMClient(ABC):
@@ -9,7 +10,13 @@ class ILLMClient(ABC):
     """
 
     @abstractmethod
-    def query(self, user_prompt: str,  system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    def query(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            *,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
         """
         Отправляет запрос к LLM и возвращает СТРУКТУРИРОВАННЫЙ ответ.
 
@@ -27,9 +34,23 @@ class ILLMClient(ABC):
             LLMClientError: При ошибках взаимодействия с LLM
             :param user_prompt:
             :param system_prompt:
+            :param use_cache: False — не использовать кэш ответов для этого запроса
         """
         pass
 
+    async def query_async(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            *,
+            use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Асинхронная версия `query`. По умолчанию выполняет синхронный `query`
+        в пуле потоков; AdapterLLMClient переопределяет её нативной реализацией.
+        """
+        return await asyncio.to_thread(self.query, user_prompt, system_prompt, use_cache=use_cache)
+
     @abstractmethod
     def get_model_info(self) -> Dict[str, Any]:
         """
@@ -50,6 +71,21 @@ class ILLMClient(ABC):
         """
         pass
 
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Загружает модель до начала тестов, чтобы время загрузки не попадало
+        в замеры первых запросов.
+
+        Returns:
+            Метрики прогрева (load_duration, warmup_latency_ms) или пустой
+            словарь, если клиент не поддерживает явный прогрев.
+        """
+        return {}
+
+    def unload(self) -> None:
+        """Выгружает модель с сервера после тестов (если клиент это поддерживает)."""
+        return None
+
 
 class ProviderClient(ABC):
     """
@@ -61,6 +97,9 @@ class ProviderClient(ABC):
     конкретного API.
     """
 
+    # Понимает ли API параметр keep_alive (время удержания модели в памяти)
+    supports_keep_alive: bool = False
+
     @abstractmethod
     def prepare_payload(
             self,
@@ -101,6 +140,43 @@ class ProviderClient(ABC):
         """
         ...
 
+    async def send_request_async(
+            self,
+            payload: Dict[str, Any]
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """
+        Асинхронная версия `send_request`.
+
+        Returns:
+            - Если stream=False: Полный JSON-ответ в виде словаря.
+            - Если stream=True: Асинхронный итератор по чанкам ответа.
+
+        Реализация по умолчанию выполняет синхронный `send_request` в пуле
+        потоков; встроенные провайдеры переопределяют её нативным асинхронным HTTP.
+        """
+        response = await asyncio.to_thread(self.send_request, payload)
+        if isinstance(response, dict):
+            return response
+        return _iterate_in_thread(iter(response))
+
+    def preload(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Явно загружает модель на сервере.
+
+        Args:
+            payload: Тело запроса без сообщений (messages=[]), собранное
+                     prepare_payload с теми же опциями, что и у тестов —
+                     иначе сервер перезагрузит модель с другими параметрами.
+
+        Returns:
+            Ответ сервера или None, если провайдер не поддерживает прогрев.
+        """
+        return None
+
+    def unload(self, model: str) -> None:
+        """Выгружает модель из памяти сервера. По умолчанию ничего не делает."""
+        return None
+
     @abstractmethod
     def extract_choices(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -154,6 +230,16 @@ class ProviderClient(ABC):
         ...
 
 
+async def _iterate_in_thread(iterator) -> AsyncIterator[Dict[str, Any]]:
+    """Асинхронный итератор поверх блокирующего: каждый next() — в пуле потоков."""
+    sentinel = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, sentinel)
+        if item is sentinel:
+            return
+        yield item
+
+
 class LLMClientError(Exception):
     """Базовое исключение для ошибок LLM клиентов"""
     pass
@@ -178,6 +264,11 @@ class LLMResponseError(LLMClientError):
     """Исключение для ошибок в ответе LLM"""
     pass
 
+
+class LLMCacheMissError(LLMClientError):
+    """Ответа нет в кэше, а кэш работает в режиме replay (запросы к модели запрещены)"""
+    pass
+
 class LLMRequestError(LLMClientError):
     """Ошибка запроса к LLM (4xx, 5xx)"""
     def __init__(self, message, status_code=None, response_text=None):
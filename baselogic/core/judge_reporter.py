@@ -35,6 +35,8 @@ class JudgeReporter(Reporter):
     Считает Accuracy, Stability, Verbosity/Positional resistance и др.
     """
 
+    TEXT_COLUMNS = Reporter.TEXT_COLUMNS + ('parsed_answer',)
+
     # ──────────────────────────────────────────────────────────────
     def __init__(self, results_dir: Path):
         super().__init__(results_dir)
@@ -3,11 +3,25 @@
 
 import logging
 import os
+import re
 import shutil
 import subprocess
 import tempfile
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from baselogic.core.compile_cache import get_compile_cache
+from baselogic.core.jvm_service import (
+    JVMService,
+    JVMServiceError,
+    JVMServiceStartError,
+    JVMServiceTimeout,
+    STATUS_OK,
+    disable_jvm_service,
+    get_jvm_service,
+)
 
 # -------------------------------------------------------------
 # Настройка логирования
@@ -32,68 +46,116 @@ if load_dotenv:
         load_dotenv(dotenv_path=dotenv_path)
         logger.debug(f"Loaded .env from {dotenv_path}")
 
+# -------------------------------------------------------------
+# Диагностика компилятора с позицией в исходнике:
+# "Main.kt:3:5: error: ..." (kotlinc) или "e: file:///…/Main.kt:3:5 ..." (K2/Gradle-формат)
+_COMPILE_DIAGNOSTIC_RE = re.compile(
+    r'^(?:\S*\.kts?:\d+:\d+: error:|e: \S*\.kts?:\d+:\d+)', re.MULTILINE
+)
+
+
+def is_compile_diagnostic(messages: str) -> bool:
+    """Ошибка компиляции вызвана исходником (а не сбоем компилятора: OOM, нет JDK и т. п.)."""
+    return _COMPILE_DIAGNOSTIC_RE.search(messages) is not None
+
+
 # -------------------------------------------------------------
 class JVMRunnerError(RuntimeError):
     """Исключение, бросаемое при проблемах запуска JVM‑компилятора/вывода."""
     pass
 
 # -------------------------------------------------------------
-class JVMRunner:
-    def __init__(
-            self,
-            java_home: Optional[str] = None,
-            kotlin_home: Optional[str] = None,
-    ) -> None:
-        self.env = os.environ.copy()
+@dataclass(frozen=True)
+class JVMToolchain:
+    """Найденные java/kotlinc, их версии и возможности. Определяется один раз на процесс."""
+    java_path: Path
+    kotlinc_path: Path
+    env: Dict[str, str]
+    use_shell: bool
+    java_version: str
+    kotlin_version: str
+
+    @property
+    def kotlin_home(self) -> Path:
+        """Каталог дистрибутива Kotlin (bin/kotlinc → ..)."""
+        return Path(self.kotlinc_path).resolve().parent.parent
+
+    @property
+    def java_major(self) -> int:
+        match = re.match(r"(?:1\.)?(\d+)", self.java_version)
+        return int(match.group(1)) if match else 0
+
+    @property
+    def version(self) -> str:
+        """Версия тулчейна (входит в ключ кэша компиляции)."""
+        return f"kotlin={self.kotlin_version}|java={self.java_path}@{self.java_version}"
+
+    @property
+    def supports_service(self) -> bool:
+        """Тёплый сервис компиляции: нужен Java 11+ (single-file source) и kotlin-compiler.jar."""
+        return self.java_major >= 11 and (self.kotlin_home / "lib" / "kotlin-compiler.jar").is_file()
+
+    @classmethod
+    def discover(cls, java_home: Optional[str] = None, kotlin_home: Optional[str] = None) -> "JVMToolchain":
+        """Ищет java и kotlinc и проверяет, что они запускаются. Бросает JVMRunnerError."""
+        env = os.environ.copy()
 
         if not java_home:
-            java_home = self.env.get("JAVA_HOME")
+            java_home = env.get("JAVA_HOME")
 
         if java_home:
             jh = Path(java_home).expanduser().resolve()
             bin_dir = jh / "bin"
 
             # Обновляем переменные для подпроцессов
-            self.env["JAVA_HOME"] = str(jh)
+            env["JAVA_HOME"] = str(jh)
             # Добавляем bin в начало PATH, чтобы subprocess видел правильную версию
-            self.env["PATH"] = f"{str(bin_dir)}{os.pathsep}{self.env.get('PATH', '')}"
+            env["PATH"] = f"{str(bin_dir)}{os.pathsep}{env.get('PATH', '')}"
 
             logger.debug(f"Configured JAVA_HOME: {jh}")
         else:
             logger.warning("JAVA_HOME not set. Relying on system PATH.")
 
-        # ── 4️⃣ Настройка KOTLIN_HOME -----------------------------------
+        # ── Настройка KOTLIN_HOME -----------------------------------
         if kotlin_home is None:
-            kotlin_home = self.env.get("KOTLIN_HOME")
-
-        # Флаг для использования shell (нужен для .bat файлов на Windows)
-        self.use_shell: bool = False
-
-        # ── 5️⃣ Поиск исполняемых файлов ----------------------------------
-        # Ищем kotlinc
-        self.kotlinc_path = self._find_executable("kotlinc", kotlin_home)
+            kotlin_home = env.get("KOTLIN_HOME")
 
+        # ── Поиск исполняемых файлов ----------------------------------
+        kotlinc_path = cls._find_executable("kotlinc", kotlin_home, env)
         # Ищем java (ВАЖНО: передаем java_home явно, чтобы не зависеть только от which)
-        self.java_path = self._find_executable("java", java_home)
+        java_path = cls._find_executable("java", java_home, env)
 
         # Проверки
-        if not self.kotlinc_path:
+        if not kotlinc_path:
             raise JVMRunnerError(
                 "Не найден kotlinc. Установите Kotlin SDK и укажите KOTLIN_HOME в .env"
             )
-        if not self.java_path:
+        if not java_path:
             raise JVMRunnerError(
                 "Не найден java. Проверьте JAVA_HOME в .env"
             )
 
+        # Флаг для использования shell (нужен для .bat файлов на Windows)
+        use_shell = any(p.suffix.lower() in (".bat", ".cmd") for p in (kotlinc_path, java_path))
+
+        toolchain = cls(
+            java_path=java_path,
+            kotlinc_path=kotlinc_path,
+            env=env,
+            use_shell=use_shell,
+            java_version=cls._probe_java_version(java_path, env, use_shell),
+            kotlin_version=cls._probe_kotlin_version(kotlinc_path, env, use_shell),
+        )
         logger.info(
             f"[+] JVM Environment configured.\n"
-            f"    Java:   {self.java_path}\n"
-            f"    Kotlin: {self.kotlinc_path}"
+            f"    Java:   {toolchain.java_path} ({toolchain.java_version})\n"
+            f"    Kotlin: {toolchain.kotlinc_path} ({toolchain.kotlin_version})"
         )
+        return toolchain
 
     # -------------------------------------------------------------
-    def _find_executable(self, name: str, home: Optional[str] = None) -> Path:
+    @staticmethod
+    def _find_executable(name: str, home: Optional[str], env: Dict[str, str]) -> Optional[Path]:
         """
         Ищет исполняемый файл. Приоритет:
         1. home/bin/{name}[.exe/.bat] (если home задан)
@@ -103,8 +165,7 @@ class JVMRunner:
 
         # 1. Если задан home, ищем строго там
         if home:
-            base = Path(home).expanduser().resolve()
-            bin_dir = base / "bin"
+            bin_dir = Path(home).expanduser().resolve() / "bin"
 
             # На Windows проверяем расширения
             if os.name == 'nt':
@@ -113,37 +174,121 @@ class JVMRunner:
             else:
                 candidates.append(bin_dir / name)
 
-        # 2. Проверяем кандидатов из home
         for candidate in candidates:
             if candidate.is_file():
                 logger.debug(f"Found {name} in home: {candidate}")
-                if candidate.suffix.lower() in (".bat", ".cmd"):
-                    self.use_shell = True
                 return candidate
 
-        # 3. Если в home пусто, ищем в PATH (используя обновленный PATH из self.env)
-        # Примечание: shutil.which по умолчанию смотрит os.environ, если path не передан.
-        # Передаем явно self.env['PATH'], так как мы могли его изменить в __init__
-        path_candidate = shutil.which(name, path=self.env.get("PATH"))
-
+        # 2. Ищем в PATH (используя обновленный PATH из env)
+        path_candidate = shutil.which(name, path=env.get("PATH"))
         if path_candidate:
-            cand_path = Path(path_candidate)
-            logger.debug(f"Found {name} in PATH: {cand_path}")
-            # Проверка расширения для флага shell
-            if cand_path.suffix.lower() in (".bat", ".cmd"):
-                self.use_shell = True
-            return cand_path
-
-        msg = f"Executable '{name}' not found. (Checked home={home})"
-        # Возвращаем None или вызываем ошибку, здесь оставим None для обработки выше,
-        # но так как метод аннотирован как -> Path, лучше сразу вернуть ошибку или путь.
-        # В текущей логике __init__ ожидает Path или падает позже?
-        # Сейчас вернем None, а __init__ проверит. Но лучше сделаем raise.
-        # Для совместимости с текущим кодом вернем None (но type hint ругается),
-        # поэтому перепишем на явный поиск.
-
-        # Если ничего не нашли - это ошибка уровня runner'а
-        return None # type: ignore
+            logger.debug(f"Found {name} in PATH: {path_candidate}")
+            return Path(path_candidate)
+
+        logger.debug(f"Executable '{name}' not found. (Checked home={home})")
+        return None
+
+    @staticmethod
+    def _probe_java_version(java_path: Path, env: Dict[str, str], use_shell: bool) -> str:
+        """Запускает `java -version`: заодно проверяет, что JVM вообще стартует."""
+        try:
+            result = subprocess.run(
+                [str(java_path), "-version"], env=env, capture_output=True, text=True,
+                timeout=30, shell=use_shell,
+            )
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            raise JVMRunnerError(f"java не запускается: {exc}") from exc
+        if result.returncode != 0:
+            raise JVMRunnerError(f"java не запускается:\n{result.stderr.strip()}")
+        match = re.search(r'version "([^"]+)"', result.stderr + result.stdout)
+        return match.group(1) if match else "unknown"
+
+    @staticmethod
+    def _probe_kotlin_version(kotlinc_path: Path, env: Dict[str, str], use_shell: bool) -> str:
+        """Версия из build.txt дистрибутива, иначе `kotlinc -version` (холодный старт, один раз)."""
+        build_file = Path(kotlinc_path).resolve().parent.parent / "build.txt"
+        try:
+            return build_file.read_text(encoding="utf-8").strip()
+        except OSError:
+            pass
+        try:
+            result = subprocess.run(
+                [str(kotlinc_path), "-version"], env=env, capture_output=True, text=True,
+                timeout=120, shell=use_shell,
+            )
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            raise JVMRunnerError(f"kotlinc не запускается: {exc}") from exc
+        match = re.search(r"kotlinc-jvm\s+(\S+)", result.stderr + result.stdout)
+        if result.returncode != 0 or not match:
+            raise JVMRunnerError(f"kotlinc не запускается:\n{(result.stderr or result.stdout).strip()}")
+        return match.group(1)
+
+
+_toolchain: Optional[JVMToolchain] = None
+_toolchain_error: Optional[str] = None
+_toolchain_resolved = False
+_toolchain_lock = threading.Lock()
+
+
+def get_jvm_toolchain() -> JVMToolchain:
+    """
+    Общий для процесса тулчейн из JAVA_HOME/KOTLIN_HOME/PATH.
+    Поиск выполняется один раз; если тулчейн недоступен, каждый вызов
+    сразу бросает JVMRunnerError с исходной причиной.
+    """
+    global _toolchain, _toolchain_error, _toolchain_resolved
+    with _toolchain_lock:
+        if not _toolchain_resolved:
+            try:
+                _toolchain = JVMToolchain.discover()
+            except JVMRunnerError as exc:
+                _toolchain_error = str(exc)
+            _toolchain_resolved = True
+        if _toolchain is None:
+            raise JVMRunnerError(_toolchain_error)
+        return _toolchain
+
+
+def check_jvm_toolchain() -> Dict[str, Any]:
+    """Проверка готовности Kotlin-тестов (для вывода перед прогоном)."""
+    try:
+        toolchain = get_jvm_toolchain()
+    except JVMRunnerError as exc:
+        return {'available': False, 'error': str(exc)}
+    return {
+        'available': True,
+        'java': str(toolchain.java_path),
+        'java_version': toolchain.java_version,
+        'kotlinc': str(toolchain.kotlinc_path),
+        'kotlin_version': toolchain.kotlin_version,
+        'kotlin_service': toolchain.supports_service,
+    }
+
+
+# -------------------------------------------------------------
+class JVMRunner:
+    def __init__(
+            self,
+            java_home: Optional[str] = None,
+            kotlin_home: Optional[str] = None,
+    ) -> None:
+        # Без явных путей используется общий тулчейн процесса (поиск — один раз)
+        if java_home is None and kotlin_home is None:
+            self.toolchain = get_jvm_toolchain()
+        else:
+            self.toolchain = JVMToolchain.discover(java_home, kotlin_home)
+
+        self.env = self.toolchain.env
+        self.java_path = self.toolchain.java_path
+        self.kotlinc_path = self.toolchain.kotlinc_path
+        self.use_shell = self.toolchain.use_shell
+
+        # Таймауты (BC_KOTLIN_COMPILE_TIMEOUT / BC_KOTLIN_RUN_TIMEOUT)
+        self.compile_timeout = int(self.env.get("BC_KOTLIN_COMPILE_TIMEOUT", 30))
+        self.run_timeout = int(self.env.get("BC_KOTLIN_RUN_TIMEOUT", 10))
+
+        # Статистика кэша компиляции для последнего run_kotlin_code (None — кэш не использовался)
+        self.last_compile_cache: Optional[Dict[str, object]] = None
 
     # -------------------------------------------------------------
     def run_kotlin_code(self, kotlin_source: str,
@@ -186,7 +331,150 @@ class JVMRunner:
         else:
             final_source = kotlin_source
 
-        # ── 2️⃣ Стандартный процесс компиляции и запуска ───────────────
+        # ── 2️⃣ Компиляция и запуск: тёплый сервис или холодный kotlinc ─
+        self.last_compile_cache = None
+        service = self._service()
+        if service is not None:
+            try:
+                return self._run_with_service(service, final_source, args or [])
+            except JVMServiceStartError as exc:
+                disable_jvm_service(service, str(exc))
+        return self._run_cold(final_source, args)
+
+    # -------------------------------------------------------------
+    @property
+    def kotlin_home(self) -> Path:
+        return self.toolchain.kotlin_home
+
+    @property
+    def toolchain_version(self) -> str:
+        return self.toolchain.version
+
+    def _compile_cached(
+            self, kind: str, final_source: str, jar_file: Path,
+            compile_fn: Callable[[], Tuple[bool, str]],
+    ) -> Tuple[bool, str]:
+        """
+        Компиляция через кэш артефактов: jar (или сообщения об ошибке компиляции)
+        берётся из кэша, если этот исходник уже компилировался этим тулчейном.
+        Таймауты и сбои компилятора не кэшируются: ошибка попадает в кэш, только
+        если в выводе есть диагностика с позицией в исходнике.
+        """
+        cache = get_compile_cache()
+        if cache is None:
+            return compile_fn()
+
+        key = cache.make_key(kind, self.toolchain_version, final_source)
+        cached = cache.find(key, (".jar", ".err"))
+        if cached is not None:
+            try:
+                if cached.suffix == ".jar":
+                    shutil.copyfile(cached, jar_file)
+                    result = (True, "")
+                else:
+                    result = (False, cached.read_text(encoding="utf-8"))
+                self.last_compile_cache = cache.stats(hit=True)
+                return result
+            except OSError as exc:
+                logger.debug(f"Compile cache entry vanished, recompiling: {exc}")
+
+        compiled, messages = compile_fn()
+        if compiled:
+            cache.put_file(key, jar_file, ".jar")
+        elif is_compile_diagnostic(messages):
+            cache.put_bytes(key, messages.encode("utf-8"), ".err")
+        else:
+            logger.debug("Compiler failed without source diagnostics, result not cached")
+        self.last_compile_cache = cache.stats(hit=False)
+        return compiled, messages
+
+    def _service(self) -> Optional[JVMService]:
+        if not self.toolchain.supports_service:
+            return None
+        return get_jvm_service(Path(self.java_path), self.kotlin_home, self.env)
+
+    @staticmethod
+    def _main_class_name(source: str) -> str:
+        """Имя класса с top-level main для файла Main.kt (учитывает package и @file:JvmName)."""
+        jvm_name = re.search(r'@file:JvmName\(\s*"([\w$]+)"\s*\)', source)
+        class_name = jvm_name.group(1) if jvm_name else "MainKt"
+        package = re.search(r'^\s*package\s+([\w.]+)', source, re.MULTILINE)
+        return f"{package.group(1)}.{class_name}" if package else class_name
+
+    def _run_with_service(self, service: JVMService, final_source: str, args: List[str]) -> str:
+        """Компиляция в каталог классов тёплым компилятором и запуск в пуле исполнителей."""
+        with tempfile.TemporaryDirectory() as tmp_dir_str:
+            tmp_dir = Path(tmp_dir_str)
+            src_file = tmp_dir / "Main.kt"
+            classes_jar = tmp_dir / "classes.jar"  # без рантайма: kotlin-stdlib уже в classpath исполнителя
+
+            try:
+                src_file.write_text(final_source, encoding="utf-8")
+            except OSError as exc:
+                return f"Error writing source file: {exc}"
+
+            try:
+                compiled, messages = self._compile_cached(
+                    "kotlin-classes", final_source, classes_jar,
+                    lambda: service.compile(src_file, classes_jar, timeout=self.compile_timeout),
+                )
+            except JVMServiceTimeout:
+                return f"Compilation Timeout ({self.compile_timeout}s)."
+            except JVMServiceStartError:
+                raise
+            except JVMServiceError as exc:
+                logger.warning(f"Kotlin compiler service failed, falling back to kotlinc: {exc}")
+                return self._run_cold(final_source, args)
+            if not compiled:
+                return f"Compilation Error:\n{messages.strip()}"
+
+            main_class = self._main_class_name(final_source)
+            try:
+                status, stdout, stderr = service.run(classes_jar, main_class, args, timeout=self.run_timeout)
+            except JVMServiceTimeout:
+                return f"Execution Timeout ({self.run_timeout}s)."
+            except JVMServiceStartError:
+                raise
+            except JVMServiceError as exc:
+                # Программа завершила процесс-исполнитель (System.exit и т.п.) —
+                # повторяем запуск в отдельной JVM, чтобы получить её настоящий вывод
+                logger.debug(f"Kotlin executor exited, re-running in a fresh JVM: {exc}")
+                return self._run_class_cold(service, classes_jar, main_class, args)
+
+            if status != STATUS_OK:
+                return f"Runtime Error:\n{stderr.strip()}"
+            return stdout.rstrip("\n")
+
+    def _run_class_cold(self, service: JVMService, classes_jar: Path, main_class: str, args: List[str]) -> str:
+        run_cmd = [
+            str(self.java_path),
+            "-cp", f"{classes_jar}{os.pathsep}{service.stdlib_jar}",
+            main_class,
+        ] + list(args)
+        return self._execute(run_cmd)
+
+    def _execute(self, run_cmd: List[str]) -> str:
+        try:
+            result_run = subprocess.run(
+                run_cmd,
+                env=self.env,
+                capture_output=True,
+                text=True,
+                timeout=self.run_timeout,
+                shell=self.use_shell,
+            )
+            if result_run.returncode != 0:
+                return f"Runtime Error:\n{result_run.stderr.strip()}"
+
+            return result_run.stdout.rstrip("\n")
+
+        except subprocess.TimeoutExpired:
+            return f"Execution Timeout ({self.run_timeout}s)."
+        except Exception as exc:
+            return f"Execution Failed: {exc}"
+
+    def _run_cold(self, final_source: str, args: Optional[list[str]] = None) -> str:
+        """Прежний путь: kotlinc -include-runtime и java -jar в новых JVM."""
         with tempfile.TemporaryDirectory() as tmp_dir_str:
             tmp_dir = Path(tmp_dir_str)
             src_file = tmp_dir / "Main.kt"
@@ -205,44 +493,30 @@ class JVMRunner:
                 str(src_file),
             ]
 
-            try:
+            def compile_jar() -> Tuple[bool, str]:
                 result_compile = subprocess.run(
                     compile_cmd,
                     env=self.env,
                     capture_output=True,
                     text=True,
-                    timeout=30,
+                    timeout=self.compile_timeout,
                     shell=self.use_shell,
                 )
-                if result_compile.returncode != 0:
-                    return f"Compilation Error:\n{result_compile.stderr.strip()}"
+                return result_compile.returncode == 0, result_compile.stderr
+
+            try:
+                compiled, messages = self._compile_cached("kotlin-jar", final_source, jar_file, compile_jar)
+                if not compiled:
+                    return f"Compilation Error:\n{messages.strip()}"
 
             except subprocess.TimeoutExpired:
-                return "Compilation Timeout (30s)."
+                return f"Compilation Timeout ({self.compile_timeout}s)."
             except Exception as exc:
                 return f"Compilation Failed: {exc}"
 
             # Запуск (передаем args в subprocess)
             run_cmd = [str(self.java_path), "-jar", str(jar_file)] + (args or [])
-
-            try:
-                result_run = subprocess.run(
-                    run_cmd,
-                    env=self.env,
-                    capture_output=True,
-                    text=True,
-                    timeout=10,
-                    shell=self.use_shell,
-                )
-                if result_run.returncode != 0:
-                    return f"Runtime Error:\n{result_run.stderr.strip()}"
-
-                return result_run.stdout.rstrip("\n")
-
-            except subprocess.TimeoutExpired:
-                return "Execution Timeout (10s)."
-            except Exception as exc:
-                return f"Execution Failed: {exc}"
+            return self._execute(run_cmd)
 
 # -------------------------------------------------------------
 if __name__ == "__main__":
@@ -0,0 +1,440 @@
+"""
+Долгоживущие JVM-процессы для компиляции и запуска Kotlin-кода.
+
+Холодный `kotlinc -include-runtime` + `java -jar` стоят 5–15 с старта JVM
+на каждую проверку. Вместо этого:
+  - один "тёплый" процесс-компилятор держит загруженный встроенный
+    компилятор (K2JVMCompiler из lib/kotlin-compiler.jar) и компилирует
+    исходники в jar без упаковки рантайма (-include-runtime не нужен);
+  - пул процессов-исполнителей с kotlin-stdlib в classpath запускает
+    main() каждого решения в новом URLClassLoader, перехватывая stdout/stderr.
+
+Обе роли — один Java-файл (JVM_SERVICE_SOURCE), запускаемый в режиме
+single-file source (Java 11+), поэтому отдельная сборка не нужна.
+Протокол: строка запроса — поля в base64 через табуляцию; строка ответа —
+"<маркер>\\t<статус>\\t<stdout>\\t<stderr>".
+
+Процесс, не ответивший за отведённое время, убивается и перезапускается
+при следующем запросе. Если сервис запустить не удалось (нет Java 11+,
+нет kotlin-compiler.jar), JVMRunner использует прежний холодный путь.
+
+Настройки (переменные окружения):
+    BC_KOTLIN_SERVICE          — использовать сервис (true)
+    BC_KOTLIN_EXECUTORS        — число процессов-исполнителей (2)
+    BC_KOTLIN_COMPILE_TIMEOUT  — лимит компиляции, с (30)
+    BC_KOTLIN_RUN_TIMEOUT      — лимит выполнения, с (10)
+"""
+import atexit
+import base64
+import hashlib
+import logging
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_MARKER = "@@JVMSERVICE@@"
+STATUS_OK = "OK"
+STATUS_ERROR = "ERR"
+STATUS_READY = "READY"
+
+# Старт JVM и загрузка компилятора не входят в лимиты запросов
+STARTUP_TIMEOUT = 120.0
+WARMUP_SOURCE = 'fun main() {\n    println("warmup")\n}\n'
+
+JVM_SERVICE_SOURCE = r'''
+import java.io.*;
+import java.lang.reflect.*;
+import java.net.*;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.*;
+import java.util.*;
+
+public class JvmService {
+    static final String MARKER = "@@JVMSERVICE@@";
+
+    interface Handler {
+        String[] handle(List<String> fields) throws Exception;
+    }
+
+    public static void main(String[] argv) throws Exception {
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        Handler handler = "compile".equals(argv[0]) ? new Compiler(argv[1]) : new Executor();
+        reply(protocol, new String[]{"READY", "", ""});
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            List<String> fields = new ArrayList<>();
+            for (String part : line.split("\t", -1)) {
+                fields.add(new String(Base64.getDecoder().decode(part), StandardCharsets.UTF_8));
+            }
+            String[] result;
+            try {
+                result = handler.handle(fields);
+            } catch (Throwable t) {
+                StringWriter trace = new StringWriter();
+                t.printStackTrace(new PrintWriter(trace));
+                result = new String[]{"ERR", "", trace.toString()};
+            }
+            reply(protocol, result);
+        }
+    }
+
+    static void reply(PrintStream protocol, String[] result) {
+        Base64.Encoder encoder = Base64.getEncoder();
+        protocol.println(MARKER + "\t" + result[0]
+                + "\t" + encoder.encodeToString(result[1].getBytes(StandardCharsets.UTF_8))
+                + "\t" + encoder.encodeToString(result[2].getBytes(StandardCharsets.UTF_8)));
+        protocol.flush();
+    }
+
+    /** fields: source, outputDir. Компилятор загружается через reflection: у исполнителей его нет в classpath. */
+    static class Compiler implements Handler {
+        final Class<?> compilerClass;
+        final Method exec;
+        final String kotlinHome;
+
+        Compiler(String kotlinHome) throws Exception {
+            this.compilerClass = Class.forName("org.jetbrains.kotlin.cli.jvm.K2JVMCompiler");
+            this.exec = compilerClass.getMethod("exec", PrintStream.class, String[].class);
+            this.kotlinHome = kotlinHome;
+        }
+
+        public String[] handle(List<String> fields) throws Exception {
+            ByteArrayOutputStream messages = new ByteArrayOutputStream();
+            PrintStream err = new PrintStream(messages, true, "UTF-8");
+            Object compiler = compilerClass.getConstructor().newInstance();
+            Object exitCode = exec.invoke(compiler, err, (Object) new String[]{
+                    "-kotlin-home", kotlinHome, "-d", fields.get(1), fields.get(0)});
+            err.flush();
+            String status = "OK".equals(String.valueOf(exitCode)) ? "OK" : "ERR";
+            return new String[]{status, "", messages.toString("UTF-8")};
+        }
+    }
+
+    /** fields: classpath entry (jar или каталог классов), mainClass, args... */
+    static class Executor implements Handler {
+        public String[] handle(List<String> fields) throws Exception {
+            ByteArrayOutputStream out = new ByteArrayOutputStream();
+            ByteArrayOutputStream err = new ByteArrayOutputStream();
+            PrintStream savedOut = System.out;
+            PrintStream savedErr = System.err;
+            InputStream savedIn = System.in;
+            Set<Thread> before = new HashSet<>(Thread.getAllStackTraces().keySet());
+            String status = "OK";
+
+            URL[] urls = {Paths.get(fields.get(0)).toUri().toURL()};
+            try (URLClassLoader loader = new URLClassLoader(urls, ClassLoader.getSystemClassLoader())) {
+                System.setOut(new PrintStream(out, true, "UTF-8"));
+                System.setErr(new PrintStream(err, true, "UTF-8"));
+                System.setIn(new ByteArrayInputStream(new byte[0]));
+                Thread.currentThread().setContextClassLoader(loader);
+
+                Method main = Class.forName(fields.get(1), true, loader).getMethod("main", String[].class);
+                String[] args = fields.subList(2, fields.size()).toArray(new String[0]);
+                try {
+                    main.invoke(null, (Object) args);
+                } catch (InvocationTargetException e) {
+                    status = "ERR";
+                    System.err.print("Exception in thread \"main\" ");
+                    e.getCause().printStackTrace();
+                }
+                // Как и обычная JVM, ждём потоки, запущенные программой
+                for (Thread thread : Thread.getAllStackTraces().keySet()) {
+                    if (!before.contains(thread) && !thread.isDaemon()) {
+                        thread.join();
+                    }
+                }
+            } finally {
+                System.out.flush();
+                System.err.flush();
+                System.setOut(savedOut);
+                System.setErr(savedErr);
+                System.setIn(savedIn);
+                Thread.currentThread().setContextClassLoader(ClassLoader.getSystemClassLoader());
+            }
+            return new String[]{status, out.toString("UTF-8"), err.toString("UTF-8")};
+        }
+    }
+}
+'''
+
+
+class JVMServiceError(RuntimeError):
+    """Процесс сервиса недоступен (не запустился или аварийно завершился)."""
+
+
+class JVMServiceStartError(JVMServiceError):
+    """Процесс сервиса не удалось запустить — дальше используется холодный путь."""
+
+
+class JVMServiceTimeout(JVMServiceError):
+    """Процесс не ответил вовремя и был остановлен."""
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _encode(value: str) -> str:
+    return base64.b64encode(value.encode('utf-8')).decode('ascii')
+
+
+def _decode(value: str) -> str:
+    return base64.b64decode(value).decode('utf-8', errors='replace')
+
+
+def service_source_path() -> Path:
+    """Java-файл сервиса во временном каталоге (имя каталога зависит от содержимого)."""
+    digest = hashlib.sha256(JVM_SERVICE_SOURCE.encode('utf-8')).hexdigest()[:12]
+    path = Path(tempfile.gettempdir()) / f"ai-reasoning-lab-jvm-{digest}" / "JvmService.java"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(JVM_SERVICE_SOURCE, encoding='utf-8')
+        os.replace(tmp, path)
+    return path
+
+
+class ServiceProcess:
+    """Один долгоживущий процесс: запросы выполняются строго по очереди."""
+
+    def __init__(self, cmd: List[str], env: Dict[str, str], name: str,
+                 startup_timeout: float = STARTUP_TIMEOUT):
+        self.name = name
+        self.jobs = 0
+        self._stderr = tempfile.TemporaryFile()
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        try:
+            self.process = subprocess.Popen(
+                cmd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=self._stderr, text=True, encoding='utf-8', bufsize=1,
+            )
+        except OSError as exc:
+            self._stderr.close()
+            raise JVMServiceStartError(f"{name}: {exc}") from exc
+        self._reader = threading.Thread(target=self._read_stdout, name=f"{name}-reader", daemon=True)
+        self._reader.start()
+        try:
+            status, _, _ = self._receive(startup_timeout)
+        except JVMServiceError as exc:
+            self.close()
+            raise JVMServiceStartError(str(exc)) from exc
+        if status != STATUS_READY:
+            self.close()
+            raise JVMServiceStartError(f"{name}: неожиданный ответ при старте: {status}")
+
+    def _read_stdout(self) -> None:
+        for line in self.process.stdout:
+            if line.startswith(RESPONSE_MARKER):
+                self._lines.put(line.rstrip('\n'))
+        self._lines.put(None)
+
+    def _stderr_tail(self) -> str:
+        try:
+            self._stderr.seek(0)
+            return self._stderr.read().decode('utf-8', errors='replace')[-2000:]
+        except (OSError, ValueError):
+            return ""
+
+    def _receive(self, timeout: float) -> Tuple[str, str, str]:
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            self.close()
+            raise JVMServiceTimeout(f"{self.name}: нет ответа за {timeout} с")
+        if line is None:
+            raise JVMServiceError(f"{self.name}: процесс завершился. {self._stderr_tail()}".strip())
+        _, status, stdout, stderr = line.split('\t')
+        return status, _decode(stdout), _decode(stderr)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, fields: List[str], timeout: float) -> Tuple[str, str, str]:
+        """Отправляет запрос и ждёт ответ: (статус, stdout, stderr)."""
+        try:
+            self.process.stdin.write('\t'.join(_encode(f) for f in fields) + '\n')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            raise JVMServiceError(f"{self.name}: процесс недоступен: {exc}") from exc
+        self.jobs += 1
+        return self._receive(timeout)
+
+    def close(self) -> None:
+        if self.alive:
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except (OSError, AttributeError):
+                pass
+        self._stderr.close()
+
+
+class JVMService:
+    """
+    Тёплый компилятор + пул исполнителей для одного набора java/kotlinc.
+    Потокобезопасен: компиляции идут по очереди, запуски — параллельно
+    (по числу исполнителей).
+    """
+
+    def __init__(self, java_path: Path, kotlin_home: Path, env: Dict[str, str],
+                 executors: Optional[int] = None, max_jobs_per_executor: int = 200):
+        self.java_path = Path(java_path)
+        self.kotlin_home = Path(kotlin_home)
+        self.env = env
+        self.size = executors or int(os.environ.get('BC_KOTLIN_EXECUTORS', 2))
+        self.max_jobs_per_executor = max_jobs_per_executor
+
+        lib = self.kotlin_home / "lib"
+        for jar in ("kotlin-compiler.jar", "kotlin-stdlib.jar"):
+            if not (lib / jar).is_file():
+                raise JVMServiceError(f"Не найден {lib / jar}")
+        self.stdlib_jar = lib / "kotlin-stdlib.jar"
+        self.source_path = service_source_path()
+
+        self._compiler: Optional[ServiceProcess] = None
+        self._compile_lock = threading.Lock()
+        self._idle: "queue.Queue[ServiceProcess]" = queue.Queue()
+        self._started = 0
+        self._start_lock = threading.Lock()
+
+    # ── компиляция ──────────────────────────────────────────────────────
+    def _start_compiler(self) -> ServiceProcess:
+        cmd = [
+            str(self.java_path), "-Xss2m", "-XX:+UseParallelGC",
+            "-cp", str(self.kotlin_home / "lib" / "*"),
+            str(self.source_path), "compile", str(self.kotlin_home),
+        ]
+        compiler = ServiceProcess(cmd, self.env, name="kotlin-compiler")
+        # Прогрев: первая компиляция загружает и JIT-компилирует фронтенд
+        with tempfile.TemporaryDirectory() as tmp:
+            src = Path(tmp) / "Warmup.kt"
+            src.write_text(WARMUP_SOURCE, encoding='utf-8')
+            try:
+                status, _, messages = compiler.request([str(src), str(Path(tmp) / "classes")], STARTUP_TIMEOUT)
+            except JVMServiceError as exc:
+                compiler.close()
+                raise JVMServiceStartError(str(exc)) from exc
+        if status != STATUS_OK:
+            compiler.close()
+            raise JVMServiceStartError(f"прогрев компилятора не удался: {messages.strip()[:500]}")
+        logger.info("[+] Kotlin compiler service started (%s)", self.kotlin_home)
+        return compiler
+
+    def compile(self, source_file: Path, output: Path, timeout: float) -> Tuple[bool, str]:
+        """Компилирует исходник в output (.jar или каталог). Возвращает (успех, сообщения компилятора)."""
+        with self._compile_lock:
+            if self._compiler is None or not self._compiler.alive:
+                self._compiler = self._start_compiler()
+            try:
+                status, _, messages = self._compiler.request([str(source_file), str(output)], timeout)
+            except JVMServiceError:
+                self._compiler.close()
+                self._compiler = None
+                raise
+            return status == STATUS_OK, messages
+
+    # ── запуск ──────────────────────────────────────────────────────────
+    def _start_executor(self) -> ServiceProcess:
+        cmd = [
+            str(self.java_path), "-Xss2m", "-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1",
+            "-cp", str(self.stdlib_jar),
+            str(self.source_path), "run",
+        ]
+        return ServiceProcess(cmd, self.env, name="kotlin-executor")
+
+    def _acquire_executor(self) -> ServiceProcess:
+        with self._start_lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                try:
+                    return self._start_executor()
+                except JVMServiceStartError:
+                    self._started -= 1
+                    raise
+        return self._idle.get()
+
+    def _release_executor(self, executor: ServiceProcess, healthy: bool) -> None:
+        if healthy and executor.alive and executor.jobs < self.max_jobs_per_executor:
+            self._idle.put(executor)
+            return
+        executor.close()
+        with self._start_lock:
+            self._started -= 1
+
+    def run(self, classpath: Path, main_class: str, args: List[str], timeout: float) -> Tuple[str, str, str]:
+        """Запускает main_class из classpath (jar или каталог). Возвращает (статус, stdout, stderr)."""
+        executor = self._acquire_executor()
+        healthy = False
+        try:
+            result = executor.request([str(classpath), main_class] + list(args), timeout)
+            healthy = True
+            return result
+        finally:
+            self._release_executor(executor, healthy)
+
+    def close(self) -> None:
+        with self._compile_lock:
+            if self._compiler is not None:
+                self._compiler.close()
+                self._compiler = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_services: Dict[Tuple[str, str], Optional[JVMService]] = {}
+_services_lock = threading.Lock()
+
+
+def get_jvm_service(java_path: Path, kotlin_home: Path, env: Dict[str, str]) -> Optional[JVMService]:
+    """
+    Общий для процесса сервис для данного java/kotlin (None — сервис
+    отключён или недоступен, нужен холодный запуск).
+    """
+    if not _env_flag('BC_KOTLIN_SERVICE', True):
+        return None
+    key = (str(java_path), str(kotlin_home))
+    with _services_lock:
+        if key not in _services:
+            try:
+                _services[key] = JVMService(java_path, kotlin_home, env)
+            except JVMServiceError as exc:
+                logger.warning("Kotlin service unavailable, using cold kotlinc/java: %s", exc)
+                _services[key] = None
+        return _services[key]
+
+
+def disable_jvm_service(service: JVMService, reason: str) -> None:
+    """Отключает сервис, который не удалось запустить (дальше — холодный путь)."""
+    logger.warning("Kotlin service disabled, using cold kotlinc/java: %s", reason)
+    service.close()
+    with _services_lock:
+        for key, value in list(_services.items()):
+            if value is service:
+                _services[key] = None
+
+
+@atexit.register
+def _close_services() -> None:
+    for service in list(_services.values()):
+        if service is not None:
+            service.close()
@@ -0,0 +1,99 @@
+"""
+Общий для всех верификаторов сервис лемматизации русского текста.
+
+pymorphy2.MorphAnalyzer загружает словари сотни миллисекунд и занимает
+десятки мегабайт. Раньше каждый модуль создавал свой анализатор при
+импорте (то есть уже при сканировании плагинов), а каждое слово
+разбиралось заново при каждой проверке. Теперь анализатор один на
+процесс и создаётся при первой лемматизации, а леммы запоминаются в
+ограниченном LRU-кэше.
+
+Настройки (переменные окружения):
+    BC_LEMMA_CACHE_SIZE — число запоминаемых словоформ (65536)
+"""
+import functools
+import logging
+import os
+import re
+import threading
+from typing import Any, Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+LEMMA_CACHE_SIZE = int(os.environ.get('BC_LEMMA_CACHE_SIZE', 65536))
+
+_WORD_RE = re.compile(r'\w+')
+
+_analyzer: Any = None
+_analyzer_error: Optional[str] = None
+_analyzer_resolved = False
+_analyzer_lock = threading.Lock()
+
+
+def get_morph_analyzer() -> Any:
+    """
+    Общий pymorphy2.MorphAnalyzer (создаётся при первом вызове).
+    Загрузка выполняется один раз: если pymorphy2 недоступен или
+    несовместим, каждый вызов сразу бросает RuntimeError с исходной причиной.
+    """
+    global _analyzer, _analyzer_error, _analyzer_resolved
+    if _analyzer is not None:
+        return _analyzer
+    with _analyzer_lock:
+        if not _analyzer_resolved:
+            try:
+                _analyzer = _load_analyzer()
+            except RuntimeError as e:
+                _analyzer_error = str(e)
+            _analyzer_resolved = True
+        if _analyzer is None:
+            raise RuntimeError(_analyzer_error)
+        return _analyzer
+
+
+def _load_analyzer() -> Any:
+    log.info("Инициализация Pymorphy2 MorphAnalyzer...")
+    try:
+        import pymorphy2
+        analyzer = pymorphy2.MorphAnalyzer()
+    except AttributeError as e:
+        log.critical("КРИТИЧЕСКАЯ ОШИБКА: Ваша версия Pymorphy2 несовместима с вашей версией Python.")
+        log.critical("ПОЖАЛУЙСТА, ОБНОВИТЕ PYMORPHY2: pip install --upgrade pymorphy2")
+        raise RuntimeError(f"Pymorphy2 MorphAnalyzer не был инициализирован: {e}") from e
+    except Exception as e:
+        log.error("Не удалось инициализировать Pymorphy2 MorphAnalyzer: %s", e)
+        raise RuntimeError(f"Pymorphy2 MorphAnalyzer не был инициализирован: {e}") from e
+    log.info("✅ Pymorphy2 MorphAnalyzer успешно инициализирован.")
+    return analyzer
+
+
+def is_available() -> bool:
+    """Можно ли лемматизировать (загружает анализатор, если он ещё не загружен)."""
+    try:
+        get_morph_analyzer()
+    except RuntimeError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemma(word: str) -> str:
+    """Нормальная форма слова (первый разбор pymorphy2)."""
+    return get_morph_analyzer().parse(word)[0].normal_form
+
+
+def lemmatize(tokens: Iterable[str]) -> List[str]:
+    """Леммы токенов в том же порядке; каждая словоформа разбирается один раз на пакет."""
+    tokens = list(tokens)
+    lemmas = {token: lemma(token) for token in dict.fromkeys(tokens)}
+    return [lemmas[token] for token in tokens]
+
+
+def lemmatize_text(text: str) -> List[str]:
+    """Леммы всех слов текста (в нижнем регистре)."""
+    return lemmatize(_WORD_RE.findall(text.lower()))
+
+
+def cache_info() -> functools._CacheInfo:
+    """Статистика кэша лемм (hits/misses/currsize)."""
+    return lemma.cache_info()
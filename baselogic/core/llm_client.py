@@ -1,11 +1,22 @@
 import logging
-from collections.abc import Iterable
-from typing import Any, Dict, List, Union
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from .interfaces import ProviderClient
+from .interfaces import LLMCacheMissError, ProviderClient
+from .response_cache import ResponseCache
 
 log = logging.getLogger(__name__)
 
+# Опции секции inference, которые управляют клиентом/раннером и не должны
+# попадать в payload запроса к API.
+CLIENT_SIDE_OPTIONS = ('stream', 'max_concurrency')
+
+# Результат проверки кэша последним chat/chat_async в текущем потоке (задаче asyncio):
+# None — ответ получен от модели, иначе записанные тайминги исходного запроса
+_cache_hit_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('cache_hit_timings', default=None)
+
 
 class LLMClient:
     """
@@ -13,17 +24,69 @@ class LLMClient:
     правильному провайдеру и вернуть "сырой" ответ от API.
     """
 
-    def __init__(self, provider: ProviderClient, model_config: Dict[str, Any], show_payload = True):
+    def __init__(self, provider: ProviderClient, model_config: Dict[str, Any], show_payload = True,
+                 response_cache: Optional[ResponseCache] = None, keep_alive: Optional[str] = None):
         self.provider = provider
         self.model_config = model_config
         self.show_payload = show_payload
+        self.response_cache = response_cache
+        # Сколько сервер держит модель в памяти после запроса (только для провайдеров с keep_alive)
+        self.keep_alive = keep_alive
         self.model = model_config.get('name', 'unknown_model')
         log.info("LLMClient создан для модели '%s' с провайдером %s", self.model, provider.__class__.__name__)
 
-    def chat(self, messages: List[Dict[str, str]], *, stream: bool = False, **kwargs: Any) -> Union[
-        Dict[str, Any], Iterable[Dict[str, Any]]]:
+    def _request_options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Опции запроса: generation + inference + явные kwargs (без клиентских)."""
+        all_opts = self.model_config.get('generation', {}).copy()
+        all_opts.update(self.model_config.get('inference', {}))
+        all_opts.update(kwargs)
+        for option in CLIENT_SIDE_OPTIONS:
+            all_opts.pop(option, None)
+        if self.keep_alive is not None and self.provider.supports_keep_alive:
+            all_opts.setdefault('keep_alive', self.keep_alive)
+        return all_opts
+
+    def _prepare_request(
+            self, messages: List[Dict[str, str]], stream: bool, use_cache: bool, kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Общая часть chat/chat_async: собирает payload и проверяет кэш.
+
+        Returns:
+            (payload, ключ кэша или None, запись кэша при попадании)
+        """
+        all_opts = self._request_options(kwargs)
+        _cache_hit_timings.set(None)
+
+        cache_key = None
+        if self.response_cache is not None and use_cache:
+            cache_key = self.response_cache.make_key(
+                self.provider.__class__.__name__, self.model, all_opts, messages, stream
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                log.info("💾 Ответ взят из кэша (%s)", cache_key[:12])
+                # Записи, сохранённые до появления таймингов, дают пустой словарь
+                _cache_hit_timings.set(dict(cached.get('timings') or {}))
+                return {}, cache_key, cached
+            if self.response_cache.read_only:
+                raise LLMCacheMissError(
+                    f"Ответ для модели '{self.model}' не найден в кэше (режим replay)"
+                )
+
+        payload = self.provider.prepare_payload(
+            messages, self.model, stream=stream, **all_opts
+        )
+        if self.show_payload:
+            log.debug("--- Финальный Payload ---\n%s", payload)
+        return payload, cache_key, None
+
+    def chat(self, messages: List[Dict[str, str]], *, stream: bool = False, use_cache: bool = True,
+             **kwargs: Any) -> Union[Dict[str, Any], Iterable[Dict[str, Any]]]:
         """
         Отправляет запрос к LLM и возвращает "сырой" ответ от провайдера.
+        Если задан response_cache и use_cache=True, ответ берётся из кэша
+        (или сохраняется в него) — формат ответа при этом не меняется.
 
         Returns:
             - Если stream=False: Полный JSON-ответ от API в виде словаря.
@@ -31,15 +94,82 @@ class LLMClient:
         """
         log.info("Вызван метод chat (stream=%s)", stream)
 
-        all_opts = self.model_config.get('generation', {}).copy()
-        all_opts.update(self.model_config.get('inference', {}))
-        all_opts.update(kwargs)
-        all_opts.pop('stream', None)
+        payload, cache_key, cached = self._prepare_request(messages, stream, use_cache, kwargs)
+        if cached is not None:
+            return self.response_cache.replay_stream(cached['chunks']) if stream else cached['response']
+
+        started_at = time.perf_counter()
+        response = self.provider.send_request(payload)
+        if cache_key is None:
+            return response
+        if stream:
+            return self.response_cache.record_stream(cache_key, response, started_at)
+        self.response_cache.put(cache_key, {
+            'stream': False, 'response': response,
+            'timings': {'total_latency_ms': (time.perf_counter() - started_at) * 1000},
+        })
+        return response
 
+    async def chat_async(self, messages: List[Dict[str, str]], *, stream: bool = False, use_cache: bool = True,
+                         **kwargs: Any) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """
+        Асинхронная версия chat.
+
+        Returns:
+            - Если stream=False: Полный JSON-ответ от API в виде словаря.
+            - Если stream=True: Асинхронный итератор по JSON-чанкам ответа.
+        """
+        log.info("Вызван метод chat_async (stream=%s)", stream)
+
+        payload, cache_key, cached = self._prepare_request(messages, stream, use_cache, kwargs)
+        if cached is not None:
+            return self.response_cache.replay_stream_async(cached['chunks']) if stream else cached['response']
+
+        started_at = time.perf_counter()
+        response = await self.provider.send_request_async(payload)
+        if cache_key is None:
+            return response
+        if stream:
+            return self.response_cache.record_stream_async(cache_key, response, started_at)
+        self.response_cache.put(cache_key, {
+            'stream': False, 'response': response,
+            'timings': {'total_latency_ms': (time.perf_counter() - started_at) * 1000},
+        })
+        return response
+
+    @staticmethod
+    def last_cache_hit_timings() -> Optional[Dict[str, float]]:
+        """
+        Был ли последний запрос этого потока (задачи asyncio) обслужен из кэша.
+
+        Returns:
+            None, если ответ получен от модели; иначе тайминги исходного запроса
+            ({'total_latency_ms', 'time_to_first_token_ms'} или {} для старых записей).
+        """
+        return _cache_hit_timings.get()
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Явно загружает модель с теми же опциями, что и у тестовых запросов.
+
+        Returns:
+            {'load_duration': нс, 'warmup_latency_ms': мс} или {}, если
+            провайдер не поддерживает прогрев.
+        """
         payload = self.provider.prepare_payload(
-            messages, self.model, stream=stream, **all_opts
+            [], self.model, stream=False, **self._request_options({})
         )
-        if self.show_payload:
-            log.debug("--- Финальный Payload ---\n%s", payload)
+        start_time = time.perf_counter()
+        response = self.provider.preload(payload)
+        if response is None:
+            return {}
+        elapsed_s = time.perf_counter() - start_time
+
+        metadata = self.provider.extract_metadata_from_response(response)
+        # Если сервер не сообщил время загрузки, считаем им всё время прогрева
+        load_duration = metadata.get('load_duration') or int(elapsed_s * 1e9)
+        return {'load_duration': load_duration, 'warmup_latency_ms': elapsed_s * 1000}
 
-        return self.provider.send_request(payload)
+    def unload(self) -> None:
+        """Выгружает модель с сервера."""
+        self.provider.unload(self.model)
@@ -1,12 +1,13 @@
 import json
 import logging
 import os
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterable
 from typing import Any, Dict, List, Optional, Union
 
-import requests
+import httpx
 from dotenv import load_dotenv
 
+from .async_http import call_sync, open_stream
 from .interfaces import (
     ProviderClient,
     LLMConnectionError, LLMRequestError, LLMResponseError, LLMTimeoutError
@@ -22,6 +23,8 @@ class OllamaClient(ProviderClient):
     Чистая реализация ProviderClient для нативного API Ollama,
     использующая эндпоинт /api/chat.
     """
+    supports_keep_alive = True
+
     def __init__(self):
         # Правильная последовательность:
         self._load_env_file()           # 1. Загружаем .env файл
@@ -31,8 +34,7 @@ class OllamaClient(ProviderClient):
             self._load_ollama_environment() # 2. Дефолты для отсутствующих переменных
 
         self.endpoint = "http://localhost:11434/api/chat"
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
+        self.headers = {"Content-Type": "application/json"}
         log.info("Ollama клиент инициализирован с настройками из .env")
 
     def _load_env_file(self):
@@ -112,6 +114,12 @@ class OllamaClient(ProviderClient):
 
 
     def send_request(self, payload: Dict[str, Any]) -> Union[Dict[str, Any], Iterable[Dict[str, Any]]]:
+        """Синхронная обёртка над send_request_async."""
+        return call_sync(self.send_request_async(payload))
+
+    async def send_request_async(
+            self, payload: Dict[str, Any]
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
         """
         Отправляет запрос к API, генерируя информативные и типизированные исключения.
         """
@@ -123,54 +131,77 @@ class OllamaClient(ProviderClient):
         log.info("Payload: %s", json.dumps(payload, indent=2, ensure_ascii=False))
 
         try:
-            resp = self.session.post(self.endpoint, json=payload, stream=is_stream, timeout=timeout)
+            resp = await open_stream("POST", self.endpoint, json=payload, headers=self.headers, timeout=timeout)
 
             # Проверяем на ошибки HTTP (4xx, 5xx)
-            if not resp.ok:
+            if resp.is_error:
+                body = await resp.aread()
+                await resp.aclose()
+                response_text = body.decode('utf-8', errors='replace')
                 # Пытаемся извлечь детальное сообщение из тела ответа
                 try:
-                    error_details = resp.json()
+                    error_details = json.loads(response_text)
                     # Ollama обычно возвращает ошибку в ключе 'error'
                     error_message = error_details.get('error', str(error_details))
-                except json.JSONDecodeError:
-                    error_message = resp.text.strip() # Если ответ не JSON
+                except (json.JSONDecodeError, AttributeError):
+                    error_message = response_text.strip()  # Если ответ не JSON
 
                 # Создаем наше кастомное, информативное исключение
                 raise LLMRequestError(
                     message=f"Ошибка API: {error_message}",
                     status_code=resp.status_code,
-                    response_text=resp.text
+                    response_text=response_text
                 )
 
             log.info("Запрос к Ollama успешно выполнен.")
 
             # Обработка успешного ответа
             if is_stream:
-                def stream_generator():
-                    try:
-                        for line in resp.iter_lines():
-                            if line:
-                                yield json.loads(line)
-                    except requests.exceptions.ChunkedEncodingError as e:
-                        raise LLMResponseError(f"Ошибка при чтении потокового ответа: {e}") from e
-                    except json.JSONDecodeError as e:
-                        raise LLMResponseError(f"Ошибка декодирования JSON из потока: {e}") from e
-                return stream_generator()
-            else:
-                try:
-                    return resp.json()
-                except json.JSONDecodeError as e:
-                    raise LLMResponseError(f"Ошибка декодирования JSON из ответа: {e}") from e
-
-        # --- Обработка специфичных ошибок requests ---
-        except requests.exceptions.Timeout as e:
+                return self._iter_stream(resp)
+            try:
+                body = await resp.aread()
+            finally:
+                await resp.aclose()
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError as e:
+                raise LLMResponseError(f"Ошибка декодирования JSON из ответа: {e}") from e
+
+        # --- Обработка специфичных ошибок HTTP-клиента ---
+        except httpx.TimeoutException as e:
             raise LLMTimeoutError(f"Таймаут запроса к {self.endpoint} (>{timeout}s)") from e
-        except requests.exceptions.ConnectionError as e:
+        except httpx.ConnectError as e:
             raise LLMConnectionError(f"Ошибка соединения с {self.endpoint}. Сервер недоступен.") from e
-        except requests.exceptions.RequestException as e:
-            # Общая ошибка для всех остальных проблем requests
+        except httpx.HTTPError as e:
+            # Общая ошибка для всех остальных сетевых проблем
             raise LLMConnectionError(f"Сетевая ошибка Ollama: {e}") from e
 
+    async def _iter_stream(self, resp: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            async for line in resp.aiter_lines():
+                if line:
+                    yield json.loads(line)
+        except httpx.HTTPError as e:
+            raise LLMResponseError(f"Ошибка при чтении потокового ответа: {e}") from e
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(f"Ошибка декодирования JSON из потока: {e}") from e
+        finally:
+            await resp.aclose()
+
+    def preload(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Загружает модель запросом /api/chat без сообщений: Ollama отвечает
+        сразу после загрузки (done_reason='load') и возвращает load_duration.
+        """
+        payload = dict(payload, messages=[], stream=False)
+        log.info("🔥 Предзагрузка модели '%s' (keep_alive=%s)...", payload.get('model'), payload.get('keep_alive'))
+        return self.send_request(payload)
+
+    def unload(self, model: str) -> None:
+        """Выгружает модель из памяти Ollama (keep_alive=0)."""
+        log.info("💤 Выгрузка модели '%s' из Ollama...", model)
+        self.send_request({"model": model, "messages": [], "stream": False, "keep_alive": 0})
+
     def extract_choices(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
         return [response] if 'message' in response else []
 
@@ -1,10 +1,11 @@
 import json
-from collections.abc import Iterable, Generator
+from collections.abc import AsyncIterator, Iterable
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Union
-import requests
+import httpx
 import logging
 
+from .async_http import call_sync, open_stream
 from .interfaces import ProviderClient, LLMResponseError, LLMConnectionError
 
 log = logging.getLogger(__name__)
@@ -18,11 +19,9 @@ class OpenAICompatibleClient(ProviderClient):
         self.endpoint = f"{self.base_url}/chat/completions"
         log.info("OpenAICompatibleClient инициализирован. Endpoint: %s", self.endpoint)
 
-        self.session = requests.Session()
-        headers = {"Content-Type": "application/json"}
+        self.headers = {"Content-Type": "application/json"}
         if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        self.session.headers.update(headers)
+            self.headers["Authorization"] = f"Bearer {api_key}"
 
     def prepare_payload(self, messages: List[Dict[str, str]], model: str, *, stream: bool = False, **kwargs: Any) -> Dict[str, Any]:
         payload: Dict[str, Any] = {"model": model, "messages": messages, "stream": stream}
@@ -30,6 +29,12 @@ class OpenAICompatibleClient(ProviderClient):
         return {k: v for k, v in payload.items() if v is not None}
 
     def send_request(self, payload: Dict[str, Any]) -> Union[Dict[str, Any], Iterable[Dict[str, Any]]]:
+        """Синхронная обёртка над send_request_async."""
+        return call_sync(self.send_request_async(payload))
+
+    async def send_request_async(
+            self, payload: Dict[str, Any]
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
         is_stream = payload.get("stream", False)
         timeout = payload.pop('query_timeout', 600)
 
@@ -37,92 +42,49 @@ class OpenAICompatibleClient(ProviderClient):
         log.info("Payload: %s", json.dumps(payload, indent=2, ensure_ascii=False))
 
         try:
-            resp = self.session.post(self.endpoint, json=payload, stream=is_stream, timeout=timeout)
-            resp.raise_for_status()
+            resp = await open_stream("POST", self.endpoint, json=payload, headers=self.headers, timeout=timeout)
+            if resp.is_error:
+                await resp.aread()
+                await resp.aclose()
+                resp.raise_for_status()
             log.info("Запрос успешно выполнен.")
             if is_stream:
-                return self._handle_stream(resp)
-            else:
-                return resp.json()
-        except requests.exceptions.RequestException as e:
+                return self._iter_stream(resp)
+            try:
+                body = await resp.aread()
+            finally:
+                await resp.aclose()
+            try:
+                return json.loads(body)
+            except json.JSONDecodeError as e:
+                raise LLMResponseError(f"Ошибка декодирования JSON из ответа: {e}") from e
+        except httpx.HTTPError as e:
             log.error("Сетевая ошибка при запросе к %s: %s", self.endpoint, e)
             raise LLMConnectionError(f"Сетевая ошибка: {e}") from e
 
-    def _handle_stream(self, response: requests.Response) -> Generator[Dict[str, Any], None, None]:
-        inside_reasoning = False
-
-        for line in response.iter_lines():
-            if line:
-                decoded_line = line.decode('utf-8')
-                if decoded_line.startswith('data: '):
-                    content_str = decoded_line[6:]
-                    if content_str.strip() == "[DONE]":
-                        break
-                    try:
-                        chunk = json.loads(content_str)
-                        choices = chunk.get("choices", [])
-
-                        if choices and len(choices) > 0:
-                            delta = choices[0].get("delta", {})
-                            # Разные провайдеры могут отдавать поле по-разному (reasoning_content или reasoning)
-                            reasoning_part = delta.get("reasoning") or delta.get("reasoning_content")
-                            content_part = delta.get("content")
-
-                            # 1. Логика НАЧАЛА рассуждения
-                            # Если пришло reasoning, но мы еще не внутри -> отправляем <think>
-                            if reasoning_part and not inside_reasoning:
-                                inside_reasoning = True
-                                yield {
-                                    "choices": [{
-                                        "index": 0,
-                                        "delta": {
-                                            "role": "assistant",
-                                            "content": "<think>\n",  # Отправляем строку, а не словарь
-                                            "reasoning": ""
-                                        }
-                                    }]
-                                }
-
-                            # 2. Логика ЗАВЕРШЕНИЯ рассуждения
-                            # Если мы были внутри, но reasoning пропал, ИЛИ пошел обычный content -> закрываем </think>
-                            # Важно: иногда чанки приходят пустые, нужно проверять смену контекста
-                            if inside_reasoning and not reasoning_part and content_part:
-                                inside_reasoning = False
-                                yield {
-                                    "choices": [{
-                                        "index": 0,
-                                        "delta": {
-                                            "role": "assistant",
-                                            "content": "\n</think>\n",
-                                            "reasoning": ""
-                                        }
-                                    }]
-                                }
-
-                            # 3. Подготовка текущего чанка
-                            # Если есть reasoning, мы можем хотеть отдать его как content (чтобы пользователь видел текст мыслей)
-                            # ИЛИ оставить в поле reasoning, если ваш интерфейс это поддерживает.
-                            # Исходя из extract_delta_from_chunk (return content + reasoning),
-                            # достаточно просто прокинуть чанк дальше, убедившись, что поля на месте.
-
-                            yield chunk
-
-                            # Если чанк был последним с reasoning, но без content, закрывающий тег может потребоваться позже.
-                            # (В простой реализации закрытие по 'content_part' обычно надежнее всего).
-
-                    except json.JSONDecodeError:
-                        log.warning("Не удалось декодировать JSON-чанк: %s", content_str)
-        # Страховка: если поток закончился, а мы все еще думаем
-        if inside_reasoning:
-            yield {
-                "choices": [{
-                    "index": 0,
-                    "delta": {
-                        "role": "assistant",
-                        "content": "\n</think>\n",
-                    }
-                }]
-            }
+    async def _iter_stream(self, response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+        parser = _SSEReasoningParser()
+        try:
+            async for line in response.aiter_lines():
+                for chunk in parser.feed(line):
+                    yield chunk
+                if parser.done:
+                    break
+            for chunk in parser.finish():
+                yield chunk
+        except httpx.HTTPError as e:
+            raise LLMResponseError(f"Ошибка при чтении потокового ответа: {e}") from e
+        finally:
+            await response.aclose()
+
+    def preload(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Прогрев минимальным запросом на один токен: локальные серверы
+        (LM Studio, Jan) загружают модель при первом обращении к ней.
+        """
+        payload = dict(payload, messages=[{"role": "user", "content": "."}], stream=False, max_tokens=1)
+        log.info("🔥 Прогрев модели '%s'...", payload.get('model'))
+        return self.send_request(payload)
 
     def extract_choices(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
         return response.get("choices", [])
@@ -212,4 +174,71 @@ class OpenAICompatibleClient(ProviderClient):
             return self.extract_metadata_from_response(chunk)
 
         # --- ШАГ 3: Если это обычный чанк с контентом, возвращаем None ---
-        return None
\ No newline at end of file
+        return None
+
+
+class _SSEReasoningParser:
+    """
+    Разбор строк SSE-потока OpenAI-совместимого API.
+
+    Рассуждения (delta.reasoning / delta.reasoning_content) оборачиваются
+    в служебные чанки <think>...</think>, чтобы адаптер выделил их из ответа.
+    """
+
+    def __init__(self):
+        self.inside_reasoning = False
+        self.done = False
+
+    @staticmethod
+    def _tag_chunk(content: str, with_reasoning: bool = True) -> Dict[str, Any]:
+        delta = {"role": "assistant", "content": content}
+        if with_reasoning:
+            delta["reasoning"] = ""
+        return {"choices": [{"index": 0, "delta": delta}]}
+
+    def feed(self, line: str) -> List[Dict[str, Any]]:
+        """Обрабатывает одну строку потока и возвращает готовые чанки."""
+        if not line or not line.startswith('data: '):
+            return []
+        content_str = line[6:]
+        if content_str.strip() == "[DONE]":
+            self.done = True
+            return []
+        try:
+            chunk = json.loads(content_str)
+        except json.JSONDecodeError:
+            log.warning("Не удалось декодировать JSON-чанк: %s", content_str)
+            return []
+
+        choices = chunk.get("choices", [])
+        if not choices:
+            return []
+
+        out = []
+        delta = choices[0].get("delta", {})
+        # Разные провайдеры могут отдавать поле по-разному (reasoning_content или reasoning)
+        reasoning_part = delta.get("reasoning") or delta.get("reasoning_content")
+        content_part = delta.get("content")
+
+        # 1. Логика НАЧАЛА рассуждения
+        # Если пришло reasoning, но мы еще не внутри -> отправляем <think>
+        if reasoning_part and not self.inside_reasoning:
+            self.inside_reasoning = True
+            out.append(self._tag_chunk("<think>\n"))
+
+        # 2. Логика ЗАВЕРШЕНИЯ рассуждения
+        # Если мы были внутри, но reasoning пропал, ИЛИ пошел обычный content -> закрываем </think>
+        if self.inside_reasoning and not reasoning_part and content_part:
+            self.inside_reasoning = False
+            out.append(self._tag_chunk("\n</think>\n"))
+
+        # 3. Сам чанк прокидываем как есть: extract_delta_from_chunk склеит content + reasoning
+        out.append(chunk)
+        return out
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Страховка: если поток закончился, а мы все еще думаем."""
+        if self.inside_reasoning:
+            self.inside_reasoning = False
+            return [self._tag_chunk("\n</think>\n", with_reasoning=False)]
+        return []
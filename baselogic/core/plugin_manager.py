@@ -1,47 +1,299 @@
+"""
+Обнаружение генераторов тестов: встроенных (baselogic/tests/tNN_*.py) и плагинов.
+
+Список тестов строится без импорта модулей — статическим разбором AST
+(манифест: ключ теста → модуль, класс, хеш исходника и простые атрибуты
+класса вроде requires_kotlin). Манифест кэшируется на диске и
+пересобирается только для изменившихся файлов. Модули импортируются лишь
+для тех тестов, которые действительно запускаются, и только при первом
+обращении: тяжёлые плагины (pymorphy2, pandas, клонирование репозиториев)
+не замедляют запуск одного теста и листинг /api/tests.
+"""
+import ast
+import hashlib
 import importlib
-import inspect
+import json
 import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, Type
-from ..tests.abstract_test_generator import AbstractTestGenerator
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Type
+
+if TYPE_CHECKING:
+    from ..tests.abstract_test_generator import AbstractTestGenerator
+
+log = logging.getLogger(__name__)
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+PLUGINS_DIR = TESTS_DIR / "plugins"
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parents[2] / "results" / "cache" / "plugin_manifest.json"
+
+# Версия формата манифеста: при изменении логики сканирования старый кэш игнорируется
+MANIFEST_VERSION = 1
+
+BASE_CLASS_NAME = "AbstractTestGenerator"
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """Статическое описание генератора теста (без импорта модуля)."""
+    key: str
+    module: str
+    class_name: str
+    path: str
+    source_hash: str
+    builtin: bool
+    # Атрибуты класса с литеральными значениями (например, requires_kotlin)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+def builtin_class_name(test_key: str) -> str:
+    """Имя класса встроенного теста по соглашению: t01_simple_logic -> SimpleLogicTestGenerator."""
+    return "".join(part.capitalize() for part in test_key.split('_')[1:]) + "TestGenerator"
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _class_attributes(node: ast.ClassDef) -> Dict[str, Any]:
+    attributes = {}
+    for statement in node.body:
+        if isinstance(statement, ast.Assign):
+            targets, value = statement.targets, statement.value
+        elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+            targets, value = [statement.target], statement.value
+        else:
+            continue
+        try:
+            literal = ast.literal_eval(value)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if not isinstance(literal, (bool, int, float, str, type(None))):
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name):
+                attributes[target.id] = literal
+    return attributes
+
+
+def _generator_classes(tree: ast.Module) -> Dict[str, ast.ClassDef]:
+    """Классы модуля верхнего уровня, наследующие AbstractTestGenerator (в том числе через классы модуля)."""
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    generators: Dict[str, ast.ClassDef] = {}
+    changed = True
+    while changed:
+        changed = False
+        for node in classes:
+            if node.name in generators:
+                continue
+            bases = {_base_name(base) for base in node.bases}
+            if BASE_CLASS_NAME in bases or bases & generators.keys():
+                generators[node.name] = node
+                changed = True
+    return generators
+
+
+def _scan_file(path: Path, source: bytes, module: str, builtin: bool) -> Optional[ManifestEntry]:
+    """Находит класс генератора в исходнике; None, если его нет."""
+    try:
+        tree = ast.parse(source, filename=str(path))
+    except SyntaxError as e:
+        log.warning("⚠️ Не удалось разобрать файл теста '%s': %s", path.name, e)
+        return None
+
+    generators = _generator_classes(tree)
+    if builtin:
+        class_name = builtin_class_name(path.stem)
+        if class_name not in generators:
+            log.warning("⚠️ В файле встроенного теста '%s' нет класса %s.", path.name, class_name)
+            return None
+    elif generators:
+        # Как и при поиске через inspect.getmembers: при нескольких классах побеждает последний по имени
+        class_name = sorted(generators)[-1]
+    else:
+        return None
+
+    return ManifestEntry(
+        key=path.stem,
+        module=module,
+        class_name=class_name,
+        path=str(path),
+        source_hash=hashlib.sha256(source).hexdigest(),
+        builtin=builtin,
+        attributes=_class_attributes(generators[class_name]),
+    )
+
+
+def _candidate_files(tests_dir: Path, plugins_dir: Path) -> List[tuple]:
+    """(путь, имя модуля, встроенный ли) в порядке регистрации: сначала встроенные, затем плагины."""
+    files = [(path, f"baselogic.tests.{path.stem}", True)
+             for path in sorted(tests_dir.glob("t[0-9][0-9]_*.py"))]
+    if plugins_dir.exists():
+        files += [(path, f"baselogic.tests.plugins.{path.stem}", False)
+                  for path in sorted(plugins_dir.glob("*.py")) if not path.name.startswith("_")]
+    return files
+
+
+def build_plugin_manifest(
+        cache_path: Optional[Path] = DEFAULT_MANIFEST_PATH,
+        tests_dir: Path = TESTS_DIR,
+        plugins_dir: Path = PLUGINS_DIR,
+) -> Dict[str, ManifestEntry]:
+    """
+    Манифест всех генераторов тестов: {ключ теста: ManifestEntry}.
+    Плагин с тем же именем переопределяет встроенный тест.
+
+    Файл перечитывается, только если изменились его mtime/размер, и
+    разбирается заново, только если изменился хеш исходника.
+    """
+    cached: Dict[str, Dict[str, Any]] = {}
+    if cache_path is not None:
+        try:
+            data = json.loads(Path(cache_path).read_text(encoding='utf-8'))
+            if data.get('version') == MANIFEST_VERSION:
+                cached = data.get('files', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    files: Dict[str, Dict[str, Any]] = {}
+    manifest: Dict[str, ManifestEntry] = {}
+    for path, module, builtin in _candidate_files(tests_dir, plugins_dir):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        record = cached.get(str(path))
+        if not (record and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size
+                and record['module'] == module):
+            source = path.read_bytes()
+            source_hash = hashlib.sha256(source).hexdigest()
+            if not (record and record['source_hash'] == source_hash and record['module'] == module):
+                entry = _scan_file(path, source, module, builtin)
+                record = {'module': module, 'source_hash': source_hash,
+                          'entry': asdict(entry) if entry else None}
+            record = {**record, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        files[str(path)] = record
+        if record['entry'] is not None:
+            entry = ManifestEntry(**record['entry'])
+            if entry.key in manifest and not builtin:
+                log.debug("Плагин '%s' переопределяет встроенный тест.", entry.key)
+            manifest[entry.key] = entry
+
+    if cache_path is not None and files != cached:
+        _save_manifest(Path(cache_path), files)
+    return manifest
+
+
+def _save_manifest(cache_path: Path, files: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps({'version': MANIFEST_VERSION, 'files': files}, ensure_ascii=False),
+                            encoding='utf-8')
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log.debug("Не удалось сохранить манифест плагинов: %s", e)
+        tmp_path.unlink(missing_ok=True)
+
+
+_manifest: Optional[Dict[str, ManifestEntry]] = None
+_loaded: Dict[str, Type['AbstractTestGenerator']] = {}
+_lock = threading.Lock()
+
+
+def get_plugin_manifest() -> Dict[str, ManifestEntry]:
+    """Манифест, построенный один раз на процесс."""
+    global _manifest
+    with _lock:
+        if _manifest is None:
+            _manifest = build_plugin_manifest()
+        return _manifest
+
+
+def load_test_generator(test_key: str) -> Optional[Type['AbstractTestGenerator']]:
+    """
+    Импортирует генератор теста по ключу при первом обращении.
+    Возвращает None, если теста нет в манифесте или модуль не загрузился.
+    """
+    generator_class = _loaded.get(test_key)
+    if generator_class is not None:
+        return generator_class
+    entry = get_plugin_manifest().get(test_key)
+    if entry is None:
+        return None
+    try:
+        generator_class = getattr(importlib.import_module(entry.module), entry.class_name)
+    except Exception as e:
+        log.warning(
+            "⚠️ Не удалось загрузить тест '%s' из файла '%s'. Ошибка: %s",
+            test_key, Path(entry.path).name, e,
+        )
+        return None
+    _loaded[test_key] = generator_class
+    return generator_class
+
 
 class PluginManager:
     """Управляет плагинами тестов"""
-    
+
     def __init__(self, plugins_dir: Path = None):
-        self.plugins_dir = plugins_dir or Path(__file__).parent.parent / "tests" / "plugins"
+        self.plugins_dir = plugins_dir or PLUGINS_DIR
         self.plugins_dir.mkdir(exist_ok=True)
-        self.loaded_plugins: Dict[str, Type[AbstractTestGenerator]] = {}
-    
-    def discover_plugins(self) -> Dict[str, Type[AbstractTestGenerator]]:
-        """Обнаруживает все доступные плагины"""
+        self.loaded_plugins: Dict[str, Type['AbstractTestGenerator']] = {}
+
+    def list_plugins(self) -> Dict[str, ManifestEntry]:
+        """Плагины из манифеста (без импорта модулей)."""
+        return {key: entry for key, entry in get_plugin_manifest().items() if not entry.builtin}
+
+    def discover_plugins(self) -> Dict[str, Type['AbstractTestGenerator']]:
+        """Импортирует все плагины (для листинга достаточно list_plugins())"""
         plugins = {}
-        
-        # Ищем файлы плагинов
-        for plugin_file in self.plugins_dir.glob("*.py"):
-            if plugin_file.name.startswith("_"):
-                continue
-            
-            try:
-                # Импортируем модуль
-                module_name = f"baselogic.tests.plugins.{plugin_file.stem}"
-                module = importlib.import_module(module_name)
-                
-                # Ищем классы, наследующие AbstractTestGenerator
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and 
-                        issubclass(obj, AbstractTestGenerator) and 
-                        obj != AbstractTestGenerator):
-                        plugins[plugin_file.stem] = obj
-                        
-            except Exception as e:
-                logging.warning(f"Не удалось загрузить плагин {plugin_file}: {e}")
-        
+        for key in self.list_plugins():
+            generator_class = load_test_generator(key)
+            if generator_class is not None:
+                plugins[key] = generator_class
         self.loaded_plugins = plugins
         return plugins
-    
-    def get_test_generator(self, test_name: str) -> Type[AbstractTestGenerator]:
+
+    def get_test_generator(self, test_name: str) -> Type['AbstractTestGenerator']:
         """Возвращает генератор теста по имени"""
-        if test_name not in self.loaded_plugins:
+        generator_class = self.loaded_plugins.get(test_name) or load_test_generator(test_name)
+        if generator_class is None:
             raise ValueError(f"Плагин {test_name} не найден")
-        return self.loaded_plugins[test_name]
\ No newline at end of file
+        return generator_class
+
+
+def discover_test_generators(names: Optional[Iterable[str]] = None) -> Dict[str, Type['AbstractTestGenerator']]:
+    """
+    Загружает генераторы тестов: встроенные (baselogic/tests/tNN_*.py) и
+    плагины. Плагин с тем же именем переопределяет встроенный тест.
+
+    Args:
+        names: ключи нужных тестов; импортируются только они.
+            None — все тесты из манифеста.
+
+    Порядок — порядок манифеста (отсортированные файлы), а не порядок names:
+    names часто множество, и его порядок зависит от PYTHONHASHSEED.
+    """
+    manifest = get_plugin_manifest()
+    if names is None:
+        keys = list(manifest)
+    else:
+        wanted = set(names)
+        keys = [key for key in manifest if key in wanted]
+    plugins = [key for key in keys if not manifest[key].builtin]
+    if plugins:
+        log.info("🔎 Плагинов тестов к загрузке: %d (%s)", len(plugins), ", ".join(plugins))
+
+    generators: Dict[str, Type['AbstractTestGenerator']] = {}
+    for key in keys:
+        generator_class = load_test_generator(key)
+        if generator_class is not None:
+            generators[key] = generator_class
+    return generators
@@ -1,5 +1,6 @@
 import sys
 import logging
+import threading
 
 log = logging.getLogger(__name__)
 
@@ -7,6 +8,7 @@ class ProgressTracker:
     """
     Простая и эффективная обертка для отображения общего прогресса тестирования.
     Выводит прогресс в stdout для парсинга внешними системами.
+    Потокобезопасен: при параллельном прогоне моделей update() вызывают разные потоки.
     """
 
     def __init__(self, total_steps: int):
@@ -20,6 +22,7 @@ class ProgressTracker:
         self.current_step = 0
         self.last_model = ""
         self.last_test = ""
+        self._lock = threading.Lock()
 
         # Выводим начальный прогресс
         self._print_progress()
@@ -28,15 +31,16 @@ class ProgressTracker:
         """
         Обновляет прогресс на один шаг и устанавливает описание текущей задачи.
         """
-        self.current_step += 1
+        with self._lock:
+            self.current_step += 1
 
-        # Обновляем информацию о текущей задаче
-        if model_name != self.last_model or test_name != self.last_test:
-            self.last_model = model_name
-            self.last_test = test_name
+            # Обновляем информацию о текущей задаче
+            if model_name != self.last_model or test_name != self.last_test:
+                self.last_model = model_name
+                self.last_test = test_name
 
-        # Выводим обновленный прогресс
-        self._print_progress()
+            # Выводим обновленный прогресс
+            self._print_progress()
 
     def _print_progress(self):
         """
@@ -58,9 +62,10 @@ class ProgressTracker:
         Корректно закрывает прогресс-бар после завершения всех операций.
         """
         # Выводим финальный прогресс
-        if self.current_step < self.total_steps:
-            self.current_step = self.total_steps
-            self._print_progress()
+        with self._lock:
+            if self.current_step < self.total_steps:
+                self.current_step = self.total_steps
+                self._print_progress()
 
         final_message = f"PROGRESS: Completed {self.total_steps}/{self.total_steps} (100.0%)"
         print(final_message, flush=True)
@@ -0,0 +1,217 @@
+"""
+Корпусный индекс эталонных ответов для семантической валидации.
+
+SemanticSimilarityScorer раньше считал IDF только по двум сравниваемым
+текстам (log(2 / df)): общие слова получали вес 0, остальные — одинаковый,
+и TF-IDF/BM25 почти ничего не говорили о значимости слов. Индекс хранит
+статистику по всем эталонам (ожидаемым ответам тестов): число документов,
+их суммарную длину и документную частоту каждого термина — этого
+достаточно для настоящих IDF и средней длины документа в BM25.
+
+Индекс — один файл SQLite (как корпус головоломок): таблица documents
+(хеш текста → длина, источник) и словарь terms (термин → df). Документ
+добавляется один раз (ключ — sha256 текста), так что индекс пополняется
+инкрементально: эталоны новых тестов попадают в него при переиндексации
+результатов (python -m baselogic.core.reference_index) или через
+SemanticSimilarityScorer.index_references. Оценка сходства индекс только
+читает: иначе оценка пары зависела бы от того, какие эталоны проверялись
+раньше. Запрос читает df только для терминов пакета по первичному
+ключу — стоимость не зависит от размера корпуса.
+
+Настройки (переменные окружения):
+    BC_REFERENCE_INDEX       — использовать индекс (true)
+    BC_REFERENCE_INDEX_PATH  — файл индекса (results/cache/reference_index.sqlite)
+"""
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from .shared import LazySingleton, env_flag
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parents[2] / "results" / "cache" / "reference_index.sqlite"
+
+# Ограничение SQLite на число параметров запроса (SQLITE_MAX_VARIABLE_NUMBER в старых сборках)
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    source TEXT,
+    length INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    documents INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, documents, total_length) VALUES (0, 0, 0);
+"""
+
+
+def document_id(text: str) -> str:
+    """Ключ документа в индексе: sha256 текста эталона."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ReferenceIndex:
+    """
+    Персистентная статистика корпуса эталонов: N, средняя длина, df терминов.
+
+    Токенизацию выполняет вызывающий код (SemanticSimilarityScorer), индекс
+    хранит уже очищенные токены.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        """path=None — индекс в памяти (для тестов и одноразовых прогонов)."""
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path) if self.path is not None else ":memory:",
+                                     check_same_thread=False)
+        if self.path is not None:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add_documents(self, documents: Iterable[Tuple[str, Sequence[str]]], source: str = "") -> int:
+        """
+        Добавляет документы (текст, токены) одной транзакцией.
+        Уже проиндексированные тексты пропускаются. Возвращает число новых.
+        """
+        batch: Dict[str, Sequence[str]] = {}
+        for text, tokens in documents:
+            batch.setdefault(document_id(text), tokens)
+        if not batch:
+            return 0
+
+        with self._lock, self._conn:
+            known = self._existing(list(batch))
+            new = {doc_id: tokens for doc_id, tokens in batch.items() if doc_id not in known}
+            if not new:
+                return 0
+            self._conn.executemany(
+                "INSERT INTO documents (doc_id, source, length) VALUES (?, ?, ?)",
+                [(doc_id, source, len(tokens)) for doc_id, tokens in new.items()],
+            )
+            df = Counter(term for tokens in new.values() for term in set(tokens))
+            self._conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                df.items(),
+            )
+            self._conn.execute(
+                "UPDATE stats SET documents = documents + ?, total_length = total_length + ? WHERE id = 0",
+                (len(new), sum(len(tokens) for tokens in new.values())),
+            )
+        return len(new)
+
+    def _existing(self, doc_ids: Sequence[str]) -> set:
+        found = set()
+        for start in range(0, len(doc_ids), _QUERY_CHUNK):
+            chunk = doc_ids[start:start + _QUERY_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT doc_id FROM documents WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update(doc_id for doc_id, in rows)
+        return found
+
+    def stats(self) -> Tuple[int, float]:
+        """(число документов, средняя длина документа в токенах)."""
+        with self._lock:
+            documents, total_length = self._conn.execute(
+                "SELECT documents, total_length FROM stats WHERE id = 0"
+            ).fetchone()
+        return documents, (total_length / documents if documents else 0.0)
+
+    def document_frequencies(self, terms: Iterable[str]) -> Dict[str, int]:
+        """df для заданных терминов; термины, которых нет в корпусе, получают 0."""
+        terms = list(dict.fromkeys(terms))
+        frequencies = dict.fromkeys(terms, 0)
+        with self._lock:
+            for start in range(0, len(terms), _QUERY_CHUNK):
+                chunk = terms[start:start + _QUERY_CHUNK]
+                frequencies.update(self._conn.execute(
+                    f"SELECT term, df FROM terms WHERE term IN ({','.join('?' * len(chunk))})", chunk
+                ))
+        return frequencies
+
+    def idf(self, terms: Sequence[str]) -> Dict[str, float]:
+        """
+        IDF терминов в варианте BM25 (Lucene): log(1 + (N - df + 0.5) / (df + 0.5)).
+        Всегда положителен; редкие и отсутствующие в корпусе слова весят больше.
+        """
+        documents, _ = self.stats()
+        return {term: math.log(1 + (documents - df + 0.5) / (df + 0.5))
+                for term, df in self.document_frequencies(terms).items()}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _create_index() -> Optional[ReferenceIndex]:
+    if not env_flag('BC_REFERENCE_INDEX'):
+        return None
+    path = Path(os.environ.get('BC_REFERENCE_INDEX_PATH') or DEFAULT_INDEX_PATH)
+    try:
+        return ReferenceIndex(path)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("Индекс эталонов недоступен (%s), IDF считается по паре текстов: %s", path, e)
+        return None
+
+
+_index: LazySingleton[ReferenceIndex] = LazySingleton(_create_index)
+
+
+def get_reference_index() -> Optional[ReferenceIndex]:
+    """Индекс эталонов процесса или None, если он выключен (BC_REFERENCE_INDEX=false) или недоступен."""
+    return _index.get()
+
+
+def reference_text(expected_output) -> Optional[str]:
+    """Текст эталона из expected_output записи результата (строка или словарь с expected_answer)."""
+    if isinstance(expected_output, dict):
+        expected_output = expected_output.get('expected_answer')
+    if isinstance(expected_output, str) and expected_output.strip():
+        return expected_output
+    return None
+
+
+def index_results(results_dir: Path, index: Optional[ReferenceIndex] = None) -> int:
+    """
+    Добавляет в индекс эталоны из сохранённых результатов (results/raw).
+    Повторный запуск добавляет только новые эталоны. Возвращает их число.
+    """
+    from .result_store import list_result_files, load_result_records
+    from .semantic_analyzer import SemanticSimilarityScorer
+
+    scorer = SemanticSimilarityScorer(index=index or get_reference_index())
+    added = 0
+    for path in list_result_files(results_dir):
+        texts = [reference_text(record.get('expected_output')) for record in load_result_records(path)]
+        added += scorer.index_references([text for text in texts if text], source=path.name)
+    return added
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    results_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[2] / "results" / "raw"
+    index = get_reference_index()
+    if index is None:
+        sys.exit("Индекс эталонов выключен (BC_REFERENCE_INDEX=false)")
+    count = index_results(results_dir, index)
+    documents, avg_length = index.stats()
+    print(f"Добавлено эталонов: {count}; всего в индексе: {documents}, средняя длина: {avg_length:.1f}")
@@ -1,7 +1,6 @@
 import json
 import logging
 import math
-import re
 import time
 from pathlib import Path
 from typing import Tuple, Dict, Any, Optional
@@ -9,6 +8,10 @@ from typing import Tuple, Dict, Any, Optional
 import numpy as np
 import pandas as pd
 
+from .columnar_store import ColumnarResultStore
+from .response_parser import parse_response
+from .result_store import list_result_files, load_result_records
+
 log = logging.getLogger(__name__)
 
 
@@ -62,10 +65,14 @@ class Reporter:
     - Корректная работа с отсутствующими полями
     """
 
+    # Текстовые колонки, нужные отчёту (остальные тексты из хранилища не читаются)
+    TEXT_COLUMNS = ('llm_response', 'thinking_response')
+
     def __init__(self, results_dir: Path):
         """Инициализирует Reporter с указанной директорией результатов."""
         self.results_dir = results_dir
         self.history_path = self.results_dir.parent / "history.json"
+        self.store_dir = self.results_dir.parent / "store"
 
         # Загружаем все результаты
         self.all_results: pd.DataFrame = self._load_all_results()
@@ -83,14 +90,34 @@ class Reporter:
         log.info(f"Reporter инициализирован: {len(self.all_results)} записей, hardware_tier: {self.hardware_tier}")
 
     def _load_all_results(self) -> pd.DataFrame:
-        """Загружает и объединяет все JSON файлы с результатами."""
+        """
+        Загружает все результаты. При установленном pyarrow сырые файлы
+        инкрементально загружаются в колоночное хранилище и читаются из него,
+        иначе — полный разбор файлов из results_dir.
+        """
+        if ColumnarResultStore.is_available():
+            try:
+                store = ColumnarResultStore(self.store_dir)
+                store.ingest(self.results_dir)
+                combined_data = store.load(text_columns=self.TEXT_COLUMNS)
+                log.info("Всего записей для анализа: %d", len(combined_data))
+                return combined_data
+            except Exception as e:
+                log.warning("Колоночное хранилище недоступно (%s), читаем сырые файлы.", e)
+        return self._load_raw_results()
+
+    def _load_raw_results(self) -> pd.DataFrame:
+        """Загружает и объединяет все файлы с результатами (*.json и *.jsonl)."""
         all_data = []
-        json_files = sorted(list(self.results_dir.glob("*.json")))
+        json_files = list_result_files(self.results_dir)
         log.info("Найдено файлов для отчета: %d", len(json_files))
 
         for json_file in json_files:
             try:
-                data = pd.read_json(json_file)
+                if json_file.suffix == '.jsonl':
+                    data = pd.DataFrame(load_result_records(json_file))
+                else:
+                    data = pd.read_json(json_file)
                 if not data.empty:
                     all_data.append(data)
                     log.debug(f"Загружен файл {json_file.name}: {len(data)} записей")
@@ -202,29 +229,13 @@ class Reporter:
         df_work['llm_response'] = df_work['llm_response'].fillna("")
         df_work['thinking_response'] = df_work['thinking_response'].fillna("")
 
-        def get_thinking_length(llm_resp, thinking_resp):
-            """Возвращает длину всего thinking текста."""
-            total_thinking = str(thinking_resp)
-
-            # Находим все <think>...</think> блоки
-            think_blocks = re.findall(r'<think>(.*?)</think>', str(llm_resp), re.DOTALL | re.IGNORECASE)
-            for block in think_blocks:
-                total_thinking += block
-
-            return len(total_thinking)
-
-        def get_answer_length(llm_resp):
-            """Возвращает длину чистого ответа без thinking блоков."""
-            clean_answer = re.sub(r'<think>.*?</think>', '', str(llm_resp), flags=re.DOTALL | re.IGNORECASE)
-            return len(clean_answer.strip())
-
-        # Простые вычисления длин
-        df_work['thinking_len'] = df_work.apply(
-            lambda row: get_thinking_length(row['llm_response'], row['thinking_response']), axis=1
-        )
-        df_work['answer_len'] = df_work.apply(
-            lambda row: get_answer_length(row['llm_response']), axis=1
-        )
+        # Каждый ответ разбирается один раз (общий кэш response_parser)
+        parsed = [parse_response(str(llm_resp)) for llm_resp in df_work['llm_response']]
+        df_work['thinking_len'] = [
+            len(str(thinking_resp)) + item.thinking_length
+            for thinking_resp, item in zip(df_work['thinking_response'], parsed)
+        ]
+        df_work['answer_len'] = [len(item.visible.strip()) for item in parsed]
         df_work['total_len'] = df_work['thinking_len'] + df_work['answer_len']
 
         # Группируем по моделям
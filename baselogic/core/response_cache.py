@@ -0,0 +1,264 @@
+"""
+Кэш ответов LLM с адресацией по содержимому запроса.
+
+Ключ — хеш от провайдера, модели, нормализованных опций generation/inference,
+сообщений и режима stream. Хранится "сырой" ответ API (или список чанков
+стрима) вместе с серверными метаданными, поэтому при повторе AdapterLLMClient
+собирает ответ и метрики токенов так же, как при живом запросе. Клиентские
+тайминги исходного запроса (полное время и время до первого чанка) хранятся
+рядом: ответ из кэша получает их, а не время чтения с диска.
+
+Режимы (BC_RESPONSE_CACHE):
+    off     — кэш выключен (по умолчанию)
+    on      — чтение и запись
+    replay  — только чтение; промах — ошибка LLMCacheMissError, запросов к модели нет
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Generator, Iterable, List, Optional
+
+log = logging.getLogger(__name__)
+
+CACHE_MODES = ('off', 'on', 'replay')
+
+# Опции, которые не влияют на содержимое ответа и не входят в ключ
+TRANSPORT_OPTIONS = ('keep_alive', 'timeout')
+
+
+def _normalize_value(value: Any) -> Any:
+    """Приводит значение к каноничному виду: 0 и 0.0 дают один и тот же ключ."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize_value(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    return value
+
+
+class ResponseCache:
+    """
+    Дисковый кэш ответов: один JSON-файл на запрос, <dir>/<ключ[:2]>/<ключ>.json.
+
+    Ограничения:
+        max_size_mb   — при превышении удаляются давно не использованные записи
+        max_age_hours — записи старше считаются промахом (0 — без ограничения)
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path,
+            mode: str = 'on',
+            max_size_mb: float = 1024,
+            max_age_hours: float = 0,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Неизвестный режим кэша ответов: '{mode}'. Ожидается один из: {CACHE_MODES}")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.max_size_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self.max_age_seconds = float(max_age_hours) * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_size: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], default_dir: Path) -> Optional["ResponseCache"]:
+        """Создаёт кэш по глобальной конфигурации или возвращает None, если он выключен."""
+        mode = str(config.get('response_cache', 'off')).strip().lower()
+        if mode in ('off', 'false', ''):
+            return None
+        if mode == 'true':
+            mode = 'on'
+        cache = cls(
+            cache_dir=Path(config.get('response_cache_dir') or default_dir),
+            mode=mode,
+            max_size_mb=config.get('response_cache_max_size_mb', 1024),
+            max_age_hours=config.get('response_cache_max_age_hours', 0),
+        )
+        log.info("💾 Кэш ответов LLM: режим '%s', каталог %s", cache.mode, cache.cache_dir)
+        return cache
+
+    @property
+    def read_only(self) -> bool:
+        return self.mode == 'replay'
+
+    # ──────────────────────────── ключ ────────────────────────────────
+    @staticmethod
+    def make_key(
+            provider: str,
+            model: str,
+            options: Dict[str, Any],
+            messages: List[Dict[str, str]],
+            stream: bool,
+    ) -> str:
+        normalized_options = {
+            k: v for k, v in _normalize_value(options).items() if k not in TRANSPORT_OPTIONS
+        }
+        payload = json.dumps(
+            {
+                'provider': provider,
+                'model': model,
+                'options': normalized_options,
+                'messages': _normalize_value(messages),
+                'stream': bool(stream),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    # ──────────────────────────── чтение ──────────────────────────────
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает запись кэша или None при промахе (включая устаревшие записи)."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning("Повреждённая запись кэша ответов %s: %s", path.name, e)
+            self._count(hit=False)
+            return None
+
+        if self.max_age_seconds and time.time() - entry.get('created_at', 0) > self.max_age_seconds:
+            log.debug("Запись кэша ответов %s устарела", key[:12])
+            self._count(hit=False)
+            return None
+
+        try:
+            os.utime(path)  # отметка использования для вытеснения LRU
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # ──────────────────────────── запись ──────────────────────────────
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Сохраняет запись (в режиме replay ничего не делает)."""
+        if self.read_only:
+            return
+        entry = dict(entry, created_at=time.time())
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Не удалось записать ответ в кэш: %s", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            if self._total_size is None:
+                self._total_size = self._scan_size()
+            else:
+                self._total_size += path.stat().st_size - old_size
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _iter_entries(self) -> Iterable[os.DirEntry]:
+        if not self.cache_dir.exists():
+            return
+        for bucket in os.scandir(self.cache_dir):
+            if bucket.is_dir():
+                for entry in os.scandir(bucket.path):
+                    if entry.name.endswith('.json'):
+                        yield entry
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._iter_entries())
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные записи, пока размер не станет ≤ 90% лимита."""
+        target = int(self.max_size_bytes * 0.9)
+        entries = sorted(
+            ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._iter_entries())
+        )
+        removed = 0
+        for _, size, path in entries:
+            if self._total_size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_size -= size
+            removed += 1
+        log.info("🧹 Кэш ответов: вытеснено %d записей", removed)
+
+    @staticmethod
+    def _stream_timings(started_at: Optional[float], first_chunk_at: Optional[float]) -> Dict[str, float]:
+        if started_at is None:
+            return {}
+        end_time = time.perf_counter()
+        return {
+            'total_latency_ms': (end_time - started_at) * 1000,
+            'time_to_first_token_ms': ((first_chunk_at or end_time) - started_at) * 1000,
+        }
+
+    def record_stream(
+            self, key: str, chunks: Iterable[Dict[str, Any]], started_at: Optional[float] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Пропускает чанки стрима насквозь и сохраняет их в кэш,
+        только если стрим был дочитан до конца без ошибок.
+        started_at (time.perf_counter() отправки запроса) — для записи таймингов.
+        """
+        recorded: List[Dict[str, Any]] = []
+        first_chunk_at = None
+        for chunk in chunks:
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+            recorded.append(chunk)
+            yield chunk
+        self.put(key, {'stream': True, 'chunks': recorded,
+                       'timings': self._stream_timings(started_at, first_chunk_at)})
+
+    @staticmethod
+    def replay_stream(chunks: List[Dict[str, Any]]) -> Generator[Dict[str, Any], None, None]:
+        yield from chunks
+
+    async def record_stream_async(
+            self, key: str, chunks: AsyncIterator[Dict[str, Any]], started_at: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Асинхронная версия record_stream."""
+        recorded: List[Dict[str, Any]] = []
+        first_chunk_at = None
+        async for chunk in chunks:
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+            recorded.append(chunk)
+            yield chunk
+        self.put(key, {'stream': True, 'chunks': recorded,
+                       'timings': self._stream_timings(started_at, first_chunk_at)})
+
+    @staticmethod
+    async def replay_stream_async(chunks: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        for chunk in chunks:
+            yield chunk
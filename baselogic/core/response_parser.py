@@ -0,0 +1,184 @@
+"""
+Разбор ответа модели: рассуждения, ответ, блоки кода и стоп-токены.
+
+Ответ thinking-модели — это 50–200 КБ рассуждений и короткий ответ.
+Раньше адаптер, базовый генератор тестов, верификаторы, Reporter и
+просмотрщик результатов каждый раз заново компилировали одни и те же
+выражения (<think>, <response>, стоп-токены) и прогоняли по всему тексту
+5–8 последовательных re.sub. Теперь текст разбирается один раз: сканер за
+один проход по заранее скомпилированному шаблону находит все служебные
+теги, вырезает рассуждения и запоминает позиции <response> и стоп-токенов;
+дальнейшая работа (блоки кода, очистка ответа) идёт только по короткому
+ответу и вычисляется при первом обращении.
+
+parse_response запоминает результат (LRU по тексту): одна и та же запись,
+прошедшая через верификатор, Reporter и просмотрщик, разбирается один раз.
+
+Настройки (переменные окружения):
+    BC_RESPONSE_PARSE_CACHE_SIZE — число запоминаемых разборов (256)
+"""
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import NamedTuple, Optional, Tuple
+
+PARSE_CACHE_SIZE = int(os.environ.get('BC_RESPONSE_PARSE_CACHE_SIZE', 256))
+
+# Все служебные теги одним шаблоном: <think>, </think>, <response>, </response> и стоп-токены
+_MARKER_RE = re.compile(r'<(/?)(think|response)>|</s>|<\|eot_id\|>|<\|endoftext\|>', re.IGNORECASE)
+_THINK_OPEN_LENGTH = len('<think>')
+# Служебные токены чат-шаблонов, которые модели иногда печатают в ответе
+_CHAT_TOKEN_RE = re.compile(r'<\|im_start\|>|<\|im_end\|>|<s>|assistant', re.IGNORECASE)
+# Начало повторяющегося содержимого после основного ответа: "», Поскольку в тексте указано:"
+_REPEAT_TAIL_RE = re.compile(r'»\s*,')
+_MARKDOWN_CHARS = str.maketrans('', '', '*_`~')
+_FENCE_RE = re.compile(r'```([^\n`]*)\n(.*?)```', re.DOTALL)
+
+
+class CodeBlock(NamedTuple):
+    """Блок кода Markdown: язык из ```lang (может быть пустым) и содержимое."""
+    language: str
+    code: str
+
+
+@dataclass(frozen=True)
+class ParsedResponse:
+    """
+    Разобранный ответ модели.
+
+    raw             — исходный текст
+    thinking_blocks — содержимое закрытых блоков <think>…</think>
+    visible         — текст без блоков рассуждений
+    response        — содержимое первого <response>…</response> (None, если его нет)
+    body            — response без пробелов по краям или visible
+    stop_offset     — позиция первого стоп-токена в body (None, если его нет)
+    """
+    raw: str
+    thinking_blocks: Tuple[str, ...]
+    visible: str
+    response: Optional[str]
+    body: str
+    stop_offset: Optional[int]
+
+    @property
+    def thinking(self) -> str:
+        """Рассуждения в том виде, в каком их сохраняет адаптер (первый блок)."""
+        return self.thinking_blocks[0].strip() if self.thinking_blocks else ""
+
+    @property
+    def thinking_length(self) -> int:
+        """Суммарная длина всех блоков рассуждений."""
+        return sum(map(len, self.thinking_blocks))
+
+    @property
+    def answer(self) -> str:
+        """Ответ (body), обрезанный на первом стоп-токене."""
+        return self.body if self.stop_offset is None else self.body[:self.stop_offset]
+
+    @functools.cached_property
+    def llm_response(self) -> str:
+        """
+        Ответ для поля llm_response: содержимое <response>, а без него —
+        ответ без стоп-токенов и повторяющегося хвоста.
+        """
+        if self.response is not None:
+            return self.body
+        return _cut_repeat_tail(self.answer).strip()
+
+    @functools.cached_property
+    def clean_answer(self) -> str:
+        """Ответ без стоп-токенов, токенов чат-шаблона, повторяющегося хвоста и Markdown-разметки."""
+        text = _cut_repeat_tail(_CHAT_TOKEN_RE.sub('', self.answer))
+        return text.translate(_MARKDOWN_CHARS).strip()
+
+    @functools.cached_property
+    def code_blocks(self) -> Tuple[CodeBlock, ...]:
+        """Блоки кода ```lang … ``` из ответа в порядке появления."""
+        return tuple(CodeBlock(match.group(1).strip(), match.group(2)) for match in _FENCE_RE.finditer(self.answer))
+
+
+def _cut_repeat_tail(text: str) -> str:
+    match = _REPEAT_TAIL_RE.search(text)
+    return text[:match.start()] if match else text
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_response(text: str) -> ParsedResponse:
+    """
+    Разбирает ответ модели за один проход по служебным тегам.
+
+    Семантика совпадает с прежними регулярными выражениями: блок рассуждений —
+    от <think> до ближайшего </think> (незакрытый <think> остаётся в тексте),
+    <response> — первый открывающий тег и ближайший закрывающий после него,
+    стоп-токены ищутся внутри ответа. Регистр тегов не важен.
+    """
+    parts, thinking_blocks, markers = [], [], []
+    visible_length = 0
+    pos = 0  # начало ещё не скопированного видимого текста
+    think_start: Optional[int] = None
+    after_unclosed_think = False
+    search_from = 0
+    while True:
+        match = _MARKER_RE.search(text, search_from)
+        if match is None:
+            if think_start is None:
+                break
+            # Незакрытый <think>: дальше блоков рассуждений нет, остаток сканируется как обычный текст
+            search_from = think_start + _THINK_OPEN_LENGTH
+            think_start = None
+            after_unclosed_think = True
+            continue
+        search_from = match.end()
+        tag = match.group(2)
+        is_think = tag is not None and tag.lower() == 'think'
+        closing = match.group(1) == '/'
+
+        if think_start is not None:
+            if is_think and closing:
+                thinking_blocks.append(text[think_start + _THINK_OPEN_LENGTH:match.start()])
+                pos = match.end()
+                think_start = None
+            continue
+        if is_think:
+            # Одиночный </think> и <think> после незакрытого остаются текстом
+            if not closing and not after_unclosed_think:
+                parts.append(text[pos:match.start()])
+                visible_length += match.start() - pos
+                pos = think_start = match.start()
+            continue
+
+        kind = 'stop' if tag is None else ('/response' if closing else 'response')
+        start = visible_length + match.start() - pos
+        markers.append((kind, start, start + len(match.group(0))))
+    parts.append(text[pos:])
+    visible = "".join(parts)
+
+    response = None
+    body, body_start = visible, 0
+    open_tag = next((marker for marker in markers if marker[0] == 'response'), None)
+    if open_tag is not None:
+        close_tag = next((marker for marker in markers if marker[0] == '/response' and marker[1] >= open_tag[2]),
+                         None)
+        if close_tag is not None:
+            response = visible[open_tag[2]:close_tag[1]]
+            body = response.strip()
+            body_start = open_tag[2] + len(response) - len(response.lstrip())
+
+    body_end = body_start + len(body)
+    stop_offset = next((start - body_start for kind, start, end in markers
+                        if kind == 'stop' and start >= body_start and end <= body_end), None)
+
+    return ParsedResponse(
+        raw=text,
+        thinking_blocks=tuple(thinking_blocks),
+        visible=visible,
+        response=response,
+        body=body,
+        stop_offset=stop_offset,
+    )
+
+
+def cache_info() -> functools._CacheInfo:
+    """Статистика кэша разборов (hits/misses/currsize)."""
+    return parse_response.cache_info()
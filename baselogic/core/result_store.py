@@ -0,0 +1,188 @@
+"""
+Хранение сырых результатов тестирования.
+
+Результаты пишутся в формате JSON Lines: одна запись — одна строка.
+Новая запись дописывается в конец файла, поэтому стоимость сохранения
+не зависит от количества уже накопленных результатов, а оборванная при
+сбое последняя строка не портит остальные записи.
+
+Системная информация (профиль оборудования) одинакова для всех записей
+прогона, поэтому хранится в файле один раз — служебной строкой-заголовком
+с record_type="system_info". Записи ссылаются на неё по хешу содержимого
+(system_info_ref), а при чтении ссылка заменяется исходным словарём.
+
+Старые файлы в формате JSON-массива (*.json) по-прежнему читаются.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+RESULT_FILE_SUFFIXES = ('.json', '.jsonl')
+SYSTEM_INFO_RECORD_TYPE = 'system_info'
+
+
+def compute_system_info_ref(system_info: Dict[str, Any]) -> str:
+    """Хеш содержимого системной информации — ключ для ссылок из записей."""
+    payload = json.dumps(system_info, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class JsonlResultWriter:
+    """
+    Потоковый writer результатов в формате JSON Lines.
+
+    Каждая запись сразу сбрасывается в буфер ОС (переживает падение процесса),
+    а fsync (защита от потери питания) выполняется пачками раз в fsync_every записей.
+
+    Поле system_info записи выносится в заголовок файла (один раз на профиль),
+    а в самой записи остаётся только system_info_ref.
+    """
+
+    def __init__(self, path: Path, fsync_every: int = 10):
+        self.path = Path(path)
+        self.fsync_every = max(1, int(fsync_every))
+        self.records_written = 0
+        self._unsynced = 0
+        self._written_refs = set()
+        # id(словаря) -> (словарь, хеш): TestRunner передаёт один и тот же объект,
+        # поэтому хеш считается один раз за прогон
+        self._ref_cache: Dict[int, Tuple[Dict[str, Any], str]] = {}
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _system_info_ref(self, system_info: Dict[str, Any]) -> str:
+        cached = self._ref_cache.get(id(system_info))
+        if cached is not None and cached[0] is system_info:
+            return cached[1]
+        ref = compute_system_info_ref(system_info)
+        self._ref_cache[id(system_info)] = (system_info, ref)
+        return ref
+
+    def _write_line(self, obj: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(obj, ensure_ascii=False, default=str) + "\n")
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Дописывает одну запись в конец файла."""
+        system_info = record.get('system_info')
+        if isinstance(system_info, dict):
+            ref = self._system_info_ref(system_info)
+            if ref not in self._written_refs:
+                self._write_line({
+                    'record_type': SYSTEM_INFO_RECORD_TYPE,
+                    'system_info_ref': ref,
+                    'system_info': system_info,
+                })
+                self._written_refs.add(ref)
+            record = {k: v for k, v in record.items() if k != 'system_info'}
+            record['system_info_ref'] = ref
+
+        self._write_line(record)
+        self._file.flush()
+        self.records_written += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """Принудительно сбрасывает накопленные записи на диск."""
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def finalize(self, final_path: Path) -> Path:
+        """
+        Закрывает файл и атомарно переименовывает его в финальный.
+        Данные не перезаписываются — это O(1) вне зависимости от размера прогона.
+        """
+        self.close()
+        final_path = Path(final_path)
+        os.replace(self.path, final_path)
+        self.path = final_path
+        return final_path
+
+    def __enter__(self) -> "JsonlResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_jsonl_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Построчно читает JSONL-файл результатов.
+    Повреждённые строки (например, оборванная запись после сбоя) пропускаются.
+    Заголовки с системной информацией не возвращаются: их содержимое
+    подставляется в поле system_info ссылающихся записей (один общий объект).
+    """
+    system_profiles: Dict[str, Dict[str, Any]] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                log.warning("Пропущена повреждённая строка %d в %s", line_no, Path(path).name)
+                continue
+            if not isinstance(record, dict):
+                continue
+            if record.get('record_type') == SYSTEM_INFO_RECORD_TYPE:
+                system_profiles[record.get('system_info_ref')] = record.get('system_info')
+                continue
+            ref = record.get('system_info_ref')
+            if ref is not None and 'system_info' not in record:
+                record['system_info'] = system_profiles.get(ref)
+            yield record
+
+
+def load_result_records(path: Path) -> List[Dict[str, Any]]:
+    """Загружает записи из файла результатов в любом поддерживаемом формате."""
+    path = Path(path)
+    if path.suffix == '.jsonl':
+        return list(iter_jsonl_records(path))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)]
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+def list_result_files(results_dir: Path) -> List[Path]:
+    """Возвращает отсортированный список файлов результатов (*.json и *.jsonl)."""
+    results_dir = Path(results_dir)
+    files: List[Path] = []
+    for suffix in RESULT_FILE_SUFFIXES:
+        files.extend(results_dir.glob(f"*{suffix}"))
+    return sorted(files)
+
+
+def recover_incremental_file(incremental_path: Path, final_path: Path) -> Optional[Path]:
+    """
+    Спасает incremental-файл, оставшийся от упавшего прогона: переименовывает
+    его в финальный, чтобы новый прогон не смешал свои записи со старыми.
+    Возвращает путь к спасённому файлу или None, если спасать нечего.
+    """
+    incremental_path = Path(incremental_path)
+    if not incremental_path.exists():
+        return None
+    if incremental_path.stat().st_size == 0:
+        incremental_path.unlink()
+        return None
+    os.replace(incremental_path, final_path)
+    return Path(final_path)
@@ -0,0 +1,228 @@
+"""
+Офлайн-перепроверка сохранённых ответов моделей.
+
+Берёт записи результатов (llm_response, expected_output, category), заново
+создаёт генератор соответствующего теста и повторно вызывает verify() —
+без обращения к модели. Проверки выполняются параллельно в пуле процессов:
+каждый процесс один раз загружает реестр генераторов и держит по одному
+экземпляру генератора на категорию.
+
+Ограничение: verify() получает expected_output после JSON-сериализации.
+Множества, сохранённые раннером как строки вида "{'a', 'b'}", восстанавливаются,
+а прочие объекты (dataclass и т.п.) — нет; такие записи, как и тесты, чей verify
+зависит от состояния генератора после generate(), попадают в ошибки отчёта.
+"""
+import ast
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .result_store import JsonlResultWriter, list_result_files, load_result_records
+
+log = logging.getLogger(__name__)
+
+# Реестр генераторов и их экземпляры — свои в каждом процессе пула
+_worker_generators: Dict[str, Any] = {}
+_worker_instances: Dict[str, Any] = {}
+
+
+def record_category(record: Dict[str, Any]) -> Optional[str]:
+    """Категория (ключ генератора) записи; для старых записей — из test_id."""
+    category = record.get('category')
+    if isinstance(category, str) and category:
+        return category
+    test_id = record.get('test_id')
+    if isinstance(test_id, str) and '_' in test_id:
+        return test_id.rsplit('_', 1)[0]
+    return None
+
+
+def restore_expected_output(value: Any) -> Any:
+    """
+    Восстанавливает множества в expected_output: при сохранении результатов
+    они сериализуются через str() и превращаются в строки "{'a', 'b'}" / "set()".
+    """
+    if isinstance(value, dict):
+        return {k: restore_expected_output(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [restore_expected_output(v) for v in value]
+    if isinstance(value, str):
+        if value == "set()":
+            return set()
+        if value.startswith("{") and value.endswith("}"):
+            try:
+                parsed = ast.literal_eval(value)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                return value
+            if isinstance(parsed, set):
+                return parsed
+    return value
+
+
+def _init_worker() -> None:
+    from .plugin_manager import get_plugin_manifest
+
+    # Вывод verify() (логи, print из исполняемого кода) в воркерах не нужен
+    logging.disable(logging.WARNING)
+    # Генераторы импортируются по мере появления их категорий в задачах
+    get_plugin_manifest()
+
+
+def _verify_one(task: Tuple[int, str, str, Any]) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+    """Перепроверяет один ответ. Возвращает (индекс, результат verify, ошибка)."""
+    index, category, llm_response, expected_output = task
+    try:
+        generator = _worker_instances.get(category)
+        if generator is None:
+            generator_class = _worker_generators.get(category)
+            if generator_class is None:
+                from .plugin_manager import load_test_generator
+                generator_class = load_test_generator(category)
+                if generator_class is None:
+                    return index, None, f"генератор '{category}' не найден"
+                _worker_generators[category] = generator_class
+            generator = generator_class(test_id=category)
+            _worker_instances[category] = generator
+        return index, generator.verify(llm_response, restore_expected_output(expected_output)), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+@dataclass
+class VerdictChange:
+    """Изменение вердикта одной записи."""
+    source_file: str
+    test_id: str
+    model_name: str
+    category: str
+    was_correct: Any
+    is_correct: bool
+
+
+@dataclass
+class ReverifyReport:
+    """Итоги перепроверки."""
+    total: int = 0
+    verified: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    error_samples: Dict[str, str] = field(default_factory=dict)
+    changes: List[VerdictChange] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+    @property
+    def flipped_to_correct(self) -> int:
+        return sum(1 for c in self.changes if c.is_correct)
+
+    @property
+    def flipped_to_wrong(self) -> int:
+        return sum(1 for c in self.changes if not c.is_correct)
+
+
+def reverify_records(
+        records: List[Dict[str, Any]],
+        categories: Optional[Iterable[str]] = None,
+        max_workers: Optional[int] = None,
+        source_files: Optional[List[str]] = None,
+) -> ReverifyReport:
+    """
+    Перепроверяет записи на месте: обновляет is_correct и verification_details
+    (прежний вердикт сохраняется в previous_is_correct).
+
+    Args:
+        records: Записи результатов
+        categories: Перепроверять только эти категории (None — все)
+        max_workers: Размер пула процессов (по умолчанию — число CPU)
+        source_files: Имя исходного файла для каждой записи (для отчёта об изменениях)
+    """
+    report = ReverifyReport()
+    wanted = set(categories) if categories is not None else None
+
+    tasks = []
+    for index, record in enumerate(records):
+        category = record_category(record)
+        if category is None or (wanted is not None and category not in wanted):
+            continue
+        tasks.append((index, category, record.get('llm_response') or "", record.get('expected_output')))
+    report.total = len(tasks)
+    if not tasks:
+        return report
+
+    started = time.perf_counter()
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        for index, result, error in executor.map(_verify_one, tasks, chunksize=chunksize):
+            record = records[index]
+            category = record_category(record)
+            if error is not None:
+                report.errors[category] = report.errors.get(category, 0) + 1
+                report.error_samples.setdefault(category, error)
+                log.debug("Не удалось перепроверить %s: %s", record.get('test_id'), error)
+                continue
+
+            was_correct = record.get('is_correct')
+            is_correct = bool(result.get('is_correct', False))
+            record['previous_is_correct'] = was_correct
+            record['is_correct'] = is_correct
+            record['verification_details'] = result.get('details', {})
+            report.verified += 1
+            if bool(was_correct) != is_correct:
+                report.changes.append(VerdictChange(
+                    source_file=source_files[index] if source_files else "",
+                    test_id=str(record.get('test_id')),
+                    model_name=str(record.get('model_name')),
+                    category=category,
+                    was_correct=was_correct,
+                    is_correct=is_correct,
+                ))
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+def reverify_results_dir(
+        results_dir: Path,
+        output_dir: Path,
+        categories: Optional[Iterable[str]] = None,
+        max_workers: Optional[int] = None,
+) -> ReverifyReport:
+    """
+    Перепроверяет все файлы результатов из results_dir и пишет новый набор
+    в output_dir (по JSONL-файлу на исходный файл) и verdict_changes.jsonl
+    со списком изменившихся вердиктов. Исходные файлы не изменяются.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Все файлы проверяются одним пулом: реестр генераторов грузится один раз на процесс
+    files: List[Tuple[Path, int]] = []
+    all_records: List[Dict[str, Any]] = []
+    source_files: List[str] = []
+    for path in list_result_files(results_dir):
+        try:
+            records = load_result_records(path)
+        except Exception as e:
+            log.error("Ошибка при чтении файла %s: %s", path.name, e)
+            continue
+        files.append((path, len(records)))
+        all_records.extend(records)
+        source_files.extend([path.name] * len(records))
+    log.info("Загружено записей для перепроверки: %d из %d файлов", len(all_records), len(files))
+
+    report = reverify_records(all_records, categories, max_workers, source_files)
+
+    offset = 0
+    for path, count in files:
+        if count:
+            with JsonlResultWriter(output_dir / f"{path.stem}.jsonl", fsync_every=1000) as writer:
+                for record in all_records[offset:offset + count]:
+                    writer.append(record)
+        offset += count
+
+    with JsonlResultWriter(output_dir / "verdict_changes.jsonl", fsync_every=1000) as writer:
+        for change in report.changes:
+            writer.append(asdict(change))
+    return report
@@ -0,0 +1,393 @@
+"""
+Изолированное выполнение Python-кода, сгенерированного моделью.
+
+Код модели выполняется не в процессе бенчмарка, а в пуле заранее
+запущенных процессов-исполнителей:
+  - RLIMIT_AS — бюджет памяти на одну задачу сверх уже занятой процессом
+    (импорт модуля генератора в бюджет не входит);
+  - RLIMIT_NOFILE / RLIMIT_CORE — открытые файлы, без core-дампов;
+  - RLIMIT_CPU — бюджет процессорного времени на одну задачу (SIGXCPU);
+  - контроль по реальному времени: не ответивший вовремя процесс убивается
+    (SIGKILL) и заменяется новым, поэтому бесконечный цикл в ответе модели
+    не блокирует прогон и не оставляет висящих потоков.
+
+Задача — вызов функции верхнего уровня (передаётся в процесс по ссылке,
+как в multiprocessing) с сериализуемыми аргументами. Для генераторов
+тестов есть готовая обвязка call_generator_method: исполнитель
+импортирует класс генератора, создаёт экземпляр и вызывает его метод.
+Генератор может задать свой бюджет памяти атрибутом sandbox_memory_mb.
+
+Настройки (переменные окружения):
+    BC_SANDBOX_WORKERS        — размер пула (по умолчанию min(4, CPU))
+    BC_SANDBOX_MEMORY_MB      — память на задачу, МБ адресного пространства (1024)
+    BC_SANDBOX_CPU_SECONDS    — процессорное время на задачу (30)
+    BC_SANDBOX_MAX_OPEN_FILES — лимит открытых файлов (64)
+"""
+import atexit
+import builtins
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: лимиты недоступны, остаётся контроль по времени
+    resource = None
+
+log = logging.getLogger(__name__)
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_CPU_LIMIT = 'cpu_limit'
+STATUS_MEMORY_LIMIT = 'memory_limit'
+STATUS_CRASHED = 'crashed'
+
+
+class SandboxTimeLimit(TimeoutError):
+    """Превышено время внутри задачи (см. call_with_time_limit)."""
+
+
+@dataclass
+class SandboxLimits:
+    memory_mb: int = 1024
+    cpu_seconds: int = 30
+    max_open_files: int = 64
+
+    @classmethod
+    def from_env(cls) -> "SandboxLimits":
+        defaults = cls()
+        return cls(
+            memory_mb=int(os.environ.get('BC_SANDBOX_MEMORY_MB', defaults.memory_mb)),
+            cpu_seconds=int(os.environ.get('BC_SANDBOX_CPU_SECONDS', defaults.cpu_seconds)),
+            max_open_files=int(os.environ.get('BC_SANDBOX_MAX_OPEN_FILES', defaults.max_open_files)),
+        )
+
+
+@dataclass
+class SandboxResult:
+    """Результат задачи: value — возвращённое функцией значение при status='ok'."""
+    status: str
+    value: Any = None
+    error: str = ''
+    traceback: str = ''
+    elapsed_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    def failure_details(self) -> Dict[str, Any]:
+        """Описание неудачи для details результата verify()."""
+        messages = {
+            STATUS_TIMEOUT: "Превышен лимит времени выполнения (вероятно, бесконечный цикл)",
+            STATUS_CPU_LIMIT: "Превышен лимит процессорного времени",
+            STATUS_MEMORY_LIMIT: "Превышен лимит памяти",
+            STATUS_CRASHED: "Процесс выполнения кода аварийно завершился",
+            STATUS_ERROR: "Ошибка выполнения кода",
+        }
+        details = {
+            'error': messages.get(self.status, self.status),
+            'sandbox_status': self.status,
+            'elapsed_s': round(self.elapsed_s, 3),
+        }
+        if self.error:
+            details['exception_message'] = self.error
+        if self.traceback:
+            details['traceback'] = self.traceback
+        return details
+
+
+# ──────────────────────────── процесс-исполнитель ─────────────────────────
+def _set_soft_limit(kind: int, value: int) -> None:
+    soft, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    try:
+        resource.setrlimit(kind, (value, hard))
+    except (ValueError, OSError) as e:
+        log.debug("Не удалось установить rlimit %s=%s: %s", kind, value, e)
+
+
+# Лимиты процесса-исполнителя (задаются в _worker_main)
+_worker_limits: Optional[SandboxLimits] = None
+
+
+def _apply_limits(limits: SandboxLimits) -> None:
+    if resource is None:
+        return
+    _set_soft_limit(resource.RLIMIT_NOFILE, limits.max_open_files)
+    _set_soft_limit(resource.RLIMIT_CORE, 0)
+
+
+def _address_space_bytes() -> int:
+    """Текущий размер адресного пространства процесса (0, если /proc недоступен)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _set_memory_budget(memory_mb: Optional[int]) -> None:
+    """
+    RLIMIT_AS считает всё адресное пространство процесса, включая импортированные
+    модули, поэтому лимит = уже занято + бюджет. None снимает ограничение.
+    """
+    if resource is None:
+        return
+    if memory_mb is None:
+        _set_soft_limit(resource.RLIMIT_AS, resource.RLIM_INFINITY)
+        return
+    _set_soft_limit(resource.RLIMIT_AS, _address_space_bytes() + memory_mb * 1024 * 1024)
+
+
+def _set_cpu_budget(seconds: int) -> None:
+    """RLIMIT_CPU считает время всего процесса, поэтому лимит = уже потрачено + бюджет."""
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _set_soft_limit(resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime) + seconds + 1)
+
+
+def _worker_main(conn, limits: SandboxLimits) -> None:
+    global _worker_limits
+    # Ctrl+C обрабатывает основной процесс; исполнители он завершит сам
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_limits = limits
+    _apply_limits(limits)
+
+    while True:
+        try:
+            func, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        _set_cpu_budget(limits.cpu_seconds)
+        _set_memory_budget(limits.memory_mb)
+
+        try:
+            reply = [STATUS_OK, func(*args), '', '']
+        except MemoryError:
+            reply = [STATUS_MEMORY_LIMIT, None, 'MemoryError', '']
+        except BaseException as e:  # включая SystemExit из exit() в коде модели
+            reply = [STATUS_ERROR, None, f"{type(e).__name__}: {e}", traceback.format_exc()]
+
+        # Код модели мог оставить живые потоки или повредить память —
+        # такой процесс больше не используем
+        recycle = reply[0] == STATUS_MEMORY_LIMIT or threading.active_count() > 1
+        try:
+            conn.send(reply + [recycle])
+        except Exception as e:
+            conn.send([STATUS_ERROR, None, f"Результат не сериализуется: {e}", '', True])
+        if recycle:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, limits: SandboxLimits):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, limits), name="sandbox-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+def _default_start_method() -> str:
+    # fork из многопоточного раннера небезопасен, forkserver даёт чистые процессы
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return 'forkserver'
+    return 'spawn'
+
+
+class SandboxPool:
+    """
+    Пул процессов-исполнителей. Потокобезопасен: run() можно вызывать
+    из нескольких потоков, каждый получит свой процесс.
+    """
+
+    def __init__(
+            self,
+            size: Optional[int] = None,
+            limits: Optional[SandboxLimits] = None,
+            max_jobs_per_worker: int = 50,
+            start_method: Optional[str] = None,
+    ):
+        self.size = size or int(os.environ.get('BC_SANDBOX_WORKERS', min(4, os.cpu_count() or 1)))
+        self.limits = limits or SandboxLimits.from_env()
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._ctx = multiprocessing.get_context(start_method or _default_start_method())
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._owner_pid = os.getpid()
+        for _ in range(self.size):
+            self._idle.put(_Worker(self._ctx, self.limits))
+        log.info(
+            "🧪 Песочница Python: %d процесс(ов), память %d MB, CPU %d с на задачу",
+            self.size, self.limits.memory_mb, self.limits.cpu_seconds,
+        )
+
+    def run(self, func: Callable[..., Any], *args: Any, timeout: float = 10.0) -> SandboxResult:
+        """
+        Выполняет func(*args) в процессе-исполнителе.
+
+        timeout — лимит реального времени в секундах: по его истечении
+        процесс убивается, а результат получает статус 'timeout'.
+        """
+        worker = self._idle.get()
+        start_time = time.perf_counter()
+        replace = False
+        try:
+            try:
+                worker.conn.send((func, args))
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                return SandboxResult(STATUS_ERROR, error=f"Задача не сериализуется: {e}")
+            except OSError:
+                replace = True
+                return SandboxResult(STATUS_CRASHED, error="Процесс-исполнитель недоступен")
+            worker.jobs += 1
+
+            if not worker.conn.poll(timeout):
+                replace = True
+                return SandboxResult(
+                    STATUS_TIMEOUT,
+                    error=f"Выполнение не завершилось за {timeout} с",
+                    elapsed_s=time.perf_counter() - start_time,
+                )
+
+            try:
+                status, value, error, tb, recycle = worker.conn.recv()
+            except (EOFError, OSError):
+                replace = True
+                return self._crash_result(worker, time.perf_counter() - start_time)
+
+            replace = recycle or worker.jobs >= self.max_jobs_per_worker
+            return SandboxResult(status, value, error, tb, time.perf_counter() - start_time)
+        except BaseException:
+            # Ctrl+C во время ожидания: процесс, возможно, ещё выполняет задачу,
+            # и его ответ достался бы следующему вызову — в пул он не возвращается
+            replace = True
+            raise
+        finally:
+            if replace:
+                worker.kill()
+                worker = _Worker(self._ctx, self.limits)
+            self._idle.put(worker)
+
+    @staticmethod
+    def _crash_result(worker: _Worker, elapsed_s: float) -> SandboxResult:
+        worker.process.join(timeout=5)
+        exitcode = worker.process.exitcode
+        if exitcode == -getattr(signal, 'SIGXCPU', -1):
+            return SandboxResult(STATUS_CPU_LIMIT, error="SIGXCPU", elapsed_s=elapsed_s)
+        if exitcode == -signal.SIGKILL:
+            # Убит извне — чаще всего OOM killer
+            return SandboxResult(STATUS_MEMORY_LIMIT, error="SIGKILL", elapsed_s=elapsed_s)
+        return SandboxResult(STATUS_CRASHED, error=f"Код завершения {exitcode}", elapsed_s=elapsed_s)
+
+    def close(self) -> None:
+        if os.getpid() != self._owner_pid:
+            return
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Общий для процесса пул (создаётся при первом обращении)."""
+    global _pool
+    with _pool_lock:
+        # После fork пул родителя не наш: его процессы общаются с родителем
+        if _pool is None or _pool._owner_pid != os.getpid():
+            _pool = SandboxPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+# ──────────────────────────── обвязки задач ───────────────────────────────
+def call_generator_method(
+        module_name: str, class_name: str, test_id: str, method_name: str, args: Tuple[Any, ...]
+) -> Any:
+    """
+    Создаёт генератор теста в процессе-исполнителе и вызывает его метод.
+    Импорт модуля (numpy, ortools и т. п.) идёт без лимита памяти: бюджет
+    задачи (BC_SANDBOX_MEMORY_MB или sandbox_memory_mb генератора)
+    отсчитывается от памяти после импорта.
+    """
+    limits = _worker_limits
+    if limits is not None:
+        _set_memory_budget(None)
+    module = importlib.import_module(module_name)
+    generator = getattr(module, class_name)(test_id=test_id)
+    if limits is not None:
+        _set_memory_budget(getattr(generator, 'sandbox_memory_mb', None) or limits.memory_mb)
+    return getattr(generator, method_name)(*args)
+
+
+def exec_and_call(
+        code: str, builtin_names: Sequence[str], calls: List[Tuple[str, Tuple[Any, ...]]]
+) -> List[Tuple[str, Any]]:
+    """
+    Выполняет код с ограниченным набором builtins и вызывает определённые им функции.
+
+    Returns:
+        Для каждого вызова: ('ok', результат) | ('missing', None) | ('raised', 'Тип: сообщение').
+    """
+    namespace: Dict[str, Any] = {
+        '__builtins__': {name: getattr(builtins, name) for name in builtin_names if hasattr(builtins, name)},
+        '__name__': '__sandbox__',
+    }
+    exec(compile(code, '<llm_generated>', 'exec'), namespace, namespace)
+    results: List[Tuple[str, Any]] = []
+    for name, args in calls:
+        func = namespace.get(name)
+        if func is None:
+            results.append(('missing', None))
+            continue
+        try:
+            results.append(('ok', func(*args)))
+        except Exception as e:
+            results.append(('raised', f"{type(e).__name__}: {e}"))
+    return results
+
+
+def call_with_time_limit(func: Callable[[], Any], seconds: float) -> Any:
+    """
+    Вызывает func с ограничением по времени (SIGALRM) и бросает SandboxTimeLimit.
+    Работает в главном потоке процесса-исполнителя; в остальных случаях
+    func вызывается как есть — задачу всё равно ограничивает таймаут пула.
+    """
+    if threading.current_thread() is not threading.main_thread() or not hasattr(signal, 'setitimer'):
+        return func()
+
+    def on_alarm(signum, frame):
+        raise SandboxTimeLimit(f"превышено {seconds} с")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return func()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -8,16 +8,72 @@
 - Анализ полноты и релевантности ответов
 """
 
-from typing import Dict, Any, List, Tuple, Optional, Set
+from typing import Dict, Any, FrozenSet, List, Sequence, Tuple, Optional, Set
 import re
 import logging
 from collections import Counter, defaultdict
+import functools
 import math
 
+import numpy as np
+from scipy import sparse
+
 from ..tests.expert_calibration_dataset import TestType
+from .embeddings import Embedder, get_embedder
+from .reference_index import ReferenceIndex, get_reference_index
 
 log = logging.getLogger(__name__)
 
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Значение по умолчанию для index и embedder: общие для процесса экземпляры (см. reference_index, embeddings)
+_SHARED = object()
+
+
+@functools.lru_cache(maxsize=8192)
+def tokenize(text: str, stop_words: FrozenSet[str], min_length: int = 3) -> Tuple[str, ...]:
+    """
+    Токены текста в нижнем регистре без пунктуации, стоп-слов и коротких слов.
+
+    Результат кэшируется: эталонные ответы одинаковы для всех моделей и
+    запусков, поэтому при пакетной валидации они разбираются один раз.
+    """
+    tokens = _PUNCTUATION_RE.sub(' ', text.lower()).split()
+    return tuple(token for token in tokens if token not in stop_words and len(token) >= min_length)
+
+
+def count_matrices(*token_lists: Sequence[Sequence[str]]) -> Tuple[List[sparse.csr_matrix], Dict[str, int]]:
+    """
+    Разреженные матрицы частот (документ × термин) для нескольких наборов
+    документов с общим словарём. Возвращает матрицы и словарь термин → столбец.
+    """
+    vocabulary: Dict[str, int] = {}
+    layouts = []
+    for documents in token_lists:
+        indptr, indices = [0], []
+        for tokens in documents:
+            indices.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            indptr.append(len(indices))
+        layouts.append((indptr, indices))
+
+    matrices = []
+    for indptr, indices in layouts:
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices)), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocabulary)),
+        )
+        matrix.sum_duplicates()
+        matrices.append(matrix)
+    return matrices, vocabulary
+
+
+def _row_sums(matrix: sparse.spmatrix) -> np.ndarray:
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
 
 class SemanticSimilarityScorer:
     """
@@ -27,11 +83,42 @@ class SemanticSimilarityScorer:
     - Косинусное сходство embeddings
     - Jaccard similarity для множеств слов
     - BM25 для релевантности
+
+    IDF и средняя длина документа для TF-IDF и BM25 берутся из корпусного
+    индекса эталонов (ReferenceIndex); без индекса (index=None или
+    BC_REFERENCE_INDEX=false) или пока он пуст IDF считается по паре
+    сравниваемых текстов.
+
+    Если задана локальная модель эмбеддингов (BC_EMBEDDING_MODEL, см.
+    embeddings), добавляется косинусное сходство эмбеддингов, и combined
+    делится поровну между ним и лексическими метриками.
     """
 
-    def __init__(self):
-        self.embedder = None  # Будет инициализирован с sentence-transformers
+    def __init__(self, index: Optional[ReferenceIndex] = _SHARED, embedder: Optional[Embedder] = _SHARED):
         self.stop_words = self._load_stop_words()
+        self._stop_words_key = frozenset(self.stop_words)
+        self._index = index
+        self._embedder = embedder
+
+    @property
+    def index(self) -> Optional[ReferenceIndex]:
+        """Индекс эталонов (общий индекс открывается при первом обращении)."""
+        if self._index is _SHARED:
+            self._index = get_reference_index()
+        return self._index
+
+    @property
+    def embedder(self) -> Optional[Embedder]:
+        """Модель эмбеддингов (общая модель загружается при первом обращении)."""
+        if self._embedder is _SHARED:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def index_references(self, references: Sequence[str], source: str = "") -> int:
+        """Добавляет эталоны в корпусный индекс; возвращает число новых документов."""
+        if self.index is None:
+            return 0
+        return self.index.add_documents(((text, self._preprocess_text(text)) for text in references), source)
 
     def _load_stop_words(self) -> Set[str]:
         """Загрузка стоп-слов для русского языка"""
@@ -61,115 +148,131 @@ class SemanticSimilarityScorer:
         Returns:
             Dict с различными метриками сходства
         """
-        # Предварительная обработка
-        clean1 = self._preprocess_text(text1)
-        clean2 = self._preprocess_text(text2)
+        return self.calculate_similarity_batch([(text1, text2)])[0]
 
-        similarities = {}
+    def calculate_similarity_batch(self, pairs: Sequence[Tuple[str, str]]) -> List[Dict[str, float]]:
+        """
+        Сходство для пакета пар (ответ, эталон) за один векторный проход.
+
+        Все тексты пакета переводятся в разреженные матрицы частот с общим
+        словарём; метрики считаются по строкам матриц, без циклов по словам.
+        Метрики каждой пары совпадают с попарным calculate_similarity.
+
+        IDF всех терминов пакета читается из индекса одним запросом; пока
+        индекс пуст, метрики считаются по паре текстов, как без индекса. Оценка
+        индекс не меняет (эталоны добавляет index_references), поэтому одна
+        и та же пара при одном состоянии индекса всегда получает одну оценку.
+        """
+        if not pairs:
+            return []
+        tokens1 = [self._preprocess_text(text1) for text1, _ in pairs]
+        tokens2 = [self._preprocess_text(text2) for _, text2 in pairs]
+        (counts1, counts2), vocabulary = count_matrices(tokens1, tokens2)
+
+        corpus = None
+        documents, avg_doc_len = self.index.stats() if self.index is not None else (0, 0.0)
+        # Пустой индекс (свежая установка) дал бы всем словам один IDF и нулевую среднюю длину — считаем по паре
+        if documents:
+            idf = self.index.idf(list(vocabulary))
+            corpus = (np.fromiter((idf[term] for term in vocabulary), dtype=float, count=len(vocabulary)),
+                      avg_doc_len)
 
         # 1. Jaccard similarity для множеств слов
-        similarities['jaccard'] = self._jaccard_similarity(clean1, clean2)
+        jaccard = self._jaccard_similarity(counts1, counts2)
 
         # 2. Cosine similarity для TF-IDF векторов
-        similarities['cosine_tfidf'] = self._cosine_similarity_tfidf(clean1, clean2)
+        cosine_tfidf = self._cosine_similarity_tfidf(counts1, counts2, corpus)
 
         # 3. BM25 similarity
-        similarities['bm25'] = self._bm25_similarity(clean1, clean2)
+        bm25 = self._bm25_similarity(counts1, counts2, corpus)
 
         # 4. Combined similarity (взвешенная комбинация)
-        similarities['combined'] = (
-            similarities['jaccard'] * 0.2 +
-            similarities['cosine_tfidf'] * 0.5 +
-            similarities['bm25'] * 0.3
-        )
-
-        return similarities
-
-    def _preprocess_text(self, text: str) -> List[str]:
-        """Предварительная обработка текста"""
-        # Приведение к нижнему регистру
-        text = text.lower()
-
-        # Удаление пунктуации
-        text = re.sub(r'[^\w\s]', ' ', text)
-
-        # Токенизация
-        tokens = text.split()
-
-        # Удаление стоп-слов и коротких слов
-        tokens = [token for token in tokens
-                 if token not in self.stop_words and len(token) > 2]
+        combined = jaccard * 0.2 + cosine_tfidf * 0.5 + bm25 * 0.3
+        metrics = {'jaccard': jaccard, 'cosine_tfidf': cosine_tfidf, 'bm25': bm25}
 
-        return tokens
+        # 5. Cosine similarity эмбеддингов (если модель задана)
+        if self.embedder is not None:
+            metrics['embedding'] = self._embedding_similarity(pairs, counts1, counts2)
+            combined = combined * 0.5 + metrics['embedding'] * 0.5
+        metrics['combined'] = combined
 
-    def _jaccard_similarity(self, tokens1: List[str], tokens2: List[str]) -> float:
-        """Jaccard similarity для множеств слов"""
-        set1 = set(tokens1)
-        set2 = set(tokens2)
+        return [dict(zip(metrics, map(float, values))) for values in zip(*metrics.values())]
 
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-
-        return intersection / union if union > 0 else 0.0
-
-    def _cosine_similarity_tfidf(self, tokens1: List[str], tokens2: List[str]) -> float:
-        """Cosine similarity для TF-IDF векторов"""
-        # Создание словаря всех слов
-        all_words = list(set(tokens1 + tokens2))
-
-        # Вычисление TF для каждого документа
-        tf1 = Counter(tokens1)
-        tf2 = Counter(tokens2)
-
-        # Вычисление IDF
-        idf = {}
-        for word in all_words:
-            df = (1 if word in tf1 else 0) + (1 if word in tf2 else 0)
-            idf[word] = math.log(2 / df) if df > 0 else 0
-
-        # Создание TF-IDF векторов
-        vector1 = [tf1.get(word, 0) * idf[word] for word in all_words]
-        vector2 = [tf2.get(word, 0) * idf[word] for word in all_words]
-
-        return self._cosine_similarity(vector1, vector2)
-
-    def _cosine_similarity(self, vector1: List[float], vector2: List[float]) -> float:
-        """Вычисление косинусного сходства"""
-        dot_product = sum(a * b for a, b in zip(vector1, vector2))
-        norm1 = math.sqrt(sum(a * a for a in vector1))
-        norm2 = math.sqrt(sum(b * b for b in vector2))
-
-        return dot_product / (norm1 * norm2) if norm1 > 0 and norm2 > 0 else 0.0
-
-    def _bm25_similarity(self, tokens1: List[str], tokens2: List[str]) -> float:
-        """BM25 similarity"""
-        # Упрощенная реализация BM25
-        query = tokens1
-        document = tokens2
+    def _preprocess_text(self, text: str) -> List[str]:
+        """Предварительная обработка текста (кэшируется, см. tokenize)"""
+        return list(tokenize(text, self._stop_words_key))
 
+    def _embedding_similarity(self, pairs: Sequence[Tuple[str, str]], counts1: sparse.csr_matrix,
+                              counts2: sparse.csr_matrix) -> np.ndarray:
+        """
+        Косинус нормированных эмбеддингов (отрицательный — 0). Ответы и
+        эталоны кодируются одним пакетом; пары, где в одном из текстов нет
+        значимых слов, получают 0, как и в лексических метриках.
+        """
+        vectors = self.embedder.encode([text for pair in pairs for text in pair])
+        cosine = np.einsum('ij,ij->i', vectors[0::2], vectors[1::2])
+        has_words = (np.diff(counts1.indptr) > 0) & (np.diff(counts2.indptr) > 0)
+        return np.where(has_words, np.clip(cosine, 0.0, 1.0), 0.0)
+
+    def _jaccard_similarity(self, counts1: sparse.csr_matrix, counts2: sparse.csr_matrix) -> np.ndarray:
+        """Jaccard similarity для множеств слов (по строкам)"""
+        present1, present2 = counts1.sign(), counts2.sign()
+        intersection = _row_sums(present1.multiply(present2))
+        union = np.diff(present1.indptr) + np.diff(present2.indptr) - intersection
+        return _safe_divide(intersection, union)
+
+    def _cosine_similarity_tfidf(self, counts1: sparse.csr_matrix, counts2: sparse.csr_matrix,
+                                 corpus: Optional[Tuple[np.ndarray, float]] = None) -> np.ndarray:
+        """
+        Cosine similarity для TF-IDF векторов.
+        corpus — (IDF столбцов из индекса, средняя длина); без него IDF по паре документов: log(2 / df).
+        """
+        if corpus is not None:
+            weights = corpus[0][np.newaxis, :]
+        else:
+            present1, present2 = counts1.sign(), counts2.sign()
+            both = present1.multiply(present2)
+            # df = 2 даёт log(1) = 0, поэтому вес ненулевой только у слов одного из документов
+            weights = (present1 + present2 - 2 * both) * math.log(2)
+        vectors1 = counts1.multiply(weights).tocsr()
+        vectors2 = counts2.multiply(weights).tocsr()
+
+        dot_product = _row_sums(vectors1.multiply(vectors2))
+        norms = np.sqrt(_row_sums(vectors1.multiply(vectors1))) * np.sqrt(_row_sums(vectors2.multiply(vectors2)))
+        return _safe_divide(dot_product, norms)
+
+    def _bm25_similarity(self, query: sparse.csr_matrix, document: sparse.csr_matrix,
+                         corpus: Optional[Tuple[np.ndarray, float]] = None) -> np.ndarray:
+        """
+        BM25 similarity (по строкам: запрос — ответ, документ — эталон).
+        С корпусом (IDF столбцов, средняя длина эталона) — настоящий BM25,
+        нормированный на свой максимум: насыщенная частота термина меньше
+        k1 + 1, поэтому делим на (k1 + 1) * сумму IDF терминов запроса.
+        Без корпуса — по паре текстов.
+        """
         k1 = 1.5  # параметр насыщения
         b = 0.75  # параметр нормализации длины
 
         # Статистики документа
-        doc_len = len(document)
-        avg_doc_len = (len(tokens1) + len(tokens2)) / 2
-
-        score = 0
-        doc_freq = Counter(document)
-
-        for term in query:
-            if term in doc_freq:
-                tf = doc_freq[term]
-                idf = math.log(2 / 1)  # упрощение для двух документов
-
-                numerator = tf * (k1 + 1)
-                denominator = tf + k1 * (1 - b + b * doc_len / avg_doc_len)
+        query_len = _row_sums(query)
+        doc_len = _row_sums(document)
+        avg_doc_len = np.full_like(doc_len, corpus[1]) if corpus is not None else (query_len + doc_len) / 2
+        length_norm = k1 * (1 - b + b * _safe_divide(doc_len, avg_doc_len))
+
+        # Насыщенная частота каждого термина документа
+        rows = np.repeat(np.arange(document.shape[0]), np.diff(document.indptr))
+        tf = document.data
+        saturated = sparse.csr_matrix(
+            (tf * (k1 + 1) / (tf + length_norm[rows]), document.indices, document.indptr), shape=document.shape
+        )
 
-                score += idf * numerator / denominator
+        if corpus is not None:
+            weighted_query = query.multiply(corpus[0][np.newaxis, :]).tocsr()
+            return _safe_divide(_row_sums(weighted_query.multiply(saturated)), (k1 + 1) * _row_sums(weighted_query))
 
-        # Нормализация
-        max_possible_score = len(query) * math.log(2)
-        return score / max_possible_score if max_possible_score > 0 else 0.0
+        # idf = log(2 / 1) для каждого термина запроса, найденного в документе;
+        # нормализация на len(query) * log(2) его сокращает
+        return _safe_divide(_row_sums(query.multiply(saturated)), query_len)
 
 
 class ConceptExtractor:
@@ -182,6 +285,8 @@ class ConceptExtractor:
     - Статистические методы для ключевых слов
     """
 
+    STOP_WORDS = frozenset({'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а'})
+
     def __init__(self):
         self.tfidf_vectorizer = None
         self.nlp_model = None  # spaCy или Natasha
@@ -213,22 +318,8 @@ class ConceptExtractor:
         return combined_concepts[:top_n]
 
     def _preprocess_text(self, text: str) -> List[str]:
-        """Предварительная обработка текста"""
-        # Приведение к нижнему регистру
-        text = text.lower()
-
-        # Удаление пунктуации
-        text = re.sub(r'[^\w\s]', ' ', text)
-
-        # Токенизация
-        tokens = text.split()
-
-        # Фильтрация
-        stop_words = {'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а'}
-        tokens = [token for token in tokens
-                 if token not in stop_words and len(token) > 2]
-
-        return tokens
+        """Предварительная обработка текста (общий кэш токенов, см. tokenize)"""
+        return list(tokenize(text, self.STOP_WORDS))
 
     def _extract_tfidf_concepts(self, tokens: List[str], top_n: int) -> List[Tuple[str, float]]:
         """Извлечение концепций на основе TF-IDF"""
@@ -429,6 +520,8 @@ class CompletenessAnalyzer:
         Анализ полноты ответа относительно требований.
         """
         completeness_scores = {}
+        # Все индикаторы ищутся в одном и том же тексте в нижнем регистре
+        response = response.lower()
 
         # 1. Покрытие ключевых аспектов
         completeness_scores['aspect_coverage'] = self._calculate_aspect_coverage(response, reference, test_type)
@@ -456,13 +549,13 @@ class CompletenessAnalyzer:
         """Расчет покрытия ключевых аспектов"""
         if test_type == TestType.MULTI_HOP_REASONING:
             key_steps = reference.get('key_steps', [])
-            covered_steps = sum(1 for step in key_steps if step.lower() in response.lower())
+            covered_steps = sum(1 for step in key_steps if step.lower() in response)
             return covered_steps / len(key_steps) if key_steps else 0.0
 
         elif test_type == TestType.CONSTRAINED_OPTIMIZATION:
             constraints = reference.get('expected_considerations', [])
             covered_constraints = sum(1 for constraint in constraints
-                                    if any(word in response.lower() for word in constraint.lower().split()))
+                                    if any(word in response for word in constraint.lower().split()))
             return covered_constraints / len(constraints) if constraints else 0.0
 
         # Для других типов тестов
@@ -475,7 +568,7 @@ class CompletenessAnalyzer:
             'комплексно', 'многоаспектно', 'многогранно'
         ]
 
-        found_indicators = sum(1 for indicator in depth_indicators if indicator in response.lower())
+        found_indicators = sum(1 for indicator in depth_indicators if indicator in response)
 
         # Учет длины ответа как индикатора глубины
         length_score = min(len(response.split()) / 100, 1.0)
@@ -487,7 +580,7 @@ class CompletenessAnalyzer:
         explanation_score = 0
 
         for category, indicators in self.completeness_indicators.items():
-            found_indicators = sum(1 for indicator in indicators if indicator in response.lower())
+            found_indicators = sum(1 for indicator in indicators if indicator in response)
             explanation_score += min(found_indicators / 2, 1.0)  # нормировка для каждой категории
 
         return explanation_score / len(self.completeness_indicators)
@@ -495,8 +588,8 @@ class CompletenessAnalyzer:
     def _calculate_structural_completeness(self, response: str) -> float:
         """Оценка структурной полноты"""
         # Проверка наличия введения, основной части и заключения
-        has_introduction = any(word in response.lower() for word in ['рассмотрим', 'анализируем', 'изучим'])
-        has_conclusion = any(word in response.lower() for word in ['итог', 'вывод', 'заключение', 'таким образом'])
+        has_introduction = any(word in response for word in ['рассмотрим', 'анализируем', 'изучим'])
+        has_conclusion = any(word in response for word in ['итог', 'вывод', 'заключение', 'таким образом'])
 
         structural_score = (has_introduction + has_conclusion) / 2
 
@@ -523,13 +616,30 @@ class EnhancedSemanticAnalyzer:
         Returns:
             Dict с результатами всех видов анализа
         """
+        return self.analyze_batch([response], [reference], [test_type])[0]
+
+    def analyze_batch(self, responses: Sequence[str], references: Sequence[Dict[str, Any]],
+                      test_types: Sequence[TestType]) -> List[Dict[str, Any]]:
+        """
+        Анализ пакета ответов: сходство с эталонами считается одним векторным
+        проходом (calculate_similarity_batch), остальные метрики — по ответам.
+        """
+        with_reference = [i for i, reference in enumerate(references) if 'expected_answer' in reference]
+        similarities = dict(zip(with_reference, self.similarity_scorer.calculate_similarity_batch(
+            [(responses[i], references[i]['expected_answer']) for i in with_reference]
+        )))
+        return [
+            self._analyze_one(response, reference, test_type, similarities.get(i))
+            for i, (response, reference, test_type) in enumerate(zip(responses, references, test_types))
+        ]
+
+    def _analyze_one(self, response: str, reference: Dict[str, Any], test_type: TestType,
+                     similarity: Optional[Dict[str, float]]) -> Dict[str, Any]:
         analysis_results = {}
 
         # 1. Семантическое сходство
-        if 'expected_answer' in reference:
-            analysis_results['similarity'] = self.similarity_scorer.calculate_similarity(
-                response, reference['expected_answer']
-            )
+        if similarity is not None:
+            analysis_results['similarity'] = similarity
 
         # 2. Извлечение концепций
         analysis_results['concepts'] = self.concept_extractor.extract_concepts(response, top_n=5)
@@ -0,0 +1,57 @@
+"""
+Общие для процесса объекты, которые создаются при первом обращении.
+
+Кэш компиляции, кэш стогов сена, индекс эталонов и модель эмбеддингов
+устроены одинаково: объект создаётся один раз на процесс по переменным
+окружения BC_*, а выключенный компонент (BC_<ИМЯ>=false) или компонент,
+который не удалось создать, даёт None. LazySingleton хранит такой объект,
+env_flag разбирает флаги включения.
+"""
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar('T')
+
+_FALSE_VALUES = ('0', 'false', 'off', 'no')
+
+
+def env_flag(name: str, default: bool = True) -> bool:
+    """Флаг из переменной окружения: 0/false/off/no — выключен, пустое значение — default."""
+    value = os.environ.get(name, '').strip().lower()
+    if not value:
+        return default
+    return value not in _FALSE_VALUES
+
+
+class LazySingleton(Generic[T]):
+    """
+    Объект, который factory создаёт при первом get() (потокобезопасно, один раз).
+    factory может вернуть None — тогда get() всегда возвращает None.
+    """
+
+    def __init__(self, factory: Callable[[], Optional[T]]):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, value: Optional[T]) -> 'LazySingleton[T]':
+        """Уже созданный объект (для тестов: подмена общего экземпляра)."""
+        singleton = cls(lambda: value)
+        singleton.get()
+        return singleton
+
+    def get(self) -> Optional[T]:
+        with self._lock:
+            if not self._initialized:
+                self._initialized = True
+                self._value = self._factory()
+            return self._value
+
+    def reset(self) -> None:
+        """Следующий get() снова вызовет factory."""
+        with self._lock:
+            self._value = None
+            self._initialized = False
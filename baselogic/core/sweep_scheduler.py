@@ -0,0 +1,197 @@
+"""
+Планировщик прогона нескольких моделей с учётом эндпоинтов.
+
+Модели группируются по эндпоинту (client_type + api_base). Разные эндпоинты
+(Ollama на одной машине, LM Studio на другой, удалённый OpenAI-совместимый API)
+обрабатываются параллельно, а модели одного локального сервера — по очереди,
+чтобы сервер не перегружал веса при каждом запросе. Число одновременно
+загруженных моделей на локальном сервере ограничено слотами
+(OLLAMA_MAX_LOADED_MODELS для Ollama, BC_MAX_LOADED_MODELS — для всех).
+
+Внутри эндпоинта конфигурации с одинаковым "ключом загрузки" (модель +
+опции, с которыми сервер её загружает) идут подряд одной цепочкой: модель
+загружается один раз, а выгружается только после последней конфигурации.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+RunModel = Callable[[Dict[str, Any], bool], None]
+
+# Адреса по умолчанию — те же, что использует LLMClientFactory
+DEFAULT_API_BASES = {
+    'ollama': "http://localhost:11434",
+    'lmstudio': "http://127.0.0.1:1234/v1",
+    'jan': "http://127.0.0.1:1337/v1",
+    'gemini': "https://generativelanguage.googleapis.com",
+}
+
+# Провайдеры, у которых адрес зашит в клиенте и api_base из конфига не используется
+FIXED_API_BASE = ('ollama', 'lmstudio', 'jan', 'gemini')
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '0.0.0.0', '::1')
+
+# Опции, при изменении которых Ollama перезагружает модель
+LOAD_OPTIONS = ('num_ctx', 'num_batch', 'num_gpu', 'main_gpu', 'low_vram', 'num_thread', 'use_mmap', 'use_mlock')
+
+
+def endpoint_key(model_config: Dict[str, Any]) -> str:
+    """Ключ эндпоинта модели: '<client_type>|<api_base>'."""
+    client_type = str(model_config.get('client_type') or 'unknown').strip().lower()
+    if client_type in FIXED_API_BASE:
+        api_base = DEFAULT_API_BASES[client_type]
+    else:
+        api_base = model_config.get('api_base') or DEFAULT_API_BASES.get(client_type, '')
+    return f"{client_type}|{str(api_base).rstrip('/')}"
+
+
+def is_local_endpoint(key: str) -> bool:
+    """Эндпоинт — локальный сервер, который сам загружает веса моделей."""
+    client_type, _, api_base = key.partition('|')
+    if client_type in ('ollama', 'lmstudio', 'jan'):
+        return True
+    return (urlparse(api_base).hostname or '') in LOCAL_HOSTS
+
+
+def model_load_key(model_config: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Конфигурации с одинаковым ключом используют одну и ту же загруженную модель."""
+    options: Dict[str, Any] = {}
+    for section in ('generation', 'inference'):
+        options.update(model_config.get(section) or {})
+    return (model_config.get('name'),) + tuple(str(options.get(o)) for o in LOAD_OPTIONS)
+
+
+def split_load_chains(models: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Упорядочивает модели так, чтобы конфигурации одной загруженной модели
+    шли подряд (в порядке первого появления), и режет их на цепочки.
+    """
+    chains: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+    for model_config in models:
+        chains.setdefault(model_load_key(model_config), []).append(model_config)
+    return list(chains.values())
+
+
+@dataclass
+class EndpointGroup:
+    """Модели одного эндпоинта и число моделей, которые он держит одновременно."""
+    key: str
+    models: List[Dict[str, Any]] = field(default_factory=list)
+    max_loaded_models: int = 1
+
+    @property
+    def chains(self) -> List[List[Dict[str, Any]]]:
+        return split_load_chains(self.models)
+
+
+def _int_setting(value: Any, default: int) -> int:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def max_loaded_models(key: str, config: Dict[str, Any], models_count: int) -> int:
+    """
+    Сколько моделей эндпоинта можно тестировать одновременно.
+
+    Приоритет: BC_MAX_LOADED_MODELS → OLLAMA_MAX_LOADED_MODELS (для Ollama) → 1.
+    Удалённые API не загружают веса по запросу — все их модели идут параллельно.
+    """
+    if not is_local_endpoint(key):
+        return max(1, models_count)
+    if config.get('max_loaded_models') is not None:
+        return _int_setting(config['max_loaded_models'], 1)
+    if key.startswith('ollama|'):
+        return _int_setting(os.environ.get('OLLAMA_MAX_LOADED_MODELS'), 1)
+    return 1
+
+
+def group_models_by_endpoint(
+        models: List[Dict[str, Any]], config: Dict[str, Any]
+) -> List[EndpointGroup]:
+    """Группирует модели по эндпоинтам, сохраняя порядок из конфигурации."""
+    groups: Dict[str, EndpointGroup] = {}
+    for model_config in models:
+        key = endpoint_key(model_config)
+        groups.setdefault(key, EndpointGroup(key=key)).models.append(model_config)
+    for group in groups.values():
+        group.max_loaded_models = max_loaded_models(key=group.key, config=config, models_count=len(group.models))
+    return list(groups.values())
+
+
+class SweepScheduler:
+    """
+    Запускает run_model(model_config) для всех моделей.
+
+    max_parallel_endpoints — сколько эндпоинтов обрабатывать одновременно
+    (0 — все; 1 — последовательный прогон, как раньше).
+    """
+
+    def __init__(self, models: List[Dict[str, Any]], config: Dict[str, Any]):
+        self.groups = group_models_by_endpoint(models, config)
+        limit = _int_setting(config.get('sweep_parallel_endpoints', 0) or len(self.groups), 1)
+        self.max_parallel_endpoints = min(limit, max(1, len(self.groups)))
+
+    @property
+    def is_parallel(self) -> bool:
+        """Будут ли модели тестироваться одновременно."""
+        if self.max_parallel_endpoints > 1:
+            return True
+        return any(g.max_loaded_models > 1 and len(g.chains) > 1 for g in self.groups)
+
+    def log_plan(self) -> None:
+        log.info("🗂️  План прогона: %d эндпоинт(ов), параллельно до %d",
+                 len(self.groups), self.max_parallel_endpoints)
+        for group in self.groups:
+            log.info("  - %s: %d модел(ей), одновременно %d%s",
+                     group.key, len(group.models), group.max_loaded_models,
+                     " (локальный сервер)" if is_local_endpoint(group.key) else "")
+
+    @staticmethod
+    def _run_chain(chain: List[Dict[str, Any]], run_model: RunModel) -> None:
+        for index, model_config in enumerate(chain):
+            run_model(model_config, index < len(chain) - 1)
+
+    def _run_group(self, group: EndpointGroup, run_model: RunModel) -> None:
+        chains = group.chains
+        workers = min(group.max_loaded_models, len(chains))
+        if workers <= 1:
+            for chain in chains:
+                self._run_chain(chain, run_model)
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sweep-model") as pool:
+            for future in [pool.submit(self._run_chain, chain, run_model) for chain in chains]:
+                future.result()
+
+    def run(self, run_model: RunModel) -> None:
+        """
+        Выполняет прогон: run_model(model_config, keep_loaded), где
+        keep_loaded=True означает, что следующей идёт конфигурация той же
+        загруженной модели и выгружать её не нужно.
+
+        Исключения run_model пробрасываются наружу, поэтому ошибки
+        отдельных моделей run_model должен обрабатывать сам.
+        """
+        if not self.is_parallel:
+            # Последовательный прогон выполняется в вызывающем потоке (Ctrl+C работает как раньше)
+            for group in self.groups:
+                self._run_group(group, run_model)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.max_parallel_endpoints, thread_name_prefix="sweep-endpoint")
+        try:
+            futures = [pool.submit(self._run_group, group, run_model) for group in self.groups]
+            for future in futures:
+                future.result()
+        except BaseException:
+            # Ctrl+C / ошибка: не запускаем эндпоинты, до которых ещё не дошли
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+
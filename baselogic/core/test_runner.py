@@ -1,25 +1,37 @@
 import gc
-import importlib
+import hashlib
 import json
 import logging
 import os
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 import psutil
 
 from .adapter import AdapterLLMClient
+from .async_http import close_bridge_client
 from .client_factory import LLMClientFactory
-from .interfaces import ILLMClient, LLMClientError
+from .interfaces import ILLMClient, LLMCacheMissError, LLMClientError
+from .jvm_runner import check_jvm_toolchain
 from .llm_client import LLMClient
-from .plugin_manager import PluginManager
+from .plugin_manager import discover_test_generators
 from .progress_tracker import ProgressTracker
 from .reporter import Reporter
+from .response_cache import ResponseCache
+from .result_store import JsonlResultWriter, recover_incremental_file
+from .sweep_scheduler import SweepScheduler
 from .system_checker import SystemProfiler, get_hardware_tier
 
 log = logging.getLogger(__name__)
 
+# Сколько сервер держит модель между запросами прогона (BC_KEEP_ALIVE).
+# Дольше стандартных 5 минут Ollama, чтобы долгая верификация не выгрузила модель.
+DEFAULT_KEEP_ALIVE = "30m"
+
 
 class TestRunner:
     """
@@ -34,6 +46,8 @@ class TestRunner:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.test_generators = self._load_test_generators()
+        # Тесты, исключённые до прогона из-за недоступного тулчейна: {имя: причина}
+        self.unavailable_tests: Dict[str, str] = {}
         project_root = Path(__file__).parent.parent.parent
         self.results_dir = project_root / "results" / "raw"
         self.results_dir.mkdir(parents=True, exist_ok=True)
@@ -43,6 +57,14 @@ class TestRunner:
         self._system_info: Optional[Dict[str, Any]] = None
         self._hardware_tier: Optional[str] = None
 
+        # Открытые JSONL-writer'ы incremental-файлов (по ключу конфигурации, см. _result_key)
+        self._result_writers: Dict[str, JsonlResultWriter] = {}
+
+        # Общий для всех моделей кэш ответов (BC_RESPONSE_CACHE=on|replay)
+        self._response_cache: Optional[ResponseCache] = ResponseCache.from_config(
+            self.config, default_dir=self.results_dir.parent / "cache" / "responses"
+        )
+
     def _get_system_info(self) -> Dict[str, Any]:
         """Ленивая инициализация системной информации (собираем один раз)."""
         if self._system_info is None:
@@ -62,55 +84,6 @@ class TestRunner:
         Динамически загружает все доступные тесты (встроенные и плагины),
         а затем фильтрует их согласно 'tests_to_run' в конфиге.
         """
-        generators = {}
-        base_module_path = "baselogic.tests"
-
-        # Шаг 1: Загружаем ВСЕ встроенные тесты
-        tests_dir = Path(__file__).parent.parent / "tests"
-        for test_file in tests_dir.glob("t[0-9][0-9]_*.py"):
-            test_key = test_file.stem
-            try:
-                class_name_parts = test_key.split('_')[1:]
-                class_name = "".join(
-                    [part.capitalize() for part in class_name_parts]
-                ) + "TestGenerator"
-
-                module_name = f"{base_module_path}.{test_key}"
-                module = importlib.import_module(module_name)
-                generator_class = getattr(module, class_name)
-
-                generators[test_key] = generator_class
-                log.debug(
-                    "✅ Встроенный тест '%s' найден и зарегистрирован.",
-                    test_key,
-                )
-            except (ImportError, AttributeError) as e:
-                log.warning(
-                    "⚠️ Не удалось загрузить встроенный тест из файла '%s'. "
-                    "Ошибка: %s",
-                    test_file.name,
-                    e,
-                )
-
-        # Шаг 2: Загружаем плагины
-        log.info("🔎 Поиск плагинов тестов...")
-        plugin_manager = PluginManager()
-        plugins = plugin_manager.discover_plugins()
-        if plugins:
-            log.info(f"✅ Найдено плагинов: {len(plugins)}")
-            for plugin_name, plugin_class in plugins.items():
-                if plugin_name in generators:
-                    log.info(
-                        f"  - Плагин '{plugin_name}' загружен "
-                        f"(ПЕРЕОПРЕДЕЛЯЕТ встроенный тест)."
-                    )
-                else:
-                    log.info(f"  - Плагин '{plugin_name}' загружен.")
-                generators[plugin_name] = plugin_class
-        else:
-            log.info("Плагины не найдены.")
-
-        # Шаг 3: Фильтрация
         tests_to_run_raw = self.config.get('tests_to_run', [])
         if isinstance(tests_to_run_raw, str):
             tests_to_run_raw = [tests_to_run_raw]
@@ -123,13 +96,11 @@ class TestRunner:
             )
             return {}
 
-        filtered_generators = {
-            name: gen
-            for name, gen in generators.items()
-            if name in tests_to_run_set
-        }
+        # Встроенные тесты и плагины: импортируются только выбранные
+        # (список остальных строится по манифесту без импорта)
+        filtered_generators = discover_test_generators(tests_to_run_raw)
 
-        missing_keys = tests_to_run_set - set(filtered_generators.keys())
+        missing_keys = [key for key in dict.fromkeys(tests_to_run_raw) if key not in filtered_generators]
         if missing_keys:
             log.warning(
                 f"⚠️ Тесты из 'tests_to_run' не найдены: "
@@ -142,29 +113,131 @@ class TestRunner:
         )
         return filtered_generators
 
+    def _exclude_unavailable_tests(self) -> Dict[str, str]:
+        """
+        Проверяет тулчейны до прогона: тесты, которым нужен Kotlin, исключаются
+        один раз, а не падают по одному после оплаченной генерации ответа.
+
+        Returns:
+            {имя теста: причина} для исключённых тестов.
+        """
+        kotlin_tests = [
+            name for name, generator_class in self.test_generators.items()
+            if getattr(generator_class, 'requires_kotlin', False)
+        ]
+        if not kotlin_tests:
+            return {}
+
+        health = check_jvm_toolchain()
+        if health['available']:
+            log.info(
+                "☕ Kotlin: %s (%s), java %s, тёплый компилятор: %s",
+                health['kotlinc'], health['kotlin_version'], health['java_version'],
+                "да" if health['kotlin_service'] else "нет",
+            )
+            return {}
+
+        log.warning(
+            "⚠️ Kotlin недоступен (%s). Исключены тесты: %s",
+            health['error'], ", ".join(kotlin_tests),
+        )
+        for name in kotlin_tests:
+            del self.test_generators[name]
+        return {name: health['error'] for name in kotlin_tests}
+
     # ------------------------------------------------------------------
     #  НОВОЕ: Промежуточное сохранение
     # ------------------------------------------------------------------
 
-    def _get_incremental_filepath(self, model_name: str) -> Path:
+    @staticmethod
+    def _result_key(model_config: Dict[str, Any]) -> str:
         """
-        Возвращает путь к файлу промежуточных результатов для модели.
+        Ключ файлов результатов конфигурации: имя модели и короткий хеш конфигурации.
+
+        Конфигурации одной модели на разных эндпоинтах (или с разными опциями)
+        могут тестироваться одновременно и не должны делить writer и файлы.
+        Хеш стабилен между запусками, поэтому incremental-файл упавшего прогона
+        находится при повторном запуске той же конфигурации.
+        """
+        payload = json.dumps(model_config, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:8]
+        return f"{model_config.get('name', 'unknown')}_{digest}"
+
+    def _get_incremental_filepath(self, result_key: str) -> Path:
+        """
+        Возвращает путь к файлу промежуточных результатов конфигурации.
         Используется фиксированное имя (без timestamp), чтобы дописывать
         в один и тот же файл на протяжении всего прогона.
         """
-        safe_name = model_name.replace(":", "_").replace("/", "_")
+        safe_name = result_key.replace(":", "_").replace("/", "_")
         hw = self._get_hardware_tier()
         # Файл с суффиксом _incremental — чтобы не путать с финальным
-        return self.results_dir / f"{safe_name}_{hw}_incremental.json"
+        return self.results_dir / f"{safe_name}_{hw}_incremental.jsonl"
+
+    def _get_final_filepath(
+            self, result_key: str, timestamp: Optional[str] = None
+    ) -> Path:
+        """
+        Возвращает путь к финальному файлу результатов конфигурации.
+        Не перезаписывает существующие файлы: при совпадении timestamp
+        (например, со спасённым файлом прерванного прогона) добавляет суффикс.
+        """
+        timestamp = timestamp or time.strftime("%Y%m%d_%H%M%S")
+        safe_name = result_key.replace(":", "_").replace("/", "_")
+        hw = self._get_hardware_tier()
+        final_path = self.results_dir / f"{safe_name}_{hw}_{timestamp}.jsonl"
+        suffix = 1
+        while final_path.exists():
+            final_path = (
+                    self.results_dir
+                    / f"{safe_name}_{hw}_{timestamp}_{suffix}.jsonl"
+            )
+            suffix += 1
+        return final_path
+
+    def _get_result_writer(self, result_key: str) -> JsonlResultWriter:
+        """
+        Возвращает (и при первом обращении открывает) writer incremental-файла.
+
+        Если на диске остался incremental-файл упавшего прогона, он сначала
+        переименовывается в финальный — его записи попадут в отчёт,
+        а новый прогон начнётся с чистого файла.
+        """
+        writer = self._result_writers.get(result_key)
+        if writer is not None:
+            return writer
+
+        filepath = self._get_incremental_filepath(result_key)
+        if filepath.exists():
+            crashed_at = time.strftime(
+                "%Y%m%d_%H%M%S", time.localtime(filepath.stat().st_mtime)
+            )
+            recovered = recover_incremental_file(
+                filepath, self._get_final_filepath(result_key, crashed_at)
+            )
+            if recovered:
+                log.warning(
+                    "  ♻️ Найден incremental-файл прерванного прогона, "
+                    "сохранён как: %s",
+                    recovered.name,
+                )
+
+        writer = JsonlResultWriter(
+            filepath,
+            fsync_every=self.config.get('results_fsync_every', 10),
+        )
+        self._result_writers[result_key] = writer
+        return writer
 
     def _save_single_result(
             self,
-            model_name: str,
+            result_key: str,
             result: Dict[str, Any],
             accumulated: List[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
         """
-        Добавляет один результат в accumulated и сразу сбрасывает на диск.
+        Добавляет один результат в accumulated и сразу дописывает его
+        отдельной строкой в incremental JSONL-файл.
         Возвращает обновлённый список.
         """
         # Обогащаем результат системной информацией
@@ -175,24 +248,13 @@ class TestRunner:
 
         accumulated.append(enriched)
 
-        # Атомарная запись: пишем во временный файл, потом переименовываем
-        filepath = self._get_incremental_filepath(model_name)
-        tmp_path = filepath.with_suffix('.tmp')
         try:
-            with open(tmp_path, 'w', encoding='utf-8') as f:
-                json.dump(
-                    accumulated,
-                    f,
-                    ensure_ascii=False,
-                    indent=4,
-                    default=str,
-                )
-            # Атомарная замена (на POSIX; на Windows — почти атомарная)
-            tmp_path.replace(filepath)
+            writer = self._get_result_writer(result_key)
+            writer.append(enriched)
             log.debug(
                 "  💾 Промежуточное сохранение: %s (%d записей)",
-                filepath.name,
-                len(accumulated),
+                writer.path.name,
+                writer.records_written,
             )
         except Exception as e:
             log.error(
@@ -203,50 +265,46 @@ class TestRunner:
 
     def _finalize_results(
             self,
-            model_name: str,
+            result_key: str,
             accumulated: List[Dict[str, Any]],
     ):
         """
         Переименовывает incremental-файл в финальный с timestamp.
-        Удаляет промежуточный файл.
+        Записи уже лежат на диске, поэтому финализация — это fsync и rename.
         """
+        writer = self._result_writers.pop(result_key, None)
+
         if not accumulated:
             log.warning(
-                "  ⚠️ Нет результатов для финализации модели '%s'",
-                model_name,
+                "  ⚠️ Нет результатов для финализации конфигурации '%s'",
+                result_key,
             )
+            if writer is not None:
+                writer.close()
+                if writer.records_written == 0 and writer.path.exists():
+                    writer.path.unlink()
             return
 
-        incremental_path = self._get_incremental_filepath(model_name)
-
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        safe_name = model_name.replace(":", "_").replace("/", "_")
-        hw = self._get_hardware_tier()
-        final_path = self.results_dir / f"{safe_name}_{hw}_{timestamp}.json"
+        final_path = self._get_final_filepath(result_key)
 
         try:
-            # Записываем финальный файл
-            with open(final_path, 'w', encoding='utf-8') as f:
-                json.dump(
-                    accumulated,
-                    f,
-                    ensure_ascii=False,
-                    indent=4,
-                    default=str,
-                )
+            if writer is None or writer.records_written != len(accumulated):
+                # Incremental-файл не вёлся (или писался с ошибками) —
+                # записываем накопленные результаты целиком.
+                if writer is not None:
+                    writer.close()
+                    writer.path.unlink(missing_ok=True)
+                with JsonlResultWriter(final_path) as full_writer:
+                    for record in accumulated:
+                        full_writer.append(record)
+            else:
+                writer.finalize(final_path)
+
             log.info(
                 "  ✅ Финальный файл: %s (%d записей)",
                 final_path.name,
                 len(accumulated),
             )
-
-            # Удаляем промежуточный файл
-            if incremental_path.exists():
-                incremental_path.unlink()
-                log.debug(
-                    "  🗑️ Промежуточный файл удалён: %s",
-                    incremental_path.name,
-                )
         except Exception as e:
             log.error(
                 "  ❌ Ошибка финализации результатов: %s", e, exc_info=True
@@ -301,6 +359,8 @@ class TestRunner:
         if not system_info['gpus']:
             log.info("🎮 GPU: Не обнаружено дискретных GPU")
 
+        self.unavailable_tests = self._exclude_unavailable_tests()
+
         # --- Запуск тестов ---
         successful_models, failed_models = [], []
         num_runs = self.config.get('runs_per_test', 1)
@@ -314,74 +374,47 @@ class TestRunner:
 
         progress = ProgressTracker(total_test_cases)
 
-        try:
-            for model_config in self.config['models_to_test']:
-                model_name = model_config.get('name')
-                if not model_name:
-                    log.warning(
-                        "Найден конфиг модели без имени ('name'). Пропуск."
-                    )
-                    continue
-
-                log.info("=" * 80)
-                log.info("🚀 НАЧАЛО ТЕСТИРОВАНИЯ МОДЕЛИ: %s", model_name)
-                log.info("=" * 80)
-
-                try:
-                    log.info("🔧 ЭТАП 1: Создание клиента...")
-                    client = self._create_client_safely(
-                        model_config, show_payload
-                    )
-                    if client is None:
-                        failed_models.append(
-                            (model_name, "Ошибка создания клиента")
-                        )
-                        for _ in range(len(self.test_generators) * num_runs):
-                            progress.update(model_name, "N/A")
-                        continue
-
-                    log.info("📊 ЭТАП 2: Получение метаданных модели...")
-                    model_details = client.get_model_info()
-
-                    log.info("🧪 ЭТАП 3: Выполнение тестов...")
-                    model_results = self._run_tests_for_model(
-                        client,
-                        model_name,
-                        model_details,
-                        progress,
-                        save_incremental=bool(raw_save),
-                    )
+        scheduler = SweepScheduler(self.config['models_to_test'], self.config)
+        scheduler.log_plan()
+        results_lock = threading.Lock()
 
-                    # ИЗМЕНЕНО: финализация вместо _save_results
-                    if raw_save:
-                        log.info("💾 ЭТАП 4: Финализация результатов...")
-                        self._finalize_results(model_name, model_results)
-
-                    if not model_results:
-                        failed_models.append(
-                            (model_name, "Нет результатов от модели")
-                        )
-                    else:
-                        successful_models.append(model_name)
-
-                except Exception as e:
-                    log.error(
-                        "❌ Критическая ошибка при тестировании модели "
-                        "%s: %s",
-                        model_name,
-                        e,
-                        exc_info=True,
-                    )
-                    failed_models.append((model_name, str(e)))
+        def run_model(model_config: Dict[str, Any], keep_loaded: bool) -> None:
+            model_name = model_config.get('name')
+            if not model_name:
+                log.warning(
+                    "Найден конфиг модели без имени ('name'). Пропуск."
+                )
+                return
+            error = self._run_model(
+                model_config,
+                progress,
+                show_payload=show_payload,
+                save_incremental=bool(raw_save),
+                echo_stream=not scheduler.is_parallel,
+                keep_loaded=keep_loaded,
+            )
+            with results_lock:
+                if error is None:
+                    successful_models.append(model_name)
+                else:
+                    failed_models.append((model_name, error))
 
-                    # НОВОЕ: Даже при ошибке промежуточный файл уже на диске
-                    log.info(
-                        "  ℹ️ Промежуточные результаты (если были) "
-                        "сохранены в incremental-файле."
-                    )
-                    continue
+        try:
+            scheduler.run(run_model)
         finally:
+            # Прерванный прогон (в т.ч. Ctrl+C): дописанные строки сбрасываем
+            # на диск, incremental-файл подхватит следующий запуск.
+            for writer in list(self._result_writers.values()):
+                writer.close()
+            self._result_writers.clear()
             progress.close()
+            close_bridge_client()
+            if self._response_cache is not None:
+                log.info(
+                    "💾 Кэш ответов: попаданий %d, промахов %d",
+                    self._response_cache.hits,
+                    self._response_cache.misses,
+                )
 
         if raw_save:
             log.info("📊 ГЕНЕРАЦИЯ ОТЧЕТА С СИСТЕМНОЙ ИНФОРМАЦИЕЙ:")
@@ -401,6 +434,106 @@ class TestRunner:
             except Exception as e:
                 log.error(f"❌ Ошибка генерации отчета: {e}")
 
+    def _run_model(
+            self,
+            model_config: Dict[str, Any],
+            progress: ProgressTracker,
+            show_payload: bool = True,
+            save_incremental: bool = True,
+            echo_stream: bool = True,
+            keep_loaded: bool = False,
+    ) -> Optional[str]:
+        """
+        Полный цикл тестирования одной модели.
+
+        Может выполняться в потоке планировщика параллельно с моделями
+        других эндпоинтов. Возвращает None при успехе или причину неудачи.
+
+        Перед тестами модель прогревается отдельным запросом (BC_WARMUP),
+        поэтому загрузка весов не попадает в метрики первых тестов. После
+        тестов модель выгружается (BC_UNLOAD_AFTER_MODEL), если следующей
+        не идёт конфигурация той же модели (keep_loaded).
+        """
+        model_name = model_config['name']
+        result_key = self._result_key(model_config)
+        num_runs = self.config.get('runs_per_test', 1)
+
+        log.info("=" * 80)
+        log.info("🚀 НАЧАЛО ТЕСТИРОВАНИЯ МОДЕЛИ: %s", model_name)
+        log.info("=" * 80)
+
+        try:
+            log.info("🔧 ЭТАП 1: Создание клиента...")
+            client = self._create_client_safely(model_config, show_payload)
+            if client is None:
+                for _ in range(len(self.test_generators) * num_runs):
+                    progress.update(model_name, "N/A")
+                return "Ошибка создания клиента"
+            max_concurrency = self._get_max_concurrency(model_config)
+            if hasattr(client, 'echo_stream'):
+                # Стримы нескольких моделей или параллельных запросов одной модели
+                # (в т.ч. по глобальному BC_MAX_CONCURRENCY) перемешались бы в stdout
+                client.echo_stream = echo_stream and max_concurrency <= 1
+
+            log.info("📊 ЭТАП 2: Получение метаданных модели...")
+            model_details = client.get_model_info()
+            if self.unavailable_tests:
+                model_details = {**model_details, 'unavailable_tests': self.unavailable_tests}
+
+            # В режиме replay запросов к модели нет — прогревать нечего
+            talks_to_server = not (self._response_cache and self._response_cache.read_only)
+            if talks_to_server and self.config.get('warmup', True):
+                log.info("🔥 Прогрев модели перед тестами...")
+                warmup_metrics = client.warm_up()
+                if warmup_metrics:
+                    model_details = {**model_details, 'warmup': warmup_metrics}
+                    log.info(
+                        "  ✅ Модель загружена за %.2f ms (не входит в замеры тестов)",
+                        warmup_metrics['load_duration'] / 1e6,
+                    )
+
+            log.info("🧪 ЭТАП 3: Выполнение тестов...")
+            try:
+                model_results = self._run_tests_for_model(
+                    client,
+                    model_name,
+                    model_details,
+                    progress,
+                    save_incremental=save_incremental,
+                    max_concurrency=max_concurrency,
+                    result_key=result_key,
+                )
+            finally:
+                if talks_to_server and not keep_loaded and self.config.get('unload_after_model', True):
+                    client.unload()
+
+            # ИЗМЕНЕНО: финализация вместо _save_results
+            if save_incremental:
+                log.info("💾 ЭТАП 4: Финализация результатов...")
+                self._finalize_results(result_key, model_results)
+
+            if not model_results:
+                return "Нет результатов от модели"
+            return None
+
+        except Exception as e:
+            log.error(
+                "❌ Критическая ошибка при тестировании модели %s: %s",
+                model_name,
+                e,
+                exc_info=True,
+            )
+
+            # НОВОЕ: Даже при ошибке промежуточный файл уже на диске
+            writer = self._result_writers.pop(result_key, None)
+            if writer is not None:
+                writer.close()
+            log.info(
+                "  ℹ️ Промежуточные результаты (если были) "
+                "сохранены в incremental-файле."
+            )
+            return str(e)
+
     def _create_client_safely(
             self,
             model_config: Dict[str, Any],
@@ -413,6 +546,8 @@ class TestRunner:
                 provider=provider,
                 model_config=model_config,
                 show_payload=show_payload,
+                response_cache=self._response_cache,
+                keep_alive=self.config.get('keep_alive', DEFAULT_KEEP_ALIVE),
             )
             adapter = AdapterLLMClient(
                 new_llm_client=new_llm_client,
@@ -430,6 +565,78 @@ class TestRunner:
             )
             return None
 
+    def _get_max_concurrency(self, model_config: Dict[str, Any]) -> int:
+        """
+        Возвращает число одновременных запросов к модели.
+
+        Приоритет: BC_MODELS_N_INFERENCE_MAX_CONCURRENCY → BC_MAX_CONCURRENCY → 1.
+        """
+        inference_opts = model_config.get('inference') or {}
+        raw_value = inference_opts.get(
+            'max_concurrency', self.config.get('max_concurrency', 1)
+        )
+        try:
+            value = int(raw_value)
+        except (TypeError, ValueError):
+            log.warning(
+                "  ⚠️ Некорректное значение max_concurrency=%r для модели "
+                "'%s'. Используется 1.",
+                raw_value,
+                model_config.get('name'),
+            )
+            return 1
+        return max(1, value)
+
+    @staticmethod
+    def _resolved_future(value: Any = None) -> Future:
+        """Future с готовым результатом — заглушка для упавших тест-кейсов."""
+        future: Future = Future()
+        future.set_result(value)
+        return future
+
+    def _iter_test_cases(
+            self,
+    ) -> Iterator[Tuple[str, str, int, Any, Optional[Dict[str, Any]]]]:
+        """
+        Генерирует тест-кейсы (категория, id, номер запуска, генератор, данные)
+        в детерминированном порядке (категория → номер запуска).
+
+        Генерация выполняется в основном потоке: генераторы хранят
+        состояние между вызовами generate() и не рассчитаны на
+        параллельный доступ. Для кейсов, которые не удалось сгенерировать,
+        возвращается test_data=None — они учитываются в прогрессе,
+        но не отправляются в модель.
+        """
+        num_runs = self.config.get('runs_per_test', 1)
+
+        for test_key, generator_class in self.test_generators.items():
+            log.info("  --- 📝 КАТЕГОРИЯ: %s ---", test_key)
+            run_num = 0
+            try:
+                generator_instance = generator_class(test_id=test_key)
+                for run_num in range(1, num_runs + 1):
+                    test_id = f"{test_key}_{run_num}"
+                    log.info(
+                        "    🔍 Тест %d/%d: %s",
+                        run_num,
+                        num_runs,
+                        test_id,
+                    )
+                    test_data = generator_instance.generate()
+                    yield test_key, test_id, run_num, generator_instance, test_data
+
+            except Exception as e:
+                log.error(
+                    "    ❌ Критическая ошибка категории %s: %s",
+                    test_key,
+                    e,
+                    exc_info=True,
+                )
+                # Оставшиеся запуски категории (включая упавший) проходят
+                # через общий конвейер, чтобы прогресс остался корректным
+                for failed_run in range(max(run_num, 1), num_runs + 1):
+                    yield test_key, f"{test_key}_{failed_run}", failed_run, None, None
+
     def _run_tests_for_model(
             self,
             client: ILLMClient,
@@ -437,10 +644,20 @@ class TestRunner:
             model_details: Dict[str, Any],
             progress: ProgressTracker,
             save_incremental: bool = True,
+            max_concurrency: int = 1,
+            result_key: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         Запускает все категории тестов для модели.
 
+        result_key — ключ incremental-файла конфигурации (по умолчанию имя модели).
+
+        Запросы к модели выполняются в пуле из max_concurrency потоков,
+        а верификация, сохранение и обновление прогресса — в основном
+        потоке строго в порядке генерации. Поэтому incremental-файл
+        и итоговый список результатов не зависят от того, в каком
+        порядке сервер вернул ответы.
+
         ИЗМЕНЕНО: сохраняет результат после КАЖДОГО теста.
         """
         # Список, который растёт по мере прохождения тестов
@@ -448,59 +665,73 @@ class TestRunner:
         num_runs = self.config.get('runs_per_test', 1)
 
         log.info(
-            "  🧪 Категорий тестов: %d | Запусков на категорию: %d",
+            "  🧪 Категорий тестов: %d | Запусков на категорию: %d | "
+            "Параллельных запросов: %d",
             len(self.test_generators),
             num_runs,
+            max_concurrency,
         )
 
-        for test_key, generator_class in self.test_generators.items():
-            log.info("  --- 📝 КАТЕГОРИЯ: %s ---", test_key)
-            try:
-                generator_instance = generator_class(test_id=test_key)
-                for run_num in range(1, num_runs + 1):
-                    test_id = f"{test_key}_{run_num}"
-                    log.info(
-                        "    🔍 Тест %d/%d: %s",
-                        run_num,
-                        num_runs,
-                        test_id,
-                    )
+        # Окно in-flight запросов: пока оно заполнено, ждём самый старый
+        # кейс. Это ограничивает память (сгенерированные промпты) и
+        # сохраняет порядок результатов.
+        in_flight: deque = deque()
 
-                    test_data = generator_instance.generate()
+        def drain_oldest():
+            nonlocal accumulated_results
+            test_key, test_id, generator_instance, test_data, future = (
+                in_flight.popleft()
+            )
+            query_result = future.result()
+            result = None
+            if query_result is not None:
+                result = self._verify_and_build_result(
+                    test_id,
+                    generator_instance,
+                    test_data,
+                    query_result,
+                    model_name,
+                    model_details,
+                    test_key,
+                )
 
-                    result = self._run_single_test_with_monitoring(
+            if result:
+                # НОВОЕ: Сохраняем сразу после каждого теста
+                if save_incremental:
+                    accumulated_results = self._save_single_result(
+                        result_key or model_name, result, accumulated_results
+                    )
+                else:
+                    accumulated_results.append(result)
+
+            progress.update(model_name, test_key)
+            gc.collect()
+
+        with ThreadPoolExecutor(
+                max_workers=max_concurrency,
+                thread_name_prefix=f"llm-{model_name}",
+        ) as pool:
+            for test_key, test_id, run_num, generator_instance, test_data in (
+                    self._iter_test_cases()
+            ):
+                if test_data is None:
+                    future = self._resolved_future(None)
+                else:
+                    future = pool.submit(
+                        self._query_with_monitoring,
                         client,
                         test_id,
-                        generator_instance,
                         test_data,
-                        model_name,
-                        model_details,
-                        test_key,
+                        run_num,
                     )
-
-                    if result:
-                        # НОВОЕ: Сохраняем сразу после каждого теста
-                        if save_incremental:
-                            accumulated_results = self._save_single_result(
-                                model_name, result, accumulated_results
-                            )
-                        else:
-                            accumulated_results.append(result)
-
-                    progress.update(model_name, test_key)
-                    gc.collect()
-
-            except Exception as e:
-                log.error(
-                    "    ❌ Критическая ошибка категории %s: %s",
-                    test_key,
-                    e,
-                    exc_info=True,
+                in_flight.append(
+                    (test_key, test_id, generator_instance, test_data, future)
                 )
-                # Обновляем прогресс для оставшихся запусков этой категории
-                remaining = num_runs - (run_num if 'run_num' in dir() else 0)
-                for _ in range(remaining):
-                    progress.update(model_name, test_key)
+                while len(in_flight) >= max_concurrency:
+                    drain_oldest()
+
+            while in_flight:
+                drain_oldest()
 
         return accumulated_results
 
@@ -515,23 +746,99 @@ class TestRunner:
             test_category: str,
     ) -> Optional[Dict[str, Any]]:
         """Запускает один тест с мониторингом ресурсов."""
+        query_result = self._query_with_monitoring(client, test_id, test_data)
+        if query_result is None:
+            return None
+        return self._verify_and_build_result(
+            test_id,
+            generator_instance,
+            test_data,
+            query_result,
+            model_name,
+            model_details,
+            test_category,
+        )
+
+    def _use_response_cache(self, test_data: Dict[str, Any], run_num: int) -> bool:
+        """
+        Можно ли брать ответ кейса из кэша ответов.
+
+        Генератор может запретить кэш для своих кейсов. Повторные запуски
+        (run_num > 1) измеряют стабильность модели и идут мимо кэша — кроме
+        режима replay, где запросов к модели нет по определению.
+        """
+        if not test_data.get('use_response_cache', True):
+            return False
+        return run_num <= 1 or bool(self._response_cache and self._response_cache.read_only)
+
+    def _query_with_monitoring(
+            self,
+            client: ILLMClient,
+            test_id: str,
+            test_data: Dict[str, Any],
+            run_num: int = 1,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Отправляет промпт тест-кейса в модель и замеряет время и RAM.
+
+        Может выполняться в рабочем потоке пула: не трогает генератор
+        и общее состояние TestRunner. Кейс, ответа на который нет в кэше
+        в режиме replay, пропускается (skipped_cache_miss) без записи результата.
+        """
         process = psutil.Process(os.getpid())
         try:
             prompt = test_data['prompt']
             system_prompt = test_data.get('system_prompt')
 
-            expected_output = test_data['expected_output']
-            log.info("      3️⃣ Отправка запроса к модели...")
+            log.info("      3️⃣ Отправка запроса к модели (%s)...", test_id)
 
             start_time = time.perf_counter()
             initial_ram = process.memory_info().rss / (1024 * 1024)
 
-            response_struct = client.query(prompt, system_prompt)
+            use_cache = self._use_response_cache(test_data, run_num)
+            response_struct = client.query(prompt, system_prompt, use_cache=use_cache)
 
             end_time = time.perf_counter()
             peak_ram = process.memory_info().rss / (1024 * 1024)
-            exec_time_ms = (end_time - start_time) * 1000
-            ram_usage_mb = peak_ram - initial_ram
+
+            return {
+                "response_struct": response_struct,
+                "exec_time_ms": (end_time - start_time) * 1000,
+                "ram_usage_mb": peak_ram - initial_ram,
+            }
+
+        except LLMCacheMissError as e:
+            log.warning("      ⏭️ Кейс %s пропущен (skipped_cache_miss): %s", test_id, e)
+            return None
+        except LLMClientError as e:
+            log.error("      ❌ Ошибка LLM клиента: %s", e)
+            return None
+        except Exception as e:
+            log.error(
+                "      ❌ Критическая ошибка в тест-кейсе %s: %s",
+                test_id,
+                e,
+                exc_info=True,
+            )
+            return None
+
+    def _verify_and_build_result(
+            self,
+            test_id: str,
+            generator_instance: Any,
+            test_data: Dict[str, Any],
+            query_result: Dict[str, Any],
+            model_name: str,
+            model_details: Dict[str, Any],
+            test_category: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Верифицирует ответ модели и собирает запись результата."""
+        try:
+            prompt = test_data['prompt']
+            expected_output = test_data['expected_output']
+            response_struct = query_result['response_struct']
+            exec_time_ms = query_result['exec_time_ms']
+            ram_usage_mb = query_result['ram_usage_mb']
 
             thinking_response = response_struct.get("thinking_response", "")
             llm_response = response_struct.get("llm_response", "")
@@ -539,6 +846,10 @@ class TestRunner:
             performance_metrics = response_struct.get(
                 "performance_metrics", {}
             )
+            if performance_metrics.get('response_cache_hit'):
+                # Ответ из кэша: время исходного запроса, а не чтения с диска
+                # (None для старых записей без таймингов — в средние не попадёт)
+                exec_time_ms = performance_metrics.get('total_latency_ms')
             performance_metrics['total_latency_ms'] = exec_time_ms
             performance_metrics['peak_ram_increment_mb'] = ram_usage_mb
 
@@ -549,7 +860,7 @@ class TestRunner:
 
             status = "✅ УСПЕХ" if is_correct else "❌ НЕУДАЧА"
             log.info(
-                "    %s (%.0f мс): %s", status, exec_time_ms, test_id
+                "    %s (%.0f мс): %s", status, query_result['exec_time_ms'], test_id
             )
 
             details = verification_result.get('details', {})
@@ -588,9 +899,6 @@ class TestRunner:
                 },
             }
 
-        except LLMClientError as e:
-            log.error("      ❌ Ошибка LLM клиента: %s", e)
-            return None
         except Exception as e:
             log.error(
                 "      ❌ Критическая ошибка в тест-кейсе %s: %s",
@@ -682,6 +990,11 @@ class TestRunner:
         eval_ms = ns_to_ms(eval_duration_ns)
         total_ms = ns_to_ms(total_duration_ns)
 
+        # Загрузка модели — не работа над запросом: доли и общая скорость
+        # считаются по времени без неё, а сама загрузка выводится отдельно.
+        bench_duration_ns = max(total_duration_ns - load_duration_ns, 0)
+        bench_ms = ns_to_ms(bench_duration_ns)
+
         prompt_tps = (
             (prompt_eval_count / ns_to_sec(prompt_eval_duration_ns))
             if prompt_eval_duration_ns > 0
@@ -695,35 +1008,35 @@ class TestRunner:
 
         total_tokens = prompt_eval_count + eval_count
         global_tps = (
-            (total_tokens / ns_to_sec(total_duration_ns))
-            if total_duration_ns > 0
+            (total_tokens / ns_to_sec(bench_duration_ns))
+            if bench_duration_ns > 0
             else 0
         )
 
-        if total_duration_ns > 0:
-            load_pct = (load_duration_ns / total_duration_ns) * 100
+        if bench_duration_ns > 0:
             prompt_pct = (
-                                 prompt_eval_duration_ns / total_duration_ns
+                                 prompt_eval_duration_ns / bench_duration_ns
                          ) * 100
-            eval_pct = (eval_duration_ns / total_duration_ns) * 100
+            eval_pct = (eval_duration_ns / bench_duration_ns) * 100
         else:
-            load_pct = prompt_pct = eval_pct = 0
+            prompt_pct = eval_pct = 0
 
         log.info("📊 --- Performance Metrics Summary ---")
         log.info(f"   🤖 Model:              {model}")
         log.info(
-            f"   ⏱️  Total Time:         {total_ms:,.2f} ms "
-            f"(Server reported)"
+            f"   ⏱️  Total Time:         {bench_ms:,.2f} ms "
+            f"(Server reported, excl. load)"
         )
         if total_latency_ms:
             log.info(
                 f"      (Client Latency):   {total_latency_ms:,.2f} ms"
             )
+        if load_duration_ns > 0:
+            log.info(
+                f"   🚀 Model Load:         {load_ms:>8.2f} ms "
+                f"(excluded from benchmark, total with load: {total_ms:,.2f} ms)"
+            )
         log.info("   -----------------------------------------")
-        log.info(
-            f"   🚀 Load Time:          {load_ms:>8.2f} ms "
-            f"({load_pct:>5.1f}%)"
-        )
         log.info(
             f"   📥 Prompt Eval:        {prompt_ms:>8.2f} ms "
             f"({prompt_pct:>5.1f}%) | Count: {prompt_eval_count} toks"
@@ -3,6 +3,11 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, Tuple
 
 from baselogic.core.jvm_runner import JVMRunner, JVMRunnerError
+from baselogic.core.response_parser import parse_response
+from baselogic.core.sandbox import SandboxResult, call_generator_method, get_sandbox_pool
+
+_KOTLIN_KEYWORDS = ('fun ', 'val ', 'var ', 'import ', 'class ', 'object ')
+_KOTLIN_FUNCTION_RE = re.compile(r'((?:import\s+[^\n]+\n)*\s*fun\s+\w+.*)', re.DOTALL)
 
 
 class AbstractTestGenerator(ABC):
@@ -10,6 +15,9 @@ class AbstractTestGenerator(ABC):
     Абстрактный базовый класс ("контракт") для всех генераторов тестов.
     """
 
+    # Проверка выполняет Kotlin-код: без java/kotlinc тест исключается до начала прогона
+    requires_kotlin: bool = False
+
     def __init__(self, test_id: str):
         self.test_id = test_id
 
@@ -64,30 +72,8 @@ class AbstractTestGenerator(ABC):
         """
         if not isinstance(llm_output, str):
             return ""
-
-        # 1. Удаляем блоки <think>...</think>
-        clean_output = re.sub(r'<think>.*?</think>', '', llm_output, flags=re.DOTALL | re.IGNORECASE)
-
-        # 2. Извлекаем содержимое из <response>...</response>
-        response_match = re.search(r'<response>(.*?)</response>', clean_output, flags=re.DOTALL | re.IGNORECASE)
-        if response_match:
-            clean_output = response_match.group(1).strip()
-
-        # 3. Удаляем служебные токены
-        stop_tokens = [
-            r"</s>.*$", r"<\|eot_id\|>.*$", r"<\|endoftext\|>.*$",
-            r"<\|im_start\|>", r"<\|im_end\|>", r"<s>", r"assistant"
-        ]
-        for token in stop_tokens:
-            clean_output = re.sub(token, "", clean_output, flags=re.DOTALL | re.IGNORECASE)
-
-        # 4. Останавливаемся на повторяющемся контенте
-        clean_output = re.sub(r"»\s*,\s*.*$", "", clean_output, flags=re.DOTALL)
-
-        # 5. Удаляем Markdown форматирование
-        clean_output = re.sub(r'[*_`~]', '', clean_output)
-
-        return clean_output.strip()
+        # Без <think>, содержимое <response>, без стоп-токенов, повторов и Markdown (см. response_parser)
+        return parse_response(llm_output).clean_answer
 
     def _sanitize_code(self, code: str) -> str:
         """Замена типографских Unicode-символов на стандартные программные."""
@@ -114,57 +100,32 @@ class AbstractTestGenerator(ABC):
         Returns:
             (успех, код_или_сообщение_об_ошибке, метод_извлечения)
         """
-        # ЭТАП 1: Санитизация ПЕРЕД извлечением (критично!)
-        cleaned = self._sanitize_code(llm_output)
-
-        # Удаляем <think> блоки
-        cleaned = re.sub(r'<think>.*?</think>', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
+        # ЭТАП 1: Ответ без <think>, <response> и стоп-токенов (разбор общий для всех верификаторов)
+        parsed = parse_response(llm_output)
+        # Санитизация до проверок кода (критично!)
+        cleaned = self._sanitize_code(parsed.answer)
+        code_blocks = [(block.language, self._sanitize_code(block.code).strip()) for block in parsed.code_blocks]
 
-        # Извлекаем из <response> если есть
-        response_match = re.search(r'<response>(.*?)</response>', cleaned, flags=re.DOTALL | re.IGNORECASE)
-        if response_match:
-            cleaned = response_match.group(1).strip()
-
-        # Удаляем служебные токены
-        stop_tokens = [r"</s>.*$", r"<\|eot_id\|>.*$", r"<\|endoftext\|>.*$"]
-        for token in stop_tokens:
-            cleaned = re.sub(token, "", cleaned, flags=re.DOTALL | re.IGNORECASE)
-
-        # ЭТАП 2: Извлечение кода (3 стратегии с приоритетами)
+        # ЭТАП 2: Извлечение кода (4 стратегии с приоритетами)
 
         # Стратегия 1: Markdown блок с указанием языка kotlin
-        pattern1 = r'```kotlin\s*\n(.*?)```'
-        match = re.search(pattern1, cleaned, flags=re.DOTALL)
-        if match:
-            code = match.group(1).strip()
-            if len(code) > 20 and 'fun ' in code:
-                return True, code, "markdown_with_kotlin_tag"
+        code = next((code for language, code in code_blocks if language == 'kotlin'), None)
+        if code is not None and len(code) > 20 and 'fun ' in code:
+            return True, code, "markdown_with_kotlin_tag"
 
         # Стратегия 2: Любой markdown блок (без указания языка)
-        pattern2 = r'```\s*\n(.*?)```'
-        matches = re.findall(pattern2, cleaned, flags=re.DOTALL)
-        for code in matches:
-            code = code.strip()
+        for language, code in code_blocks:
             # Проверяем наличие Kotlin-ключевых слов
-            kotlin_keywords = ['fun ', 'val ', 'var ', 'import ', 'class ', 'object ']
-            if any(kw in code for kw in kotlin_keywords) and len(code) > 20:
+            if not language and any(kw in code for kw in _KOTLIN_KEYWORDS) and len(code) > 20:
                 return True, code, "markdown_generic_with_validation"
 
         # Стратегия 3: Markdown с произвольным языком (```xxx)
-        pattern3 = r'``````'
-        match = re.search(pattern3, cleaned, flags=re.DOTALL)
-        if match:
-            code = match.group(1).strip()
-            kotlin_keywords = ['fun ', 'val ', 'var ', 'import ', 'class ', 'object ']
-            if any(kw in code for kw in kotlin_keywords) and len(code) > 20:
+        for language, code in code_blocks:
+            if language and any(kw in code for kw in _KOTLIN_KEYWORDS) and len(code) > 20:
                 return True, code, "markdown_with_any_lang_tag"
 
         # Стратегия 4: Прямой поиск функций (fallback)
-        func_match = re.search(
-            r'((?:import\s+[^\n]+\n)*\s*fun\s+\w+.*)',
-            cleaned,
-            flags=re.DOTALL
-        )
+        func_match = _KOTLIN_FUNCTION_RE.search(cleaned)
         if func_match:
             code = func_match.group(1).strip()
             # Проверяем наличие main()
@@ -178,11 +139,15 @@ class AbstractTestGenerator(ABC):
     def execute_kotlin_code(self, code: str, args: Optional[list[str]] = None) -> Dict[str, Any]:
         """
         Выполняет Kotlin-код через JVMRunner.
+        compile_cache — статистика кэша компиляции (если он включён).
         """
         try:
             runner = JVMRunner()
             output = runner.run_kotlin_code(kotlin_source=code, args=args)
-            return {'success': True, 'output': output}
+            result = {'success': True, 'output': output}
+            if runner.last_compile_cache is not None:
+                result['compile_cache'] = runner.last_compile_cache
+            return result
         except JVMRunnerError as exc:
             return {
                 'success': False,
@@ -193,3 +158,19 @@ class AbstractTestGenerator(ABC):
                 'success': False,
                 'error': f'Неожиданная ошибка при запуске кода: {e}'
             }
+
+    def execute_python_sandboxed(self, method_name: str, *args: Any, timeout: float = 10.0) -> SandboxResult:
+        """
+        Вызывает метод этого генератора в изолированном процессе песочницы.
+
+        Используется для выполнения Python-кода модели: метод получает код
+        и тесты как аргументы, а бесконечный цикл, исчерпание памяти или
+        падение интерпретатора не затрагивают процесс бенчмарка.
+        Аргументы и результат метода должны сериализоваться (pickle).
+        """
+        cls = type(self)
+        return get_sandbox_pool().run(
+            call_generator_method,
+            cls.__module__, cls.__qualname__, self.test_id, method_name, args,
+            timeout=timeout,
+        )
@@ -20,6 +20,8 @@ except ImportError:
         def verify(self, llm_output: str, expected_output: Any) -> Dict[str, Any]: raise NotImplementedError
 from dotenv import load_dotenv
 
+from baselogic.core.haystack import Haystack, SentencePool
+
 # Настройка логирования
 log = logging.getLogger(__name__)
 load_dotenv()  # Загружает .env файл
@@ -43,6 +45,7 @@ class AdvancedReasoningTestGenerator(AbstractTestGenerator):
     def __init__(self, test_id: str, seed: int = 42):
         super().__init__(test_id)
         self.rng = random.Random(seed)
+        self._narrative_pool = None
 
         # Конфигурация через переменные окружения
         lengths_str = os.getenv("CST_CONTEXT_LENGTHS_K", "1")
@@ -62,29 +65,35 @@ class AdvancedReasoningTestGenerator(AbstractTestGenerator):
         ts = base + datetime.timedelta(minutes=self.rng.randint(0, relative_max - relative_min))
         return ts.strftime("%Y-%m-%d %H:%M:%S")
 
+    NARRATIVE_TEMPLATES = [
+        "Инженер {name} пытался выполнить {action} на сервере {server}, но столкнулся с ошибкой {error}.",
+        "После обновления {system} до версии {ver}, метрики {metric} показали {status} рост.",
+        "Анализ инцидента {id} выявил, что {reason} привела к каскадному сбою в {module}.",
+        "В документации по {topic} сказано, что метод {method} является устаревшим (deprecated)."
+    ]
+
     def _gen_narrative_noise(self) -> str:
         """Генерирует правдоподобный технический текст."""
-        templates = [
-            "Инженер {name} пытался выполнить {action} на сервере {server}, но столкнулся с ошибкой {error}.",
-            "После обновления {system} до версии {ver}, метрики {metric} показали {status} рост.",
-            "Анализ инцидента {id} выявил, что {reason} привела к каскадному сбою в {module}.",
-            "В документации по {topic} сказано, что метод {method} является устаревшим (deprecated)."
-        ]
-        return templates[self.rng.randint(0, len(templates) - 1)].format(
-            name=self.rng.choice(['Алекс', 'Мария', 'Джон', 'Света']),
-            action=self.rng.choice(['диплой', 'роллбек', 'комит', 'мердж']),
-            server=f"srv-{self.rng.randint(10, 99)}",
-            error=self.rng.choice(['Timeout', 'SegFault', 'OOM', '404']),
-            system=self.rng.choice(['Kubernetes', 'Postgres', 'Redis']),
-            ver=f"{self.rng.randint(1, 5)}.{self.rng.randint(0, 9)}",
-            metric=self.rng.choice(['CPU', 'RAM', 'DiskIO']),
-            status=self.rng.choice(['значительный', 'незначительный', 'критический']),
-            id=self.rng.randint(1000, 9999),
-            reason=self.rng.choice(['утечка памяти', 'сетевая задержка', 'битая память']),
-            module=self.rng.choice(['Auth', 'Billing', 'Frontend']),
-            topic=self.rng.choice(['API', 'SDK', 'CLI']),
-            method=self.rng.choice(['getUsers', 'setCookie', 'initAuth'])
-        )
+        # Пул рендерится один раз на экземпляр из self.rng, поэтому тексты воспроизводимы по seed
+        if self._narrative_pool is None:
+            rng = self.rng
+            self._narrative_pool = SentencePool.render(self.NARRATIVE_TEMPLATES, {
+                'name': ['Алекс', 'Мария', 'Джон', 'Света'],
+                'action': ['диплой', 'роллбек', 'комит', 'мердж'],
+                'server': lambda: f"srv-{rng.randint(10, 99)}",
+                'error': ['Timeout', 'SegFault', 'OOM', '404'],
+                'system': ['Kubernetes', 'Postgres', 'Redis'],
+                'ver': lambda: f"{rng.randint(1, 5)}.{rng.randint(0, 9)}",
+                'metric': ['CPU', 'RAM', 'DiskIO'],
+                'status': ['значительный', 'незначительный', 'критический'],
+                'id': lambda: rng.randint(1000, 9999),
+                'reason': ['утечка памяти', 'сетевая задержка', 'битая память'],
+                'module': ['Auth', 'Billing', 'Frontend'],
+                'topic': ['API', 'SDK', 'CLI'],
+                'method': ['getUsers', 'setCookie', 'initAuth'],
+            }, size=512, rng=rng)
+        text, _ = self._narrative_pool.sample(1, self.rng)
+        return text
 
     def _gen_log_noise(self) -> str:
         """
@@ -137,24 +146,20 @@ class AdvancedReasoningTestGenerator(AbstractTestGenerator):
         lines.append("```")
         return "\n".join(lines)
 
-    def _build_haystack(self, tokens_k: int) -> str:
+    def _build_haystack(self, tokens_k: int) -> Haystack:
         """Собирает контекст (стог сена) заданного размера."""
         # 1000 токенов ~ 3000-4000 символов
         target_len = tokens_k * 3000
-        blocks = []
-        curr_len = 0
         generators = [self._gen_narrative_noise, self._gen_narrative_noise, self._gen_log_noise]
+        # Заголовок части начинается с пустой строки, поэтому блоки склеиваются без разделителя
+        haystack = Haystack(separator="")
 
-        i = 1
-        while curr_len < target_len:
+        def make_block() -> str:
             gen = self.rng.choice(generators)
-            header = f"\n\n## Part {i}: {self.rng.choice(self.TECH_BUZZWORDS).upper()}\n"
-            content = gen()
-            block = header + content
-            blocks.append(block)
-            curr_len += len(block)
-            i += 1
-        return "".join(blocks)
+            header = f"\n\n## Part {len(haystack) + 1}: {self.rng.choice(self.TECH_BUZZWORDS).upper()}\n"
+            return header + gen()
+
+        return haystack.fill(make_block, target_chars=target_len)
 
     def _create_logic_puzzle(self, scenario: str) -> Dict[str, Any]:
         """Создает логическую задачу (иголку)."""
@@ -189,21 +194,22 @@ class AdvancedReasoningTestGenerator(AbstractTestGenerator):
             }
         return {}
 
-    def _insert_puzzle(self, haystack: str, puzzle: Dict[str, Any]) -> str:
+    def _insert_puzzle(self, haystack: Haystack, puzzle: Dict[str, Any]) -> str:
         """Внедряет части пазла в текст скрытно (без явных маркеров)."""
-        blocks = haystack.split('\n\n')
         parts = puzzle['parts']
 
         # Если контекст слишком мал, просто добавляем в конец
-        if len(blocks) < len(parts):
-            return haystack + "\n\n" + "\n\n".join(parts)
+        if len(haystack) < len(parts):
+            for part in parts:
+                haystack.append(f"\n\n{part}")
+            return haystack.render()
 
         # Случайная вставка в разные части текста
-        indices = sorted(self.rng.sample(range(len(blocks)), len(parts)))
+        indices = sorted(self.rng.sample(range(len(haystack)), len(parts)))
         for i, idx in enumerate(indices):
-            blocks[idx] += f"\n{parts[i]}"
+            haystack.extend_block(idx, f"\n{parts[i]}")
 
-        return "\n\n".join(blocks)
+        return haystack.render()
 
     # --- Обязательные методы API (Override) ---
 
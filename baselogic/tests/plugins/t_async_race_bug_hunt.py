@@ -30,6 +30,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Any, Tuple
 
+from baselogic.core.response_parser import parse_response
 # Assuming this imports exist in your environment structure
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
@@ -301,8 +302,8 @@ class AsyncRaceConditionBugHuntV5TestGenerator(AbstractTestGenerator):
 
     def parse_llm_output(self, llm_raw_output: str) -> Dict[str, str]:
         # Clean markdown
-        clean = re.sub(r'```(?:json)?\s*(.*?)```', r'\1', llm_raw_output, flags=re.DOTALL)
-        clean = re.sub(r'<think>.*?</think>', '', clean, flags=re.DOTALL) # Remove CoT if present
+        clean = parse_response(llm_raw_output).visible  # без блоков <think>
+        clean = re.sub(r'```(?:json)?\s*(.*?)```', r'\1', clean, flags=re.DOTALL)
         clean = clean.strip()
 
         parsed = None
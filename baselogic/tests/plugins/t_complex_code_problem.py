@@ -132,7 +132,14 @@ class CodeGenTestGenerator(AbstractTestGenerator):
             code_to_exec = code_to_exec.replace(old, new)
         # >>>>> КОНЕЦ ИЗМЕНЕНИЙ <<<<<
 
-        # 2. Выполняем код и запускаем тесты
+        # 2. Выполняем код и запускаем тесты в изолированном процессе
+        result = self.execute_python_sandboxed('_run_solution', code_to_exec, expected_output)
+        if not result.ok:
+            return {'is_correct': False, 'details': result.failure_details()}
+        return result.value
+
+    def _run_solution(self, code_to_exec: str, expected_output: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполняется в процессе песочницы (см. execute_python_sandboxed)."""
         try:
             local_scope = {}
             exec(code_to_exec, {}, local_scope)
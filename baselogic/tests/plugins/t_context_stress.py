@@ -3,28 +3,29 @@
 import os
 import random
 import re
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Optional
 
 from dotenv import load_dotenv
 import logging
-import pymorphy2
 
+from baselogic.core.haystack import Haystack, SentencePool, cached_pool
+from baselogic.core.haystack_cache import cached_case
+from baselogic.core.lemmatizer import lemma, lemmatize
+from baselogic.core.response_parser import parse_response
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 # --- Инициализация ---
 load_dotenv()
 log = logging.getLogger(__name__)
-morph = pymorphy2.MorphAnalyzer()
 
 def normalize_word(word: str) -> str:
     """Приводит слово к его нормальной форме (лемме)."""
-    parsed = morph.parse(word)[0]
-    return parsed.normal_form
+    return lemma(word)
 
 def normalize_text(text: str) -> str:
     """Приводит все слова в тексте к нижнему регистру и нормальной форме."""
     words = re.findall(r'\w+', text.lower())
-    return ' '.join(normalize_word(word) for word in words)
+    return ' '.join(lemmatize(words))
 
 
 class ContextStressTestGenerator(AbstractTestGenerator):
@@ -80,6 +81,25 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         }
     }
 
+    # Варианты структуры предложения для разнообразия ({Entity} — сущность с заглавной буквы)
+    SENTENCE_PATTERNS = [
+        "{Entity} {action} {obj} {location}.",
+        "В то время как {entity} {action} {location}, он обнаружил {obj}.",
+        "Согласно источникам, {entity} {action} и нашел {obj} {location}.",
+        "История повествует о том, как {entity} {action} {obj} {location}.",
+        "Известно, что {entity} успешно {action} {obj} именно {location}.",
+        "Документы свидетельствуют: {entity} {action} уникальный {obj} {location}."
+    ]
+
+    # Переходные фразы в начале абзаца
+    TRANSITIONS = [
+        "В дополнение к этому, ",
+        "Стоит также отметить, что ",
+        "По мере развития событий, ",
+        "Однако исследования показывают, что ",
+        "В то же время "
+    ]
+
     def __init__(self, test_id: str):
         super().__init__(test_id)
 
@@ -90,6 +110,12 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         self.context_lengths_k = [int(k.strip()) for k in lengths_str.split(',')]
         self.needle_depths = [int(d.strip()) for d in depths_str.split(',')]
 
+        # Фиксированный seed: каждая модель свипа получает тот же кейс в той же ячейке
+        # (кейсы кэшируются, см. haystack_cache). CST_SEED=random — новый контекст каждый раз.
+        seed_str = os.getenv("CST_SEED", "42").strip().lower()
+        self.seed = None if seed_str in ("", "none", "random") else int(seed_str)
+        self.rng = random.Random(self.seed)
+
         # Создаем план всех тестов
         self.test_plan = self._create_test_plan()
         self.current_test_index = 0
@@ -119,86 +145,62 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         log.info(f"Создано {len(plan)} уникальных тест-кейсов")
         return plan
 
-    def _generate_coherent_paragraph(self, theme_data: dict, min_sentences: int = 3) -> str:
-        """Генерирует связный абзац на заданную тему."""
-        sentences = []
-        entities = random.choices(theme_data['entities'], k=min_sentences)
-
-        for entity in entities:
-            action = random.choice(theme_data['actions'])
-            location = random.choice(theme_data['locations'])
-            obj = random.choice(theme_data['objects'])
-
-            # Варианты структуры предложения для разнообразия
-            patterns = [
-                f"{entity.title()} {action} {obj} {location}.",
-                f"В то время как {entity} {action} {location}, он обнаружил {obj}.",
-                f"Согласно источникам, {entity} {action} и нашел {obj} {location}.",
-                f"История повествует о том, как {entity} {action} {obj} {location}.",
-                f"Известно, что {entity} успешно {action} {obj} именно {location}.",
-                f"Документы свидетельствуют: {entity} {action} уникальный {obj} {location}."
-            ]
-            sentences.append(random.choice(patterns))
-
-        return ' '.join(sentences)
-
-    def _generate_haystack(self, context_length_tokens: int) -> str:
+    def _sentence_pool(self, theme: str) -> SentencePool:
+        """Заранее отрендеренные предложения темы (строятся один раз на процесс)."""
+        def render() -> SentencePool:
+            theme_data = self.THEMES[theme]
+            return SentencePool.render(self.SENTENCE_PATTERNS, {
+                'entity': theme_data['entities'],
+                'Entity': [e.title() for e in theme_data['entities']],
+                'action': theme_data['actions'],
+                'location': theme_data['locations'],
+                'obj': theme_data['objects'],
+            }, rng=random.Random(f"{__name__}:{theme}"))  # пул не зависит от порядка генерации
+        return cached_pool((__name__, theme), render)
+
+    def _generate_coherent_paragraph(self, theme: str, min_sentences: int = 3) -> Tuple[str, int]:
+        """Генерирует связный абзац на заданную тему; возвращает текст и число слов."""
+        return self._sentence_pool(theme).sample(min_sentences, self.rng)
+
+    def _generate_haystack(self, context_length_tokens: int) -> Haystack:
         """Генерирует структурированный осмысленный текст заданной длины."""
         themes = list(self.THEMES.keys())
 
         # Консервативная оценка: 1 токен ≈ 0.35 слова для русского языка
         target_words = int(context_length_tokens * 0.35)
-        paragraphs = []
-        current_words = 0
+        haystack = Haystack(separator="\n\n")
         chapter_num = 1
 
-        while current_words < target_words:
-            theme = random.choice(themes)
+        while haystack.word_count < target_words:
+            theme = self.rng.choice(themes)
             theme_data = self.THEMES[theme]
 
             # Генерируем заголовок главы/раздела
             chapter_titles = [
-                f"Глава {chapter_num}: Исследование {random.choice(theme_data['objects'])}",
-                f"Раздел {chapter_num}: О {random.choice(theme_data['entities'])}",
-                f"Часть {chapter_num}: {random.choice(theme_data['locations']).title()}",
-                f"Том {chapter_num}: История {random.choice(theme_data['objects'])}",
-                f"Документ {chapter_num}: Записи о {random.choice(theme_data['entities'])}"
+                f"Глава {chapter_num}: Исследование {self.rng.choice(theme_data['objects'])}",
+                f"Раздел {chapter_num}: О {self.rng.choice(theme_data['entities'])}",
+                f"Часть {chapter_num}: {self.rng.choice(theme_data['locations']).title()}",
+                f"Том {chapter_num}: История {self.rng.choice(theme_data['objects'])}",
+                f"Документ {chapter_num}: Записи о {self.rng.choice(theme_data['entities'])}"
             ]
+            # Заголовки не учитываются в объеме текста, как и раньше
+            haystack.append(self.rng.choice(chapter_titles), words=0)
 
-            chapter_title = random.choice(chapter_titles)
-            paragraph = f"\n\n{chapter_title}\n\n"
-
-            # Генерируем 3-6 связных абзацев для каждой главы
-            num_paragraphs = random.randint(3, 6)
+            # Генерируем 3-6 связных абзацев для каждой главы;
+            # абзацы после первого начинаются с переходной фразы
+            num_paragraphs = self.rng.randint(3, 6)
             for para_idx in range(num_paragraphs):
-                para_text = self._generate_coherent_paragraph(theme_data, random.randint(2, 5))
-                paragraph += para_text
-
-                # Добавляем переходные фразы между абзацами
-                if para_idx < num_paragraphs - 1:
-                    transitions = [
-                        "\n\nВ дополнение к этому, ",
-                        "\n\nСтоит также отметить, что ",
-                        "\n\nПо мере развития событий, ",
-                        "\n\nОднако исследования показывают, что ",
-                        "\n\nВ то же время "
-                    ]
-                    paragraph += random.choice(transitions)
-                else:
-                    paragraph += "\n\n"
-
-                current_words += len(para_text.split())
-
-                if current_words >= target_words:
+                para_text, para_words = self._generate_coherent_paragraph(theme, self.rng.randint(2, 5))
+                if para_idx > 0:
+                    para_text = self.rng.choice(self.TRANSITIONS) + para_text
+                haystack.append(para_text, words=para_words)
+
+                if haystack.word_count >= target_words:
                     break
 
-            paragraphs.append(paragraph)
             chapter_num += 1
 
-            if current_words >= target_words:
-                break
-
-        return ''.join(paragraphs)
+        return haystack
 
     def _generate_needle(self) -> Tuple[str, str, str]:
         """Генерирует разнообразные типы 'иголок' с различными паттернами вопросов."""
@@ -210,12 +212,12 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'question': "Сколько {item} нашел исследователь {name}?",
                 'answer': "{count}",
                 'vars': {
-                    'year': lambda: random.randint(1850, 2020),
-                    'name': lambda: random.choice(['Иванов', 'Петров', 'Сидоров', 'Козлов', 'Морозов', 'Волков']),
-                    'count': lambda: random.randint(7, 47),
-                    'item': lambda: random.choice(['древних артефактов', 'редких рукописей', 'уникальных образцов',
+                    'year': lambda: self.rng.randint(1850, 2020),
+                    'name': lambda: self.rng.choice(['Иванов', 'Петров', 'Сидоров', 'Козлов', 'Морозов', 'Волков']),
+                    'count': lambda: self.rng.randint(7, 47),
+                    'item': lambda: self.rng.choice(['древних артефактов', 'редких рукописей', 'уникальных образцов',
                                                    'исторических документов', 'археологических находок']),
-                    'location': lambda: random.choice(['горной пещере Алтая', 'древней библиотеке монастыря',
+                    'location': lambda: self.rng.choice(['горной пещере Алтая', 'древней библиотеке монастыря',
                                                        'подземном храме', 'заброшенной крепости', 'тайном архиве'])
                 }
             },
@@ -225,10 +227,10 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'question': "На каком расстоянии от города {city} находится база {code_name}?",
                 'answer': "{distance} км к {direction}",
                 'vars': {
-                    'code_name': lambda: f"«{random.choice(['Альфа', 'Бета', 'Гамма', 'Дельта', 'Омега'])}-{random.randint(1,9)}»",
-                    'distance': lambda: random.randint(15, 85),
-                    'direction': lambda: random.choice(['северу', 'югу', 'востоку', 'западу', 'северо-востоку', 'юго-западу']),
-                    'city': lambda: random.choice(['Новгород', 'Псков', 'Тверь', 'Рязань', 'Смоленск', 'Муром'])
+                    'code_name': lambda: f"«{self.rng.choice(['Альфа', 'Бета', 'Гамма', 'Дельта', 'Омега'])}-{self.rng.randint(1,9)}»",
+                    'distance': lambda: self.rng.randint(15, 85),
+                    'direction': lambda: self.rng.choice(['северу', 'югу', 'востоку', 'западу', 'северо-востоку', 'юго-западу']),
+                    'city': lambda: self.rng.choice(['Новгород', 'Псков', 'Тверь', 'Рязань', 'Смоленск', 'Муром'])
                 }
             },
             # Временные факты
@@ -237,10 +239,10 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'question': "В какое время проводился эксперимент {exp_name}?",
                 'answer': "каждый {day} в {time}",
                 'vars': {
-                    'exp_name': lambda: f"№{random.randint(100, 999)}-{random.choice(['А', 'Б', 'В', 'Г'])}",
-                    'day': lambda: random.choice(['понедельник', 'вторник', 'среду', 'четверг', 'пятницу', 'субботу']),
-                    'time': lambda: f"{random.randint(9, 17)}:{random.choice(['00', '15', '30', '45'])}",
-                    'duration': lambda: f"{random.randint(2, 18)} месяцев"
+                    'exp_name': lambda: f"№{self.rng.randint(100, 999)}-{self.rng.choice(['А', 'Б', 'В', 'Г'])}",
+                    'day': lambda: self.rng.choice(['понедельник', 'вторник', 'среду', 'четверг', 'пятницу', 'субботу']),
+                    'time': lambda: f"{self.rng.randint(9, 17)}:{self.rng.choice(['00', '15', '30', '45'])}",
+                    'duration': lambda: f"{self.rng.randint(2, 18)} месяцев"
                 }
             },
             # Персональные факты
@@ -249,10 +251,10 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'question': "Кто является главным архитектором проекта {project}?",
                 'answer': "{architect}",
                 'vars': {
-                    'project': lambda: f"«{random.choice(['Феникс', 'Атлас', 'Титан', 'Орион', 'Сириус'])}»",
-                    'architect': lambda: random.choice(['Александр Белов', 'Михаил Крылов', 'Елена Соколова',
+                    'project': lambda: f"«{self.rng.choice(['Феникс', 'Атлас', 'Титан', 'Орион', 'Сириус'])}»",
+                    'architect': lambda: self.rng.choice(['Александр Белов', 'Михаил Крылов', 'Елена Соколова',
                                                         'Дмитрий Орлов', 'Анна Лебедева', 'Сергей Медведев']),
-                    'company': lambda: random.choice(['ТехноСфера', 'ИнноВейв', 'СмартСистемс', 'ПроДизайн', 'МегаСофт'])
+                    'company': lambda: self.rng.choice(['ТехноСфера', 'ИнноВейв', 'СмартСистемс', 'ПроДизайн', 'МегаСофт'])
                 }
             },
             # Технические характеристики
@@ -261,14 +263,14 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'question': "Какую мощность потребляет система {system_name}?",
                 'answer': "{power} Вт",
                 'vars': {
-                    'system_name': lambda: f"{random.choice(['Квазар', 'Нейтрон', 'Протон', 'Фотон'])}-{random.randint(1000, 9999)}",
-                    'frequency': lambda: random.randint(800, 3200),
-                    'power': lambda: random.randint(45, 350)
+                    'system_name': lambda: f"{self.rng.choice(['Квазар', 'Нейтрон', 'Протон', 'Фотон'])}-{self.rng.randint(1000, 9999)}",
+                    'frequency': lambda: self.rng.randint(800, 3200),
+                    'power': lambda: self.rng.randint(45, 350)
                 }
             }
         ]
 
-        template = random.choice(needle_templates)
+        template = self.rng.choice(needle_templates)
         vars_filled = {k: v() for k, v in template['vars'].items()}
 
         needle = template['needle'].format(**vars_filled)
@@ -277,7 +279,7 @@ class ContextStressTestGenerator(AbstractTestGenerator):
 
         return needle, question, answer
 
-    def _add_distractors(self, haystack: str, needle: str) -> str:
+    def _add_distractors(self, haystack: Haystack, needle: str) -> Haystack:
         """Добавляет отвлекающие элементы, похожие на иголку."""
 
         distractors = []
@@ -285,51 +287,43 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         # Числовые отвлекатели
         if any(char.isdigit() for char in needle):
             numeric_distractors = [
-                f"Важное замечание: в главном архиве хранятся {random.randint(100, 999)} различных документов.",
-                f"Согласно последнему отчету, было зафиксировано {random.randint(20, 80)} случаев.",
-                f"В ходе масштабной экспедиции собрано {random.randint(200, 800)} уникальных образцов.",
-                f"Статистические данные показывают: обработано {random.randint(50, 300)} единиц материала."
+                f"Важное замечание: в главном архиве хранятся {self.rng.randint(100, 999)} различных документов.",
+                f"Согласно последнему отчету, было зафиксировано {self.rng.randint(20, 80)} случаев.",
+                f"В ходе масштабной экспедиции собрано {self.rng.randint(200, 800)} уникальных образцов.",
+                f"Статистические данные показывают: обработано {self.rng.randint(50, 300)} единиц материала."
             ]
-            distractors.extend(random.sample(numeric_distractors, 2))
+            distractors.extend(self.rng.sample(numeric_distractors, 2))
 
         # Географические отвлекатели
         if any(word in needle.lower() for word in ['находится', 'расположен', 'км', 'город']):
             geo_distractors = [
-                f"Дополнительная информация: ближайший населенный пункт находится в {random.randint(5, 40)} км.",
+                f"Дополнительная информация: ближайший населенный пункт находится в {self.rng.randint(5, 40)} км.",
                 f"Территориальное расположение: объект удален от основных транспортных узлов.",
                 f"Географические особенности: местность характеризуется сложным рельефом."
             ]
-            distractors.extend(random.sample(geo_distractors, 1))
+            distractors.extend(self.rng.sample(geo_distractors, 1))
 
         # Персональные отвлекатели
         if any(name in needle for name in ['Иванов', 'Петров', 'Сидоров', 'Козлов', 'Александр', 'Михаил']):
             person_distractors = [
-                f"В команде также работали {random.choice(['специалист Федоров', 'эксперт Николаев', 'консультант Павлов'])}.",
-                f"Руководство проекта осуществлял {random.choice(['директор Смирнов', 'координатор Васильев', 'менеджер Попов'])}."
+                f"В команде также работали {self.rng.choice(['специалист Федоров', 'эксперт Николаев', 'консультант Павлов'])}.",
+                f"Руководство проекта осуществлял {self.rng.choice(['директор Смирнов', 'координатор Васильев', 'менеджер Попов'])}."
             ]
-            distractors.extend(random.sample(person_distractors, 1))
-
-        # Вставляем отвлекатели в случайные позиции
-        paragraphs = haystack.split('\n\n')
-        for distractor in distractors:
-            if paragraphs:  # Проверяем, что список не пуст
-                insertion_point = random.randint(0, len(paragraphs))
-                paragraphs.insert(insertion_point, distractor)
+            distractors.extend(self.rng.sample(person_distractors, 1))
 
-        return '\n\n'.join(paragraphs)
+        # Вставляем отвлекатели в случайные позиции между абзацами
+        if len(haystack):
+            for distractor in distractors:
+                haystack.insert_random(distractor, self.rng)
 
-    def _insert_needle_naturally(self, haystack: str, needle: str, depth_percent: int) -> str:
-        """Естественно вставляет иголку в контекст на заданной глубине."""
+        return haystack
 
-        # Разбиваем на абзацы для более естественной вставки
-        paragraphs = [p for p in haystack.split('\n\n') if p.strip()]
+    def _insert_needle_naturally(self, haystack: Haystack, needle: str, depth_percent: int) -> Haystack:
+        """Естественно вставляет иголку в контекст на заданной глубине (по доле символов текста)."""
 
-        if not paragraphs:
-            return f"{haystack}\n\n{needle}"
-
-        # Определяем позицию вставки
-        target_position = int(len(paragraphs) * (depth_percent / 100))
-        target_position = max(1, min(target_position, len(paragraphs) - 1))
+        if not len(haystack):
+            haystack.append(needle)
+            return haystack
 
         # Создаем естественные обертки для иголки
         wrappers = [
@@ -341,14 +335,15 @@ class ContextStressTestGenerator(AbstractTestGenerator):
             f"Экспертная комиссия подтвердила важный факт: {needle}"
         ]
 
-        wrapped_needle = random.choice(wrappers)
+        wrapped_needle = self.rng.choice(wrappers)
 
         # Добавляем разделительные маркеры для лучшей видимости
         formatted_needle = f"\n--- ВАЖНОЕ ДОПОЛНЕНИЕ ---\n{wrapped_needle}\n--- КОНЕЦ ДОПОЛНЕНИЯ ---\n"
 
-        paragraphs.insert(target_position, formatted_needle)
+        # Не в самое начало и не в самый конец текста
+        haystack.insert_at_depth(depth_percent, formatted_needle, lo=1, hi=len(haystack) - 1)
 
-        return '\n\n'.join(paragraphs)
+        return haystack
 
     def generate(self) -> Dict[str, Any]:
         """Генерирует следующий тест-кейс из плана."""
@@ -356,9 +351,22 @@ class ContextStressTestGenerator(AbstractTestGenerator):
             raise RuntimeError("План тестов пуст!")
 
         test_config = self.test_plan[self.current_test_index % len(self.test_plan)]
+        cycle = self.current_test_index // len(self.test_plan)
         self.current_test_index += 1
         log.info(f"Генерируем тест {self.current_test_index}/{len(self.test_plan)}: {test_config['test_id']}")
 
+        if self.seed is None:
+            return self._generate_case(test_config)
+        # Повторный проход по плану (runs_per_test больше плана) получает новый seed
+        case_seed = self.seed + cycle
+        return cached_case(self, test_config['context_k'], test_config['depth_percent'], case_seed,
+                           lambda: self._generate_case(test_config, case_seed))
+
+    def _generate_case(self, test_config: Dict[str, Any], seed: Optional[int] = None) -> Dict[str, Any]:
+        """Генерирует кейс ячейки плана; при заданном seed результат детерминирован."""
+        if seed is not None:
+            self.rng.seed(f"{seed}:{test_config['context_k']}:{test_config['depth_percent']}")
+
         # Генерируем иголку
         needle, question, expected_answer = self._generate_needle()
 
@@ -374,7 +382,7 @@ class ContextStressTestGenerator(AbstractTestGenerator):
             haystack_with_distractors,
             needle,
             test_config['depth_percent']
-        )
+        ).render()
 
         # Формируем итоговый промпт
         prompt = (
@@ -394,7 +402,8 @@ class ContextStressTestGenerator(AbstractTestGenerator):
                 'depth_percent': test_config['depth_percent'],
                 'prompt_length': len(final_text),
                 'needle_content': needle,
-                'question_type': self._classify_question_type(question)
+                'question_type': self._classify_question_type(question),
+                'seed': seed
             }
         }
 
@@ -430,13 +439,8 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         if not response:
             return ""
 
-        # Убираем лишние пробелы
-        cleaned = ' '.join(response.split())
-
-        # Удаляем теги размышлений
-        if '<think>' in cleaned:
-            cleaned = re.sub(r'<think>.*?</think>', '', cleaned, flags=re.DOTALL)
-            cleaned = cleaned.strip()
+        # Удаляем теги размышлений и лишние пробелы
+        cleaned = ' '.join(parse_response(response).visible.split())
 
         # ОЧЕНЬ ОСТОРОЖНЫЙ список префиксов - только очевидно избыточные длинные фразы
         safe_prefixes_to_remove = [
@@ -482,10 +486,7 @@ class ContextStressTestGenerator(AbstractTestGenerator):
 
         # 3. Обычная нормализация для остальных слов
         words = re.findall(r'[а-яё]+', text.lower())
-        for word in words:
-            if len(word) > 1 and word not in self.STOP_VERBS:
-                normalized = normalize_word(word)
-                keywords.add(normalized)
+        keywords.update(lemmatize(word for word in words if len(word) > 1 and word not in self.STOP_VERBS))
 
         return keywords
 
@@ -701,13 +702,7 @@ class ContextStressTestGenerator(AbstractTestGenerator):
         name_words = re.findall(r'[А-ЯЁ][а-яё]+', text)
 
         # Нормализуем каждое слово
-        normalized = set()
-        for word in name_words:
-            # Для имен собственных используем более осторожную нормализацию
-            parsed = morph.parse(word)[0]
-            normalized.add(parsed.normal_form.lower())
-
-        return normalized
+        return {lemma_.lower() for lemma_ in lemmatize(name_words)}
 
     def _verify_generic_answer(self, output: str, expected: str) -> Tuple[bool, dict]:
         """Базовая верификация для остальных типов ответов."""
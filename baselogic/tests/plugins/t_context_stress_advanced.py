@@ -5,22 +5,22 @@ import random
 import re
 import uuid
 import datetime
+import itertools
 from typing import Dict, Any, Tuple, List, Set
 
 from dotenv import load_dotenv
 import logging
-import pymorphy2
 
+from baselogic.core.haystack import Haystack, SentencePool, cached_pool
+from baselogic.core.lemmatizer import lemma
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 # --- Инициализация ---
 load_dotenv()
 log = logging.getLogger(__name__)
-morph = pymorphy2.MorphAnalyzer()
 
 def normalize_word(word: str) -> str:
-    parsed = morph.parse(word)[0]
-    return parsed.normal_form
+    return lemma(word)
 
 class AdvancedContextStressTestGenerator(AbstractTestGenerator):
     """
@@ -54,6 +54,17 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
         "Впрочем, ни {entity}, ни его коллеги не могли предвидеть, что {obj} окажется {location}."
     ]
 
+    # Словарь для заполнения COMPLEX_TEMPLATES
+    NARRATIVE_FIELDS = {
+        'entity': ['инженер', 'аналитик', 'система', 'алгоритм', 'сервер', 'протокол'],
+        'action_inf': ['оптимизировать', 'уничтожить', 'перезагрузить', 'исследовать', 'заблокировать'],
+        'action_past': ['обнаружил', 'скрыл', 'развернул', 'проигнорировал', 'скомпилировал'],
+        'action_fut': ['запустит', 'обновит', 'удалил', 'проверит'],
+        'obj': ['базу данных', 'микросервис', 'отчет', 'ключ шифрования', 'патч безопасности'],
+        'location': ['в облаке', 'на локальном кластере', 'в песочнице', 'в продакшене'],
+        'state': ['нестабилен', 'скомпрометирован', 'оптимизирован', 'недоступен', 'поврежден'],
+    }
+
     def __init__(self, test_id: str):
         super().__init__(test_id)
 
@@ -85,29 +96,10 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
 
     def _gen_narrative_block(self) -> str:
         """Генерирует связный художественный или публицистический текст."""
-        entities = ['инженер', 'аналитик', 'система', 'алгоритм', 'сервер', 'протокол']
-        actions_inf = ['оптимизировать', 'уничтожить', 'перезагрузить', 'исследовать', 'заблокировать']
-        actions_past = ['обнаружил', 'скрыл', 'развернул', 'проигнорировал', 'скомпилировал']
-        actions_fut = ['запустит', 'обновит', 'удалил', 'проверит']
-        objects = ['базу данных', 'микросервис', 'отчет', 'ключ шифрования', 'патч безопасности']
-        locations = ['в облаке', 'на локальном кластере', 'в песочнице', 'в продакшене']
-        states = ['нестабилен', 'скомпрометирован', 'оптимизирован', 'недоступен', 'поврежден']
-
-        sentences = []
-        for _ in range(random.randint(3, 6)):
-            tmpl = random.choice(self.COMPLEX_TEMPLATES)
-            s = tmpl.format(
-                entity=random.choice(entities),
-                action_inf=random.choice(actions_inf),
-                action_past=random.choice(actions_past),
-                action_fut=random.choice(actions_fut),
-                obj=random.choice(objects),
-                location=random.choice(locations),
-                state=random.choice(states)
-            )
-            sentences.append(s)
-
-        return " ".join(sentences)
+        pool = cached_pool((__name__, 'narrative'),
+                           lambda: SentencePool.render(self.COMPLEX_TEMPLATES, self.NARRATIVE_FIELDS))
+        text, _ = pool.sample(random.randint(3, 6))
+        return text
 
     def _gen_log_block(self) -> str:
         """Генерирует имитацию системных логов."""
@@ -162,15 +154,12 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
         }
         return f"```json\n{json.dumps(data, indent=2, ensure_ascii=False)}\n```"
 
-    def _generate_haystack(self, context_length_tokens: int) -> str:
+    def _generate_haystack(self, context_length_tokens: int) -> Haystack:
         """Собирает контекст из разнородных блоков."""
         # Приблизительно 1 токен ~ 3-4 символа (очень грубо, для кириллицы + код может быть иначе)
         # Целимся в количество символов
         target_chars = context_length_tokens * 3
 
-        blocks = []
-        current_chars = 0
-
         generators = [
             self._gen_narrative_block,
             self._gen_narrative_block, # Нарратива чуть больше
@@ -179,20 +168,15 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
             self._gen_json_block
         ]
 
-        section_id = 1
-        while current_chars < target_chars:
-            gen_func = random.choice(generators)
-
-            header = f"\n\n### SECTION {section_id}: {random.choice(self.TECH_BUZZWORDS).upper()}\n"
-            content = gen_func()
+        # Заголовок секции начинается с пустой строки, поэтому блоки склеиваются без разделителя
+        haystack = Haystack(separator="")
+        section_ids = itertools.count(1)
 
-            block = header + content
-            blocks.append(block)
+        def make_block() -> str:
+            header = f"\n\n### SECTION {next(section_ids)}: {random.choice(self.TECH_BUZZWORDS).upper()}\n"
+            return header + random.choice(generators)()
 
-            current_chars += len(block)
-            section_id += 1
-
-        return "".join(blocks)
+        return haystack.fill(make_block, target_chars=target_chars)
 
     # --- Генерация иголки (Фактов) ---
 
@@ -236,7 +220,7 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
 
         return needle, chosen['question'], ans
 
-    def _add_smart_distractors(self, haystack: str, needle: str, question: str) -> str:
+    def _add_smart_distractors(self, haystack: Haystack, needle: str, question: str) -> Haystack:
         """Добавляет 'ложные иголки' - похожие по структуре, но с другими данными."""
 
         distractors = []
@@ -255,19 +239,20 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
             distractors.append("Параметр 'min_tokens' обычно равен 100.")
             distractors.append("В новой версии конфига параметр 'max_tokens' игнорируется.")
 
-        # Вставка дистракторов
-        parts = haystack.split('\n\n')
-        for d in distractors:
-            if parts:
-                idx = random.randint(0, len(parts)-1)
-                parts.insert(idx, f"Примечание: {d}")
+        # Вставка дистракторов между секциями
+        if len(haystack):
+            for d in distractors:
+                haystack.insert_random(f"\n\nПримечание: {d}")
 
-        return "\n\n".join(parts)
+        return haystack
 
-    def _insert_needle(self, haystack: str, needle: str, depth_percent: int) -> str:
+    def _insert_needle(self, haystack: Haystack, needle: str, depth_percent: int) -> Haystack:
         """Вставляет иголку, маскируя её под формат окружающего текста."""
-        lines = haystack.split('\n')
-        target_line_idx = int(len(lines) * (depth_percent / 100))
+        # Разбивается на строки только секция, на которую приходится нужная глубина
+        block_idx, offset = haystack.locate(depth_percent)
+        block = haystack.blocks[block_idx] if len(haystack) else ""
+        lines = block.split('\n')
+        target_line_idx = block.count('\n', 0, offset)
         target_line_idx = max(0, min(target_line_idx, len(lines) - 1))
 
         # Определяем контекст места вставки для маскировки
@@ -288,7 +273,11 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
             masked_needle = f"\n\n!!! ВНИМАНИЕ (CONFIDENTIAL): {needle} !!!\n\n"
 
         lines.insert(target_line_idx, masked_needle)
-        return "\n".join(lines)
+        if len(haystack):
+            haystack.replace(block_idx, "\n".join(lines))
+        else:
+            haystack.append("\n".join(lines))
+        return haystack
 
     def generate(self) -> Dict[str, Any]:
         if not self.test_plan:
@@ -310,7 +299,7 @@ class AdvancedContextStressTestGenerator(AbstractTestGenerator):
         haystack = self._add_smart_distractors(haystack, needle, question)
 
         # 4. Вставка иголки
-        final_text = self._insert_needle(haystack, needle, config['depth_percent'])
+        final_text = self._insert_needle(haystack, needle, config['depth_percent']).render()
 
         prompt = (
             f"Проанализируй предоставленные данные (логи, переписку, документацию) и ответь на вопрос.\n"
@@ -3,6 +3,8 @@ from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 
 class DistributedConsensusReasoningTestGenerator(AbstractTestGenerator):
+    requires_kotlin = True
+
     def __init__(self, test_id: str) -> None:
         super().__init__(test_id)
 
@@ -226,6 +228,7 @@ class DistributedConsensusReasoningTestGenerator(AbstractTestGenerator):
                 "expected": expected_val,
                 "extraction_method": method,
                 "status": "✓ OK" if is_correct else "✗ Mismatch",
+                "compile_cache": exec_result.get("compile_cache"),
             },
         }
 
@@ -8,6 +8,7 @@ import tempfile
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
 
+from baselogic.core.response_parser import parse_response
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 log = logging.getLogger(__name__)
@@ -1258,7 +1259,7 @@ Convert to Pydantic v2 model with validation:
 
     def _extract_code(self, raw: str, lang: str) -> str:
         """Извлечение кода из ответа LLM."""
-        cleaned = re.sub(r'<think>.*?</think>', '', raw, flags=re.DOTALL | re.IGNORECASE)
+        cleaned = parse_response(raw).visible
 
         lang_aliases = {
             "kotlin": ["kotlin", "kt"],
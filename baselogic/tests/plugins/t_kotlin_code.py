@@ -13,6 +13,8 @@ class KotlinCodeGenTestGenerator(AbstractTestGenerator):
     Позволяет менять промпты и проверки без правки кода.
     """
 
+    requires_kotlin = True
+
     def __init__(self, test_id: str, config: Optional[Dict] = None, *, config_path: Optional[str | Path] = None) -> None:
         super().__init__(test_id)
         if config is not None:
@@ -113,7 +115,8 @@ class KotlinCodeGenTestGenerator(AbstractTestGenerator):
                     'actual': actual_val,
                     'expected': expected_val,
                     'extraction_method': method,
-                    'status': '✓ OK' if is_correct else '✗ Mismatch'
+                    'status': '✓ OK' if is_correct else '✗ Mismatch',
+                    'compile_cache': exec_result.get('compile_cache'),
                 }
             }
 
@@ -7,6 +7,7 @@ from typing import Dict, Any, Tuple, List
 
 from dotenv import load_dotenv
 
+from baselogic.core.haystack import Haystack, SentencePool, cached_pool
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 
@@ -63,20 +64,13 @@ class AdvancedMultiHopContextGenerator(AbstractTestGenerator):
             "// TODO: Fix {word} in module {pid}",
             "User {pid} requested access to {uuid}."
         ]
-
-        buffer = []
-        chars_count = 0
-        while chars_count < size_chars:
-            tpl = random.choice(noise_templates)
-            s = tpl.format(
-                pid=random.randint(1000, 9999),
-                word=random.choice(self.NOISE_BUZZWORDS),
-                status=random.choice(['OK', 'FAIL', 'PENDING']),
-                uuid=str(uuid.uuid4())[:8]
-            )
-            buffer.append(s)
-            chars_count += len(s) + 1
-        return "\n".join(buffer)
+        pool = cached_pool((__name__, 'noise'), lambda: SentencePool.render(noise_templates, {
+            'pid': lambda: random.randint(1000, 9999),
+            'word': self.NOISE_BUZZWORDS,
+            'status': ['OK', 'FAIL', 'PENDING'],
+            'uuid': lambda: str(uuid.uuid4())[:8],
+        }))
+        return pool.sample_chars(size_chars, sep="\n")
 
     def _generate_chain(self, num_hops: int) -> Tuple[List[Dict], str, str]:
         """Генерирует логическую цепочку связей."""
@@ -132,18 +126,18 @@ class AdvancedMultiHopContextGenerator(AbstractTestGenerator):
         total_chars = config['context_k'] * 1024 * 3
         avg_noise_size = int(total_chars / (len(chain) + 1))
 
-        haystack_parts = []
+        haystack = Haystack(separator="")
         for link in chain:
-            haystack_parts.append(self._generate_noise_block(avg_noise_size))
-            haystack_parts.append(f"\n\n{self._format_clue(link)}\n\n")
-        haystack_parts.append(self._generate_noise_block(avg_noise_size))
+            haystack.append(self._generate_noise_block(avg_noise_size))
+            haystack.append(f"\n\n{self._format_clue(link)}\n\n")
+        haystack.append(self._generate_noise_block(avg_noise_size))
 
         prompt = (
             f"System: You are a forensic data analyst. Analyze the provided chaotic logs and code snippets.\n"
             f"Task: {question}\n"
             f"Constraint: Provide ONLY the final value. Do not explain unless asked.\n\n"
             f"--- BEGIN DATA DUMP ---\n"
-            f"{''.join(haystack_parts)}\n"
+            f"{haystack.render()}\n"
             f"--- END DATA DUMP ---\n\n"
             f"Question: {question}\n"
             f"Final Answer:"
@@ -7,6 +7,7 @@ import re
 
 from dotenv import load_dotenv
 
+from baselogic.core.haystack import Haystack, SentencePool, cached_pool
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 load_dotenv()
@@ -58,18 +59,12 @@ class RussianAdvancedMultiHopContextGenerator(AbstractTestGenerator):
 
     def _generate_noise_block(self, size_chars: int) -> str:
         """Генерирует мусорный текст (имитация логов на русском/английском)."""
-        buffer = []
-        chars_count = 0
-        while chars_count < size_chars:
-            tpl = random.choice(self.NOISE_PHRASES)
-            s = tpl.format(
-                pid=random.randint(1000, 9999),
-                word=random.choice(self.BUZZWORDS),
-                uuid=str(uuid.uuid4())[:8]
-            )
-            buffer.append(s)
-            chars_count += len(s) + 1
-        return "\n".join(buffer)
+        pool = cached_pool((__name__, 'noise'), lambda: SentencePool.render(self.NOISE_PHRASES, {
+            'pid': lambda: random.randint(1000, 9999),
+            'word': self.BUZZWORDS,
+            'uuid': lambda: str(uuid.uuid4())[:8],
+        }))
+        return pool.sample_chars(size_chars, sep="\n")
 
     def _generate_chain(self, num_hops: int) -> Tuple[List[Dict], str, str]:
         """Генерирует цепочку связей на русском."""
@@ -138,13 +133,13 @@ class RussianAdvancedMultiHopContextGenerator(AbstractTestGenerator):
         total_chars = config['context_k'] * 1024 * 4
         avg_noise_size = int(total_chars / (len(chain) + 1))
 
-        haystack_parts = []
+        haystack = Haystack(separator="")
         for link in chain:
-            haystack_parts.append(self._generate_noise_block(avg_noise_size))
-            haystack_parts.append(f"\n\n{self._format_clue(link)}\n\n")
-        haystack_parts.append(self._generate_noise_block(avg_noise_size))
+            haystack.append(self._generate_noise_block(avg_noise_size))
+            haystack.append(f"\n\n{self._format_clue(link)}\n\n")
+        haystack.append(self._generate_noise_block(avg_noise_size))
 
-        full_text = "".join(haystack_parts)
+        full_text = haystack.render()
 
         prompt = (
             f"Система: Ты системный аналитик, расследующий инцидент.\n"
@@ -218,6 +218,17 @@ if not loop.run_until_complete(run_hidden_verification()):
         for old_char, new_char in replacements.items():
             code_to_exec = code_to_exec.replace(old_char, new_char)
 
+        # ШАГИ 5–8 выполняются в изолированном процессе: зависание асинхронного
+        # кода модели не должно блокировать прогон
+        result = self.execute_python_sandboxed(
+            '_run_mvcc_tests', code_to_exec, expected_output['tests'], timeout=30.0
+        )
+        if not result.ok:
+            return {'is_correct': False, 'details': result.failure_details()}
+        return result.value
+
+    def _run_mvcc_tests(self, code_to_exec: str, tests: str) -> Dict[str, Any]:
+        """Выполняется в процессе песочницы (см. execute_python_sandboxed)."""
         # ШАГ 5: Подготовка окружения
         test_scope = {}
         # Блокируем выполнение if __name__ == "__main__" самым надежным способом
@@ -250,7 +261,7 @@ if not loop.run_until_complete(run_hidden_verification()):
                     test_scope['asyncio'] = asyncio
 
                 # Запускаем тесты в ТОМ ЖЕ скоупе
-                exec(expected_output['tests'], test_scope, test_scope)
+                exec(tests, test_scope, test_scope)
 
             return {
                 'is_correct': True,
@@ -1,10 +1,14 @@
 import logging
+import marshal
 import math
 import random
 import re
 import traceback
 from typing import Dict, Any, Optional, List, Tuple
 
+from baselogic.core.compile_cache import compile_python, get_compile_cache
+from baselogic.core.sandbox import SandboxTimeLimit, call_with_time_limit
+from baselogic.core.response_parser import parse_response
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 log = logging.getLogger(__name__)
@@ -37,6 +41,9 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
         ],
     ]
 
+    # Лимит реального времени на выполнение кода модели с симуляцией, с
+    SANDBOX_TIMEOUT = 20.0
+
     # Белый список модулей, которые модель может импортировать
     ALLOWED_MODULES = {
         'math', 'collections', 'heapq', 'itertools',
@@ -246,7 +253,7 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
             )
 
             try:
-                compiled = compile(code, '<llm_generated>', 'exec')
+                compiled, cache_hit = compile_python(code)
             except SyntaxError as e:
                 lines = code.split('\n')
                 error_context = self._format_error_context(lines, e.lineno)
@@ -256,7 +263,11 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
                     code_preview=code[:800],
                 )
 
-            return self._execute_and_verify(code, compiled, expected_output)
+            verdict = self._execute_and_verify(code, compiled, expected_output)
+            cache = get_compile_cache()
+            if cache is not None:
+                verdict['details']['compile_cache'] = cache.stats(hit=cache_hit)
+            return verdict
 
         except Exception as e:
             log.error("Критическая ошибка в verify: %s", e, exc_info=True)
@@ -273,8 +284,8 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
         Извлекает Python-код из ответа LLM.
         НЕ вызывает _cleanup_llm_response() — та удаляет * и _.
         """
-        output = self._remove_think_blocks(llm_output)
-        output = self._extract_response_block(output)
+        # Без <think>, содержимое <response>, если есть
+        output = parse_response(llm_output).body
 
         # Стратегия 1: ```python ... ```
         matches = re.findall(
@@ -345,19 +356,6 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
         )
         return None
 
-    def _remove_think_blocks(self, text: str) -> str:
-        return re.sub(
-            r'<think>.*?</think>', '', text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-
-    def _extract_response_block(self, text: str) -> str:
-        match = re.search(
-            r'<response>(.*?)</response>', text,
-            flags=re.DOTALL | re.IGNORECASE,
-        )
-        return match.group(1).strip() if match else text
-
     def _remove_main_block(self, code: str) -> str:
         """Удаляет if __name__ == '__main__': и всё после него."""
         # С комментарием перед if
@@ -424,6 +422,54 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
             compiled: Any,
             expected_output: Dict[str, Any],
     ) -> Dict[str, Any]:
+        # Этапы 1–6 выполняют код модели — в изолированном процессе
+        result = self.execute_python_sandboxed(
+            '_run_bot', code, marshal.dumps(compiled), expected_output, timeout=self.SANDBOX_TIMEOUT
+        )
+        if not result.ok:
+            failure = result.failure_details()
+            return self._failure_result(failure.pop('error'), **failure)
+
+        outcome = result.value
+        if 'is_correct' in outcome:
+            # Проверка остановилась досрочно
+            return outcome
+        score = outcome['score']
+        max_score = 100
+        details = outcome['details']
+
+        # --- ЭТАП 7: Анализ кода ---
+        code_analysis = self._analyze_code_structure(code)
+        details['code_analysis'] = code_analysis
+
+        if code_analysis.get('has_neural_network'):
+            score += 5
+        if code_analysis.get('has_recursion') or code_analysis.get('has_bfs'):
+            score += 5
+        if code_analysis.get('has_error_handling'):
+            score += 5
+
+        is_correct = score >= 50
+
+        return {
+            'is_correct': is_correct,
+            'score': score,
+            'max_score': max_score,
+            'details': details,
+        }
+
+    def _run_bot(
+            self, code: str, compiled_code: bytes, expected_output: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Выполняет код модели и запускает симуляцию.
+        Вызывается в процессе песочницы через execute_python_sandboxed.
+
+        Returns:
+            Итоговый результат, если проверка остановилась досрочно,
+            иначе {'score', 'details'} для анализа кода в основном процессе.
+        """
+        compiled = marshal.loads(compiled_code)
         score = 0
         max_score = 100
         details: Dict[str, Any] = {}
@@ -591,25 +637,17 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
                 details['neural_decision'] = f"Ошибка: {e}"
 
         # --- ЭТАП 6: Запуск симуляции (с таймаутом) ---
-        import signal
-        import threading
-
         sim_result = None
         sim_error = None
+        timed_out = False
+        try:
+            sim_result = call_with_time_limit(bot.run_simulation, 10.0)  # 10 секунд максимум
+        except SandboxTimeLimit:
+            timed_out = True
+        except Exception as e:
+            sim_error = e
 
-        def run_sim():
-            nonlocal sim_result, sim_error
-            try:
-                sim_result = bot.run_simulation()
-            except Exception as e:
-                sim_error = e
-
-        # Запускаем в отдельном потоке с таймаутом
-        thread = threading.Thread(target=run_sim, daemon=True)
-        thread.start()
-        thread.join(timeout=10.0)  # 10 секунд максимум
-
-        if thread.is_alive():
+        if timed_out:
             details['simulation_error'] = (
                 "Таймаут: симуляция не завершилась за 10 секунд "
                 "(вероятно, бесконечный цикл)"
@@ -696,25 +734,7 @@ class NeuralLabyrinthTestGenerator(AbstractTestGenerator):
                 else:
                     details['proper_error_handling'] = 'not_found'
 
-        # --- ЭТАП 7: Анализ кода ---
-        code_analysis = self._analyze_code_structure(code)
-        details['code_analysis'] = code_analysis
-
-        if code_analysis.get('has_neural_network'):
-            score += 5
-        if code_analysis.get('has_recursion') or code_analysis.get('has_bfs'):
-            score += 5
-        if code_analysis.get('has_error_handling'):
-            score += 5
-
-        is_correct = score >= 50
-
-        return {
-            'is_correct': is_correct,
-            'score': score,
-            'max_score': max_score,
-            'details': details,
-        }
+        return {'score': score, 'details': details}
 
     # ==================================================================
     #  Вспомогательные методы
@@ -5,10 +5,16 @@ import random
 import re
 from typing import Dict, Any, List
 
+from baselogic.core.response_parser import parse_response
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 log = logging.getLogger(__name__)
 
+# Стоп-токены и токены чат-шаблонов, удаляемые из JSON-ответов
+_SERVICE_TOKEN_RE = re.compile(
+    r'</s>|<\|eot_id\|>|<\|endoftext\|>|<\|im_start\|>|<\|im_end\|>|<s>|assistant', re.IGNORECASE
+)
+
 
 class InstructionsTestGenerator(AbstractTestGenerator):
     """
@@ -165,7 +171,7 @@ class InstructionsTestGenerator(AbstractTestGenerator):
             return ""
 
         # 1) <think>…</think>
-        text = re.sub(r'<think>.*?</think>', '', raw, flags=re.DOTALL | re.IGNORECASE)
+        text = parse_response(raw).visible
 
         # 2) Markdown‑код
         text = self._strip_code_fence(text)
@@ -226,13 +232,12 @@ class InstructionsTestGenerator(AbstractTestGenerator):
             return ""
 
         # 1. Удаляем <think>
-        cleaned = re.sub(r'<think>.*?</think>', '', raw, flags=re.DOTALL | re.IGNORECASE)
+        cleaned = parse_response(raw).visible
         # 2. Удаляем Markdown фенсы (```json ... ```)
         cleaned = self._strip_code_fence(cleaned)
 
         # 3. Удаляем стоп-токены
-        for token in[r"</s>", r"<\|eot_id\|>", r"<\|endoftext\|>", r"<\|im_start\|>", r"<\|im_end\|>", r"<s>", r"assistant"]:
-            cleaned = re.sub(token, "", cleaned, flags=re.DOTALL | re.IGNORECASE)
+        cleaned = _SERVICE_TOKEN_RE.sub("", cleaned)
 
         # УБРАНА ДЕСТРУКТИВНАЯ ОЧИСТКА REGEX'ом[^\w\s.,-<>]
         return cleaned.strip()
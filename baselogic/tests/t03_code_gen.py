@@ -1,9 +1,11 @@
 import logging
+import marshal
 import random
 import re
 import traceback
 from typing import Dict, Any, Optional
 
+from baselogic.core.compile_cache import compile_python, get_compile_cache
 from baselogic.tests.abstract_test_generator import AbstractTestGenerator
 
 log = logging.getLogger(__name__)
@@ -21,6 +23,9 @@ class CodeGenTestGenerator(AbstractTestGenerator):
     - Детальная диагностика при ошибках
     """
 
+    # Лимит реального времени на выполнение кода модели вместе с тестами, с
+    EXECUTION_TIMEOUT = 10.0
+
     # Безопасный набор builtins для exec()
     SAFE_BUILTINS = {
         'abs': abs, 'all': all, 'any': any, 'bool': bool,
@@ -155,9 +160,9 @@ class CodeGenTestGenerator(AbstractTestGenerator):
         # --- ЭТАП 2: Санитизация ---
         code = self._sanitize_python_code(code)
 
-        # --- ЭТАП 3: Компиляция (проверяем синтаксис отдельно) ---
+        # --- ЭТАП 3: Компиляция (проверяем синтаксис отдельно, через кэш) ---
         try:
-            compiled = compile(code, '<llm_generated>', 'exec')
+            compiled, cache_hit = compile_python(code)
         except SyntaxError as e:
             return {
                 'is_correct': False,
@@ -169,6 +174,33 @@ class CodeGenTestGenerator(AbstractTestGenerator):
                 },
             }
 
+        # --- ЭТАПЫ 4–6: выполнение и тесты в изолированном процессе ---
+        result = self.execute_python_sandboxed(
+            '_execute_tests', code, marshal.dumps(compiled), func_name, tests, extraction_method,
+            timeout=self.EXECUTION_TIMEOUT,
+        )
+        if result.ok:
+            verdict = result.value
+        else:
+            details = result.failure_details()
+            details['code_preview'] = code[:500]
+            verdict = {'is_correct': False, 'details': details}
+
+        cache = get_compile_cache()
+        if cache is not None:
+            verdict['details']['compile_cache'] = cache.stats(hit=cache_hit)
+        return verdict
+
+    def _execute_tests(
+            self, code: str, compiled_code: bytes, func_name: str, tests: list, extraction_method: str
+    ) -> Dict[str, Any]:
+        """
+        Выполняет код модели и прогоняет тесты.
+        Вызывается в процессе песочницы через execute_python_sandboxed;
+        compiled_code — marshal code-объекта, скомпилированного в основном процессе.
+        """
+        compiled = marshal.loads(compiled_code)
+
         # --- ЭТАП 4: Выполнение в песочнице ---
         sandbox = {'__builtins__': self.SAFE_BUILTINS.copy()}
         # Добавляем re, так как он может понадобиться для is_palindrome
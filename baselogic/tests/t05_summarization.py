@@ -1,29 +1,13 @@
 import random
 import re
 from typing import Dict, Any
-import pymorphy2
 
+from baselogic.core import lemmatizer
 from .abstract_test_generator import AbstractTestGenerator
 
 import logging
 log = logging.getLogger(__name__)
 
-# --- Глобальный Singleton для MorphAnalyzer ---
-# Мы создаем анализатор один раз на уровне модуля.
-# Это решает и проблему совместимости, и проблему производительности.
-try:
-    log.info("Инициализация Pymorphy2 MorphAnalyzer...")
-    MORPH_ANALYZER = pymorphy2.MorphAnalyzer()
-    log.info("✅ Pymorphy2 MorphAnalyzer успешно инициализирован.")
-except AttributeError as e:
-    log.critical("КРИТИЧЕСКАЯ ОШИБКА: Ваша версия Pymorphy2 несовместима с вашей версией Python.")
-    log.critical("ПОЖАЛУЙСТА, ОБНОВИТЕ PYMORPHY2: pip install --upgrade pymorphy2")
-    log.critical("Оригинальная ошибка: %s", e)
-    MORPH_ANALYZER = None # Устанавливаем в None, чтобы тесты корректно падали
-except Exception as e:
-    log.error("Не удалось инициализировать Pymorphy2 MorphAnalyzer: %s", e)
-    MORPH_ANALYZER = None
-
 class SummarizationTestGenerator(AbstractTestGenerator):
     """
     Проверяет способность модели к суммаризации, используя семантическое сравнение.
@@ -32,9 +16,9 @@ class SummarizationTestGenerator(AbstractTestGenerator):
     def __init__(self, test_id: str):
         super().__init__(test_id)
         # Убеждаемся, что анализатор доступен. Если нет - тест не будет работать.
-        if MORPH_ANALYZER is None:
+        # Анализатор общий для всех плагинов (baselogic.core.lemmatizer).
+        if not lemmatizer.is_available():
             raise RuntimeError("Pymorphy2 MorphAnalyzer не был инициализирован. См. логи выше.")
-        self.morph = MORPH_ANALYZER
 
         self.stop_words = {"это", "как", "но", "и", "в", "на", "с", "из", "к", "по", "о", "у", "за", "под", "быть",
                            "являться", "мочь", "находиться"}
@@ -59,12 +43,7 @@ class SummarizationTestGenerator(AbstractTestGenerator):
     def _get_lemmas(self, text: str) -> set:
         """Превращает текст в множество нормализованных лемм."""
         words = re.findall(r'\b\w+\b', text.lower())
-        lemmas = set()
-        for word in words:
-            if word not in self.stop_words:
-                p = self.morph.parse(word)[0]
-                lemmas.add(p.normal_form)
-        return lemmas
+        return set(lemmatizer.lemmatize(word for word in words if word not in self.stop_words))
 
     def verify(self, llm_output: str, expected_output: Any) -> Dict[str, Any]:
         # Сначала очищаем ответ модели от всего шума
@@ -1,7 +1,9 @@
 # grandmaster/src/tests/GrandmasterJudgeEvaluatorTestGenerator.py
 
+import functools
 import json
 import logging
+import os
 import re
 from typing import Dict, Any, Tuple
 
@@ -9,6 +11,53 @@ from .abstract_test_generator import AbstractTestGenerator
 
 log = logging.getLogger(__name__)
 
+_CONDITIONS_RE = re.compile(r"Условия \(\d+ подсказок\):\s*\n(.*?)\n\s*={40}", re.DOTALL)
+_QUESTION_RE = re.compile(r"Вопрос:\s*(.*?)\s*\n={40}", re.DOTALL)
+_ANSWER_RE = re.compile(r"Ответ для проверки:\s*(.*?)\s*\n", re.DOTALL)
+_SOLUTION_TABLE_RE = re.compile(r"---\s*Скрытое Решение для самопроверки\s*---\s*\n(.*?)$", re.DOTALL)
+_SOLVER_ANSWER_RE = re.compile(r"(?:Финальный ответ|Ответ):\s*([^\n]+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_puzzle_file(path: str, mtime_ns: int, size: int) -> Tuple[str, Dict[str, str]]:
+    """
+    Читает и разбирает текстовый файл головоломки. Результат кешируется по
+    (путь, mtime, размер): повторные экземпляры генератора для того же файла
+    не перечитывают и не разбирают его заново.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            full_text = f.read()
+    except FileNotFoundError:
+        log.error(f"File not found: {path}")
+        return "", {}
+    if not full_text: return "", {}
+    conditions_match = _CONDITIONS_RE.search(full_text)
+    question_match = _QUESTION_RE.search(full_text)
+    answer_match = _ANSWER_RE.search(full_text)
+    solution_table_match = _SOLUTION_TABLE_RE.search(full_text)
+    if not all([conditions_match, question_match, answer_match, solution_table_match]):
+        log.error(f"Не удалось распарсить структуру головоломки из файла: {path}")
+        return full_text, {}
+    return full_text, {"conditions": conditions_match.group(1).strip(), "question": question_match.group(1).strip(),
+                       "answer": answer_match.group(1).strip(),
+                       "solution_table": solution_table_match.group(1).strip()}
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_solver_file(path: str, mtime_ns: int, size: int) -> Tuple[str, str]:
+    """Читает ответ решателя и находит в нем финальный ответ; кешируется так же, как _parse_puzzle_file."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            full_text = f.read()
+    except FileNotFoundError:
+        log.error(f"File not found: {path}")
+        return "", ""
+    if not full_text: return "", ""
+    answer_match = _SOLVER_ANSWER_RE.search(full_text)
+    solver_answer = answer_match.group(1).strip().strip('.') if answer_match else ""
+    return full_text.strip(), solver_answer
+
 
 class GrandmasterJudgeEvaluatorTestGenerator(AbstractTestGenerator):
     """
@@ -111,31 +160,18 @@ class GrandmasterJudgeEvaluatorTestGenerator(AbstractTestGenerator):
                        "reasoning_present_ok": reasoning_ok}}}
 
     def _load_and_parse_puzzle(self, path: str) -> Tuple[str, Dict]:
-        full_text = self._load_file(path)
-        if not full_text: return "", {}
-        conditions_match = re.search(r"Условия \(\d+ подсказок\):\s*\n(.*?)\n\s*={40}", full_text, re.DOTALL)
-        question_match = re.search(r"Вопрос:\s*(.*?)\s*\n={40}", full_text, re.DOTALL)
-        answer_match = re.search(r"Ответ для проверки:\s*(.*?)\s*\n", full_text, re.DOTALL)
-        solution_table_match = re.search(r"---\s*Скрытое Решение для самопроверки\s*---\s*\n(.*?)$", full_text,
-                                         re.DOTALL)
-        if not all([conditions_match, question_match, answer_match, solution_table_match]):
-            log.error(f"Не удалось распарсить структуру головоломки из файла: {path}")
-            return full_text, {}
-        return full_text, {"conditions": conditions_match.group(1).strip(), "question": question_match.group(1).strip(),
-                           "answer": answer_match.group(1).strip(),
-                           "solution_table": solution_table_match.group(1).strip()}
+        try:
+            stat = os.stat(path)
+        except OSError:
+            log.error(f"File not found: {path}")
+            return "", {}
+        full_text, solution_data = _parse_puzzle_file(path, stat.st_mtime_ns, stat.st_size)
+        return full_text, dict(solution_data)
 
     def _load_and_parse_solver_response(self, path: str) -> Tuple[str, str]:
-        full_text = self._load_file(path)
-        if not full_text: return "", ""
-        answer_match = re.search(r"(?:Финальный ответ|Ответ):\s*([^\n]+)", full_text, re.IGNORECASE)
-        solver_answer = answer_match.group(1).strip().strip('.') if answer_match else ""
-        return full_text.strip(), solver_answer
-
-    def _load_file(self, path: str) -> str:
         try:
-            with open(path, encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            log.error(f"File not found: {path}");
-            return ""
+            stat = os.stat(path)
+        except OSError:
+            log.error(f"File not found: {path}")
+            return "", ""
+        return _parse_solver_file(path, stat.st_mtime_ns, stat.st_size)
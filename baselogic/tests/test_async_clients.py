@@ -0,0 +1,150 @@
+# baselogic/tests/test_async_clients.py
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from baselogic.core import async_http
+from baselogic.core.adapter import AdapterLLMClient
+from baselogic.core.interfaces import LLMRequestError
+from baselogic.core.llm_client import LLMClient
+from baselogic.core.ollama_client import OllamaClient
+from baselogic.core.openai_client import OpenAICompatibleClient
+from baselogic.core.response_cache import ResponseCache
+
+
+def _install_transport(handler):
+    """Подменяет транспорт пула текущего event loop (сеть в тестах не нужна)."""
+    loop = asyncio.get_running_loop()
+    async_http._clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _install_bridge_transport(handler):
+    async def install():
+        _install_transport(handler)
+    async_http.run_sync(install())
+
+
+def _ollama_handler(calls):
+    def handler(request):
+        calls.append(json.loads(request.content))
+        if json.loads(request.content)['stream']:
+            lines = [
+                {'message': {'content': "he"}, 'done': False},
+                {'message': {'content': "llo"}, 'done': False},
+                {'message': {'content': ""}, 'done': True, 'eval_count': 2, 'prompt_eval_count': 5},
+            ]
+            body = "\n".join(json.dumps(line) for line in lines) + "\n"
+            return httpx.Response(200, text=body)
+        return httpx.Response(200, json={'message': {'content': "hello"}, 'done': True, 'eval_count': 2})
+    return handler
+
+
+def test_sync_send_request_streams_through_bridge_loop():
+    calls = []
+    _install_bridge_transport(_ollama_handler(calls))
+    provider = OllamaClient()
+
+    stream = provider.send_request({'model': "qwen:7b", 'messages': [], 'stream': True, 'timeout': 5})
+    chunks = list(stream)
+
+    assert [c['message']['content'] for c in chunks] == ["he", "llo", ""]
+    assert chunks[-1]['eval_count'] == 2
+    assert 'timeout' not in calls[0]
+    assert provider.send_request({'model': "qwen:7b", 'messages': [], 'stream': False})['eval_count'] == 2
+
+    bridge_loop = async_http._get_bridge_loop()
+    pool = async_http._clients[bridge_loop]
+    async_http.close_bridge_client()
+    assert pool.is_closed and bridge_loop not in async_http._clients
+
+
+def test_http_error_is_mapped_to_request_error():
+    async def scenario():
+        _install_transport(lambda request: httpx.Response(404, json={'error': "model 'x' not found"}))
+        with pytest.raises(LLMRequestError) as exc_info:
+            await OllamaClient().send_request_async({'model': "x", 'messages': [], 'stream': False})
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 404
+    assert "model 'x' not found" in str(error)
+
+
+def test_openai_sse_stream_wraps_reasoning_in_think_tags():
+    events = [
+        {'choices': [{'delta': {'reasoning': "думаю"}}]},
+        {'choices': [{'delta': {'content': "42"}}]},
+        {'choices': [{'delta': {}, 'finish_reason': "stop"}]},
+    ]
+    body = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events) + "data: [DONE]\n\n"
+
+    async def scenario():
+        _install_transport(lambda request: httpx.Response(200, text=body))
+        provider = OpenAICompatibleClient(base_url="http://llm.local/v1")
+        stream = await provider.send_request_async({'model': "m", 'messages': [], 'stream': True})
+        return [provider.extract_delta_from_chunk(chunk) async for chunk in stream]
+
+    deltas = asyncio.run(scenario())
+    assert "".join(deltas).replace("\n", "") == "<think>думаю</think>42"
+
+
+def test_query_async_uses_pool_and_response_cache(tmp_path):
+    calls = []
+    config = {'name': "qwen:7b", 'generation': {'temperature': 0}, 'inference': {'stream': 'true'}}
+
+    async def scenario():
+        _install_transport(_ollama_handler(calls))
+        llm_client = LLMClient(OllamaClient(), config, response_cache=ResponseCache(tmp_path))
+        adapter = AdapterLLMClient(llm_client, config)
+        live = await adapter.query_async("hi")
+        cached = await adapter.query_async("hi")
+        other = await adapter.query_async("hi", use_cache=False)
+        await async_http.close_async_client()
+        return live, cached, other
+
+    live, cached, other = asyncio.run(scenario())
+    assert live['llm_response'] == cached['llm_response'] == other['llm_response'] == "hello"
+    assert cached['performance_metrics']['eval_count'] == 2
+    # Второй запрос берётся из кэша, третий явно его обходит
+    assert len(calls) == 2
+
+
+def test_warm_up_preloads_with_test_options_and_keep_alive():
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={'message': {'content': ""}, 'done': True, 'load_duration': 2_500_000_000})
+
+    config = {'name': "qwen:7b", 'generation': {'temperature': 0}, 'inference': {'num_ctx': 8192, 'stream': True}}
+
+    async def scenario():
+        _install_transport(handler)
+        llm_client = LLMClient(OllamaClient(), config, keep_alive="30m")
+        metrics = await asyncio.to_thread(llm_client.warm_up)
+        await asyncio.to_thread(llm_client.unload)
+        return metrics
+
+    _install_bridge_transport(handler)
+    metrics = asyncio.run(scenario())
+    async_http.run_sync(async_http.close_async_client())
+
+    assert metrics['load_duration'] == 2_500_000_000
+    preload, unload = calls
+    assert preload['messages'] == [] and preload['keep_alive'] == "30m"
+    assert preload['options']['num_ctx'] == 8192
+    assert unload['keep_alive'] == 0
+
+
+def test_load_time_is_excluded_from_ttft():
+    config = {'name': "qwen:7b", 'inference': {}}
+    adapter = AdapterLLMClient(LLMClient(OllamaClient(), config), config)
+    metrics = adapter._build_final_metrics(
+        {'load_duration': 1_500_000_000, 'prompt_eval_duration': 1, 'eval_count': 3},
+        prompt_token_count=5, final_response_str="abc",
+        start_time=0.0, ttft_time=1.7, end_time=2.0,
+    )
+    assert metrics['model_load_ms'] == 1500.0
+    assert metrics['time_to_first_token_ms'] == 200.0
@@ -0,0 +1,84 @@
+# baselogic/tests/test_columnar_store.py
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from baselogic.core.columnar_store import ColumnarResultStore
+from baselogic.core.result_store import JsonlResultWriter
+
+
+def _write_run(path, model, n, ts=1_760_000_000.0):
+    with JsonlResultWriter(path) as writer:
+        for i in range(n):
+            writer.append({
+                'test_id': f"t_{i}",
+                'model_name': model,
+                'hardware_tier': "mid_range",
+                'benchmark_timestamp': ts,
+                'is_correct': i % 2 == 0,
+                'prompt': "x" * 1000,
+                'llm_response': f"answer {i}",
+                'verification_details': {'score': i},
+                'system_info': {'cpu': {'model': "Ryzen"}},
+            })
+
+
+def test_ingest_partitions_and_loads_core_columns(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _write_run(raw / "a.jsonl", "qwen:7b", 3)
+    _write_run(raw / "b.jsonl", "llama3:8b", 2)
+
+    store = ColumnarResultStore(tmp_path / "store")
+    assert store.ingest(raw) == {'ingested': 2, 'skipped': 0, 'removed': 0}
+    assert (tmp_path / "store" / "model=qwen_7b" / "tier=mid_range").is_dir()
+
+    df = store.load()
+    assert len(df) == 5
+    assert 'prompt' not in df.columns and 'llm_response' not in df.columns
+    assert df.loc[df['test_id'] == "t_1", 'verification_details'].iloc[0] == {'score': 1}
+    assert set(df['source_file']) == {"a.jsonl", "b.jsonl"}
+
+    qwen = ColumnarResultStore(tmp_path / "store").load(
+        columns=['test_id', 'model_name'], text_columns=['llm_response'], models=["qwen:7b"]
+    )
+    assert list(qwen.columns) == ['test_id', 'model_name', 'llm_response']
+    assert list(qwen['llm_response']) == ["answer 0", "answer 1", "answer 2"]
+
+
+def test_ingest_is_incremental(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _write_run(raw / "a.jsonl", "qwen:7b", 3)
+    _write_run(raw / "b.jsonl", "qwen:7b", 1)
+    ColumnarResultStore(tmp_path / "store").ingest(raw)
+
+    store = ColumnarResultStore(tmp_path / "store")
+    assert store.ingest(raw) == {'ingested': 0, 'skipped': 2, 'removed': 0}
+
+    _write_run(raw / "a.jsonl", "qwen:7b", 1)  # дописали ещё одну запись
+    os.remove(raw / "b.jsonl")
+    assert store.ingest(raw) == {'ingested': 1, 'skipped': 0, 'removed': 1}
+    assert len(store.load()) == 4
+
+    manifest = json.loads((tmp_path / "store" / "_manifest.json").read_text(encoding='utf-8'))
+    assert list(manifest['sources']) == ["a.jsonl"]
+
+
+def test_store_dir_created_on_first_write(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    store = ColumnarResultStore(tmp_path / "store")
+
+    store.ingest(raw)
+    (raw / "empty.jsonl").write_text("", encoding='utf-8')
+    assert store.ingest(raw)['ingested'] == 1
+    assert store.load().empty
+    assert not (tmp_path / "store").exists()
+
+    _write_run(raw / "a.jsonl", "qwen:7b", 1)
+    store.ingest(raw)
+    assert (tmp_path / "store" / "_manifest.json").is_file()
@@ -0,0 +1,89 @@
+# baselogic/tests/test_compile_cache.py
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from baselogic.core import compile_cache
+from baselogic.core.compile_cache import CompileCache, compile_python
+from baselogic.core.jvm_runner import JVMRunner
+from baselogic.core.shared import LazySingleton
+from baselogic.tests.t03_code_gen import CodeGenTestGenerator
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Подменяет общий кэш процесса на кэш во временном каталоге."""
+    instance = CompileCache(tmp_path / "compile", max_size_mb=1)
+    monkeypatch.setattr(compile_cache, '_cache', LazySingleton.of(instance))
+    return instance
+
+
+def test_python_code_objects_are_reused(cache):
+    source = "def add(a, b):\n    return a + b\n"
+
+    first, first_hit = compile_python(source)
+    second, second_hit = compile_python(source)
+
+    assert (first_hit, second_hit) == (False, True)
+    namespace = {}
+    exec(second, namespace)
+    assert namespace['add'](2, 3) == 5
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_syntax_errors_are_raised_and_not_cached(cache):
+    with pytest.raises(SyntaxError):
+        compile_python("def broken(:\n")
+    assert cache._scan_size() == 0
+
+
+def test_least_recently_used_artifacts_are_evicted(cache):
+    chunk = b"x" * (300 * 1024)
+    keys = [cache.make_key('kotlin-jar', "2.0", f"fun main() = println({i})") for i in range(3)]
+    for index, key in enumerate(keys[:2]):
+        cache.put_bytes(key, chunk, '.jar')
+        os.utime(cache._path(key, '.jar'), (1000 + index, 1000 + index))
+    # Первый артефакт использовался недавно — вытеснен будет второй
+    assert cache.find(keys[0], ('.jar', '.err')) is not None
+
+    cache.put_bytes(keys[2], chunk, '.jar')
+    cache.put_bytes(keys[2] + "b", chunk, '.err')
+
+    assert cache.find(keys[0], ('.jar',)) is not None
+    assert cache.find(keys[1], ('.jar',)) is None
+    assert cache._scan_size() <= cache.max_size_bytes
+
+
+def test_t03_reports_hit_rate_in_details(cache):
+    generator = CodeGenTestGenerator(test_id="t03_cache")
+    expected = {'function_name': "add", 'tests': ["assert add(2, 3) == 5"]}
+    answer = "```python\ndef add(a, b):\n    return a + b\n```"
+
+    first = generator.verify(answer, expected)
+    second = generator.verify(answer, expected)
+
+    assert first['is_correct'] and second['is_correct']
+    assert first['details']['compile_cache']['hit'] is False
+    assert second['details']['compile_cache'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'hit': True}
+
+
+@pytest.mark.parametrize("messages, cached", [
+    ("/tmp/run/Main.kt:2:5: error: unresolved reference: foo\n", True),
+    ("e: file:///tmp/run/Main.kt:2:5 Unresolved reference 'foo'.\n", True),
+    ("error: unable to find JDK\n", False),
+    ("exception: java.lang.OutOfMemoryError: Java heap space\n", False),
+])
+def test_only_source_diagnostics_are_cached_as_errors(cache, tmp_path, messages, cached):
+    runner = JVMRunner.__new__(JVMRunner)
+    runner.toolchain = SimpleNamespace(version="2.0")
+    calls = []
+
+    def compile_fn():
+        calls.append(1)
+        return False, messages
+
+    for _ in range(2):
+        assert runner._compile_cached("kotlin-jar", "fun main() = foo()", tmp_path / "app.jar", compile_fn) == (
+            False, messages)
+    assert len(calls) == (1 if cached else 2)
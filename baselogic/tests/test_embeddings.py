@@ -0,0 +1,84 @@
+# baselogic/tests/test_embeddings.py
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from baselogic.core import embeddings
+from baselogic.core.embeddings import Embedder, EmbeddingCache, text_key
+from baselogic.core.semantic_analyzer import SemanticSimilarityScorer
+from baselogic.core.shared import LazySingleton
+
+
+class _BagOfWordsBackend:
+    """Детерминированная «модель»: вектор частот слов по хешу, считает закодированные тексты."""
+    dim = 16
+    model_id = "fake"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), self.dim))
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(text_key(word), 16) % self.dim] += 1
+        return vectors
+
+
+def test_texts_are_encoded_once_and_cached_on_disk(tmp_path):
+    backend = _BagOfWordsBackend()
+    embedder = Embedder(backend, EmbeddingCache(tmp_path, backend.dim), batch_size=2)
+
+    first = embedder.encode(["рост ввп", "рост цен", "рост ввп", "падение"])
+    assert backend.encoded == ["рост ввп", "рост цен", "падение"]
+    assert first.dtype == np.float32 and first.shape == (4, 16)
+    assert np.linalg.norm(first, axis=1) == pytest.approx(1.0, abs=1e-3)
+    assert np.array_equal(first[0], first[2])
+
+    # Новый процесс: векторы читаются из float16-матрицы, модель не вызывается
+    reopened_backend = _BagOfWordsBackend()
+    reopened = Embedder(reopened_backend, EmbeddingCache(tmp_path, backend.dim))
+    assert np.array_equal(reopened.encode(["падение", "рост ввп"]), first[[3, 0]])
+    assert reopened_backend.encoded == []
+    assert (tmp_path / "vectors.f16").stat().st_size == 3 * 16 * 2
+
+
+def test_truncated_cache_drops_unpaired_rows(tmp_path):
+    cache = EmbeddingCache(tmp_path, 4)
+    cache.put(["a", "b"], np.ones((2, 4)))
+    # Оборванная запись: вектор дописан, ключ — нет
+    with open(tmp_path / "vectors.f16", 'ab') as f:
+        f.write(np.ones(4, dtype=np.float16).tobytes())
+
+    reopened = EmbeddingCache(tmp_path, 4)
+    assert len(reopened) == 2
+    assert sorted(reopened.get(["a", "b", "c"])) == ["a", "b"]
+
+
+def test_scorer_mixes_embedding_similarity():
+    backend = _BagOfWordsBackend()
+    scorer = SemanticSimilarityScorer(index=None, embedder=Embedder(backend))
+    lexical = SemanticSimilarityScorer(index=None, embedder=None)
+
+    pairs = [("совпадение полное", "совпадение полное"), ("", "эталон"), ("рост цен", "рост ввп")]
+    scores = scorer.calculate_similarity_batch(pairs)
+
+    assert scores[0]['embedding'] == pytest.approx(1.0, abs=1e-3)
+    assert scores[1]['embedding'] == 0.0
+    for pair, result in zip(pairs, scores):
+        expected = lexical.calculate_similarity(*pair)
+        assert result['combined'] == pytest.approx(0.5 * expected['combined'] + 0.5 * result['embedding'])
+    # Ответы и эталоны кодируются одним пакетом
+    assert len(backend.encoded) == 5
+
+
+def test_embedder_is_disabled_without_model(monkeypatch):
+    monkeypatch.setattr(embeddings, '_embedder', LazySingleton(embeddings._create_embedder))
+    monkeypatch.delenv('BC_EMBEDDING_MODEL', raising=False)
+    assert embeddings.get_embedder() is None
+
+    embeddings._embedder.reset()
+    monkeypatch.setenv('BC_EMBEDDING_MODEL', '/nonexistent/model')
+    assert embeddings.get_embedder() is None
@@ -256,6 +256,23 @@ def test_verify_judge_on_incorrect_solver_answer(incorrect_solver_setup):
     assert result['is_correct'] is False, "Верификатор должен был отвергнуть неадекватный вердикт судьи"
 
 
+def test_judge_files_are_parsed_once_until_changed(tmp_path):
+    """Повторные экземпляры не перечитывают файлы; изменение файла дает новый разбор."""
+    puzzle_file = tmp_path / "puzzle.txt"
+    puzzle_file.write_text(PUZZLE_TEXT, encoding="utf-8")
+    solver_file = tmp_path / "solver_response.txt"
+    solver_file.write_text(SOLVER_RESPONSE_INCORRECT, encoding="utf-8")
+
+    with patch("builtins.open", wraps=open) as opened:
+        first = GrandmasterJudgeEvaluatorTestGenerator("judge_cache", str(puzzle_file), str(solver_file))
+        GrandmasterJudgeEvaluatorTestGenerator("judge_cache", str(puzzle_file), str(solver_file))
+    assert opened.call_count == 2
+
+    solver_file.write_text(SOLVER_RESPONSE_CORRECT + "\n", encoding="utf-8")
+    updated = GrandmasterJudgeEvaluatorTestGenerator("judge_cache", str(puzzle_file), str(solver_file))
+    assert updated.solver_answer != first.solver_answer
+
+
 # ================== ФИНАЛЬНЫЕ ИСПРАВЛЕННЫЕ ТЕСТЫ ДЛЯ InstructionsTestGenerator ==================
 
 @pytest.fixture
@@ -0,0 +1,99 @@
+# baselogic/tests/test_haystack.py
+import random
+import time
+
+import pytest
+
+from baselogic.core.haystack import Haystack, SentencePool, cached_pool
+
+
+def _pool():
+    return SentencePool.render(["{a} видит {b}.", "{b} и {a} молчат."],
+                               {'a': ['Кот', 'Пёс'], 'b': ['луну', 'реку', 'лес']},
+                               size=64, rng=random.Random(0))
+
+
+def test_counts_match_rendered_text():
+    haystack = Haystack()
+    haystack.append("один два три")
+    haystack.append("четыре")
+    haystack.insert(1, "пять шесть", words=2)
+    haystack.extend_block(0, " семь")
+    haystack.replace(2, "восемь девять")
+
+    text = haystack.render()
+    assert text == "один два три семь\n\nпять шесть\n\nвосемь девять"
+    assert haystack.char_count == len(text)
+    assert haystack.word_count == len(text.split())
+
+
+def test_offsets_and_locate():
+    haystack = Haystack(separator="--")
+    for block in ("aaaa", "bb", "cccccc"):
+        haystack.append(block)
+
+    text = haystack.render()
+    assert haystack.offsets() == [text.index("aaaa"), text.index("bb"), text.index("cccccc")]
+    assert haystack.locate(0) == (0, 0)
+    assert haystack.locate(50) == (1, 2)
+    assert haystack.locate(100) == (2, 6)
+    assert Haystack().locate(50) == (0, 0)
+
+
+def test_insert_at_depth_respects_bounds():
+    haystack = Haystack()
+    for i in range(10):
+        haystack.append(f"блок {i}")
+
+    assert haystack.insert_at_depth(0, "игла", lo=1) == 1
+    assert haystack.insert_at_depth(100, "игла", hi=len(haystack) - 1) == len(haystack) - 2
+    middle = haystack.insert_at_depth(50, "середина")
+    assert 4 <= middle <= 8
+    assert haystack.blocks[middle] == "середина"
+
+
+def test_fill_requires_exactly_one_target():
+    with pytest.raises(ValueError):
+        Haystack().fill(lambda: "x")
+    with pytest.raises(ValueError):
+        Haystack().fill(lambda: "x", target_chars=1, target_words=1)
+
+    by_words = Haystack().fill(lambda: ("раз два", 2), target_words=5)
+    assert by_words.word_count == 6 and len(by_words) == 3
+    by_chars = Haystack(separator="").fill(lambda: "abc", target_chars=10)
+    assert by_chars.char_count == 12
+
+
+def test_sentence_pool_sampling():
+    pool = _pool()
+    text, words = pool.sample(5, random.Random(1))
+    assert words == len(text.split())
+
+    noise = pool.sample_chars(500, random.Random(1))
+    assert len(noise) >= 500 - 1
+    assert all(line in pool.sentences for line in noise.split("\n"))
+    assert pool.sample_chars(500, random.Random(1)) == noise
+
+
+def test_cached_pool_builds_once():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return _pool()
+
+    key = (__name__, 'test_cached_pool_builds_once')
+    assert cached_pool(key, factory) is cached_pool(key, factory)
+    assert len(calls) == 1
+
+
+def test_large_haystack_is_fast():
+    pool = _pool()
+    rng = random.Random(0)
+    started = time.perf_counter()
+    haystack = Haystack().fill(lambda: pool.sample(8, rng), target_words=128_000)
+    for depth in range(0, 101, 10):
+        haystack.insert_at_depth(depth, "игла", lo=1, hi=len(haystack) - 1)
+    text = haystack.render()
+    assert len(text) == haystack.char_count
+    assert time.perf_counter() - started < 2.0
@@ -0,0 +1,84 @@
+# baselogic/tests/test_haystack_cache.py
+import pytest
+
+from baselogic.core import haystack_cache
+from baselogic.core.haystack_cache import HaystackCache, cached_case
+from baselogic.core.shared import LazySingleton
+
+
+class _Generator:
+    def __init__(self, test_id="t_context_stress"):
+        self.test_id = test_id
+        self.builds = 0
+
+    def build(self, seed):
+        self.builds += 1
+        return {'prompt': f"стог {seed}", 'expected_output': "42", 'metadata': {'seed': seed}}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Подменяет общий кэш процесса на кэш во временном каталоге."""
+    instance = HaystackCache(tmp_path / "haystacks", max_size_mb=1)
+    monkeypatch.setattr(haystack_cache, '_cache', LazySingleton.of(instance))
+    return instance
+
+
+def test_case_is_generated_once_and_replayed(cache):
+    generator = _Generator()
+
+    first = cached_case(generator, 32, 50, 42, lambda: generator.build(42))
+    second = cached_case(_Generator(), 32, 50, 42, lambda: pytest.fail("кейс должен браться из кэша"))
+
+    assert generator.builds == 1
+    assert second == first
+    # Промпт не копируется, а метаданные копируются
+    assert second['prompt'] is first['prompt']
+    second['metadata']['model'] = "x"
+    assert 'model' not in cached_case(generator, 32, 50, 42, lambda: generator.build(42))['metadata']
+
+
+def test_key_covers_cell_seed_and_generator(cache):
+    generator = _Generator()
+    keys = {
+        cache.case_key(generator, 32, 50, 42),
+        cache.case_key(generator, 32, 90, 42),
+        cache.case_key(generator, 64, 50, 42),
+        cache.case_key(generator, 32, 50, 43),
+        cache.case_key(_Generator("t_other"), 32, 50, 42),
+    }
+    assert len(keys) == 5
+
+
+def test_cases_survive_process_restart(cache, tmp_path):
+    generator = _Generator()
+    case = cached_case(generator, 8, 10, 7, lambda: generator.build(7))
+
+    fresh = HaystackCache(tmp_path / "haystacks")
+    assert fresh.get(fresh.case_key(generator, 8, 10, 7)) == case
+    assert fresh.stats() == {'hits': 1, 'misses': 0, 'hit_rate': 1.0}
+
+
+def test_disabled_cache_always_builds(monkeypatch):
+    monkeypatch.setattr(haystack_cache, '_cache', LazySingleton.of(None))
+    generator = _Generator()
+
+    cached_case(generator, 8, 10, 7, lambda: generator.build(7))
+    cached_case(generator, 8, 10, 7, lambda: generator.build(7))
+    assert generator.builds == 2
+
+
+def test_key_changes_with_haystack_source(cache, tmp_path, monkeypatch):
+    source = tmp_path / "haystack.py"
+    source.write_text("VERSION = 1\n", encoding='utf-8')
+    monkeypatch.setattr(haystack_cache, 'HAYSTACK_SOURCE', source)
+    haystack_cache._source_fingerprint.cache_clear()
+    generator = _Generator()
+    before = cache.case_key(generator, 32, 50, 42)
+
+    source.write_text("VERSION = 2\n", encoding='utf-8')
+    haystack_cache._source_fingerprint.cache_clear()
+    try:
+        assert cache.case_key(generator, 32, 50, 42) != before
+    finally:
+        haystack_cache._source_fingerprint.cache_clear()
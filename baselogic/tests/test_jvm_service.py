@@ -0,0 +1,114 @@
+# baselogic/tests/test_jvm_service.py
+import os
+import sys
+import textwrap
+
+import pytest
+
+from baselogic.core import jvm_runner, test_runner
+from baselogic.core.jvm_runner import JVMRunner, JVMRunnerError, JVMToolchain, get_jvm_toolchain
+from baselogic.core.jvm_service import (
+    JVMServiceError,
+    JVMServiceStartError,
+    JVMServiceTimeout,
+    ServiceProcess,
+)
+
+# Процесс с тем же построчным протоколом, что и JvmService.java:
+# "echo" возвращает аргументы, "sleep" зависает, "exit" завершает процесс
+FAKE_SERVICE = textwrap.dedent('''
+    import base64, sys, time
+    MARK = "@@JVMSERVICE@@"
+    enc = lambda s: base64.b64encode(s.encode()).decode()
+    print(MARK, "READY", "", "", sep="\\t", flush=True)
+    for line in sys.stdin:
+        fields = [base64.b64decode(p).decode() for p in line.rstrip("\\n").split("\\t")]
+        if fields[0] == "sleep":
+            time.sleep(60)
+        if fields[0] == "exit":
+            sys.exit(3)
+        print("noise from user code", flush=True)
+        print(MARK, "OK", enc(" ".join(fields[1:])), enc("ошибок нет"), sep="\\t", flush=True)
+''')
+
+
+@pytest.fixture
+def fake_cmd(tmp_path):
+    script = tmp_path / "fake_service.py"
+    script.write_text(FAKE_SERVICE, encoding="utf-8")
+    return [sys.executable, str(script)]
+
+
+def test_requests_are_answered_in_order_and_noise_is_ignored(fake_cmd):
+    process = ServiceProcess(fake_cmd, dict(os.environ), name="fake")
+    try:
+        assert process.request(["echo", "a\tb", "привет"], timeout=5) == ("OK", "a\tb привет", "ошибок нет")
+        assert process.request(["echo", ""], timeout=5) == ("OK", "", "ошибок нет")
+        assert process.jobs == 2
+    finally:
+        process.close()
+
+
+def test_hanging_request_kills_process(fake_cmd):
+    process = ServiceProcess(fake_cmd, dict(os.environ), name="fake")
+
+    with pytest.raises(JVMServiceTimeout):
+        process.request(["sleep"], timeout=0.5)
+    assert not process.alive
+
+
+def test_exited_process_is_reported(fake_cmd):
+    process = ServiceProcess(fake_cmd, dict(os.environ), name="fake")
+    try:
+        with pytest.raises(JVMServiceError):
+            process.request(["exit"], timeout=5)
+    finally:
+        process.close()
+
+
+def test_missing_executable_is_a_start_error(tmp_path):
+    with pytest.raises(JVMServiceStartError):
+        ServiceProcess([str(tmp_path / "no-java")], dict(os.environ), name="fake")
+
+
+def test_main_class_name_follows_package_and_jvm_name():
+    assert JVMRunner._main_class_name("fun main() {}") == "MainKt"
+    assert JVMRunner._main_class_name("package com.example.app\n\nfun main() {}") == "com.example.app.MainKt"
+    assert JVMRunner._main_class_name('@file:JvmName("Solution")\npackage a.b\nfun main() {}') == "a.b.Solution"
+
+
+def test_toolchain_is_discovered_once_per_process(monkeypatch):
+    calls = []
+
+    def discover(cls, java_home=None, kotlin_home=None):
+        calls.append(1)
+        raise JVMRunnerError("Не найден kotlinc")
+
+    monkeypatch.setattr(JVMToolchain, 'discover', classmethod(discover))
+    monkeypatch.setattr(jvm_runner, '_toolchain', None)
+    monkeypatch.setattr(jvm_runner, '_toolchain_error', None)
+    monkeypatch.setattr(jvm_runner, '_toolchain_resolved', False)
+
+    for _ in range(3):
+        with pytest.raises(JVMRunnerError, match="kotlinc"):
+            get_jvm_toolchain()
+    assert len(calls) == 1
+
+
+class _KotlinGenerator:
+    requires_kotlin = True
+
+
+class _PlainGenerator:
+    pass
+
+
+def test_kotlin_tests_are_excluded_before_the_sweep(monkeypatch):
+    monkeypatch.setattr(test_runner, 'check_jvm_toolchain', lambda: {'available': False, 'error': "нет kotlinc"})
+    runner = test_runner.TestRunner.__new__(test_runner.TestRunner)
+    runner.test_generators = {'t_kotlin_code': _KotlinGenerator, 't01_simple_logic': _PlainGenerator}
+
+    excluded = runner._exclude_unavailable_tests()
+
+    assert excluded == {'t_kotlin_code': "нет kotlinc"}
+    assert list(runner.test_generators) == ['t01_simple_logic']
@@ -0,0 +1,85 @@
+# baselogic/tests/test_lemmatizer.py
+from types import SimpleNamespace
+
+import pytest
+
+from baselogic.core import lemmatizer
+
+
+class _CountingAnalyzer:
+    """Анализатор с предсказуемыми леммами: отрезает окончание, считает разборы."""
+
+    def __init__(self):
+        self.parsed = []
+
+    def parse(self, word):
+        self.parsed.append(word)
+        return [SimpleNamespace(normal_form=word.lower().rstrip('аеиоуыя'))]
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    instance = _CountingAnalyzer()
+    monkeypatch.setattr(lemmatizer, '_analyzer', instance)
+    lemmatizer.lemma.cache_clear()
+    yield instance
+    lemmatizer.lemma.cache_clear()
+
+
+def test_lemmas_are_cached_across_calls(analyzer):
+    assert lemmatizer.lemmatize(["кошки", "кошки", "собака"]) == ["кошк", "кошк", "собак"]
+    assert lemmatizer.lemmatize_text("Кошки и собака") == ["кошк", "", "собак"]
+
+    assert analyzer.parsed == ["кошки", "собака", "и"]
+    assert lemmatizer.cache_info().currsize == 3
+
+
+def test_analyzer_is_loaded_lazily_once(monkeypatch):
+    loads = []
+    monkeypatch.setattr(lemmatizer, '_analyzer', None)
+    monkeypatch.setattr(lemmatizer, '_analyzer_resolved', False)
+    monkeypatch.setattr(lemmatizer, '_load_analyzer', lambda: loads.append(1) or _CountingAnalyzer())
+
+    assert lemmatizer.get_morph_analyzer() is lemmatizer.get_morph_analyzer()
+    assert loads == [1]
+
+
+def test_unavailable_analyzer_is_reported(monkeypatch):
+    def fail():
+        raise RuntimeError("нет словарей")
+
+    monkeypatch.setattr(lemmatizer, '_analyzer', None)
+    monkeypatch.setattr(lemmatizer, '_analyzer_resolved', False)
+    monkeypatch.setattr(lemmatizer, '_load_analyzer', fail)
+    assert lemmatizer.is_available() is False
+
+
+def test_failed_load_is_not_repeated(monkeypatch):
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise RuntimeError("нет словарей")
+
+    monkeypatch.setattr(lemmatizer, '_analyzer', None)
+    monkeypatch.setattr(lemmatizer, '_analyzer_resolved', False)
+    monkeypatch.setattr(lemmatizer, '_load_analyzer', fail)
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="нет словарей"):
+            lemmatizer.get_morph_analyzer()
+    assert attempts == [1]
+
+
+def test_real_pymorphy2_lemmas(monkeypatch):
+    pytest.importorskip("pymorphy2")
+    # После теста общий анализатор возвращается в прежнее состояние (monkeypatch)
+    monkeypatch.setattr(lemmatizer, '_analyzer', None)
+    monkeypatch.setattr(lemmatizer, '_analyzer_error', None)
+    monkeypatch.setattr(lemmatizer, '_analyzer_resolved', False)
+    if not lemmatizer.is_available():
+        pytest.skip("pymorphy2 установлен, но MorphAnalyzer не создаётся в этой версии Python")
+    lemmatizer.lemma.cache_clear()
+    try:
+        assert lemmatizer.lemmatize(["кошки", "бежали"]) == ["кошка", "бежать"]
+    finally:
+        lemmatizer.lemma.cache_clear()
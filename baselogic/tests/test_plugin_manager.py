@@ -0,0 +1,98 @@
+# baselogic/tests/test_plugin_manager.py
+import sys
+
+import pytest
+
+from baselogic.core import plugin_manager
+from baselogic.core.plugin_manager import ManifestEntry, build_plugin_manifest, discover_test_generators
+
+GENERATOR = '''
+from baselogic.tests.abstract_test_generator import AbstractTestGenerator
+
+class {name}(AbstractTestGenerator):
+{body}
+    def generate(self):
+        return {{}}
+
+    def verify(self, llm_output, expected_output):
+        return {{}}
+'''
+
+
+def _write(path, name, body="    pass"):
+    path.write_text(GENERATOR.format(name=name, body=body), encoding='utf-8')
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    tests_dir = tmp_path / "tests"
+    plugins_dir = tests_dir / "plugins"
+    plugins_dir.mkdir(parents=True)
+    _write(tests_dir / "t01_simple_logic.py", "SimpleLogicTestGenerator")
+    _write(tests_dir / "t02_broken.py", "WrongName")
+    _write(plugins_dir / "t_kotlin.py", "KotlinTestGenerator", "    requires_kotlin = True")
+    _write(plugins_dir / "t01_simple_logic.py", "OverrideTestGenerator")
+    (plugins_dir / "t_syntax.py").write_text("class Broken(:\n", encoding='utf-8')
+    (plugins_dir / "helpers.py").write_text("class Helper:\n    pass\n", encoding='utf-8')
+    return tests_dir, plugins_dir
+
+
+def test_manifest_is_built_without_imports(dirs, tmp_path):
+    tests_dir, plugins_dir = dirs
+    manifest = build_plugin_manifest(tmp_path / "manifest.json", tests_dir, plugins_dir)
+
+    assert sorted(manifest) == ['t01_simple_logic', 't_kotlin']
+    # Плагин переопределяет встроенный тест
+    assert manifest['t01_simple_logic'].class_name == 'OverrideTestGenerator'
+    assert manifest['t01_simple_logic'].module == 'baselogic.tests.plugins.t01_simple_logic'
+    assert manifest['t_kotlin'].attributes == {'requires_kotlin': True}
+    assert 'baselogic.tests.plugins.t_kotlin' not in sys.modules
+
+
+def test_manifest_cache_rescans_only_changed_files(dirs, tmp_path, monkeypatch):
+    tests_dir, plugins_dir = dirs
+    cache_path = tmp_path / "manifest.json"
+    build_plugin_manifest(cache_path, tests_dir, plugins_dir)
+
+    scanned = []
+    real_scan = plugin_manager._scan_file
+    monkeypatch.setattr(plugin_manager, '_scan_file',
+                        lambda path, *args: scanned.append(path.name) or real_scan(path, *args))
+
+    assert build_plugin_manifest(cache_path, tests_dir, plugins_dir)['t_kotlin'].attributes
+    assert scanned == []
+
+    _write(plugins_dir / "t_kotlin.py", "KotlinTestGenerator", "    requires_kotlin = False")
+    manifest = build_plugin_manifest(cache_path, tests_dir, plugins_dir)
+    assert scanned == ['t_kotlin.py']
+    assert manifest['t_kotlin'].attributes == {'requires_kotlin': False}
+
+
+def test_only_selected_generators_are_imported(tmp_path, monkeypatch):
+    for name in ("lazy_plugin_a", "lazy_plugin_b"):
+        _write(tmp_path / f"{name}.py", "LazyTestGenerator")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    manifest = {
+        key: ManifestEntry(key=key, module=f"lazy_plugin_{key[-1]}", class_name="LazyTestGenerator",
+                           path=str(tmp_path / f"lazy_plugin_{key[-1]}.py"), source_hash="", builtin=False)
+        for key in ("t_a", "t_b")
+    }
+    monkeypatch.setattr(plugin_manager, '_manifest', manifest)
+    monkeypatch.setattr(plugin_manager, '_loaded', {})
+
+    generators = discover_test_generators({'t_a', 't_missing'})
+
+    assert list(generators) == ['t_a']
+    assert generators['t_a'].__module__ == 'lazy_plugin_a'
+    assert 'lazy_plugin_b' not in sys.modules
+
+
+def test_selected_generators_keep_manifest_order(monkeypatch):
+    keys = ("t01_a", "t02_b", "t03_c", "t_plugin")
+    manifest = {key: ManifestEntry(key=key, module="m", class_name="C", path=f"{key}.py", source_hash="",
+                                   builtin=key != "t_plugin")
+                for key in keys}
+    monkeypatch.setattr(plugin_manager, '_manifest', manifest)
+    monkeypatch.setattr(plugin_manager, '_loaded', {key: object for key in keys})
+
+    assert list(discover_test_generators(["t_plugin", "t03_c", "t01_a"])) == ["t01_a", "t03_c", "t_plugin"]
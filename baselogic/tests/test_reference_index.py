@@ -0,0 +1,93 @@
+# baselogic/tests/test_reference_index.py
+import json
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from baselogic.core.reference_index import ReferenceIndex, index_results
+from baselogic.core.semantic_analyzer import SemanticSimilarityScorer
+
+
+def test_documents_are_added_once(tmp_path):
+    index = ReferenceIndex(tmp_path / "index.sqlite")
+
+    assert index.add_documents([("a b", ["a", "b"]), ("a c", ["a", "c"]), ("a b", ["a", "b"])]) == 2
+    assert index.add_documents([("a b", ["a", "b"]), ("d", ["d"])]) == 1
+
+    assert index.stats() == (3, 5 / 3)
+    assert index.document_frequencies(["a", "b", "d", "missing"]) == {'a': 2, 'b': 1, 'd': 1, 'missing': 0}
+    index.close()
+
+    # Статистика переживает переоткрытие файла
+    reopened = ReferenceIndex(tmp_path / "index.sqlite")
+    assert reopened.stats() == (3, 5 / 3)
+    assert reopened.idf(["a"])['a'] == pytest.approx(math.log(1 + 1.5 / 2.5))
+
+
+def test_corpus_idf_weights_rare_terms():
+    index = ReferenceIndex()
+    scorer = SemanticSimilarityScorer(index=index)
+    scorer.index_references([f"рост ввп {topic}" for topic in ("цены", "спроса", "налогов", "экспорта")])
+
+    # "рост" есть во всех эталонах, "импорта" — ни в одном
+    common = scorer.calculate_similarity("рост импорта", "рост импорта замедлится")
+    rare = scorer.calculate_similarity("импорта рост", "импорта снижение")
+    assert 0 < common['cosine_tfidf'] < 1
+    assert rare['cosine_tfidf'] > 0.5 > SemanticSimilarityScorer(index=None).calculate_similarity(
+        "импорта рост", "импорта снижение")['cosine_tfidf']
+
+    identical = scorer.calculate_similarity("совпадение полное", "совпадение полное")
+    assert identical['cosine_tfidf'] == pytest.approx(1.0)
+    # Эталон из 2 слов при средней длине 3: tf * (k1 + 1) / (tf + k1 * (1 - b + b * 2 / 3)), деленное на k1 + 1
+    assert identical['bm25'] == pytest.approx(1 / (1 + 1.5 * (0.25 + 0.75 * 2 / 3)))
+    assert identical['combined'] == pytest.approx(0.2 + 0.5 + 0.3 * identical['bm25'])
+    # Оценка не пополняет индекс: в нём только явно добавленные эталоны
+    assert index.stats()[0] == 4
+
+
+def test_empty_index_falls_back_to_pairwise_scores():
+    pair = ("рост цены налогов", "рост цены экспорта")
+    pairwise = SemanticSimilarityScorer(index=None, embedder=None).calculate_similarity(*pair)
+
+    assert SemanticSimilarityScorer(index=ReferenceIndex(), embedder=None).calculate_similarity(*pair) == pairwise
+
+
+def test_corpus_bm25_stays_below_full_match_for_partial_overlap():
+    index = ReferenceIndex()
+    scorer = SemanticSimilarityScorer(index=index, embedder=None)
+    scorer.index_references([f"рост ввп {topic} за год" for topic in ("цены", "спроса", "налогов")])
+
+    # Короткий эталон покрывает только часть запроса — это не полное совпадение
+    partial = scorer.calculate_similarity("рост цены налогов", "рост цены")
+    assert 0 < partial['bm25'] < 0.5
+
+
+def test_scoring_is_stable_between_calls():
+    index = ReferenceIndex()
+    scorer = SemanticSimilarityScorer(index=index, embedder=None)
+    scorer.index_references(["рост ввп цены", "рост ввп спроса"])
+    pair = ("рост импорта", "рост импорта замедлится")
+
+    first = scorer.calculate_similarity(*pair)
+    scorer.calculate_similarity_batch([("снижение спроса", "рост экспорта"), ("цены", "импорта цены")])
+    assert scorer.calculate_similarity(*pair) == first
+    assert index.stats()[0] == 2
+
+
+def test_index_results_reads_expected_outputs(tmp_path):
+    records = [
+        {'expected_output': "замедление роста ВВП"},
+        {'expected_output': {'expected_answer': "рост безработицы"}},
+        {'expected_output': ["не", "строка"]},
+        {'expected_output': "замедление роста ВВП"},
+    ]
+    (tmp_path / "run.jsonl").write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in records),
+                                        encoding='utf-8')
+    index = ReferenceIndex()
+
+    assert index_results(tmp_path, index) == 2
+    assert index_results(tmp_path, index) == 0
+    assert index.document_frequencies(["роста"]) == {'роста': 1}
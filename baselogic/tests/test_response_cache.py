@@ -0,0 +1,131 @@
+# baselogic/tests/test_response_cache.py
+import json
+import time
+
+import pytest
+
+from baselogic.core.adapter import AdapterLLMClient
+from baselogic.core.interfaces import LLMCacheMissError
+from baselogic.core.llm_client import LLMClient
+from baselogic.core.response_cache import ResponseCache
+
+
+class _CountingProvider:
+    """Провайдер-заглушка: считает реальные запросы."""
+
+    def __init__(self):
+        self.requests = 0
+
+    def prepare_payload(self, messages, model, *, stream=False, **kwargs):
+        return {'messages': messages, 'stream': stream, **kwargs}
+
+    def send_request(self, payload):
+        self.requests += 1
+        if payload['stream']:
+            return (chunk for chunk in [{'delta': "he"}, {'delta': "llo", 'done': True}])
+        time.sleep(0.05)
+        return {'content': "hello", 'eval_count': 2}
+
+    # Разбор ответа для AdapterLLMClient
+    def extract_choices(self, response):
+        return [response]
+
+    def extract_content_from_choice(self, choice):
+        return choice['content']
+
+    def extract_metadata_from_response(self, response):
+        return {'eval_count': response['eval_count']}
+
+
+def _client(provider, cache, **generation):
+    config = {'name': "qwen:7b", 'generation': generation, 'inference': {'stream': False}}
+    return LLMClient(provider, config, show_payload=False, response_cache=cache)
+
+
+MESSAGES = [{'role': "user", 'content': "hi"}]
+
+
+def test_non_stream_response_is_served_from_cache(tmp_path):
+    provider = _CountingProvider()
+    client = _client(provider, ResponseCache(tmp_path), temperature=0.0)
+
+    first = client.chat(MESSAGES)
+    second = _client(provider, ResponseCache(tmp_path), temperature=0).chat(MESSAGES)
+
+    assert first == second == {'content': "hello", 'eval_count': 2}
+    assert provider.requests == 1
+
+
+def test_stream_is_recorded_only_after_full_consumption(tmp_path):
+    provider = _CountingProvider()
+    client = _client(provider, ResponseCache(tmp_path))
+
+    assert list(client.chat(MESSAGES, stream=True)) == [{'delta': "he"}, {'delta': "llo", 'done': True}]
+    replayed = client.chat(MESSAGES, stream=True)
+
+    assert list(replayed) == [{'delta': "he"}, {'delta': "llo", 'done': True}]
+    assert provider.requests == 1
+
+
+def test_options_and_bypass_change_behaviour(tmp_path):
+    provider = _CountingProvider()
+    cache = ResponseCache(tmp_path)
+
+    _client(provider, cache, temperature=0).chat(MESSAGES)
+    _client(provider, cache, temperature=0.7).chat(MESSAGES)
+    _client(provider, cache, temperature=0).chat(MESSAGES, use_cache=False)
+
+    assert provider.requests == 3
+    assert cache.hits == 0
+
+
+def test_replay_mode_never_queries_model(tmp_path):
+    provider = _CountingProvider()
+    _client(provider, ResponseCache(tmp_path)).chat(MESSAGES)
+
+    replay = _client(provider, ResponseCache(tmp_path, mode='replay'))
+    assert replay.chat(MESSAGES) == {'content': "hello", 'eval_count': 2}
+    with pytest.raises(LLMCacheMissError):
+        replay.chat([{'role': "user", 'content': "new prompt"}])
+    assert provider.requests == 1
+
+
+def test_age_and_size_limits(tmp_path):
+    cache = ResponseCache(tmp_path, max_size_mb=0.001)  # ~1 КБ
+    for i in range(10):
+        cache.put(f"{i:064d}", {'stream': False, 'response': {'content': "x" * 200}})
+    assert cache._scan_size() <= cache.max_size_bytes
+
+    stale = ResponseCache(tmp_path, max_age_hours=1)
+    key = "f" * 64
+    stale.put(key, {'stream': False, 'response': {}})
+    assert stale.get(key) == {'stream': False, 'response': {}, 'created_at': pytest.approx(time.time(), abs=60)}
+
+    path = stale._path(key)
+    entry = json.loads(path.read_text(encoding='utf-8'))
+    entry['created_at'] -= 2 * 3600
+    path.write_text(json.dumps(entry), encoding='utf-8')
+    assert stale.get(key) is None
+
+
+def test_cache_hit_keeps_recorded_latency(tmp_path):
+    provider = _CountingProvider()
+    client = _client(provider, ResponseCache(tmp_path))
+    adapter = AdapterLLMClient(client, client.model_config)
+
+    live = adapter.query("hi")['performance_metrics']
+    cached = adapter.query("hi")['performance_metrics']
+
+    assert provider.requests == 1
+    assert live['response_cache_hit'] is False and cached['response_cache_hit'] is True
+    # Задержка ответа из кэша — записанная при живом запросе, а не время чтения с диска
+    assert cached['total_latency_ms'] >= 50
+    assert cached['total_latency_ms'] == pytest.approx(live['total_latency_ms'], abs=5)
+
+
+def test_adapter_propagates_replay_cache_miss(tmp_path):
+    client = _client(_CountingProvider(), ResponseCache(tmp_path, mode='replay'))
+    adapter = AdapterLLMClient(client, client.model_config)
+
+    with pytest.raises(LLMCacheMissError):
+        adapter.query("new prompt")
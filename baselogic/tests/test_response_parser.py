@@ -0,0 +1,86 @@
+# baselogic/tests/test_response_parser.py
+import pytest
+
+from baselogic.core.response_parser import CodeBlock, parse_response
+from baselogic.tests.abstract_test_generator import AbstractTestGenerator
+
+
+class _Generator(AbstractTestGenerator):
+    def generate(self):
+        return {}
+
+    def verify(self, llm_output, expected_output):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    parse_response.cache_clear()
+    yield
+    parse_response.cache_clear()
+
+
+def test_thinking_response_and_stop_tokens_in_one_pass():
+    parsed = parse_response(
+        "<THINK> шаг 1 </think>до<think>шаг 2</Think>\n<response> **Елена** </response><|eot_id|>хвост"
+    )
+
+    assert parsed.thinking_blocks == (" шаг 1 ", "шаг 2")
+    assert parsed.thinking == "шаг 1"
+    assert parsed.thinking_length == len(" шаг 1 шаг 2")
+    assert parsed.visible == "до\n<response> **Елена** </response><|eot_id|>хвост"
+    assert parsed.response == " **Елена** "
+    # Содержимое <response> берётся целиком, стоп-токен после него не мешает
+    assert parsed.llm_response == "**Елена**"
+    assert parsed.clean_answer == "Елена"
+
+
+def test_without_response_tag_answer_stops_at_first_stop_token():
+    parsed = parse_response("Ответ: 42</s> assistant повтор <|endoftext|>")
+
+    assert parsed.response is None
+    assert parsed.stop_offset == len("Ответ: 42")
+    assert parsed.llm_response == "Ответ: 42"
+    assert parse_response("«Москва», Поскольку в тексте указано").llm_response == "«Москва"
+    assert parse_response("<s>assistant Ответ_да").clean_answer == "Ответда"
+
+
+def test_unclosed_think_stays_in_text():
+    parsed = parse_response("ответ </think> <think> бесконечные рассуждения </s> хвост")
+
+    assert parsed.thinking_blocks == ()
+    assert parsed.visible == "ответ </think> <think> бесконечные рассуждения </s> хвост"
+    assert parsed.llm_response == "ответ </think> <think> бесконечные рассуждения"
+
+
+def test_results_are_memoized():
+    text = "<think>" + "долгие рассуждения " * 1000 + "</think>ответ"
+    first = parse_response(text)
+
+    assert parse_response(text) is first
+    assert parse_response.cache_info().hits == 1
+
+
+def test_code_blocks_are_split_from_answer():
+    parsed = parse_response(
+        "<think>```kotlin\nfun draft() {}\n```</think>Код:\n```kotlin \nfun main() {}\n```\n```\nval x = 1\n```"
+    )
+
+    assert parsed.code_blocks == (CodeBlock("kotlin", "fun main() {}\n"), CodeBlock("", "val x = 1\n"))
+
+
+@pytest.mark.parametrize("output, method", [
+    ("```kotlin\nfun main() { println(“ok”) }\n```", "markdown_with_kotlin_tag"),
+    ("```\nval answer = listOf(1, 2, 3)\n```", "markdown_generic_with_validation"),
+    ("```kt\nval answer = listOf(1, 2, 3)\n```", "markdown_with_any_lang_tag"),
+    ("<think>```kotlin\nfun draft() = 1\n```</think>fun main() { println(42) }", "direct_function_search"),
+    ("<think>fun main() { println(42) }</think>не знаю", "extraction_failed"),
+])
+def test_kotlin_extraction_uses_parsed_blocks(output, method):
+    success, code, used = _Generator("t")._extract_kotlin_code(output)
+
+    assert used == method
+    assert success is (method != "extraction_failed")
+    if method == "markdown_with_kotlin_tag":
+        # Санитизация типографских кавычек
+        assert code == 'fun main() { println("ok") }'
@@ -0,0 +1,108 @@
+# baselogic/tests/test_result_store.py
+import json
+
+from baselogic.core.result_store import (
+    SYSTEM_INFO_RECORD_TYPE,
+    JsonlResultWriter,
+    list_result_files,
+    load_result_records,
+    recover_incremental_file,
+)
+
+
+def test_writer_appends_one_line_per_record(tmp_path):
+    path = tmp_path / "model_incremental.jsonl"
+    with JsonlResultWriter(path, fsync_every=2) as writer:
+        for i in range(5):
+            writer.append({'test_id': f"t_{i}", 'prompt': "строка\nс переносом"})
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[0])['prompt'] == "строка\nс переносом"
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "crashed.jsonl"
+    with JsonlResultWriter(path) as writer:
+        writer.append({'test_id': "t_1"})
+        writer.append({'test_id': "t_2"})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"test_id": "t_3", "llm_resp')
+
+    assert [r['test_id'] for r in load_result_records(path)] == ["t_1", "t_2"]
+
+
+def test_finalize_renames_without_rewriting(tmp_path):
+    path = tmp_path / "m_incremental.jsonl"
+    final_path = tmp_path / "m_20260101_000000.jsonl"
+    writer = JsonlResultWriter(path)
+    writer.append({'test_id': "t_1"})
+
+    assert writer.finalize(final_path) == final_path
+    assert not path.exists()
+    assert load_result_records(final_path) == [{'test_id': "t_1"}]
+
+
+def test_system_info_is_stored_once_and_resolved_on_read(tmp_path):
+    path = tmp_path / "run.jsonl"
+    system_info = {'cpu': {'model': "Ryzen 9"}, 'memory': {'total_ram_gb': 64}}
+    with JsonlResultWriter(path) as writer:
+        for i in range(3):
+            writer.append({'test_id': f"t_{i}", 'system_info': system_info})
+
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert len(lines) == 4
+    assert lines[0]['record_type'] == SYSTEM_INFO_RECORD_TYPE
+    assert all('system_info' not in line and line['system_info_ref'] == lines[0]['system_info_ref']
+               for line in lines[1:])
+    assert writer.records_written == 3
+
+    records = load_result_records(path)
+    assert [r['test_id'] for r in records] == ["t_0", "t_1", "t_2"]
+    assert all(r['system_info'] == system_info for r in records)
+
+
+def test_legacy_json_and_jsonl_are_listed_together(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps([{'test_id': "old"}]), encoding='utf-8')
+    with JsonlResultWriter(tmp_path / "b.jsonl") as writer:
+        writer.append({'test_id': "new"})
+    (tmp_path / "notes.txt").write_text("skip me", encoding='utf-8')
+
+    files = list_result_files(tmp_path)
+    assert [f.name for f in files] == ["a.json", "b.jsonl"]
+    assert [r['test_id'] for f in files for r in load_result_records(f)] == ["old", "new"]
+
+
+def test_recover_incremental_file(tmp_path):
+    path = tmp_path / "m_incremental.jsonl"
+    target = tmp_path / "m_recovered.jsonl"
+    assert recover_incremental_file(path, target) is None
+
+    with JsonlResultWriter(path) as writer:
+        writer.append({'test_id': "t_1"})
+
+    assert recover_incremental_file(path, target) == target
+    assert not path.exists()
+    assert load_result_records(target) == [{'test_id': "t_1"}]
+
+
+def test_runner_recovers_crashed_incremental_file(tmp_path):
+    from baselogic.core import test_runner
+
+    runner = test_runner.TestRunner.__new__(test_runner.TestRunner)
+    runner.config = {'results_fsync_every': 1}
+    runner.results_dir = tmp_path
+    runner._system_info = {}
+    runner._hardware_tier = "mid_range"
+    runner._result_writers = {}
+
+    runner._save_single_result("m:7b", {'test_id': "crashed"}, [])
+    runner._result_writers.pop("m:7b").close()  # процесс "упал", файл остался
+
+    accumulated = runner._save_single_result("m:7b", {'test_id': "fresh"}, [])
+    runner._finalize_results("m:7b", accumulated)
+
+    files = list_result_files(tmp_path)
+    assert len(files) == 2
+    assert not any("incremental" in f.name for f in files)
+    assert sorted(r['test_id'] for f in files for r in load_result_records(f)) == ["crashed", "fresh"]
@@ -0,0 +1,62 @@
+# baselogic/tests/test_reverifier.py
+import json
+
+from baselogic.core.result_store import JsonlResultWriter, load_result_records
+from baselogic.core.reverifier import (
+    record_category,
+    restore_expected_output,
+    reverify_results_dir,
+)
+
+
+def _record(test_id, llm_response, is_correct):
+    # expected_output в том виде, в каком его сохраняет раннер (множества через str())
+    return {
+        'test_id': test_id,
+        'model_name': "qwen:7b",
+        'category': "t04_data_extraction",
+        'llm_response': llm_response,
+        'expected_output': {
+            'emails': "{'admin@sys-ops.xyz'}",
+            'phones': "set()",
+            'urls': "set()",
+            'test_type': "multi_entity_extraction",
+        },
+        'is_correct': is_correct,
+    }
+
+
+def test_restore_expected_output_and_category():
+    assert restore_expected_output({'a': "{'x', 'y'}", 'b': ["set()"], 'c': "{not a set}"}) == {
+        'a': {'x', 'y'}, 'b': [set()], 'c': "{not a set}",
+    }
+    assert record_category({'test_id': "t01_simple_logic_3"}) == "t01_simple_logic"
+    assert record_category({'category': "t_context_stress", 'test_id': "x_1"}) == "t_context_stress"
+
+
+def test_reverify_writes_new_set_and_verdict_diff(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    with JsonlResultWriter(raw / "run.jsonl") as writer:
+        writer.append(_record("t04_data_extraction_1", "Email: admin@sys-ops.xyz", True))
+        writer.append(_record("t04_data_extraction_2", "Email: admin@sys-ops.xyz", False))
+        writer.append({'test_id': "t_missing_1", 'category': "t_missing", 'is_correct': True})
+
+    out = tmp_path / "rescored"
+    report = reverify_results_dir(raw, out, max_workers=2)
+
+    assert (report.total, report.verified, report.errors) == (3, 2, {'t_missing': 1})
+    rescored = load_result_records(out / "run.jsonl")
+    assert [r['is_correct'] for r in rescored] == [True, True, True]
+    assert rescored[1]['previous_is_correct'] is False
+
+    changes = [json.loads(line) for line in (out / "verdict_changes.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert changes == [{
+        'source_file': "run.jsonl",
+        'test_id': "t04_data_extraction_2",
+        'model_name': "qwen:7b",
+        'category': "t04_data_extraction",
+        'was_correct': False,
+        'is_correct': True,
+    }]
+    assert load_result_records(raw / "run.jsonl")[1]['is_correct'] is False
@@ -0,0 +1,223 @@
+# baselogic/tests/test_runner_scheduler.py
+import random
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from baselogic.core import test_runner
+from baselogic.core.interfaces import LLMCacheMissError
+from baselogic.core.result_store import list_result_files, load_result_records
+
+
+class _EchoGenerator:
+    """Генератор, промпт которого содержит порядковый номер кейса."""
+
+    def __init__(self, test_id: str):
+        self.test_id = test_id
+        self.counter = 0
+
+    def generate(self):
+        self.counter += 1
+        return {'prompt': f"{self.test_id}:{self.counter}", 'expected_output': f"{self.test_id}:{self.counter}"}
+
+    def verify(self, llm_output, expected_output):
+        return {'is_correct': llm_output == expected_output, 'details': {}}
+
+
+class _BrokenGenerator(_EchoGenerator):
+    def generate(self):
+        if self.counter >= 1:
+            raise RuntimeError("generation failed")
+        return super().generate()
+
+
+class _SlowEchoClient:
+    """Клиент, отвечающий эхом со случайной задержкой и считающий параллелизм."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def query(self, prompt, system_prompt=None, *, use_cache=True):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(random.uniform(0.001, 0.02))
+        with self.lock:
+            self.active -= 1
+        return {'thinking_response': '', 'llm_response': prompt, 'performance_metrics': {}}
+
+
+class _CountingProgress:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, model_name, test_name):
+        self.updates.append(test_name)
+
+
+def _make_runner(generators, runs_per_test):
+    runner = test_runner.TestRunner.__new__(test_runner.TestRunner)
+    runner.config = {'runs_per_test': runs_per_test}
+    runner.test_generators = generators
+    runner.results_dir = Path(".")
+    runner._response_cache = None
+    runner.log_performance_metrics = lambda metrics: None
+    return runner
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_results_keep_generation_order(max_concurrency):
+    runner = _make_runner({'t_a': _EchoGenerator, 't_b': _EchoGenerator}, runs_per_test=6)
+    client = _SlowEchoClient()
+    progress = _CountingProgress()
+
+    results = runner._run_tests_for_model(
+        client, "model", {}, progress, save_incremental=False, max_concurrency=max_concurrency
+    )
+
+    assert [r['test_id'] for r in results] == [f"t_a_{i}" for i in range(1, 7)] + [f"t_b_{i}" for i in range(1, 7)]
+    assert all(r['is_correct'] for r in results)
+    assert len(progress.updates) == 12
+    assert client.max_active <= max_concurrency
+
+
+def test_parallel_requests_are_actually_concurrent():
+    runner = _make_runner({'t_a': _EchoGenerator}, runs_per_test=16)
+    client = _SlowEchoClient()
+
+    runner._run_tests_for_model(client, "model", {}, _CountingProgress(), save_incremental=False, max_concurrency=4)
+
+    assert client.max_active > 1
+
+
+def test_failed_generation_still_advances_progress():
+    runner = _make_runner({'t_a': _BrokenGenerator, 't_b': _EchoGenerator}, runs_per_test=3)
+    progress = _CountingProgress()
+
+    results = runner._run_tests_for_model(
+        _SlowEchoClient(), "model", {}, progress, save_incremental=False, max_concurrency=2
+    )
+
+    assert [r['test_id'] for r in results] == ["t_a_1", "t_b_1", "t_b_2", "t_b_3"]
+    assert progress.updates == ['t_a'] * 3 + ['t_b'] * 3
+
+
+def test_max_concurrency_config_priority():
+    runner = _make_runner({}, runs_per_test=1)
+    runner.config['max_concurrency'] = 3
+
+    assert runner._get_max_concurrency({'inference': {'max_concurrency': 8}}) == 8
+    assert runner._get_max_concurrency({}) == 3
+    assert runner._get_max_concurrency({'inference': {'max_concurrency': 'many'}}) == 1
+    assert runner._get_max_concurrency({'inference': {'max_concurrency': 0}}) == 1
+
+
+class _EchoStreamClient:
+    echo_stream = True
+
+    def get_model_info(self):
+        return {}
+
+
+@pytest.mark.parametrize("config, model_config, expected", [
+    ({}, {}, True),
+    ({'max_concurrency': 3}, {}, False),
+    ({'max_concurrency': 3}, {'inference': {'max_concurrency': 1}}, True),
+])
+def test_echo_stream_follows_effective_concurrency(config, model_config, expected):
+    runner = _make_runner({}, runs_per_test=1)
+    runner.config.update(config, warmup=False, unload_after_model=False)
+    runner.unavailable_tests = {}
+    runner._response_cache = None
+    client = _EchoStreamClient()
+    runner._create_client_safely = lambda model_config, show_payload: client
+
+    runner._run_model({'name': "model", **model_config}, _CountingProgress(), save_incremental=False)
+
+    assert client.echo_stream is expected
+
+
+class _CacheRecordingClient(_SlowEchoClient):
+    def __init__(self):
+        super().__init__()
+        self.use_cache = []
+
+    def query(self, prompt, system_prompt=None, *, use_cache=True):
+        self.use_cache.append((prompt, use_cache))
+        return super().query(prompt, system_prompt, use_cache=use_cache)
+
+
+@pytest.mark.parametrize("read_only, expected", [(False, [True, False, False]), (True, [True, True, True])])
+def test_repeated_runs_bypass_response_cache(read_only, expected):
+    runner = _make_runner({'t_a': _EchoGenerator}, runs_per_test=3)
+    runner._response_cache = type("Cache", (), {'read_only': read_only})()
+    client = _CacheRecordingClient()
+
+    runner._run_tests_for_model(client, "model", {}, _CountingProgress(), save_incremental=False)
+
+    assert [use_cache for _, use_cache in sorted(client.use_cache)] == expected
+
+
+def test_replay_cache_miss_is_skipped_without_result():
+    class _ReplayClient(_SlowEchoClient):
+        def query(self, prompt, system_prompt=None, *, use_cache=True):
+            if prompt.endswith(":2"):
+                raise LLMCacheMissError("not cached")
+            return super().query(prompt, system_prompt, use_cache=use_cache)
+
+    runner = _make_runner({'t_a': _EchoGenerator}, runs_per_test=3)
+    progress = _CountingProgress()
+    results = runner._run_tests_for_model(_ReplayClient(), "model", {}, progress, save_incremental=False)
+
+    assert [r['test_id'] for r in results] == ["t_a_1", "t_a_3"]
+    assert progress.updates == ['t_a'] * 3
+
+
+class _BarrierClient(_SlowEchoClient):
+    """Клиент, ответ которого ждёт, пока запрос придёт и ко второй конфигурации."""
+
+    def __init__(self, barrier, endpoint):
+        super().__init__()
+        self.barrier = barrier
+        self.endpoint = endpoint
+
+    def get_model_info(self):
+        return {'endpoint': self.endpoint}
+
+    def query(self, prompt, system_prompt=None, *, use_cache=True):
+        self.barrier.wait(timeout=5)
+        return super().query(prompt, system_prompt, use_cache=use_cache)
+
+
+def test_same_model_on_two_endpoints_keeps_separate_result_files(tmp_path):
+    runner = _make_runner({'t_a': _EchoGenerator, 't_b': _EchoGenerator}, runs_per_test=2)
+    runner.config.update(warmup=False, unload_after_model=False, results_fsync_every=1)
+    runner.results_dir = tmp_path
+    runner.unavailable_tests = {}
+    runner._system_info = {}
+    runner._hardware_tier = "mid_range"
+    runner._result_writers = {}
+    barrier = threading.Barrier(2)
+    runner._create_client_safely = lambda model_config, show_payload: _BarrierClient(
+        barrier, model_config['api_base'])
+    configs = [{'name': "qwen:7b", 'client_type': "openai_compatible", 'api_base': f"http://host-{i}:8000/v1"}
+               for i in (1, 2)]
+
+    threads = [threading.Thread(target=runner._run_model, args=(config, _CountingProgress()),
+                                kwargs={'echo_stream': False}) for config in configs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    files = list_result_files(tmp_path)
+    assert len(files) == 2 and not any("incremental" in f.name for f in files)
+    for path in files:
+        records = load_result_records(path)
+        assert [r['test_id'] for r in records] == ["t_a_1", "t_a_2", "t_b_1", "t_b_2"]
+        assert len({r['model_details']['endpoint'] for r in records}) == 1
+    assert runner._result_writers == {}
@@ -0,0 +1,106 @@
+# baselogic/tests/test_sandbox.py
+import pytest
+
+from baselogic.core import compile_cache
+from baselogic.core.sandbox import SandboxLimits, SandboxPool, call_generator_method, exec_and_call
+from baselogic.core.shared import LazySingleton
+from baselogic.tests.t03_code_gen import CodeGenTestGenerator
+
+
+class _AllocatingGenerator:
+    """Генератор со своим бюджетом памяти в песочнице."""
+    sandbox_memory_mb = 64
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+
+    def allocate(self, megabytes):
+        return len(bytearray(megabytes * 1024 * 1024))
+
+
+class _InterruptedConnection:
+    """Соединение, ожидание ответа на котором прерывается Ctrl+C."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def send(self, obj):
+        self.conn.send(obj)
+
+    def poll(self, timeout):
+        raise KeyboardInterrupt
+
+    def close(self):
+        self.conn.close()
+
+
+@pytest.fixture(scope="module")
+def pool():
+    sandbox = SandboxPool(size=1, limits=SandboxLimits(memory_mb=512, cpu_seconds=5))
+    yield sandbox
+    sandbox.close()
+
+
+def test_functions_defined_by_code_are_called_in_worker(pool):
+    result = pool.run(exec_and_call, "def double(x):\n    return x * 2", ['range'], [('double', (21,)), ('nope', ())])
+
+    assert result.ok
+    assert result.value == [('ok', 42), ('missing', None)]
+
+
+def test_infinite_loop_is_killed_and_worker_replaced(pool):
+    result = pool.run(exec_and_call, "while True:\n    pass", [], [], timeout=0.5)
+
+    assert result.status == 'timeout'
+    assert 'бесконечный цикл' in result.failure_details()['error']
+    # Пул продолжает работать на новом процессе
+    assert pool.run(exec_and_call, "def f():\n    return 1", [], [('f', ())]).value == [('ok', 1)]
+
+
+def test_memory_limit_is_reported(pool):
+    result = pool.run(exec_and_call, "data = bytearray(1024 * 1024 * 1024)", ['bytearray'], [])
+
+    assert result.status == 'memory_limit'
+    assert pool.run(exec_and_call, "x = 1", [], []).ok
+
+
+def test_code_errors_come_back_as_structured_result(pool):
+    result = pool.run(exec_and_call, "raise ValueError('boom')", ['ValueError'], [])
+
+    assert result.status == 'error'
+    assert result.error == "ValueError: boom"
+    assert "Traceback" in result.traceback
+
+
+def test_t03_verify_runs_model_code_in_sandbox(monkeypatch):
+    generator = CodeGenTestGenerator(test_id="t03_sandbox")
+    monkeypatch.setattr(CodeGenTestGenerator, 'EXECUTION_TIMEOUT', 1.0)
+    monkeypatch.setattr(compile_cache, '_cache', LazySingleton.of(None))
+    expected = {'function_name': "add", 'tests': ["assert add(2, 3) == 5"]}
+
+    correct = generator.verify("```python\ndef add(a, b):\n    return a + b\n```", expected)
+    hanging = generator.verify("```python\ndef add(a, b):\n    while True:\n        pass\n```", expected)
+
+    assert correct['is_correct'] is True
+    assert hanging['is_correct'] is False
+    assert hanging['details']['sandbox_status'] == 'timeout'
+
+
+def test_generator_memory_budget_overrides_pool_limit(pool):
+    def allocate(megabytes):
+        return pool.run(call_generator_method, __name__, "_AllocatingGenerator", "t", "allocate", (megabytes,))
+
+    assert allocate(16).value == 16 * 1024 * 1024
+    assert allocate(128).status == 'memory_limit'
+
+
+def test_interrupted_worker_is_replaced(pool):
+    worker = pool._idle.get()
+    worker.conn = _InterruptedConnection(worker.conn)
+    pool._idle.put(worker)
+
+    with pytest.raises(KeyboardInterrupt):
+        pool.run(exec_and_call, "x = 1", [], [])
+
+    assert not worker.process.is_alive()
+    assert pool.run(exec_and_call, "def f():\n    return 1", [], [('f', ())]).value == [('ok', 1)]
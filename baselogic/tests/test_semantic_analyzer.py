@@ -0,0 +1,76 @@
+# baselogic/tests/test_semantic_analyzer.py
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from baselogic.core.enhanced_validator import EnhancedValidator
+from baselogic.core.reference_index import ReferenceIndex
+from baselogic.core.semantic_analyzer import SemanticSimilarityScorer, semantic_analyzer, tokenize
+from baselogic.tests import expert_calibration_dataset as calibration
+
+
+def test_similarity_metrics_for_a_pair():
+    scorer = SemanticSimilarityScorer(index=None, embedder=None)
+    scores = scorer.calculate_similarity("рост ввп замедлится", "замедление роста ввп")
+
+    # Общее слово одно ("ввп") из пяти разных
+    assert scores['jaccard'] == pytest.approx(0.2)
+    # IDF по паре документов обнуляет общие слова
+    assert scores['cosine_tfidf'] == 0.0
+    # tf=1, длины равны: 2.5 / (1 + 1.5) на один из трёх терминов запроса
+    assert scores['bm25'] == pytest.approx(1 / 3)
+    assert scores['combined'] == pytest.approx(0.2 * 0.2 + 0.3 / 3)
+
+
+@pytest.mark.parametrize('corpus', [False, True], ids=['pairwise', 'corpus'])
+def test_batch_matches_pairwise_scores(corpus):
+    index = ReferenceIndex() if corpus else None
+    scorer = SemanticSimilarityScorer(index=index, embedder=None)
+    if corpus:
+        scorer.index_references(["кошки едят рыбу", "собаки грызут кости"])
+    pairs = [
+        ("Кошки любят рыбу и молоко каждый день", "кошки рыбу едят"),
+        ("", "кошки"),
+        ("повторяем повторяем слово", "повторяем"),
+        ("совпадение полное", "совпадение полное"),
+    ]
+
+    batch = scorer.calculate_similarity_batch(pairs)
+
+    assert len(batch) == len(pairs)
+    for pair, scores in zip(pairs, batch):
+        assert scores == pytest.approx(scorer.calculate_similarity(*pair))
+    assert batch[1]['combined'] == 0.0
+    assert batch[3]['jaccard'] == 1.0 and batch[3]['cosine_tfidf'] == pytest.approx(1.0 if index else 0.0)
+    if index is None:
+        assert batch[3]['bm25'] == pytest.approx(1.0)
+    assert scorer.calculate_similarity_batch([]) == []
+
+
+def test_tokens_are_cached():
+    stop_words = frozenset({'и'})
+    tokenize.cache_clear()
+
+    assert tokenize("Кошки и, собаки!", stop_words) == ("кошки", "собаки")
+    tokenize("Кошки и, собаки!", stop_words)
+    assert tokenize.cache_info().hits == 1
+
+
+def test_validate_batch_matches_validate(monkeypatch):
+    monkeypatch.setattr(semantic_analyzer.similarity_scorer, '_index', ReferenceIndex())
+    validator = EnhancedValidator()
+    items = [
+        ("Снижение инвестиций приводит к замедлению роста ВВП",
+         {'expected_answer': "замедление роста ВВП", 'key_steps': ["снижение инвестиций"]},
+         calibration.TestType.MULTI_HOP_REASONING),
+        ("Не знаю", {}, calibration.TestType.CONSTRAINED_OPTIMIZATION),
+    ]
+
+    batch = validator.validate_batch(items)
+
+    for item, result in zip(items, batch):
+        single = validator.validate(*item)
+        assert result.total_score == pytest.approx(single.total_score)
+        assert result.total_score > 0
+        assert not any(r.startswith("Validation error") for r in result.recommendations)
@@ -0,0 +1,45 @@
+# baselogic/tests/test_shared.py
+import threading
+
+import pytest
+
+from baselogic.core.shared import LazySingleton, env_flag
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, True), ('', True), ('true', True), ('1', True), (' ON ', True),
+    ('0', False), ('false', False), ('Off', False), ('no', False),
+])
+def test_env_flag(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv('BC_TEST_FLAG', raising=False)
+    else:
+        monkeypatch.setenv('BC_TEST_FLAG', value)
+    assert env_flag('BC_TEST_FLAG') is expected
+
+
+def test_env_flag_default_off(monkeypatch):
+    monkeypatch.delenv('BC_TEST_FLAG', raising=False)
+    assert env_flag('BC_TEST_FLAG', default=False) is False
+
+
+def test_factory_runs_once_even_when_it_returns_none():
+    calls = []
+    singleton = LazySingleton(lambda: calls.append(1))
+
+    threads = [threading.Thread(target=singleton.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert singleton.get() is None
+    assert calls == [1]
+
+    singleton.reset()
+    singleton.get()
+    assert calls == [1, 1]
+
+
+def test_of_wraps_existing_value():
+    value = object()
+    assert LazySingleton.of(value).get() is value
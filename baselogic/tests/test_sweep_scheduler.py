@@ -0,0 +1,105 @@
+# baselogic/tests/test_sweep_scheduler.py
+import threading
+import time
+
+from baselogic.core.sweep_scheduler import SweepScheduler, endpoint_key, group_models_by_endpoint, split_load_chains
+
+MODELS = [
+    {'name': "qwen:7b", 'client_type': "ollama", 'api_base': "http://localhost:11434/v1"},
+    {'name': "gemma", 'client_type': "lmstudio"},
+    {'name': "llama:8b", 'client_type': "ollama"},
+    {'name': "gpt", 'client_type': "openai_compatible", 'api_base': "https://api.example.com/v1/"},
+    {'name': "gpt-mini", 'client_type': "openai_compatible", 'api_base': "https://api.example.com/v1"},
+]
+
+
+class _Recorder:
+    """run_model, который запоминает, какие модели выполнялись одновременно."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = set()
+        self.overlaps = set()
+        self.order = []
+        self.kept_loaded = []
+
+    def __call__(self, model_config, keep_loaded):
+        name = model_config['name']
+        with self.lock:
+            self.order.append(name)
+            if keep_loaded:
+                self.kept_loaded.append(name)
+            for other in self.active:
+                self.overlaps.add(frozenset((name, other)))
+            self.active.add(name)
+        time.sleep(0.05)
+        with self.lock:
+            self.active.remove(name)
+
+
+def test_models_are_grouped_by_endpoint(monkeypatch):
+    monkeypatch.delenv('OLLAMA_MAX_LOADED_MODELS', raising=False)
+    groups = group_models_by_endpoint(MODELS, {})
+
+    assert [(g.key, [m['name'] for m in g.models], g.max_loaded_models) for g in groups] == [
+        ("ollama|http://localhost:11434", ["qwen:7b", "llama:8b"], 1),
+        ("lmstudio|http://127.0.0.1:1234/v1", ["gemma"], 1),
+        ("openai_compatible|https://api.example.com/v1", ["gpt", "gpt-mini"], 2),
+    ]
+    assert endpoint_key({'client_type': "openai_compatible", 'api_base': "http://127.0.0.1:8080"}) == \
+        "openai_compatible|http://127.0.0.1:8080"
+
+
+def test_loaded_models_limit_comes_from_ollama_env_or_config(monkeypatch):
+    monkeypatch.setenv('OLLAMA_MAX_LOADED_MODELS', "2")
+    assert group_models_by_endpoint(MODELS, {})[0].max_loaded_models == 2
+    assert group_models_by_endpoint(MODELS, {'max_loaded_models': 3})[0].max_loaded_models == 3
+    local_openai = [{'name': "m", 'client_type': "openai_compatible", 'api_base': "http://localhost:8000/v1"}]
+    assert group_models_by_endpoint(local_openai, {})[0].max_loaded_models == 1
+
+
+def test_endpoints_run_in_parallel_and_local_models_are_serialised(monkeypatch):
+    monkeypatch.delenv('OLLAMA_MAX_LOADED_MODELS', raising=False)
+    recorder = _Recorder()
+
+    SweepScheduler(MODELS, {}).run(recorder)
+
+    assert sorted(recorder.order) == sorted(m['name'] for m in MODELS)
+    assert frozenset(("qwen:7b", "llama:8b")) not in recorder.overlaps
+    assert frozenset(("qwen:7b", "gemma")) in recorder.overlaps
+    assert frozenset(("gpt", "gpt-mini")) in recorder.overlaps
+
+
+def test_single_endpoint_limit_restores_sequential_sweep(monkeypatch):
+    monkeypatch.delenv('OLLAMA_MAX_LOADED_MODELS', raising=False)
+    models = [m for m in MODELS if m['client_type'] != "openai_compatible"]
+    recorder = _Recorder()
+    scheduler = SweepScheduler(models, {'sweep_parallel_endpoints': 1})
+
+    scheduler.run(recorder)
+
+    assert not scheduler.is_parallel
+    assert recorder.overlaps == set()
+    # Модели одного сервера идут подряд, чтобы не перегружать веса
+    assert recorder.order == ["qwen:7b", "llama:8b", "gemma"]
+
+
+def test_configs_of_one_loaded_model_form_a_chain():
+    models = [
+        {'name': "qwen:7b", 'client_type': "ollama", 'generation': {'temperature': 0}},
+        {'name': "llama:8b", 'client_type': "ollama"},
+        {'name': "qwen:7b", 'client_type': "ollama", 'generation': {'temperature': 0.7}},
+        {'name': "qwen:7b", 'client_type': "ollama", 'inference': {'num_ctx': 32768}},
+    ]
+    chains = split_load_chains(models)
+    assert [[(m['name'], m.get('generation')) for m in chain] for chain in chains] == [
+        [("qwen:7b", {'temperature': 0}), ("qwen:7b", {'temperature': 0.7})],
+        [("llama:8b", None)],
+        [("qwen:7b", None)],
+    ]
+
+    recorder = _Recorder()
+    SweepScheduler(models, {}).run(recorder)
+    # Модель не выгружается между конфигурациями с одинаковыми опциями загрузки
+    assert recorder.order == ["qwen:7b", "qwen:7b", "llama:8b", "qwen:7b"]
+    assert recorder.kept_loaded == ["qwen:7b"]
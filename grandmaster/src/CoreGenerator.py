@@ -1,8 +1,12 @@
 # CoreGenerator.py
+import collections
+import contextlib
 import functools
+import multiprocessing
+import os
 import random
 import time
-from typing import List, Optional, Tuple, Any
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
 
 from clue_types import ClueType, Difficulty
 from ortools.sat.python import cp_model
@@ -32,6 +36,154 @@ def time_it(func):
     return wrapper
 
 
+class GeneratedPuzzle(NamedTuple):
+    """Результат успешной попытки генерации."""
+    clues: List
+    question_data: Dict
+    solution: Any  # pd.DataFrame с эталонным решением
+    seed: Optional[int]  # seed попытки: повторный запуск с ним воспроизводит головоломку
+    difficulty_profile: Dict  # метрики сложности со стороны решателя (см. CoreGenerator._measure_difficulty)
+
+
+def _attempt_seed(seed: Optional[int], attempt: int) -> Optional[int]:
+    """Seed попытки №attempt: не зависит от того, в каком процессе она выполняется."""
+    return None if seed is None else seed + attempt
+
+
+def _run_attempt_quietly(task: Tuple[PuzzleDefinition, Difficulty, Optional[int]]) -> Optional[GeneratedPuzzle]:
+    """Точка входа воркера пула: одна попытка без подробного лога (вывод процессов перемешивался бы)."""
+    definition, difficulty, seed = task
+    generator = CoreGenerator(definition, difficulty)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return generator._run_attempt(seed)
+
+
+class IncrementalSolvabilityChecker:
+    """
+    Инкрементальная проверка разрешимости на одной модели CP-SAT.
+
+    Вместо пересборки модели на каждую проверку каждая улика добавляется
+    в модель ровно один раз, под собственным литералом-включателем
+    (enforcement literal). Набор активных улик задается через допущения
+    (assumptions): литерал активной улики = True, остальных = False.
+
+    Уникальность проверяется двумя решениями вместо перебора всех решений:
+    1. Найти любое решение S (или доказать, что решений нет).
+    2. Под тем же набором улик и запретом "решение совпадает с S"
+       доказать, что других решений нет.
+    Если набор улик — подмножество набора, для которого уже доказана
+    уникальность, S заведомо остается решением и первый шаг пропускается
+    (типичный случай для минимизации).
+    """
+
+    # Ограничения, которые CP-SAT умеет отключать литералом (Add/AddBoolOr/... и snake_case-аналоги)
+    _ENFORCEABLE = {'add', 'addboolor', 'addbooland', 'addimplication', 'addlinearconstraint', 'addlinearexpressionindomain'}
+    # "Определяющие" ограничения: вводят новую переменную-результат и сами по себе ничего не запрещают
+    _DEFINING = {'addmaxequality', 'addminequality', 'addabsequality', 'addmoduloequality',
+                 'addmultiplicationequality', 'adddivisionequality'}
+
+    def __init__(self, definition: PuzzleDefinition, max_time_in_seconds: float = 10.0):
+        self.definition = definition
+        self.max_time_in_seconds = max_time_in_seconds
+        self.model, self.variables = definition.create_base_model_and_vars()
+        self._decision_vars = list(self.variables.values())
+        self._clue_literals: dict = {}
+        self._value_literals: dict = {}
+        self._block_literals: dict = {}
+        self._unique_for: Optional[Tuple[frozenset, Tuple[int, ...]]] = None
+        self.solves = 0
+
+    class _GuardedModel:
+        """Прокси модели: все ограничения улики включаются только при истинном литерале."""
+        def __init__(self, model: cp_model.CpModel, literal):
+            self._model = model
+            self._literal = literal
+
+        def __getattr__(self, name: str):
+            attr = getattr(self._model, name)
+            key = name.replace('_', '').lower()
+            if key in IncrementalSolvabilityChecker._ENFORCEABLE:
+                def guarded(*args, **kwargs):
+                    constraint = attr(*args, **kwargs)
+                    constraint.OnlyEnforceIf(self._literal)
+                    return constraint
+                return guarded
+            if key in IncrementalSolvabilityChecker._DEFINING:
+                def defining(target, *args, **kwargs):
+                    if isinstance(target, int):
+                        raise TypeError(
+                            f"'{name}' с константой вместо переменной-результата нельзя привязать к литералу улики: "
+                            f"введите новую переменную и ограничьте ее через Add().")
+                    return attr(target, *args, **kwargs)
+                return defining
+            if key.startswith('add'):
+                raise ValueError(f"Ограничение '{name}' нельзя привязать к литералу улики.")
+            return attr
+
+    def _literal_for(self, clue: Tuple[ClueType, Any]):
+        """Литерал улики; ограничения улики добавляются в модель при первом обращении."""
+        literal = self._clue_literals.get(clue)
+        if literal is None:
+            literal = self.model.NewBoolVar(f"clue_{len(self._clue_literals)}")
+            self.definition.add_clue_constraint(self._GuardedModel(self.model, literal), self.variables, clue)
+            self._clue_literals[clue] = literal
+        return literal
+
+    def _block_literal_for(self, solution: Tuple[int, ...]):
+        """Литерал ограничения "решение отличается от solution" (создается один раз на решение)."""
+        literal = self._block_literals.get(solution)
+        if literal is None:
+            literal = self.model.NewBoolVar(f"block_{len(self._block_literals)}")
+            differs = []
+            for var, value in zip(self._decision_vars, solution):
+                equal = self._value_literals.get((var.Index(), value))
+                if equal is None:
+                    equal = self.model.NewBoolVar('')
+                    self.model.Add(var == value).OnlyEnforceIf(equal)
+                    self.model.Add(var != value).OnlyEnforceIf(equal.Not())
+                    self._value_literals[(var.Index(), value)] = equal
+                differs.append(equal.Not())
+            self.model.AddBoolOr(differs).OnlyEnforceIf(literal)
+            self._block_literals[solution] = literal
+        return literal
+
+    def _solve(self, assumptions: List) -> Tuple[int, Optional[Tuple[int, ...]]]:
+        self.model.ClearAssumptions()
+        self.model.AddAssumptions(assumptions)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        solver.parameters.num_workers = 1  # модели маленькие: запуск параллельных воркеров дороже самого поиска
+        status = solver.Solve(self.model)
+        self.solves += 1
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return status, tuple(solver.Value(var) for var in self._decision_vars)
+        return status, None
+
+    def check(self, clues: List) -> int:
+        """Возвращает 0, 1 или 2 (два и более решений либо исчерпан лимит времени)."""
+        # Порядок улик, а не порядок множества: от него зависят номера литералов и ход поиска,
+        # а порядок обхода множества кортежей с Enum меняется вместе с PYTHONHASHSEED
+        ordered = list(dict.fromkeys(tuple(c) for c in clues))
+        keys = frozenset(ordered)
+        # Литералы неактивных улик остаются свободными: решатель просто выключит их ограничения
+        assumptions = [self._literal_for(clue) for clue in ordered]
+
+        if self._unique_for is not None and keys <= self._unique_for[0]:
+            solution = self._unique_for[1]
+        else:
+            status, solution = self._solve(assumptions)
+            if status == cp_model.INFEASIBLE:
+                return 0
+            if solution is None:  # Если решатель "задумался" и не успел
+                return 2
+
+        status, _ = self._solve(assumptions + [self._block_literal_for(solution)])
+        if status == cp_model.INFEASIBLE:
+            self._unique_for = (keys, solution)
+            return 1
+        return 2
+
+
 class CoreGenerator:
     """
     Ядро генератора головоломок. Реализует универсальный трехфазный алгоритм
@@ -59,102 +211,188 @@ class CoreGenerator:
         """
         self.definition = puzzle_definition
         self.difficulty = difficulty
+        self._checker: Optional[IncrementalSolvabilityChecker] = None
 
-    def generate(self, max_retries: int = 5) -> None:
+    def generate(self, max_retries: int = 5, workers: int = 1, seed: Optional[int] = None) -> Optional[GeneratedPuzzle]:
         """
         Основной метод, запускающий полный цикл генерации головоломки.
+
+        Args:
+            max_retries (int): Максимальное число независимых попыток.
+            workers (int): Число процессов. При workers > 1 попытки выполняются
+                           параллельно в пуле процессов: берется первая успешная,
+                           остальные прерываются.
+            seed (Optional[int]): Базовый seed. Попытка №i использует seed + i,
+                                  поэтому результат воспроизводим и не зависит
+                                  от числа процессов.
         """
         total_start_time = time.perf_counter()  # Замеряем общее время всего процесса
-        for attempt in range(max_retries):
-            print(f"\n--- ПОПЫТКА ГЕНЕРАЦИИ №{attempt + 1}/{max_retries} ---")
-
-            start_time = time.perf_counter()
-            solution = self.definition.generate_solution()
-            print(f"  - [TIMER] Генерация эталонного решения: {time.perf_counter() - start_time:.3f} сек.")
-
-            # --- Фаза 1: Проектирование каркаса ---
-            print(f"\n[{self.definition.name}]: Фаза 1: Проектирование каркаса интриги...")
-            start_time = time.perf_counter()
-            core_puzzle, remaining_clues = self.definition.design_core_puzzle(solution)
-            print(f"  - [TIMER] Проектирование ядра ('design_core_puzzle'): {time.perf_counter() - start_time:.3f} сек.")
-
-            # <<< КОММЕНТАРИЙ: Блок адаптивной модификации ядра на основе сложности >>>
-            # Здесь мы управляем "характером" головоломки на самом раннем этапе.
-            num_items = solution.shape[0]
-            base_core_size = len(core_puzzle)
-
-            if self.difficulty == Difficulty.CLASSIC:
-                classic_types = {ClueType.POSITIONAL, ClueType.DIRECT_LINK, ClueType.RELATIVE_POS}
-                core_puzzle = [c for c in core_puzzle if c[0] in classic_types]
-                simple_from_reserve = [c for c in remaining_clues if c[0] in classic_types]
-                random.shuffle(simple_from_reserve)
-                num_to_add = base_core_size - len(core_puzzle)
-                if len(simple_from_reserve) >= num_to_add > 0:
-                    core_puzzle.extend(simple_from_reserve[:num_to_add])
-                print(f"  - [Сложность CLASSIC]: Ядро очищено от сложных улик. Размер ядра: {len(core_puzzle)}.")
-            elif self.difficulty == Difficulty.EASY:
-                num_to_remove = max(1, base_core_size // 2)
-                if num_to_remove > 0 and len(core_puzzle) > num_to_remove:
-                    removed = core_puzzle[-num_to_remove:]
-                    core_puzzle = core_puzzle[:-num_to_remove]
-                    remaining_clues.extend(removed)
-                    print(f"  - [Сложность EASY]: Ядро упрощено, {num_to_remove} сложных улик возвращено в резерв.")
-            elif self.difficulty == Difficulty.HARD:
-                num_to_add = max(1, num_items // 2)
-                if len(remaining_clues) >= num_to_add:
-                    added = remaining_clues[:num_to_add]
-                    core_puzzle.extend(added)
-                    remaining_clues = remaining_clues[num_to_add:]
-                    print(f"  - [Сложность HARD]: Ядро усилено, добавлено {num_to_add} улик из резерва.")
-            elif self.difficulty == Difficulty.EXPERT:
-                num_to_add = max(2, num_items)
-                if len(remaining_clues) >= num_to_add:
-                    added = remaining_clues[:num_to_add]
-                    core_puzzle.extend(added)
-                    remaining_clues = remaining_clues[num_to_add:]
-                    print(f"  - [Сложность EXPERT]: Ядро значительно усилено, добавлено {num_to_add} улик из резерва.")
-
-            # "Санитарная проверка" ядра после модификации.
-            start_time = time.perf_counter()
-            if self._check_solvability(core_puzzle) == 0:
-                print(f"  - [TIMER] Санитарная проверка ядра: {time.perf_counter() - start_time:.3f} сек.")
-                print("  - ПРОВАЛ: Модифицированное ядро оказалось противоречивым. Новая попытка...")
-                continue
+        result = None
+        if workers > 1:
+            print(f"\n--- ПАРАЛЛЕЛЬНАЯ ГЕНЕРАЦИЯ: {max_retries} попыток, процессов: {workers} ---")
+            found = self._run_parallel_attempts(max_retries, 1, workers, seed)
+            result = found[0] if found else None
+        else:
+            for attempt in range(max_retries):
+                print(f"\n--- ПОПЫТКА ГЕНЕРАЦИИ №{attempt + 1}/{max_retries} ---")
+                result = self._run_attempt(_attempt_seed(seed, attempt))
+                if result:
+                    break
+
+        total_run_time = time.perf_counter() - total_start_time
+        if result is None:
+            print(f"\n[КРИТИЧЕСКАЯ ОШИБКА]: Не удалось сгенерировать качественную головоломку за {max_retries} попыток.")
+            print(f"Общее время: {total_run_time:.3f} сек.")
+            return None
+
+        profile = result.difficulty_profile
+        print("\n" + "=" * 60)
+        print("ГЕНЕРАЦИЯ УСПЕШНО ЗАВЕРШЕНА.")
+        print(f"Итоговое число подсказок: {len(result.clues)}")
+        print(f"Финальная сложность (ветвлений): {profile['branches']}, конфликтов: {profile['conflicts']}, "
+              f"длина пути дедукции: {profile['path_length']}")
+        if result.seed is not None:
+            print(f"Seed попытки: {result.seed}")
+        print(f"Общее время генерации: {total_run_time:.3f} сек.")
+        print("=" * 60)
+        self.definition.print_puzzle(result.clues, result.question_data, result.solution)
+        return result
+
+    def generate_batch(self, count: int, workers: Optional[int] = None, seed: Optional[int] = None,
+                       max_attempts: Optional[int] = None) -> List[GeneratedPuzzle]:
+        """
+        Генерирует до `count` головоломок за один вызов (для сборки корпусов).
+
+        Попытки распределяются по пулу процессов; как только набрано `count`
+        успешных головоломок, оставшиеся попытки прерываются. При заданном seed
+        результат воспроизводим: головоломки возвращаются в порядке номеров попыток.
+
+        Args:
+            count (int): Сколько головоломок нужно получить.
+            workers (Optional[int]): Число процессов. По умолчанию — число ядер CPU.
+            seed (Optional[int]): Базовый seed (попытка №i использует seed + i).
+            max_attempts (Optional[int]): Предел числа попыток. По умолчанию count * 5.
+        """
+        workers = workers or os.cpu_count() or 1
+        max_attempts = max_attempts or count * 5
+        start_time = time.perf_counter()
+        if workers > 1:
+            puzzles = self._run_parallel_attempts(max_attempts, count, workers, seed)
+        else:
+            puzzles = []
+            for attempt in range(max_attempts):
+                result = self._run_attempt(_attempt_seed(seed, attempt))
+                if result:
+                    puzzles.append(result)
+                    if len(puzzles) >= count:
+                        break
+        print(f"\n[BATCH]: Сгенерировано {len(puzzles)}/{count} головоломок за {time.perf_counter() - start_time:.3f} сек.")
+        return puzzles
+
+    def _run_parallel_attempts(self, attempts: int, count: int, workers: int, seed: Optional[int]) -> List[GeneratedPuzzle]:
+        """
+        Выполняет попытки в пуле процессов и возвращает первые `count` успешных.
+        Выход из `with Pool` вызывает terminate(): незавершенные попытки прерываются.
+        При заданном seed результаты берутся в порядке номеров попыток (imap),
+        иначе — в порядке завершения (imap_unordered), что быстрее.
+        """
+        tasks = [(self.definition, self.difficulty, _attempt_seed(seed, attempt)) for attempt in range(attempts)]
+        puzzles: List[GeneratedPuzzle] = []
+        with multiprocessing.Pool(processes=min(workers, attempts)) as pool:
+            results = pool.imap(_run_attempt_quietly, tasks) if seed is not None else pool.imap_unordered(_run_attempt_quietly, tasks)
+            for result in results:
+                if result:
+                    puzzles.append(result)
+                    print(f"  - УСПЕХ: Найдена интересная головоломка ({len(puzzles)}/{count}).")
+                    if len(puzzles) >= count:
+                        break
+        return puzzles
+
+    def _run_attempt(self, seed: Optional[int] = None) -> Optional[GeneratedPuzzle]:
+        """
+        Одна независимая попытка генерации: эталонное решение, каркас, укрепление,
+        шлифовка и аудит. Возвращает головоломку или None, если попытка провалена.
+        """
+        if seed is not None:
+            random.seed(seed)
+        # Новая попытка — новый набор улик: модель проверки собираем заново
+        self._checker = IncrementalSolvabilityChecker(self.definition)
+
+        start_time = time.perf_counter()
+        solution = self.definition.generate_solution()
+        print(f"  - [TIMER] Генерация эталонного решения: {time.perf_counter() - start_time:.3f} сек.")
+
+        # --- Фаза 1: Проектирование каркаса ---
+        print(f"\n[{self.definition.name}]: Фаза 1: Проектирование каркаса интриги...")
+        start_time = time.perf_counter()
+        core_puzzle, remaining_clues = self.definition.design_core_puzzle(solution)
+        print(f"  - [TIMER] Проектирование ядра ('design_core_puzzle'): {time.perf_counter() - start_time:.3f} сек.")
+
+        # <<< КОММЕНТАРИЙ: Блок адаптивной модификации ядра на основе сложности >>>
+        # Здесь мы управляем "характером" головоломки на самом раннем этапе.
+        num_items = solution.shape[0]
+        base_core_size = len(core_puzzle)
+
+        if self.difficulty == Difficulty.CLASSIC:
+            classic_types = {ClueType.POSITIONAL, ClueType.DIRECT_LINK, ClueType.RELATIVE_POS}
+            core_puzzle = [c for c in core_puzzle if c[0] in classic_types]
+            simple_from_reserve = [c for c in remaining_clues if c[0] in classic_types]
+            random.shuffle(simple_from_reserve)
+            num_to_add = base_core_size - len(core_puzzle)
+            if len(simple_from_reserve) >= num_to_add > 0:
+                core_puzzle.extend(simple_from_reserve[:num_to_add])
+            print(f"  - [Сложность CLASSIC]: Ядро очищено от сложных улик. Размер ядра: {len(core_puzzle)}.")
+        elif self.difficulty == Difficulty.EASY:
+            num_to_remove = max(1, base_core_size // 2)
+            if num_to_remove > 0 and len(core_puzzle) > num_to_remove:
+                removed = core_puzzle[-num_to_remove:]
+                core_puzzle = core_puzzle[:-num_to_remove]
+                remaining_clues.extend(removed)
+                print(f"  - [Сложность EASY]: Ядро упрощено, {num_to_remove} сложных улик возвращено в резерв.")
+        elif self.difficulty == Difficulty.HARD:
+            num_to_add = max(1, num_items // 2)
+            if len(remaining_clues) >= num_to_add:
+                added = remaining_clues[:num_to_add]
+                core_puzzle.extend(added)
+                remaining_clues = remaining_clues[num_to_add:]
+                print(f"  - [Сложность HARD]: Ядро усилено, добавлено {num_to_add} улик из резерва.")
+        elif self.difficulty == Difficulty.EXPERT:
+            num_to_add = max(2, num_items)
+            if len(remaining_clues) >= num_to_add:
+                added = remaining_clues[:num_to_add]
+                core_puzzle.extend(added)
+                remaining_clues = remaining_clues[num_to_add:]
+                print(f"  - [Сложность EXPERT]: Ядро значительно усилено, добавлено {num_to_add} улик из резерва.")
+
+        # "Санитарная проверка" ядра после модификации.
+        start_time = time.perf_counter()
+        if self._check_solvability(core_puzzle) == 0:
             print(f"  - [TIMER] Санитарная проверка ядра: {time.perf_counter() - start_time:.3f} сек.")
+            print("  - ПРОВАЛ: Модифицированное ядро оказалось противоречивым. Новая попытка...")
+            return None
+        print(f"  - [TIMER] Санитарная проверка ядра: {time.perf_counter() - start_time:.3f} сек.")
 
-            # --- Фаза 2: Достижение уникальности ---
-            print(f"\n[{self.definition.name}]: Фаза 2: Достижение уникальности...")
-            unique_puzzle = self._build_walls(core_puzzle, remaining_clues)
-            if not unique_puzzle:
-                print("  - ПРОВАЛ: Не удалось достичь уникальности. Новая попытка...")
-                continue
+        # --- Фаза 2: Достижение уникальности ---
+        print(f"\n[{self.definition.name}]: Фаза 2: Достижение уникальности...")
+        unique_puzzle = self._build_walls(core_puzzle, remaining_clues)
+        if not unique_puzzle:
+            print("  - ПРОВАЛ: Не удалось достичь уникальности. Новая попытка...")
+            return None
 
-            # --- Фаза 3: Шлифовка и аудит ---
-            print(f"\n[{self.definition.name}]: Фаза 3: Шлифовка и аудит...")
-            minimized_puzzle = self._minimize_puzzle(unique_puzzle, self.definition.get_anchors(solution))
-
-            start_time = time.perf_counter()
-            final_puzzle, question_data = self.definition.quality_audit_and_select_question(minimized_puzzle, solution)
-            print(f"  - [TIMER] Аудит качества и выбор вопроса: {time.perf_counter() - start_time:.3f} сек.")
-
-            if question_data:
-                print("  - УСПЕХ: Найдена интересная головоломка!")
-                total_run_time = time.perf_counter() - total_start_time
-                _, final_branches = self._count_solutions_and_measure_complexity(final_puzzle)
-                print("\n" + "=" * 60)
-                print("ГЕНЕРАЦИЯ УСПЕШНО ЗАВЕРШЕНА.")
-                print(f"Итоговое число подсказок: {len(final_puzzle)}")
-                print(f"Финальная сложность (ветвлений): {final_branches}")
-                print(f"Общее время генерации: {total_run_time:.3f} сек.")
-                print("=" * 60)
-                self.definition.print_puzzle(final_puzzle, question_data, solution)
-                return
-            else:
-                print("  - ПРОВАЛ: Головоломка отбракована как 'скучная'. Новая попытка...")
+        # --- Фаза 3: Шлифовка и аудит ---
+        print(f"\n[{self.definition.name}]: Фаза 3: Шлифовка и аудит...")
+        minimized_puzzle = self._minimize_puzzle(unique_puzzle, self.definition.get_anchors(solution))
 
-        total_run_time = time.perf_counter() - total_start_time
-        print(f"\n[КРИТИЧЕСКАЯ ОШИБКА]: Не удалось сгенерировать качественную головоломку за {max_retries} попыток.")
-        print(f"Общее время: {total_run_time:.3f} сек.")
+        start_time = time.perf_counter()
+        final_puzzle, question_data = self.definition.quality_audit_and_select_question(minimized_puzzle, solution)
+        print(f"  - [TIMER] Аудит качества и выбор вопроса: {time.perf_counter() - start_time:.3f} сек.")
+
+        if not question_data:
+            print("  - ПРОВАЛ: Головоломка отбракована как 'скучная'. Новая попытка...")
+            return None
+        print("  - УСПЕХ: Найдена интересная головоломка!")
+        profile = self._measure_difficulty(final_puzzle, question_data)
+        return GeneratedPuzzle(final_puzzle, question_data, solution, seed, profile)
 
     @time_it
     def _build_walls(self, core_puzzle: List, wall_clues: List) -> Optional[List]:
@@ -253,27 +491,42 @@ class CoreGenerator:
             self.definition.add_clue_constraint(model, variables, clue)
         return model
 
-    def _count_solutions_and_measure_complexity(self, clues: List) -> Tuple[int, int]:
-        """Считает точное количество решений и измеряет сложность поиска (ветвления)."""
+    def _measure_difficulty(self, clues: List, question_data: Dict) -> Dict[str, Any]:
+        """
+        Профиль сложности головоломки со стороны решателя. Считается один раз
+        при генерации и хранится вместе с головоломкой (GeneratedPuzzle, корпус),
+        чтобы отчеты не перерешивали задачи.
+
+        branches/conflicts/propagations — усилия CP-SAT на полный перебор
+        (поиск решения и доказательство его единственности) в одном потоке.
+        """
         model = self._create_or_tools_model(clues)
         solver = cp_model.CpSolver()
+        solver.parameters.num_workers = 1  # статистика одного воркера сопоставима между задачами
+        solver.parameters.enumerate_all_solutions = True
         solution_counter = self.SolutionCounter(limit=3)
-        solver.SearchForAllSolutions(model, solution_counter)
-        return solution_counter.solution_count, solver.NumBranches()
+        solver.Solve(model, solution_counter)
+        response = solver.ResponseProto()
+        return {
+            'solutions': solution_counter.solution_count,
+            'branches': solver.NumBranches(),
+            'conflicts': solver.NumConflicts(),
+            'propagations': response.num_binary_propagations + response.num_integer_propagations,
+            'solve_time': solver.WallTime(),
+            'path_length': question_data.get('path_length'),
+            'num_clues': len(clues),
+            'clue_types': dict(collections.Counter(c[0].name for c in clues)),
+        }
 
     def _check_solvability(self, clues: List) -> int:
         """
         Быстро проверяет разрешимость системы: 0, 1 или >1 решений.
-        Использует лимит по времени, чтобы избежать зависаний на сложных моделях.
+        Использует одну инкрементальную модель на попытку генерации
+        (см. IncrementalSolvabilityChecker) и лимит по времени на каждое решение.
         """
-        model = self._create_or_tools_model(clues)
-        solution_counter = self.SolutionCounter(limit=2)
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 10.0
-        status = solver.SearchForAllSolutions(model, solution_counter)
-        if status == cp_model.UNKNOWN:  # Если решатель "задумался" и не успел
-            return 2  # Считаем, что решений много (неопределенность)
-        return solution_counter.solution_count
+        if self._checker is None:
+            self._checker = IncrementalSolvabilityChecker(self.definition)
+        return self._checker.check(clues)
 
     class SolutionCounter(cp_model.CpSolverSolutionCallback):
         """Вспомогательный класс для эффективного подсчета решений в CP-SAT."""
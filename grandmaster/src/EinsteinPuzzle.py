@@ -90,12 +90,13 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
 
     def generate_clue_pool(self, solution: pd.DataFrame) -> Dict[ClueType, List]:
         pool = collections.defaultdict(list)
-        unique_clues = collections.defaultdict(set)
+        # dict вместо set: порядок улик в пуле не должен зависеть от PYTHONHASHSEED (иначе seed не воспроизводим)
+        unique_clues = collections.defaultdict(dict)
         cat_keys = list(self.categories.keys())
         all_items_flat = [(cat, item) for cat, items in self.categories.items() for item in items]
 
         def add_clue(clue_type: ClueType, params: Tuple):
-            unique_clues[clue_type].add((clue_type, params))
+            unique_clues[clue_type][(clue_type, params)] = None
 
         for i in range(len(all_items_flat)):
             cat1, item1 = all_items_flat[i]
@@ -169,12 +170,12 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
                 except (ValueError, IndexError): break
 
         false_facts = []
-        all_items_in_cat = {cat: set(items) for cat, items in self.categories.items()}
         for pos in range(1, self.num_items + 1):
             for cat in self.cat_keys:
                 true_item = solution.loc[pos, cat]
-                for false_item in all_items_in_cat[cat] - {true_item}:
-                    false_facts.append((ClueType.POSITIONAL, (pos, cat, false_item)))
+                for false_item in self.categories[cat]:
+                    if false_item != true_item:
+                        false_facts.append((ClueType.POSITIONAL, (pos, cat, false_item)))
         if len(false_facts) >= 2:
             for _ in range(self.num_items * self.num_categories):
                 try:
@@ -206,7 +207,9 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
             if p1 is not None and p2 is not None: model.Add(p1 != p2)
         elif clue_type == ClueType.RELATIVE_POS:
             _, v1, _, v2 = params; p1, p2 = get_var(v1), get_var(v2)
-            if p1 is not None and p2 is not None: model.AddAbsEquality(1, p1 - p2)
+            if p1 is not None and p2 is not None:
+                distance = model.NewIntVar(0, self.num_items, '')
+                model.AddAbsEquality(distance, p1 - p2); model.Add(distance == 1)
         elif clue_type == ClueType.AT_EDGE:
             _, val = params; p = get_var(val)
             if p is not None:
@@ -218,7 +221,9 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
             if p1 is not None and p2 is not None: model.Add(p1 + p2 == total)
         elif clue_type == ClueType.IS_EVEN:
             _, val, is_even = params; p = get_var(val)
-            if p is not None: model.AddModuloEquality(0 if is_even else 1, p, 2)
+            if p is not None:
+                parity = model.NewIntVar(0, 1, '')
+                model.AddModuloEquality(parity, p, 2); model.Add(parity == (0 if is_even else 1))
         elif clue_type in [ClueType.THREE_IN_A_ROW, ClueType.ORDERED_CHAIN]:
             (_, v1), (_, v2), (_, v3) = params; p1, p2, p3 = get_var(v1), get_var(v2), get_var(v3)
             if p1 is not None and p2 is not None and p3 is not None:
@@ -241,7 +246,7 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
             reify(p_clue, b_p); reify(q_clue, b_q)
             if clue_type == ClueType.IF_THEN: model.AddImplication(b_p, b_q)
             elif clue_type == ClueType.IF_NOT_THEN_NOT: model.AddImplication(b_p.Not(), b_q.Not())
-            elif clue_type == ClueType.EITHER_OR: model.AddBoolXOr([b_p, b_q])
+            elif clue_type == ClueType.EITHER_OR: model.Add(b_p != b_q)
             elif clue_type == ClueType.IF_AND_ONLY_IF: model.Add(b_p == b_q)
         elif clue_type == ClueType.NEITHER_NOR_POS:
             item_tuples, position = params
@@ -257,7 +262,8 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
 
             if p1 is not None and p2 is not None:
                 if op == '*':
-                    model.AddMultiplicationEquality(result, [p1, p2])
+                    product = model.NewIntVar(1, self.num_items * self.num_items, '')
+                    model.AddMultiplicationEquality(product, [p1, p2]); model.Add(product == result)
                 elif op == '+':
                     model.Add(p1 + p2 == result)
         # <<< НОВЫЙ БЛОК 3: Обработка Иерархии >>>
@@ -330,7 +336,8 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
 
                         best_question = {
                             "question": q_start + " " + q_middle + q_end,
-                            "answer": f"Ответ для проверки: {answer_item}"
+                            "answer": f"Ответ для проверки: {answer_item}",
+                            "path_length": max_path_len
                         }
                     break
                 for neighbor in graph.get(curr_node, []):
@@ -338,7 +345,7 @@ class EinsteinPuzzleDefinition(PuzzleDefinition):
 
         if max_path_len >= min_path_len:
             print(f"  - Аудит пройден. Найден вопрос с длиной пути: {max_path_len}")
-            return list(set(map(tuple, puzzle))), best_question
+            return list(dict.fromkeys(map(tuple, puzzle))), best_question
         return puzzle, None
 
     def print_puzzle(self, final_clues: List, question_data: Dict, solution: pd.DataFrame):
@@ -0,0 +1,116 @@
+# build_corpus.py
+"""
+Офлайн-сборка корпуса головоломок (см. puzzle_corpus.py).
+
+Для каждой комбинации размера и сложности генерирует пакет головоломок
+через CoreGenerator.generate_batch и дописывает их в файл корпуса.
+Запускается из каталога grandmaster/src, как и main.py.
+
+Пример:
+    python build_corpus.py --sizes 6x6 8x8 --difficulties MEDIUM EXPERT --count 20 --seed 42
+"""
+import argparse
+import os
+import random
+from typing import Any, Dict, List
+
+from CoreGenerator import CoreGenerator, GeneratedPuzzle
+from EinsteinPuzzle import EinsteinPuzzleDefinition
+from clue_types import Difficulty
+from main import load_json_data
+from puzzle_corpus import ANSWER_PREFIX, DEFAULT_CORPUS_PATH, PuzzleCorpus, size_label
+
+
+def puzzle_to_record(generator: CoreGenerator, theme: str, puzzle: GeneratedPuzzle) -> Dict[str, Any]:
+    """Преобразует результат генерации в запись корпуса (в том же виде, что печатает print_puzzle)."""
+    definition = generator.definition
+    clue_texts = sorted(definition.format_clue(c) for c in puzzle.clues)
+    answer = puzzle.question_data['answer']
+    if answer.startswith(ANSWER_PREFIX):
+        answer = answer[len(ANSWER_PREFIX):]
+    return {
+        'theme': theme,
+        'num_items': definition.num_items,
+        'num_categories': definition.num_categories,
+        'difficulty': generator.difficulty.name,
+        'difficulty_profile': puzzle.difficulty_profile,
+        'seed': puzzle.seed,
+        'conditions': "\n".join(f"{i}. {text}" for i, text in enumerate(clue_texts, 1)),
+        'question': puzzle.question_data['question'],
+        'answer': answer,
+        'solution_table': str(puzzle.solution),
+        'clues': [[clue_type, params] for clue_type, params in puzzle.clues],
+        'solution': puzzle.solution.to_dict(orient='split'),
+    }
+
+
+def build_stratum(themes: Dict, linguistic_cores: Dict, num_items: int, num_categories: int,
+                  difficulty: Difficulty, count: int, workers: int, seed: int) -> List[Dict[str, Any]]:
+    """Генерирует до count головоломок одного размера и сложности на подходящих темах."""
+    rng = random.Random(seed)
+    suitable = [name for name, theme in themes.items()
+                if theme and len(theme) >= num_categories and min(len(v) for v in theme.values()) >= num_items]
+    if not suitable:
+        print(f"  - ПРОПУСК: Нет тем, вмещающих размер {size_label(num_items, num_categories)}.")
+        return []
+
+    records = []
+    batch = 0
+    while len(records) < count and batch < count:
+        theme_name = rng.choice(suitable)
+        random.seed(rng.random())  # выбор категорий в EinsteinPuzzleDefinition тоже воспроизводим
+        definition = EinsteinPuzzleDefinition(
+            themes={theme_name: themes[theme_name]},
+            story_elements={"scenario": "", "position": "локация"},
+            linguistic_cores=linguistic_cores,
+            num_items=num_items,
+            num_categories=num_categories
+        )
+        generator = CoreGenerator(definition, difficulty)
+        # Несколько головоломок на тему: так корпус остается разнообразным по темам
+        puzzles = generator.generate_batch(min(workers, count - len(records)), workers=workers,
+                                           seed=seed * 1000 + batch * 100)
+        records.extend(puzzle_to_record(generator, theme_name, p) for p in puzzles)
+        batch += 1
+    return records[:count]
+
+
+def main() -> None:
+    """CLI-точка входа."""
+    parser = argparse.ArgumentParser(
+        description="Пакетная генерация корпуса головоломок Гроссмейстера.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--sizes", nargs="+", default=["6x6", "8x8"], help="Размеры: <элементы>x<категории>.")
+    parser.add_argument("--difficulties", nargs="+", default=["MEDIUM", "EXPERT"],
+                        choices=[d.name for d in Difficulty], help="Уровни сложности.")
+    parser.add_argument("--count", type=int, default=10, help="Головоломок на каждую комбинацию размера и сложности.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Число процессов генерации.")
+    parser.add_argument("--seed", type=int, default=0, help="Базовый seed (корпус воспроизводим).")
+    parser.add_argument("--output", default=str(DEFAULT_CORPUS_PATH), help="Файл корпуса (дописывается).")
+    args = parser.parse_args()
+
+    themes = load_json_data('themes.json')
+    linguistic_cores = load_json_data('linguistics.json')
+    if not themes or not linguistic_cores:
+        print("Выход из программы.")
+        return
+
+    with PuzzleCorpus(args.output) as corpus:
+        for stratum_index, (size, difficulty_name) in enumerate(
+                (s, d) for s in args.sizes for d in args.difficulties):
+            num_items, num_categories = (int(x) for x in size.lower().split("x"))
+            print(f"\n=== Корпус: {size}, {difficulty_name}, {args.count} шт. ===")
+            records = build_stratum(themes, linguistic_cores, num_items, num_categories,
+                                    Difficulty[difficulty_name], args.count, args.workers,
+                                    args.seed + stratum_index)
+            corpus.add_many(records)
+            print(f"  - Добавлено {len(records)} головоломок.")
+        print("\nСостав корпуса:")
+        for (difficulty_name, size), n in corpus.strata().items():
+            print(f"  - {size} {difficulty_name}: {n}")
+        print(f"Файл корпуса: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 # main.py
 import json
+import os
 import random
 
 import pandas as pd
@@ -68,6 +69,13 @@ if __name__ == '__main__':
     desired_num_categories = 8
     desired_difficulty = Difficulty.EXPERT
 
+    # 2. Параллелизм и воспроизводимость
+    #    - generation_workers: число процессов для независимых попыток генерации
+    #      (1 — последовательный режим с подробным логом каждой попытки).
+    #    - generation_seed: базовый seed попыток; None — случайная генерация.
+    generation_workers = os.cpu_count() or 1
+    generation_seed = None
+
     # ===============================================================
     # --- ПОДРОБНОЕ РУКОВОДСТВО ПО ПАРАМЕТРАМ ГЕНЕРАЦИИ ---
     #
@@ -173,4 +181,4 @@ if __name__ == '__main__':
     )
 
     # 3. Запускаем магию!
-    core_generator.generate()
\ No newline at end of file
+    core_generator.generate(workers=generation_workers, seed=generation_seed)
\ No newline at end of file
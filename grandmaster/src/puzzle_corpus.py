@@ -0,0 +1,262 @@
+"""
+Корпус заранее сгенерированных головоломок "Гроссмейстера".
+
+Корпус — один файл SQLite: таблица puzzles с индексами по сложности и
+размеру. Лёгкие метаданные (тема, размер, сложность, число подсказок,
+метрики решателя: ветвления, конфликты, распространения, длина пути
+дедукции) лежат в отдельных колонках, а полный текст задачи (условия,
+вопрос, ответ, таблица решения) читается только при обращении к конкретной
+головоломке. Поэтому выборка по сложности/размеру и стратифицированный
+сэмплинг не требуют разбора текста, а бенчмарк не тратит время на загрузку.
+
+Корпус собирается офлайн (см. build_corpus.py) пакетной генерацией через
+CoreGenerator. Модуль не зависит от ortools/pandas и может использоваться
+бенчмарками напрямую.
+"""
+import json
+import random
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+DEFAULT_CORPUS_PATH = Path(__file__).resolve().parent.parent / "puzzles" / "corpus.sqlite"
+
+# Колонки, доступные для фильтрации и стратификации без загрузки текста
+INDEX_COLUMNS = ('id', 'theme', 'size', 'num_items', 'num_categories', 'difficulty',
+                 'num_clues', 'branches', 'conflicts', 'propagations', 'path_length', 'seed', 'created_at')
+# Скалярные метрики профиля сложности, вынесенные в колонки для фильтрации и корреляций
+PROFILE_COLUMNS = ('branches', 'conflicts', 'propagations', 'path_length')
+# Префикс, с которым EinsteinPuzzleDefinition кладет ответ в question_data; в корпусе ответ хранится без него
+ANSWER_PREFIX = "Ответ для проверки: "
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    theme TEXT NOT NULL,
+    size TEXT NOT NULL,
+    num_items INTEGER NOT NULL,
+    num_categories INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    num_clues INTEGER NOT NULL,
+    branches INTEGER,
+    conflicts INTEGER,
+    propagations INTEGER,
+    path_length INTEGER,
+    difficulty_profile TEXT,
+    seed INTEGER,
+    created_at REAL NOT NULL,
+    conditions TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    solution_table TEXT NOT NULL,
+    clues TEXT NOT NULL,
+    solution TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_puzzles_difficulty_size ON puzzles (difficulty, size);
+CREATE INDEX IF NOT EXISTS idx_puzzles_size ON puzzles (size);
+"""
+
+# Колонки, добавленные после первой версии схемы: дописываются в старые файлы корпуса
+_ADDED_COLUMNS = {
+    'conflicts': 'INTEGER',
+    'propagations': 'INTEGER',
+    'path_length': 'INTEGER',
+    'difficulty_profile': 'TEXT',
+}
+
+
+def _json_default(value: Any) -> Any:
+    """numpy-скаляры и Enum (ClueType) в улики попадают из pandas и генератора."""
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'name'):
+        return value.name
+    return str(value)
+
+
+def size_label(num_items: int, num_categories: int) -> str:
+    """Размер в том виде, в каком он фигурирует в test_id: "8x8"."""
+    return f"{num_items}x{num_categories}"
+
+
+def parse_test_id(test_id: str) -> Dict[str, Optional[str]]:
+    """
+    Разбирает test_id бенчмарка в фильтр корпуса:
+    "grandmaster_8x8_expert" -> {"size": "8x8", "difficulty": "EXPERT"}.
+    """
+    parts = test_id.replace("grandmaster_", "", 1).split("_")
+    size = parts[0] if parts and 'x' in parts[0] else None
+    difficulty = parts[1].upper() if len(parts) > 1 else None
+    return {'size': size, 'difficulty': difficulty}
+
+
+class PuzzleCorpus:
+    """
+    Индексированный корпус головоломок в одном файле SQLite.
+
+    Соединение открывается лениво при первом обращении. Методы выборки
+    возвращают только метаданные; полный текст — через get().
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CORPUS_PATH, readonly: bool = False):
+        self.path = Path(path)
+        self.readonly = readonly
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.readonly:
+                if not self.path.exists():
+                    raise FileNotFoundError(f"Корпус головоломок не найден: {self.path}")
+                self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.path))
+                self._conn.executescript(_SCHEMA)
+                self._migrate(self._conn)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(puzzles)")}
+        with conn:
+            for name, column_type in _ADDED_COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE puzzles ADD COLUMN {name} {column_type}")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> 'PuzzleCorpus':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0]
+
+    # --- Запись ---
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """Добавляет одну головоломку, возвращает её id."""
+        return self.add_many([record])[0]
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        """Добавляет головоломки одной транзакцией."""
+        ids = []
+        with self.conn:
+            for record in records:
+                profile = record.get('difficulty_profile') or {}
+                row = {
+                    'theme': record['theme'],
+                    'size': record.get('size') or size_label(record['num_items'], record['num_categories']),
+                    'num_items': record['num_items'],
+                    'num_categories': record['num_categories'],
+                    'difficulty': str(record['difficulty']).upper(),
+                    'num_clues': record.get('num_clues', len(record['clues'])),
+                    **{name: record.get(name, profile.get(name)) for name in PROFILE_COLUMNS},
+                    'difficulty_profile': json.dumps(profile, ensure_ascii=False, default=_json_default) if profile else None,
+                    'seed': record.get('seed'),
+                    'created_at': record.get('created_at', time.time()),
+                    'conditions': record['conditions'],
+                    'question': record['question'],
+                    'answer': record['answer'],
+                    'solution_table': record['solution_table'],
+                    'clues': json.dumps(record['clues'], ensure_ascii=False, default=_json_default),
+                    'solution': json.dumps(record['solution'], ensure_ascii=False, default=_json_default),
+                }
+                columns = ', '.join(row)
+                placeholders = ', '.join(f":{name}" for name in row)
+                cursor = self.conn.execute(f"INSERT INTO puzzles ({columns}) VALUES ({placeholders})", row)
+                ids.append(cursor.lastrowid)
+        return ids
+
+    # --- Чтение ---
+
+    @staticmethod
+    def _where(difficulty: Optional[str], size: Optional[str]) -> tuple:
+        clauses, params = [], []
+        if difficulty:
+            clauses.append("difficulty = ?")
+            params.append(difficulty.upper())
+        if size:
+            clauses.append("size = ?")
+            params.append(size)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def index(self, difficulty: Optional[str] = None, size: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Метаданные головоломок (без текста), отфильтрованные по сложности и размеру."""
+        where, params = self._where(difficulty, size)
+        rows = self.conn.execute(f"SELECT {', '.join(INDEX_COLUMNS)} FROM puzzles{where} ORDER BY id", params)
+        return [dict(row) for row in rows]
+
+    def get(self, puzzle_id: int) -> Optional[Dict[str, Any]]:
+        """Полная запись головоломки по id."""
+        row = self.conn.execute("SELECT * FROM puzzles WHERE id = ?", (puzzle_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record['clues'] = json.loads(record['clues'])
+        record['solution'] = json.loads(record['solution'])
+        record['difficulty_profile'] = json.loads(record['difficulty_profile']) if record.get('difficulty_profile') else None
+        return record
+
+    def first(self, difficulty: Optional[str] = None, size: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Первая (по id) головоломка, подходящая под фильтр: детерминированный выбор для бенчмарка."""
+        where, params = self._where(difficulty, size)
+        row = self.conn.execute(f"SELECT id FROM puzzles{where} ORDER BY id LIMIT 1", params).fetchone()
+        return self.get(row['id']) if row else None
+
+    def sample(self, n: int, difficulty: Optional[str] = None, size: Optional[str] = None,
+               seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Случайная выборка n головоломок (метаданные) под фильтр."""
+        candidates = self.index(difficulty, size)
+        return random.Random(seed).sample(candidates, min(n, len(candidates)))
+
+    def sample_stratified(self, per_stratum: int, by: Sequence[str] = ('difficulty', 'size'),
+                          seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Стратифицированная выборка: до per_stratum головоломок из каждой
+        комбинации значений колонок `by`. Возвращает метаданные.
+        """
+        unknown = set(by) - set(INDEX_COLUMNS)
+        if unknown:
+            raise ValueError(f"Стратификация возможна только по колонкам индекса, получено: {sorted(unknown)}")
+        rng = random.Random(seed)
+        strata: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in self.index():
+            strata.setdefault(tuple(row[column] for column in by), []).append(row)
+        selected = []
+        for key in sorted(strata, key=lambda k: tuple(str(v) for v in k)):
+            rows = strata[key]
+            selected.extend(rng.sample(rows, min(per_stratum, len(rows))))
+        return selected
+
+    def strata(self, by: Sequence[str] = ('difficulty', 'size')) -> Dict[tuple, int]:
+        """Число головоломок в каждой страте."""
+        unknown = set(by) - set(INDEX_COLUMNS)
+        if unknown:
+            raise ValueError(f"Стратификация возможна только по колонкам индекса, получено: {sorted(unknown)}")
+        columns = ', '.join(by)
+        rows = self.conn.execute(f"SELECT {columns}, COUNT(*) AS n FROM puzzles GROUP BY {columns} ORDER BY {columns}")
+        return {tuple(row[column] for column in by): row['n'] for row in rows}
+
+
+def render_puzzle_text(record: Dict[str, Any]) -> str:
+    """Текст головоломки в формате print_puzzle (как в файлах grandmaster/puzzles/*.txt)."""
+    num_clues = record.get('num_clues') or len(record['conditions'].splitlines())
+    return (f"**Сценарий: Тайна в сеттинге: {record['theme']}**\n\n"
+            f"Условия ({num_clues} подсказок):\n\n"
+            f"{record['conditions']}\n\n"
+            f"{'=' * 40}\n\n"
+            f"Вопрос: {record['question']}\n\n"
+            f"{'=' * 40}\n\n"
+            f"{ANSWER_PREFIX}{record['answer']}\n\n"
+            f"--- Скрытое Решение для самопроверки ---\n"
+            f"{record['solution_table']}")
@@ -185,7 +185,7 @@ def list_available_models():
     # Также проверим results для существующих результатов
     results_dir = "results/raw"
     if os.path.exists(results_dir):
-        results = [f for f in os.listdir(results_dir) if f.endswith('.json')]
+        results = [f for f in os.listdir(results_dir) if f.endswith(('.json', '.jsonl'))]
         print(f"Найдено результатов тестов: {len(results)}")
         for result in results[:5]:  # Покажем первые 5
             print(f"  - {result}")
@@ -437,7 +437,7 @@ async def get_results():
     try:
         results_dir = "results/raw"
         if os.path.exists(results_dir):
-            results = [f for f in os.listdir(results_dir) if f.endswith('.json')]
+            results = [f for f in os.listdir(results_dir) if f.endswith(('.json', '.jsonl'))]
             return {"results": results}
         else:
             return {"results": []}
@@ -449,12 +449,13 @@ async def get_results():
 async def get_tests():
     """Получить список доступных тестов"""
     try:
-        tests_dir = "baselogic/tests"
-        if os.path.exists(tests_dir):
-            test_files = [f for f in os.listdir(tests_dir) if f.startswith('t') and f.endswith('.py')]
+        # Встроенные тесты и плагины из манифеста: модули тестов не импортируются
+        from baselogic.core.plugin_manager import get_plugin_manifest
+        manifest = get_plugin_manifest()
+        if manifest:
             tests = []
-            for test_file in test_files:
-                test_id = test_file.replace('.py', '')
+            for test_id, entry in manifest.items():
+                test_file = os.path.basename(entry.path)
                 # Пытаемся определить категорию по названию файла
                 if 'logic' in test_file.lower():
                     category = 'Logic'
@@ -18,10 +18,8 @@ import json
 import os
 import re
 import sys
-import time
-import traceback
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, List, Tuple
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -29,76 +27,36 @@ else:
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 
 
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from baselogic.core.sandbox import exec_and_call, get_sandbox_pool  # noqa: E402
+
+
 # ----------------------------
-# Utilities (safe-ish exec)
+# Utilities (sandboxed exec)
 # ----------------------------
 
-class CandidateError(Exception):
-    pass
+# Полный список, необходимый для работы классов и импортов.
+# Код кандидата выполняется в отдельном процессе песочницы (baselogic.core.sandbox).
+SAFE_BUILTIN_NAMES = [
+    # Exceptions
+    "Exception", "ValueError", "TypeError", "KeyError", "IndexError",
+    "AssertionError", "ImportError", "NameError", "AttributeError",
+    "NotImplementedError",
 
+    # IO / Basic
+    "print", "len", "range", "enumerate", "id", "hash",
+    "__import__",       # Импорты
+    "__build_class__",  # Создание классов
 
-def _exec_candidate(code: str) -> Dict[str, Any]:
-    """
-    Executes candidate code in a fresh namespace.
-    """
-    ns: Dict[str, Any] = {}
-
-    # Полный список, необходимый для работы классов и импортов
-    safe_builtins = {
-        # Exceptions
-        "Exception": Exception,
-        "ValueError": ValueError,
-        "TypeError": TypeError,
-        "KeyError": KeyError,
-        "IndexError": IndexError,
-        "AssertionError": AssertionError,
-        "ImportError": ImportError,
-        "NameError": NameError,
-        "AttributeError": AttributeError,
-        "NotImplementedError": NotImplementedError,
-
-        # IO / Basic
-        "print": print,
-        "len": len,
-        "range": range,
-        "enumerate": enumerate,
-        "id": id,
-        "hash": hash,
-        "__import__": __import__,      # Импорты
-        "__build_class__": __build_class__, # Создание классов
-
-        # Math / Logic
-        "min": min,
-        "max": max,
-        "sum": sum,
-        "abs": abs,
-        "all": all,
-        "any": any,
-        "zip": zip,
-        "sorted": sorted,
-        "reversed": reversed,
-
-        # Types
-        "set": set,
-        "dict": dict,
-        "list": list,
-        "tuple": tuple,
-        "str": str,
-        "int": int,
-        "float": float,
-        "bool": bool,
-        "isinstance": isinstance,
-        "object": object,
-        "super": super,
-        "type": type,
-    }
-    ns["__builtins__"] = safe_builtins
-    try:
-        exec(code, ns, ns)
-    except Exception as e:
-        raise CandidateError(f"Exec failed: {e}\n{traceback.format_exc()}") from e
-    return ns
+    # Math / Logic
+    "min", "max", "sum", "abs", "all", "any", "zip", "sorted", "reversed",
 
+    # Types
+    "set", "dict", "list", "tuple", "str", "int", "float", "bool",
+    "isinstance", "object", "super", "type",
+]
 
 
 def _read_text(path: str) -> str:
@@ -144,25 +102,22 @@ class LabTest:
             if re.search(rf"\b{re.escape(sym)}\b", candidate_code) is None:
                 return False, _format_fail(f"Missing required symbol: {sym}")
 
-        start = time.perf_counter()
-        try:
-            ns = _exec_candidate(candidate_code)
-        except CandidateError as e:
-            return False, _format_fail(str(e))
-
-        elapsed = time.perf_counter() - start
-        if elapsed > timeout_s:
+        # exec + тесты выполняются в отдельном процессе: timeout_s — жёсткий лимит
+        calls = [(tc.name, tc.args) for tc in self.tests]
+        result = get_sandbox_pool().run(
+            exec_and_call, candidate_code, SAFE_BUILTIN_NAMES, calls, timeout=timeout_s
+        )
+        if result.status == "timeout":
             return False, _format_fail(f"Timeout during exec (> {timeout_s}s)")
+        if not result.ok:
+            return False, _format_fail(f"Exec failed: {result.error}\n{result.traceback}")
 
         # Run test cases
-        for tc in self.tests:
-            if tc.name not in ns:
+        for tc, (outcome, got) in zip(self.tests, result.value):
+            if outcome == "missing":
                 return False, _format_fail(f"Function '{tc.name}' not found")
-            fn = ns[tc.name]
-            try:
-                got = fn(*tc.args)
-            except Exception as e:
-                return False, _format_fail(f"{tc.name}{tc.args} raised {type(e).__name__}: {e}")
+            if outcome == "raised":
+                return False, _format_fail(f"{tc.name}{tc.args} raised {got}")
             if got != tc.expected:
                 return False, _format_fail(
                     f"{tc.name}{tc.args} => {got!r}, expected {tc.expected!r}"
@@ -652,7 +607,7 @@ def main() -> int:
     parser.add_argument("--save-json", type=str, help="Save prompts to a JSON file (forces UTF-8).")
     parser.add_argument("--dir", type=str, default=None, help="Directory containing candidate outputs: <TEST_ID>.py")
     parser.add_argument("--label", type=str, default="model", help="Label for report")
-    parser.add_argument("--timeout", type=float, default=2.0, help="Timeout for exec+tests per task (soft).")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Timeout for exec+tests per task (hard, enforced by the sandbox).")
     args = parser.parse_args()
 
     tests = build_tests()
@@ -2,7 +2,7 @@
 # LLM BENCHMARK VIEWER - С СОРТИРОВКОЙ И ИЗМЕНЕНИЕМ ШИРИНЫ КОЛОНОК
 # ============================================================================
 
-import sys, json, os, re
+import sys, os, re
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
@@ -28,6 +28,11 @@ from scipy.stats import binomtest
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+# --- Разбор ответов моделей (общий с baselogic) ---
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from baselogic.core.response_parser import parse_response  # noqa: E402
+from baselogic.core.result_store import list_result_files, load_result_records  # noqa: E402
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -47,16 +52,11 @@ def wilson_score_interval(successes: int, trials: int, confidence: float = 0.95)
 
 
 def extract_thinking_length(llm_response: str, thinking_response: str) -> int:
-    total_thinking = str(thinking_response)
-    think_blocks = re.findall(r'<think>(.*?)</think>', str(llm_response), re.DOTALL | re.IGNORECASE)
-    for block in think_blocks:
-        total_thinking += block
-    return len(total_thinking)
+    return len(str(thinking_response)) + parse_response(str(llm_response)).thinking_length
 
 
 def extract_answer_length(llm_response: str) -> int:
-    clean_answer = re.sub(r'<think>.*?</think>', '', str(llm_response), flags=re.DOTALL | re.IGNORECASE)
-    return len(clean_answer.strip())
+    return len(parse_response(str(llm_response)).visible.strip())
 
 
 # ============================================================================
@@ -503,7 +503,7 @@ class MainWindow(QMainWindow):
         if not folder:
             return
 
-        json_files = list(Path(folder).glob("*.json"))
+        json_files = list_result_files(Path(folder))
         if not json_files:
             QMessageBox.warning(self, "Ошибка", "В папке нет JSON-файлов.")
             return
@@ -513,15 +513,10 @@ class MainWindow(QMainWindow):
 
         for f in json_files:
             try:
-                with open(f, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
-                    if isinstance(data, list):
-                        for item in data:
-                            self.all_results.append(TestResult.from_dict(item))
-                            loaded_count += 1
-                    else:
-                        self.all_results.append(TestResult.from_dict(data))
-                        loaded_count += 1
+                # Общий загрузчик: JSON и JSON Lines, заголовки system_info и оборванные строки
+                for item in load_result_records(f):
+                    self.all_results.append(TestResult.from_dict(item))
+                    loaded_count += 1
             except Exception as e:
                 print(f"Ошибка загрузки {f.name}: {e}")
 
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Офлайн-перепроверка сохранённых результатов без обращения к моделям.
+
+После исправления verify() в генераторе теста пересчитывает вердикты
+по уже сохранённым ответам:
+  • results/rescored/<время>/*.jsonl      — новый набор результатов
+  • results/rescored/<время>/verdict_changes.jsonl — изменившиеся вердикты
+
+Пример:
+    python scripts/reverify_results.py --categories t03_code_gen t_context_stress
+"""
+
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# --- Пути и импорты ----------------------------------------------------------
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))         # надёжные относительные импорты
+
+from baselogic.core.logger import setup_logging
+from baselogic.core.reverifier import reverify_results_dir, log
+
+# -----------------------------------------------------------------------------
+
+
+def main() -> None:
+    """CLI-точка входа."""
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Перепроверка сохранённых ответов моделей текущими verify() генераторов.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-i",
+        "--input-dir",
+        default=str(project_root / "results" / "raw"),
+        help="Директория с сырыми результатами (*.json, *.jsonl).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=None,
+        help="Куда записать новый набор (по умолчанию results/rescored/<время>).",
+    )
+    parser.add_argument(
+        "-c",
+        "--categories",
+        nargs="*",
+        default=None,
+        help="Перепроверять только эти тесты (по умолчанию — все).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Число процессов (по умолчанию — число CPU).",
+    )
+    args = parser.parse_args()
+
+    input_dir = Path(args.input_dir)
+    if not input_dir.exists():
+        log.error("❌ Директория с результатами не найдена: %s", input_dir)
+        sys.exit(1)
+    output_dir = Path(args.output_dir) if args.output_dir else (
+        project_root / "results" / "rescored" / time.strftime('%Y%m%d_%H%M%S')
+    )
+
+    log.info("🔁 Перепроверка результатов из %s…", input_dir)
+    report = reverify_results_dir(input_dir, output_dir, args.categories, args.workers)
+
+    log.info(
+        "✅ Перепроверено %d из %d записей за %.1f с",
+        report.verified, report.total, report.elapsed_s,
+    )
+    if report.errors:
+        for category, count in sorted(report.errors.items()):
+            log.warning(
+                "⚠️  %s: не удалось перепроверить %d записей (%s)",
+                category, count, report.error_samples.get(category),
+            )
+
+    log.info(
+        "📊 Изменилось вердиктов: %d (стало верно: %d, стало неверно: %d)",
+        len(report.changes), report.flipped_to_correct, report.flipped_to_wrong,
+    )
+    for (category, is_correct), count in sorted(
+            Counter((c.category, c.is_correct) for c in report.changes).items()
+    ):
+        log.info("  - %s: %s %d", category, "❌→✅" if is_correct else "✅→❌", count)
+    log.info("💾 Новый набор результатов: %s", output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 
 from baselogic.core.config_loader import EnvConfigLoader
 from baselogic.core.logger import setup_logging
+from grandmaster.src.puzzle_corpus import DEFAULT_CORPUS_PATH, PuzzleCorpus, parse_test_id, render_puzzle_text
 
 # Добавляем корень проекта и backend в sys.path для надежных импортов
 project_root = Path(__file__).parent.parent
@@ -83,6 +84,10 @@ class GrandmasterTester:
         self.config = config
         self.project_root = Path(__file__).parent.parent
         self.puzzles_path = self.project_root / "grandmaster" / "puzzles"
+        # Корпус заранее сгенерированных головоломок (grandmaster/src/build_corpus.py);
+        # текстовые файлы в puzzles_path используются, только если корпуса нет
+        corpus_path = Path(config.get('grandmaster_corpus_path') or DEFAULT_CORPUS_PATH)
+        self.corpus = PuzzleCorpus(corpus_path, readonly=True) if corpus_path.exists() else None
         self.results_path = self.project_root / "results" / "raw"
 
         # Создаем директорию для результатов если не существует
@@ -119,7 +124,34 @@ class GrandmasterTester:
                     continue
 
     def _load_puzzle(self, test_id: str) -> Optional[Dict[str, Any]]:
-        """Загружает головоломку из файла"""
+        """Загружает головоломку из корпуса, а при его отсутствии — из текстового файла"""
+        if self.corpus is not None:
+            puzzle = self._load_puzzle_from_corpus(test_id)
+            if puzzle:
+                return puzzle
+            logging.warning(f"В корпусе нет головоломки для {test_id}, ищем текстовый файл")
+        return self._load_puzzle_from_file(test_id)
+
+    def _load_puzzle_from_corpus(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Берет головоломку из корпуса по test_id вида grandmaster_<размер>_<сложность>
+        (например, grandmaster_8x8_expert). Выбор детерминирован: первая подходящая по id.
+        """
+        record = self.corpus.first(**parse_test_id(test_id))
+        if record is None:
+            return None
+        return {
+            'conditions': record['conditions'],
+            'question': record['question'],
+            'answer': record['answer'],
+            'solution_table': record['solution_table'],
+            'full_text': render_puzzle_text(record),
+            'corpus_id': record['id'],
+            'difficulty_profile': record['difficulty_profile'],
+        }
+
+    def _load_puzzle_from_file(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Загружает головоломку из текстового файла"""
         # Извлекаем имя файла из test_id (grandmaster_4x4 -> 4x4.txt)
         if test_id.startswith("grandmaster_"):
             filename = test_id.replace("grandmaster_", "") + ".txt"
@@ -182,7 +214,10 @@ class GrandmasterTester:
             'timestamp': '2025-09-02T09:51:41.723Z',
             'status': 'completed',
             'puzzle_conditions': puzzle_data['conditions'],
-            'puzzle_question': puzzle_data['question']
+            'puzzle_question': puzzle_data['question'],
+            # Профиль сложности из корпуса: отчеты сопоставляют точность моделей с усилиями решателя
+            'corpus_id': puzzle_data.get('corpus_id'),
+            'difficulty_profile': puzzle_data.get('difficulty_profile'),
         }
 
     def _save_result(self, test_id: str, model_name: str, result: Dict[str, Any]):
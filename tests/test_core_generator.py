@@ -0,0 +1,151 @@
+# tests/test_core_generator.py
+
+import contextlib
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ortools")
+pytest.importorskip("pandas")
+
+# Модули генератора импортируют друг друга по плоским именам (как при запуске из grandmaster/src)
+SRC_DIR = Path(__file__).resolve().parents[1] / "grandmaster" / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from ortools.sat.python import cp_model  # noqa: E402
+
+from CoreGenerator import CoreGenerator, IncrementalSolvabilityChecker  # noqa: E402
+from EinsteinPuzzle import EinsteinPuzzleDefinition  # noqa: E402
+from clue_types import ClueType  # noqa: E402
+
+THEMES = {
+    "Тестовая тема": {
+        "Ученик": ["Анна", "Борис", "Вера", "Глеб", "Дина"],
+        "Питомец": ["Кошка", "Собака", "Хомяк", "Попугай", "Рыбка"],
+        "Обед": ["Суп", "Пицца", "Салат", "Бургер", "Каша"],
+        "Цвет рюкзака": ["Белый", "Черный", "Красный", "Синий", "Зеленый"],
+    }
+}
+
+
+def _definition(seed: int, num_items: int = 4, num_categories: int = 4) -> EinsteinPuzzleDefinition:
+    random.seed(seed)
+    return EinsteinPuzzleDefinition(
+        themes=THEMES,
+        story_elements={"scenario": "", "position": "локация"},
+        linguistic_cores={},
+        num_items=num_items,
+        num_categories=num_categories,
+    )
+
+
+def _fingerprint(puzzle) -> str:
+    """Все, что должно воспроизводиться по seed (профиль сложности содержит время решения)."""
+    return repr((puzzle.seed, puzzle.clues, puzzle.question_data, puzzle.solution.to_dict()))
+
+
+def _quietly(func, *args, **kwargs):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return func(*args, **kwargs)
+
+
+def _fresh_count(definition: EinsteinPuzzleDefinition, clues) -> int:
+    """Эталон: новая модель и перебор решений (до двух)."""
+    model = CoreGenerator(definition)._create_or_tools_model(clues)
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = 1
+    solver.parameters.enumerate_all_solutions = True
+    counter = CoreGenerator.SolutionCounter(limit=2)
+    solver.Solve(model, counter)
+    return min(counter.solution_count, 2)
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_incremental_checker_matches_fresh_model(seed):
+    definition = _definition(seed)
+    solution = definition.generate_solution()
+    # EITHER_OR строится из двух истинных фактов и эталону противоречит — без него наборы совместны
+    pool = [clue for clue_type, clues in definition.generate_clue_pool(solution).items()
+            if clue_type != ClueType.EITHER_OR for clue in clues]
+    # Ложные позиционные улики дают и неразрешимые наборы
+    false_clues = [(ClueType.POSITIONAL, (pos, cat, item))
+                   for pos in solution.index for cat in definition.cat_keys
+                   for item in definition.categories[cat] if item != solution.loc[pos, cat]]
+
+    checker = IncrementalSolvabilityChecker(definition)
+    rng = random.Random(seed)
+    counts = []
+
+    def check(clues):
+        expected = _fresh_count(definition, clues)
+        assert checker.check(clues) == expected, clues
+        counts.append(expected)
+        return expected
+
+    # Укрепление: случайные улики вперемешку с истинными позициями, пока решение не станет единственным
+    positional = rng.sample(definition.generate_clue_pool(solution)[ClueType.POSITIONAL], k=len(solution.index) * 4)
+    clues = []
+    for fact in positional:
+        clues = clues + rng.sample(pool, 2) + [fact]
+        if check(clues) == 1:
+            break
+    # Минимизация: подмножества набора с уже доказанной уникальностью
+    for clue in list(clues):
+        candidate = [c for c in clues if c != clue]
+        if check(candidate) == 1:
+            clues = candidate
+    # Противоречие и возврат к неоднозначному набору на той же модели
+    check(clues + rng.sample(false_clues, 1))
+    check(clues[:len(clues) // 2])
+    assert {0, 1, 2} <= set(counts)
+
+
+def test_guarded_model_rejects_constraints_it_cannot_enforce():
+    definition = _definition(1)
+    checker = IncrementalSolvabilityChecker(definition)
+    literal = checker.model.NewBoolVar("clue")
+    guarded = IncrementalSolvabilityChecker._GuardedModel(checker.model, literal)
+    variables = list(checker.variables.values())
+
+    with pytest.raises(TypeError, match="AddMaxEquality"):
+        guarded.AddMaxEquality(3, variables[:2])
+    with pytest.raises(ValueError, match="AddAllDifferent"):
+        guarded.AddAllDifferent(variables[:2])
+
+
+def test_generate_with_seed_is_reproducible():
+    first = _quietly(CoreGenerator(_definition(3, num_categories=3)).generate, max_retries=1, seed=5)
+    second = _quietly(CoreGenerator(_definition(3, num_categories=3)).generate, max_retries=1, seed=5)
+    assert first is not None
+    assert _fingerprint(first) == _fingerprint(second)
+
+
+def test_generate_with_seed_does_not_depend_on_hash_seed():
+    # Процессы пула (spawn) и повторные запуски получают разный PYTHONHASHSEED
+    script = (
+        "import contextlib, os, sys\n"
+        f"sys.path[:0] = [{str(SRC_DIR)!r}, {str(Path(__file__).parent)!r}]\n"
+        "import test_core_generator as t\n"
+        "from CoreGenerator import CoreGenerator\n"
+        "puzzle = t._quietly(CoreGenerator(t._definition(3, num_categories=3)).generate, max_retries=1, seed=5)\n"
+        "print(t._fingerprint(puzzle))\n"
+    )
+    outputs = set()
+    for hash_seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                                encoding="utf-8", check=True)
+        outputs.add(result.stdout.strip().splitlines()[-1])
+    assert len(outputs) == 1
+
+
+def test_generate_batch_parallel_matches_serial():
+    generator = CoreGenerator(_definition(3))
+    serial = _quietly(generator.generate_batch, 2, workers=1, seed=0, max_attempts=5)
+    parallel = _quietly(generator.generate_batch, 2, workers=2, seed=0, max_attempts=5)
+    assert len(serial) == 2
+    assert [_fingerprint(p) for p in parallel] == [_fingerprint(p) for p in serial]
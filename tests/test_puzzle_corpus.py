@@ -0,0 +1,100 @@
+# tests/test_puzzle_corpus.py
+
+import pytest
+
+from grandmaster.src.puzzle_corpus import PuzzleCorpus, parse_test_id, render_puzzle_text
+
+
+def _record(size=(4, 4), difficulty="MEDIUM", theme="Тайна в Школе номер 7", answer="Кошка"):
+    num_items, num_categories = size
+    return {
+        'theme': theme,
+        'num_items': num_items,
+        'num_categories': num_categories,
+        'difficulty': difficulty,
+        'difficulty_profile': {'solutions': 1, 'branches': 3, 'conflicts': 1, 'propagations': 120,
+                               'path_length': 4, 'num_clues': 2,
+                               'clue_types': {'POSITIONAL': 1, 'RELATIVE_POS': 1}},
+        'seed': 42,
+        'conditions': "1. В локация №1 находится обед 'Бургер'.\n2. Обед 'пицца' находится в соседнем локация с цвет рюкзака 'Белый'.",
+        'question': "Какой питомец у ученика по имени Анна?",
+        'answer': answer,
+        'solution_table': "   Ученик Питомец\n1    Анна   Кошка",
+        'clues': [["POSITIONAL", [1, "Обед", "Бургер"]], ["RELATIVE_POS", ["Обед", "Пицца", "Цвет рюкзака", "Белый"]]],
+        'solution': {'index': [1], 'columns': ["Ученик", "Питомец"], 'data': [["Анна", "Кошка"]]},
+    }
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    with PuzzleCorpus(tmp_path / "corpus.sqlite") as corpus:
+        corpus.add_many([_record((4, 4), "MEDIUM"), _record((4, 4), "EXPERT"),
+                         _record((8, 8), "EXPERT"), _record((8, 8), "EXPERT", answer="Волк")])
+        yield corpus
+
+
+def test_index_filters_by_difficulty_and_size(corpus):
+    rows = corpus.index(difficulty="expert", size="8x8")
+    assert [row['size'] for row in rows] == ["8x8", "8x8"]
+    assert all(row['difficulty'] == "EXPERT" for row in rows)
+    assert 'conditions' not in rows[0]  # индекс не тянет текст задачи
+
+
+def test_get_returns_full_record(corpus):
+    record = corpus.first(difficulty="EXPERT", size="8x8")
+    assert record['answer'] == "Кошка"
+    assert record['num_clues'] == 2
+    assert record['clues'][0] == ["POSITIONAL", [1, "Обед", "Бургер"]]
+    assert record['solution']['data'] == [["Анна", "Кошка"]]
+
+
+def test_stratified_sampling_is_reproducible(corpus):
+    assert corpus.strata() == {("EXPERT", "4x4"): 1, ("EXPERT", "8x8"): 2, ("MEDIUM", "4x4"): 1}
+    sample = corpus.sample_stratified(1, seed=7)
+    assert sorted((row['difficulty'], row['size']) for row in sample) == [
+        ("EXPERT", "4x4"), ("EXPERT", "8x8"), ("MEDIUM", "4x4")]
+    assert [row['id'] for row in corpus.sample_stratified(1, seed=7)] == [row['id'] for row in sample]
+    with pytest.raises(ValueError):
+        corpus.sample_stratified(1, by=('conditions',))
+
+
+def test_readonly_corpus_reopens_file(tmp_path, corpus):
+    with PuzzleCorpus(corpus.path, readonly=True) as readonly:
+        assert len(readonly) == 4
+    with pytest.raises(FileNotFoundError):
+        len(PuzzleCorpus(tmp_path / "missing.sqlite", readonly=True))
+
+
+def test_rendered_text_matches_puzzle_file_layout(corpus):
+    from baselogic.tests.t13_grandmaster_judge_evaluator import _CONDITIONS_RE, _QUESTION_RE, _ANSWER_RE
+    text = render_puzzle_text(corpus.first(size="4x4"))
+    assert _CONDITIONS_RE.search(text).group(1).strip().startswith("1. В локация №1")
+    assert _QUESTION_RE.search(text).group(1) == "Какой питомец у ученика по имени Анна?"
+    assert _ANSWER_RE.search(text).group(1) == "Кошка"
+
+
+def test_parse_test_id():
+    assert parse_test_id("grandmaster_8x8_expert") == {'size': "8x8", 'difficulty': "EXPERT"}
+    assert parse_test_id("grandmaster_4x4") == {'size': "4x4", 'difficulty': None}
+
+
+def test_difficulty_profile_is_stored_and_indexed(corpus):
+    row = corpus.index(size="4x4")[0]
+    assert (row['branches'], row['conflicts'], row['propagations'], row['path_length']) == (3, 1, 120, 4)
+    profile = corpus.get(row['id'])['difficulty_profile']
+    assert profile['clue_types'] == {'POSITIONAL': 1, 'RELATIVE_POS': 1}
+
+
+def test_old_corpus_file_gains_profile_columns(tmp_path):
+    import sqlite3
+    path = tmp_path / "old.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE puzzles (id INTEGER PRIMARY KEY AUTOINCREMENT, theme TEXT NOT NULL, size TEXT NOT NULL, "
+                 "num_items INTEGER NOT NULL, num_categories INTEGER NOT NULL, difficulty TEXT NOT NULL, "
+                 "num_clues INTEGER NOT NULL, branches INTEGER, seed INTEGER, created_at REAL NOT NULL, "
+                 "conditions TEXT NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL, "
+                 "solution_table TEXT NOT NULL, clues TEXT NOT NULL, solution TEXT NOT NULL)")
+    conn.close()
+    with PuzzleCorpus(path) as corpus:
+        puzzle_id = corpus.add(_record())
+        assert corpus.get(puzzle_id)['difficulty_profile']['conflicts'] == 1